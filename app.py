@@ -6,6 +6,7 @@ try:
 except Exception:
     _HAS_JS_EVAL = False
 import pandas as pd
+import numpy as np
 import math
 import io
 import base64
@@ -346,62 +347,8 @@ def get_drive_file_map_deep():
     _scan(root_id)
     return file_map
 
-def _do_download_image(ds, file_id):
-    """실제 드라이브 다운로드 (재시도 로직 분리)
-    - 원본 비율 유지 (지주대 등 세장형 품목 대응)
-    - 300×225 박스 안에 중앙 패딩 배치
-    - 드라이브 파일 원본은 건드리지 않음
-    """
-    request = ds.files().get_media(fileId=file_id)
-    downloader = request.execute(num_retries=3)   # [V36] 소켓 끊김 자동 재시도
-    with Image.open(io.BytesIO(downloader)) as img:
-        # [V29] 투명 PNG(RGBA/LA/P+투명) → 흰 배경에 합성 후 RGB.
-        #  기존 convert('RGB')는 알파를 검정으로 채워, 누끼 PNG가 빌더·견적서에서 검정배경이 되는 사고 유발(V15 §2-6).
-        #  흰 배경 합성 시 빌더의 흰배경 키아웃(makeTransparentBg)·여백자르기가 정상 동작.
-        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-            _rgba = img.convert('RGBA')
-            _wbg = Image.new('RGBA', _rgba.size, (255, 255, 255, 255))
-            _wbg.paste(_rgba, (0, 0), _rgba)   # 알파를 마스크로 → 투명영역은 흰색
-            img_rgb = _wbg.convert('RGB')
-        else:
-            img_rgb = img.convert('RGB')
-        # 비율 유지하면서 300×225 박스 안에 맞춤 (LANCZOS: 고품질 다운샘플링)
-        img_rgb.thumbnail((300, 225), Image.LANCZOS)
-        # 흰 배경 300×225 캔버스에 중앙 배치 (비율이 달라도 여백으로 채움)
-        padded = Image.new('RGB', (300, 225), (255, 255, 255))
-        offset_x = (300 - img_rgb.width) // 2
-        offset_y = (225 - img_rgb.height) // 2
-        padded.paste(img_rgb, (offset_x, offset_y))
-        img_rgb.close()
-        buffer = io.BytesIO()
-        padded.save(buffer, format="JPEG", quality=85)
-    return f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode()}"
-
-# 이미지 다운로드 + 캐시 (ttl=3600)
-# [V33] 실패(None)를 캐시하지 않는다 — 예전엔 Broken pipe 한 번이면 None이 1시간 캐시돼
-#  해당 부속이 리런마다 계속 빈칸/사라진 것처럼 보였음. st.cache_data는 예외를 캐시하지 않으므로,
-#  캐시되는 내부 함수는 실패 시 예외를 던지고 외부 래퍼가 None으로 감싼다. (다음 리런에 자동 재시도)
-# [V35] ttl 1h→24h — 키가 파일ID라 안전(이미지 교체 시 새 ID 발급 → 자동 반영). 매시간 전체 재다운로드 폭풍 제거.
-@st.cache_data(ttl=86400, show_spinner=False)
-def _download_image_cached(file_id):
-    ds = get_google_services()[1]  # 항상 최신 서비스 객체 사용
-    if not ds: raise RuntimeError("drive service unavailable")
-    try:
-        return _do_download_image(ds, file_id)
-    except Exception as e:
-        if any(k in str(e) for k in _SOCKET_ERRS):
-            get_google_services.clear()  # 소켓 끊김 → 재인증 후 1회 재시도
-            ds2 = get_google_services()[1]
-            if ds2:
-                return _do_download_image(ds2, file_id)
-        raise
-
-def download_image_by_id(file_id):
-    if not file_id: return None
-    try:
-        return _download_image_cached(file_id)
-    except Exception:
-        return None
+# [V80] Drive 이미지 다운로드(패딩·24h 캐시) → `looperget/drive_img.py` 분리 — app_jp.py와 공용.
+#  아래 모듈 짝 검증 직후 bind된다(이 사이 모듈 수준 호출 없음).
 
 def get_image_from_drive(filename_or_id):
     # [V33] 캐시 데코레이터 제거 — 맵·다운로드가 이미 캐시라 중복이고, 실패 None을 1시간 물고 있었음.
@@ -520,14 +467,7 @@ COL_MAP_JP = {
 }
 REV_COL_MAP_JP = {v: k for k, v in COL_MAP_JP.items()}
 
-JP_CAT_MAP = {
-    "주배관": "メイン配管", "주배관세트": "メイン配管",
-    "가지관": "分岐配管",  "가지관세트": "分岐配管",
-    "살수": "散水",      "살수세트": "散水セット",
-    "부속": "付属",
-    "기타": "その他資材",  "기타자재": "その他資材",
-    "관급비용": "管給費用"
-}
+# [V86] JP_CAT_MAP → `looperget/jp_catalog.py` (JP 병합 카탈로그와 함께)
 
 def init_db():
     if not gc: return None, None
@@ -640,130 +580,37 @@ def save_products_to_sheet(products_list):
     
     ws_prod.clear(); ws_prod.update([df_up.columns.values.tolist()] + df_up.values.tolist())
 
-# ── [V11] 핵심 엔진 함수 ─────────────────────────────────────────
-
-KR_PRICE_FIELDS = [
-    "price_buy", "price_d1", "price_d2",
-    "price_agy1", "price_agy2",
-    "price_nh_sys", "price_nh_loc",
-    "price_cons", "price_site", "price_supply_jp"
-]
-KR_PRICE_LABELS = {
-    "price_buy": "매입단가", "price_d1": "총판가1", "price_d2": "총판가2",
-    "price_agy1": "대리점가1", "price_agy2": "대리점가2",
-    "price_nh_sys": "계통농협", "price_nh_loc": "지역농협",
-    "price_cons": "소비자가", "price_site": "단가(현장)",
-    "price_supply_jp": "신정공급가"
-}
+def save_products_delta(updates: dict) -> int:
+    """[V84] Products 시트에 바뀐 칸만 기록 — {코드: {필드: 값}} → batch_update 1회.
+    전체 clear+update(save_products_to_sheet) 대신 헤더·코드 열 2회 읽기 + 쓰기 1회. 반환 = 기록한 칸 수."""
+    ws_prod, _ = init_db()
+    if not ws_prod or not updates: return 0
+    header = ws_prod.row_values(1)
+    if "품목코드" not in header: raise RuntimeError("Products 시트에 '품목코드' 열이 없습니다")
+    codes = ws_prod.col_values(header.index("품목코드") + 1)
+    row_of = {}
+    for r, c in enumerate(codes[1:], start=2):
+        if str(c).strip(): row_of.setdefault(str(c).strip().zfill(5), r)
+    data = []
+    for code, fields in updates.items():
+        r = row_of.get(str(code).strip().zfill(5))
+        if not r: continue
+        for f, v in fields.items():
+            col = REV_COL_MAP.get(f)
+            if col in header:
+                data.append({"range": gspread.utils.rowcol_to_a1(r, header.index(col) + 1), "values": [[v]]})
+    if data: ws_prod.batch_update(data)
+    return len(data)
 
-def smart_roundup(value: float, apply_vat_fit: bool = True) -> float:
-    """
-    가격 규모별 올림 단위 + 부가세 역산(÷1.1) 정수 조건:
-      ~999원    → 0.1원 단위, ÷1.1이 소수점 없이 떨어지는 최소값으로 올림
-      1000~9999 → 10원 단위, ÷1.1 조건 적용 (11의 배수)
-      10000~    → 100원 단위, ÷1.1 조건 적용 (11의 배수 × 10)
-    apply_vat_fit=False 이면 단순 올림만 수행 (신정공급가 등에 사용)
-    """
-    v = float(value)
-
-    if v < 1000:
-        # 0.1원 단위 올림 후, v/1.1이 소수점 1자리 이하로 떨어지는 최솟값 탐색
-        # 조건: v * 10이 11의 배수 → v = 11k/10 (k는 양의 정수)
-        base = math.ceil(v * 10) / 10  # 0.1원 올림
-        if not apply_vat_fit:
-            return round(base, 1)
-        # v * 10 이 11의 배수가 되는 최소 k 탐색
-        k = math.ceil(v * 10 / 11)  # v*10 >= 11k → k = ceil(v*10/11)
-        result = round(k * 11 / 10, 1)
-        return result
-
-    elif v < 10000:
-        # 10원 단위 올림 후 11의 배수
-        if not apply_vat_fit:
-            return int(math.ceil(v / 10) * 10)
-        k = math.ceil(v / 11)
-        result = k * 11
-        # 10원 단위가 아니면 다음 11의 배수로
-        while result % 10 != 0:
-            k += 1
-            result = k * 11
-        return result
+# ── [V11] 핵심 엔진 함수 ─────────────────────────────────────────
 
-    else:
-        # 100원 단위 올림 후 110의 배수 (11의 배수이면서 100원 단위)
-        if not apply_vat_fit:
-            return int(math.ceil(v / 100) * 100)
-        k = math.ceil(v / 110)
-        return k * 110
-
-def recalc_prices_from_buy(old_prod: dict, new_buy: int) -> dict:
-    """매입단가 변동 시 기존 비율 유지하며 전체 단가 재계산."""
-    old_buy = float(old_prod.get("price_buy", 0) or 0)
-    if old_buy == 0:
-        result = {f: int(old_prod.get(f, 0) or 0) for f in KR_PRICE_FIELDS}
-        result["price_buy"] = new_buy
-        return result
-    ratio = float(new_buy) / old_buy
-    result = {}
-    for f in KR_PRICE_FIELDS:
-        old_val = float(old_prod.get(f, 0) or 0)
-        if f == "price_buy":
-            result[f] = new_buy
-        elif old_val == 0:
-            result[f] = 0
-        elif f == "price_supply_jp":
-            # 신정공급가는 부가세 역산 조건 제외, 단순 올림만
-            result[f] = smart_roundup(old_val * ratio, apply_vat_fit=False)
-        else:
-            result[f] = smart_roundup(old_val * ratio, apply_vat_fit=True)
-    return result
+# [V83] KR_PRICE_FIELDS·KR_PRICE_LABELS·smart_roundup·recalc_prices_from_buy → `looperget/reprice.py`
+#       (가드 통과 후 import — 카탈로그 일괄 NumPy판 *_vec 동봉)
 
 # ── [V39] 매입단가 변동 시뮬레이터 엔진 (박 대표님 승인 규칙, 2026-07-11) ──
-def snap_band_price(v) -> int:
-    """가격대별 단위 스냅(반올림). ~1천=10원 / 1천~1만=100원 / 1만~10만=100원 / 10만~=1,000원."""
-    try: v = float(v)
-    except (TypeError, ValueError): return 0
-    if v <= 0: return 0
-    unit = 10 if v < 1000 else (100 if v < 100000 else 1000)
-    return int(round(v / unit) * unit)
-
-def margin_pct(sell, buy):
-    """이익율% = (판매-매입)/판매. 기존 이익분석과 동일 기준(VAT포함가 대 VAT포함가)."""
-    try:
-        sell = float(sell or 0); buy = float(buy or 0)
-        if sell <= 0: return None
-        return (sell - buy) / sell * 100.0
-    except (TypeError, ValueError): return None
-
-def price_segment(prod) -> str:
-    """추천 이익율 산출용 세그먼트: [V40] 세부카테고리 우선(첫 태그), 없으면 구 로직(매입가 밴드)."""
-    sub = str(prod.get("subcategory", "")).split(",")[0].strip()
-    if sub: return sub
-    cat = str(prod.get("category", "")).strip() or "기타"
-    if cat != "부속": return cat
-    try: buy = float(prod.get("price_buy", 0) or 0)
-    except (TypeError, ValueError): buy = 0
-    if buy < 3000: return "부속·소형"
-    if buy < 20000: return "부속·중형"
-    if buy < 100000: return "부속·대형"
-    return "부속·고가(펌프류)"
-
-def recommend_tier_margins(products: list) -> dict:
-    """세그먼트×단가필드별 권장 이익율%(중앙값) — 데이터가 쌓일수록 추천이 진화."""
-    import statistics
-    pool = {}
-    for p in products:
-        try: buy = float(p.get("price_buy", 0) or 0)
-        except (TypeError, ValueError): buy = 0
-        if buy <= 0: continue
-        seg = price_segment(p)
-        for f in KR_PRICE_FIELDS:
-            if f == "price_buy": continue
-            m = margin_pct(p.get(f), buy)
-            if m is not None and -50 < m < 99:
-                pool.setdefault(seg, {}).setdefault(f, []).append(m)
-    return {seg: {f: statistics.median(v) for f, v in fields.items() if v}
-            for seg, fields in pool.items()}
+# [V83] snap_band_price·margin_pct·recalc_keep_margin → `looperget/reprice.py`
+
+# [V85] price_segment·recommend_tier_margins → `looperget/margin_stats.py` (리비전 캐시 + 증분 갱신)
 
 def load_price_policy():
     """[V40] PricePolicy 시트 → {세부카테고리: {티어라벨: 목표이익%}}. 실패/부재 시 빈 dict."""
@@ -796,20 +643,6 @@ def save_price_policy(policy_rows: list):
         grid.append([r.get("세부카테고리", "")] + [r.get(t, "") if r.get(t) is not None else "" for t in tiers])
     ws.clear(); ws.update(grid)
 
-def recalc_keep_margin(prod: dict, new_buy: int) -> dict:
-    """기존 이익율 유지 재계산 + 단위 스냅. 이익율 산출 불가(기존가 0 등)면 0 유지."""
-    old_buy = float(prod.get("price_buy", 0) or 0)
-    out = {"price_buy": int(new_buy)}
-    for f in KR_PRICE_FIELDS:
-        if f == "price_buy": continue
-        old_v = float(prod.get(f, 0) or 0)
-        if old_v <= 0: out[f] = 0; continue
-        m = margin_pct(old_v, old_buy)
-        if m is None or m >= 100: out[f] = int(old_v); continue
-        raw = new_buy / (1 - m / 100.0) if m < 100 else old_v
-        out[f] = snap_band_price(raw)
-    return out
-
 # ==========================================
 # [V41] 아쿠나리스(농협 관수코너) — 시트 로드
 #  - 단가 정본은 Products. AQ_Items는 진열 속성만 담는다(단가 컬럼 없음).
@@ -927,6 +760,186 @@ def aq_append_row(ws_name, row_vals):
     _aq_sh().worksheet(ws_name).append_row(
         [str(v) for v in row_vals], value_input_option='RAW')
 
+def aq_load_oplog():
+    """[V97] AQ_LayoutOps(배치 조작 로그) 전체 행. 시트 없으면 [].
+    캐시 없음 — 다른 편집자가 방금 추가한 조작까지 읽는다(사이트를 열 때·불러오기·압축 때만 호출).
+    get_all_values 사용 — 기준(op_base, 16진)이 '199e1234567'처럼 숫자로 해석되면 재생 대상에서 빠진다."""
+    try:
+        vals = _aq_sh().worksheet(AQ_OPLOG_WS).get_all_values()
+    except gspread.exceptions.WorksheetNotFound:
+        return []
+    if not vals: return []
+    hdr = vals[0]
+    return [dict(zip(hdr, r)) for r in vals[1:] if r and any(r)]
+
+def aq_oplog_append(site, base, ops):
+    """[V97] 조작 배치 1건 = AQ_LayoutOps 1행 추가(append_row — 시트 전체 재기록 없음). 시트가 없으면 만든다.
+    순번 = 세션 안 일련(세션 = aq_ops_salt) — 재생 시 (세션, 순번) 중복 행은 1번만 적용."""
+    sh = _aq_sh()
+    try:
+        ws = sh.worksheet(AQ_OPLOG_WS)
+    except gspread.exceptions.WorksheetNotFound:
+        ws = sh.add_worksheet(title=AQ_OPLOG_WS, rows=200, cols=len(AQ_OPLOG_HDR))
+        ws.append_row(AQ_OPLOG_HDR)
+    n = st.session_state.get("aq_oplog_seq", 0) + 1
+    st.session_state["aq_oplog_seq"] = n
+    ws.append_row([site, base, str(st.session_state.get("aq_ops_salt", "")), n,
+                   datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                   json.dumps(ops, ensure_ascii=False, separators=(",", ":"))], value_input_option='RAW')
+    return n
+
+def _aq_ws_delete_rows(ws, vals, idx, key_cols):
+    """공유 추가형 시트(AQ_LayoutOps·AQ_Layouts)에서 vals(get_all_values) 기준 행 번호 idx만 delete_rows.
+    시트 전체를 다시 쓰지 않으므로 그 사이 다른 세션이 append한 행은 살아남는다. 연속 구간을 아래에서 위로 지우고,
+    지우기 직전 그 구간을 다시 읽어 key_cols 값이 그대로인지 확인한다(밀렸으면 중단 — 남은 행은 다음 정리 때).
+    반환 지운 행 수."""
+    runs = []
+    for i in sorted(idx):
+        if runs and runs[-1][1] == i - 1: runs[-1][1] = i
+        else: runs.append([i, i])
+    w = len(vals[0]) if vals else 1
+    key = lambda r: tuple(r[c] if c < len(r) else "" for c in key_cols)
+    n = 0
+    for a, b in reversed(runs):
+        cur = ws.get(f"{gspread.utils.rowcol_to_a1(a, 1)}:{gspread.utils.rowcol_to_a1(b, w)}")
+        if [key(r) for r in cur] != [key(r) for r in vals[a - 1:b]]:
+            break
+        ws.delete_rows(a, b)
+        n += b - a + 1
+    return n
+
+def aq_oplog_keys(rows, site, base):
+    """[V97] aq_load_oplog 행 → 이 사이트·기준 로그 행의 {(세션, 순번)} (aq_oplog_batches가 재생하는 행)."""
+    return {(str(r.get("세션", "")).strip(), str(r.get("순번", "")).strip()) for r in rows or []
+            if str(r.get("농협명", "")).strip() == site and str(r.get("기준", "")).strip() == str(base or "")}
+
+def aq_oplog_prune(site, base, only=None):
+    """[V97] 사이트의 옛 기준 로그 행 정리 — 💾 저장·압축으로 기준(op_base)이 바뀌면 옛 행은 재생되지 않는다.
+    지금 기준(base) 행과 다른 사이트 행은 그대로, 해당 행만 지운다(_aq_ws_delete_rows). 반환 지운 행 수.
+    only = {(세션, 순번)} — 주면 그 행만 지운다(압축이 스냅샷에 실제로 접어 넣은 행). 읽은 뒤 추가된 행은 남는다."""
+    try:
+        ws = _aq_sh().worksheet(AQ_OPLOG_WS)
+    except gspread.exceptions.WorksheetNotFound:
+        return 0
+    vals = ws.get_all_values()
+    if len(vals) < 2: return 0
+    hdr = vals[0]
+    ci, bi, si, ni = (hdr.index(h) for h in ("농협명", "기준", "세션", "순번"))
+    cell = lambda r, j: r[j].strip() if j < len(r) else ""
+    idx = [i for i, r in enumerate(vals[1:], start=2)
+           if cell(r, ci) == site and cell(r, bi) != str(base or "")
+           and (only is None or (cell(r, si), cell(r, ni)) in only)]
+    return _aq_ws_delete_rows(ws, vals, idx, (ci, bi, si, ni)) if idx else 0
+
+# ── [V98] 배치 좌표 저장소 AQ_Layouts — 배치JSON엔 진열 계획 + 포인터, 좌표는 이진 조각 행(aquanaris_layout) ──
+@st.cache_data(ttl=600, show_spinner=False)
+def aq_load_layouts():
+    """[V98] AQ_Layouts 전체 행 → list[dict]. 사이트 목록(aq_load_all)과 따로 캐시 — 좌표가 필요한 화면만 읽는다.
+    get_all_values 사용(base64 조각이 숫자로 해석되지 않게). 시트 없으면 []."""
+    if not gc: return []
+    try:
+        vals = _aq_sh().worksheet(AQ_LAYOUT_WS).get_all_values()
+    except gspread.exceptions.WorksheetNotFound:
+        return []
+    if not vals: return []
+    hdr = vals[0]
+    return [dict(zip(hdr, r)) for r in vals[1:] if r and any(r)]
+
+def aq_site_plan(site):
+    """[V98] AQ_Sites 행 → 배치JSON dict. 'layout' 포인터가 있으면 AQ_Layouts 조각을 이어 inst2·파생 assign/splits를
+    되붙인다(옛 인라인 배치JSON은 그대로). 조각이 없으면 캐시를 한 번 비워 다시 읽고, 그래도 없으면 plan['_layout_err']."""
+    try: plan = json.loads(str(site.get("배치JSON") or "{}"))
+    except Exception: plan = {}
+    if not isinstance(plan, dict): return {}
+    ptr = plan.get("layout")
+    if not isinstance(ptr, dict) or not ptr.get("rev"):
+        return plan
+    owner = str(ptr.get("site") or site.get("농협명") or "").strip()
+    s = aq_layout_join(aq_load_layouts(), owner, ptr["rev"])
+    if s is None:
+        aq_load_layouts.clear()   # 다른 세션이 방금 저장 — 포인터가 캐시보다 새것
+        s = aq_layout_join(aq_load_layouts(), owner, ptr["rev"])
+    if s is None:
+        plan["_layout_err"] = f"AQ_Layouts에 '{owner}' 배치 좌표(리비전 {ptr['rev']})가 없습니다"
+        return plan
+    try:
+        return aq_plan_attach(plan, aq_layout_decode(s))
+    except Exception as e:
+        plan["_layout_err"] = f"AQ_Layouts 배치 좌표 해석 실패: {e}"
+        return plan
+
+def aq_save_layouts(packed_by_site):
+    """[V98] {사이트: 좌표(inst2)} → AQ_Layouts에 새 리비전 조각 행 추가(append_rows 1회 — 기존 행 무변경).
+    시트가 없으면 만든다. 반환 {사이트: 배치JSON에 넣을 포인터}. 옛 리비전은 포인터 저장 뒤 aq_layout_prune으로 정리."""
+    rows, ptrs = [], {}
+    rev = aq_op_base_new()
+    for site, packed in packed_by_site.items():
+        s = aq_layout_encode(packed)
+        parts = aq_layout_chunks(s)
+        rows += [[site, rev, i, len(parts), p] for i, p in enumerate(parts)]
+        ptrs[site] = {"store": AQ_LAYOUT_WS, "site": site, "rev": rev, "chunks": len(parts), "size": len(s),
+                      "n": sum(len(v) for shs in packed.values() for cds in shs.values() for v in cds.values())}
+    if not rows: return ptrs
+    sh = _aq_sh()
+    try:
+        ws = sh.worksheet(AQ_LAYOUT_WS)
+    except gspread.exceptions.WorksheetNotFound:
+        ws = sh.add_worksheet(title=AQ_LAYOUT_WS, rows=100, cols=len(AQ_LAYOUT_HDR))
+        ws.append_row(AQ_LAYOUT_HDR)
+    ws.append_rows(rows, value_input_option='RAW')
+    aq_load_layouts.clear()
+    return ptrs
+
+def aq_plan_store(site, plan, packed, ptr=None):
+    """[V98] 저장 직전 배치JSON 정리 — 좌표(packed=inst2)는 AQ_Layouts로(ptr = 이미 써 둔 포인터),
+    plan엔 포인터만 남긴다. packed가 비면 좌표 필드는 건드리지 않는다(레거시 인라인 유지). 반환 aq_plan_dumps(plan)."""
+    plan.pop("_layout_err", None)
+    if packed:
+        for f in ("instances", "inst2", "assign", "splits"):
+            plan.pop(f, None)
+        plan["layout"] = ptr or aq_save_layouts({site: packed})[site]
+    return aq_plan_dumps(plan)
+
+def aq_layout_prune(names, sites=None):
+    """[V98] names(사이트 이름 또는 목록)로 쓴 조각 행 중 어느 사이트 포인터도 가리키지 않는 **옛** 리비전 정리.
+    sites = 방금 저장한 AQ_Sites 행(없으면 캐시 로드). 시트 전체를 다시 쓰지 않고 해당 행만 delete_rows —
+    그 사이 다른 세션이 append한 조각은 건드리지 않는다.
+    · 살아 있는 사이트: 가리키는 리비전 중 가장 새것보다 **오래된** 것만(더 새 리비전 = 다른 세션이 포인터를 쓰는 중).
+    · 삭제된 사이트(sites에 없음): 아무 포인터도 가리키지 않는 리비전 전부.
+    지우기는 _aq_ws_delete_rows(구간을 다시 읽어 확인 후 아래에서 위로)."""
+    names = {names} if isinstance(names, str) else set(names)
+    try:
+        ws = _aq_sh().worksheet(AQ_LAYOUT_WS)
+    except gspread.exceptions.WorksheetNotFound:
+        return 0
+    vals = ws.get_all_values()
+    if len(vals) < 2: return 0
+    hdr = vals[0]
+    ci, ri = hdr.index("농협명"), hdr.index("리비전")
+    used, live, newest = set(), set(), {}
+    for s in (aq_load_sites() if sites is None else sites):
+        live.add(str(s.get("농협명") or "").strip())
+        try: ptr = json.loads(str(s.get("배치JSON") or "{}")).get("layout")
+        except Exception: ptr = None
+        if isinstance(ptr, dict):
+            k = (str(ptr.get("site") or s.get("농협명") or "").strip(), str(ptr.get("rev") or ""))
+            used.add(k)
+            try: newest[k[0]] = max(newest.get(k[0], -1), int(k[1], 16))
+            except ValueError: pass
+
+    def _stale(r):
+        if len(r) <= max(ci, ri): return False
+        site, rev = r[ci].strip(), r[ri].strip()
+        if site not in names or (site, rev) in used: return False
+        if site not in live and site not in newest: return True
+        try: return int(rev, 16) < newest.get(site, -1)
+        except ValueError: return False
+
+    idx = [i for i, r in enumerate(vals[1:], start=2) if _stale(r)]
+    n = _aq_ws_delete_rows(ws, vals, idx, (ci, ri)) if idx else 0
+    if n: aq_load_layouts.clear()
+    return n
+
 def aq_update_item_cell(code, col_name, value):
     """[V48] AQ_Items에서 품목코드 행을 찾아 1셀 갱신 (컬럼 없으면 헤더에 추가). 이미지ISO 등록에 사용."""
     ws = _aq_sh().worksheet("AQ_Items")
@@ -1025,8 +1038,8 @@ def aq_rename_box(old, new):
 from aquanaris_layout import *   # [V66] 아쿠나리스 배치 엔진 분리 — ⚠배포 시 aquanaris_layout.py도 함께 올릴 것
 # [V67] 신구 짝 검증 — 모듈이 구버전이면(NameError로 죽기 전에) 원인과 조치를 한국어로 안내하고 정지.
 #  (2026-07-24 실배포에서 app.py만 푸시되어 line 6573 NameError 발생 → 재발 방지 가드)
-if int(globals().get("AQ_LAYOUT_VER", 0) or 0) < 77:
-    st.error("🚨 **aquanaris_layout.py가 구버전입니다** — app.py(V77)와 짝이 맞지 않습니다.\n\n"
+if int(globals().get("AQ_LAYOUT_VER", 0) or 0) < 103:
+    st.error("🚨 **aquanaris_layout.py가 구버전입니다** — app.py(V103)와 짝이 맞지 않습니다.\n\n"
              "GitHub `Looperget-Mate/Price`에 **최신 `aquanaris_layout.py`를 app.py와 함께** 올린 뒤 "
              "재배포하세요. 두 파일은 항상 세트로 푸시해야 합니다.")
     st.stop()
@@ -1039,108 +1052,109 @@ try:
     _LG_VER = int(getattr(_lg, "PKG_VER", 0) or 0)
 except Exception:
     _LG_VER = 0
-if _LG_VER < 77:
-    st.error("🚨 **`looperget/` 폴더가 없거나 구버전입니다** — app.py(V77)와 짝이 맞지 않습니다.\n\n"
+if _LG_VER < 95:
+    st.error("🚨 **`looperget/` 폴더가 없거나 구버전입니다** — app.py(V95)와 짝이 맞지 않습니다.\n\n"
              "GitHub `Looperget-Mate/Price`에 **`looperget/` 폴더를 통째로** "
              "`app.py`·`aquanaris_layout.py`와 함께 올린 뒤 재배포하세요. **셋은 항상 세트입니다.**")
     st.stop()
 
+from looperget import drive_img as _di
+_di.bind(get_google_services=get_google_services, _SOCKET_ERRS=_SOCKET_ERRS)
+from looperget.drive_img import *
+
+# [V83] 단가 재계산 엔진(스칼라 원본 + 카탈로그 일괄 NumPy판) → `looperget/reprice.py`
+from looperget.reprice import *
+# [V85] 세그먼트×티어 이익율 통계(정렬 배열 저장소) → `looperget/margin_stats.py`
+from looperget.margin_stats import *
+# [V86] JP 병합 카탈로그 — (KR 리비전, Products_JP 리비전) 조인 캐시 + 환율별 배열 변환 → `looperget/jp_catalog.py`
+# [V87] Products_JP 동기화 증분 계획(jp_sync_rows·jp_sync_plan)도 같은 모듈
+from looperget.jp_catalog import *
+# [V88] 일본 수출 이익 전체 집계(사실 테이블·group-by·환율 민감도) → `looperget/jp_analytics.py`
+from looperget.jp_analytics import *
+# [V89] 국내 견적 분석 창고(Quotes_KR 내용 해시 증분 ETL → 사실 테이블, 집계 캐시) → `looperget/quote_warehouse.py`
+from looperget.quote_warehouse import *
+# [V90] 세트 단가 롤업(레시피 행렬 × 단가 행렬, 제품→세트 역색인 증분) → `looperget/set_pricing.py`
+from looperget.set_pricing import *
+# [V91] 저장 견적 재단가(창고 코드→견적 역색인 + 차이표) → `looperget/quote_reprice.py`
+from looperget.quote_reprice import *
+# [V92] 가격 지침 준수 점검(카탈로그 전체 지침가·차이% 행렬, (카탈로그, 지침) 리비전 캐시) → `looperget/price_policy.py`
+from looperget.price_policy import *
+
 from looperget import aq_print as _aqp
 _aqp.bind(FONT_REGULAR=FONT_REGULAR, FONT_BOLD=FONT_BOLD,
           aq_err_str=aq_err_str,
           aq_load_items=aq_load_items, aq_load_sites=aq_load_sites,
-          aq_load_boxes=aq_load_boxes,
+          aq_site_plan=aq_site_plan, aq_load_boxes=aq_load_boxes,
           download_image_by_id=download_image_by_id)
 from looperget.aq_print import *
 def sync_products_jp_to_sheet(kr_products: list, exchange_rate: float):
-    """한국 Products → Products_JP 자동 동기화. 기존 JP 단가 비율 유지."""
+    """한국 Products → Products_JP 자동 동기화. 기존 JP 단가 비율 유지.
+    [V87] 증분 기록 — 새 격자(looperget/jp_catalog.py jp_sync_rows, 배열 계산)를 시트 현재 값과 칸 단위로
+          비교해 바뀐 칸 + 신규 코드 행만 batch_update 1회. 새 시트·헤더 불일치면 예전처럼 전체 재기록.
+          KR에서 빠진 코드의 JP 행은 지우지 않는다(병합은 KR 기준이라 표시에는 영향 없음)."""
     if not gc:
         return False, "구글 서비스 미연결"
     try:
         sh = gc.open(SHEET_NAME)
         try:
             ws_prod_jp = sh.worksheet("Products_JP")
-            jp_records = ws_prod_jp.get_all_records()
+            values = ws_prod_jp.get_all_values()
         except:
             ws_prod_jp = sh.add_worksheet(title="Products_JP", rows=300, cols=12)
-            jp_records = []
-
-        jp_dict = {str(r.get("품목코드", "")).zfill(5): r for r in jp_records if r.get("품목코드")}
-        rows = [list(COL_MAP_JP.keys())]
-        synced = 0
-        for i, p in enumerate(kr_products):
-            code = str(p.get("code", "")).strip().zfill(5)
-            if not code or code == "00000":
-                continue
-            kr_supply = float(p.get("price_supply_jp", 0) or 0)
-            buy_krw = int(round(kr_supply / 1.1)) if kr_supply else 0
-            buy_jpy = int(round(buy_krw / exchange_rate)) if (exchange_rate and buy_krw) else 0
-
-            jp_row = jp_dict.get(code, {})
-            old_buy_jpy = float(jp_row.get("매입가(별도가,엔)", 0) or 0)
-            old_d1      = float(jp_row.get("대리점가(별도가,엔)", 0) or 0)
-            old_cons    = float(jp_row.get("소비자가(포함가,엔)", 0) or 0)
-
-            if old_buy_jpy > 0 and buy_jpy > 0:
-                jp_ratio = buy_jpy / old_buy_jpy
-                new_d1   = smart_roundup(old_d1   * jp_ratio) if old_d1   > 0 else smart_roundup(buy_jpy * 1.3)
-                new_cons = smart_roundup(old_cons  * jp_ratio) if old_cons > 0 else smart_roundup(buy_jpy * 1.65)
-            else:
-                new_d1   = smart_roundup(buy_jpy * 1.3)
-                new_cons = smart_roundup(buy_jpy * 1.65)
-
-            cat_jp = JP_CAT_MAP.get(p.get("category", ""), p.get("category", ""))
-            rows.append([
-                f"{i+1:03d}", code, cat_jp,
-                jp_row.get("일본용 제품명", p.get("name", "")),
-                p.get("spec", ""), p.get("unit", "EA"), p.get("len_per_unit", ""),
-                buy_krw, buy_jpy, new_d1, new_cons, p.get("image", "")
-            ])
-            synced += 1
-
-        ws_prod_jp.clear()
-        ws_prod_jp.update(rows)
-        return True, f"Products_JP 동기화 완료 ({synced}개 품목, 환율 {exchange_rate})"
+            values = []
+
+        header = [str(h).strip() for h in (values[0] if values else [])]
+        jp_records = [dict(zip(header, r)) for r in values[1:]]
+        new_rows = jp_sync_rows(kr_products, jp_records, exchange_rate)
+        synced = len(new_rows)
+        plan = jp_sync_plan(values, new_rows)
+
+        if plan is None:
+            ws_prod_jp.clear()
+            ws_prod_jp.update([list(COL_MAP_JP.keys())] + [r for _, r in new_rows])
+            load_products_jp_records.clear()   # [V86] 병합 카탈로그 캐시 무효화
+            return True, f"Products_JP 동기화 완료 ({synced}개 품목, 환율 {exchange_rate}) — 전체 재기록"
+
+        data = [{"range": gspread.utils.rowcol_to_a1(r, c), "values": [[v]]} for r, c, v in plan["cells"]]
+        if plan["appends"]:
+            start = len(values) + 1
+            need = start + len(plan["appends"]) - 1
+            if need > ws_prod_jp.row_count:
+                ws_prod_jp.add_rows(need - ws_prod_jp.row_count)
+            data.append({"range": f"A{start}", "values": plan["appends"]})
+        if data:
+            ws_prod_jp.batch_update(data)
+            load_products_jp_records.clear()   # [V86] 병합 카탈로그 캐시 무효화
+
+        moved = plan["moved"]
+        msg = (f"Products_JP 동기화 완료 ({synced}개 품목, 환율 {exchange_rate}) — "
+               f"변경 {len(plan['cells'])}칸 · 단가 변동 {len(moved)}품목 · 신규 {len(plan['appends'])}품목")
+        if moved:
+            msg += f"\n단가 변동 코드: {', '.join(moved[:30])}" + (f" 외 {len(moved) - 30}건" if len(moved) > 30 else "")
+        if plan["stale"]:
+            msg += f"\nKR에 없는 JP 행 {len(plan['stale'])}건은 그대로 두었습니다."
+        return True, msg
     except Exception as e:
         return False, str(e)
 
+@st.cache_resource(ttl=600, show_spinner=False)
+def load_products_jp_records():
+    """[V86] Products_JP 원본 행(get_all_records) — 10분 캐시. 시트를 다시 쓰면 .clear().
+    cache_resource: 행 목록을 복사하지 않고 공유(읽기 전용으로만 쓸 것).
+    읽기 실패는 여기서 삼키지 않는다 — 예외는 캐시되지 않으므로 다음 호출이 다시 읽는다([V33] 실패 캐시 금지)."""
+    sh = gc.open(SHEET_NAME)
+    return sh.worksheet("Products_JP").get_all_records()
+
 def load_jp_merged_products(kr_products: list, exchange_rate: float) -> list:
-    """KR Products + Products_JP 병합 → JP 모드 제품 리스트 반환."""
+    """KR Products + Products_JP 병합 → JP 모드 제품 리스트 반환.
+    [V86] 시트 행은 캐시, 병합·환율 변환은 looperget/jp_catalog.py 리비전·환율 캐시 — 토글·환율 조정에 네트워크 없음."""
     if not gc:
         return []
     try:
-        sh = gc.open(SHEET_NAME)
-        ws_prod_jp = sh.worksheet("Products_JP")
-        jp_records = ws_prod_jp.get_all_records()
-    except:
-        jp_records = []
-    jp_dict = {str(r.get("품목코드", "")).zfill(5): r for r in jp_records if r.get("품목코드")}
-    merged = []
-    for p in kr_products:
-        code = str(p.get("code", "")).strip().zfill(5)
-        if not code or code == "00000":
-            continue
-        jp_row = jp_dict.get(code, {})
-        kr_supply = float(p.get("price_supply_jp", 0) or 0)
-        buy_krw = int(round(kr_supply / 1.1)) if kr_supply else 0
-        buy_jpy = int(round(buy_krw / exchange_rate)) if (exchange_rate and buy_krw) else 0
-        existing_d1   = int(jp_row.get("대리점가(별도가,엔)", 0) or 0)
-        existing_cons = int(jp_row.get("소비자가(포함가,엔)", 0) or 0)
-        merged.append({
-            "seq_no": p.get("seq_no", ""),
-            "code": code,
-            "category": JP_CAT_MAP.get(p.get("category", ""), p.get("category", "")),
-            "name": jp_row.get("일본용 제품명", p.get("name", "")),
-            "spec": p.get("spec", ""),
-            "unit": p.get("unit", "EA"),
-            "len_per_unit": p.get("len_per_unit", ""),
-            "price_buy_krw": buy_krw,
-            "price_buy": buy_jpy,
-            "price_d1":   existing_d1   if existing_d1   > 0 else smart_roundup(buy_jpy * 1.3),
-            "price_cons": existing_cons if existing_cons > 0 else smart_roundup(buy_jpy * 1.65),
-            "image": p.get("image", "")
-        })
-    return merged
+        jp_rows = load_products_jp_records()
+    except Exception:
+        jp_rows = []   # 이번 호출만 JP 시트 없이 — 빈 결과를 10분 캐시에 남기지 않는다
+    return jp_merged_products(kr_products, jp_rows, exchange_rate)
 
 # ─────────────────────────────────────────────────────────────────
 
@@ -1244,6 +1258,27 @@ def save_quote_to_sheet(timestamp, q_name, manager, total, json_data):
     except Exception as e:
         return False
 
+def update_quote_rows(writes: dict, expect: dict) -> int:
+    """[V91] Quotes_KR 행 단위 갱신 — {시트 행: (총액, 데이터JSON)} → 총액·데이터JSON 칸만 batch_update 1회.
+    expect = {시트 행: (날짜, 현장명)} — 불러온 뒤 시트가 바뀌어 행이 밀렸으면 그 행은 건너뛴다. 반환 = 갱신한 행 수."""
+    if not gc or not writes: return 0
+    ws_kr = gc.open(SHEET_NAME).worksheet("Quotes_KR")
+    header = ws_kr.row_values(1)
+    if not all(c in header for c in ("날짜", "현장명", "총액", "데이터JSON")):
+        raise RuntimeError("Quotes_KR 헤더가 예상과 다릅니다")
+    dates = ws_kr.col_values(header.index("날짜") + 1)
+    names = ws_kr.col_values(header.index("현장명") + 1)
+    c_tot, c_json = header.index("총액") + 1, header.index("데이터JSON") + 1
+    data = []
+    for r, (total, js) in writes.items():
+        got = (dates[r - 1] if r - 1 < len(dates) else "", names[r - 1] if r - 1 < len(names) else "")
+        if tuple(map(str, got)) != tuple(map(str, expect.get(r, (None, None)))):
+            continue
+        data.append({"range": gspread.utils.rowcol_to_a1(r, c_tot), "values": [[int(total)]]})
+        data.append({"range": gspread.utils.rowcol_to_a1(r, c_json), "values": [[js]]})
+    if data: ws_kr.batch_update(data)
+    return len(data) // 2
+
 # ==========================================
 # 2-PRE. 세트 이미지 빌더 (Fabric.js / V12)
 # ==========================================
@@ -2903,6 +2938,17 @@ _qd.bind(FONT_REGULAR=FONT_REGULAR, FONT_BOLD=FONT_BOLD,
          get_best_image_id=get_best_image_id,
          download_image_by_id=download_image_by_id)
 from looperget.quote_docs import *
+# [V78] 저장 견적 일괄 출력(ZIP) + STEP 3 행 가공 공용화 → `looperget/quote_batch.py`
+from looperget import quote_batch as _qb
+_qb.bind(FONT_REGULAR=FONT_REGULAR, FONT_BOLD=FONT_BOLD,
+         get_drive_file_map_deep=get_drive_file_map_deep,
+         get_best_image_id=get_best_image_id,
+         download_image_by_id=download_image_by_id)
+from looperget.quote_batch import *
+# [V81] 세트 전개(BOM) 엔진 — 세트×부품 희소 행렬·제품 색인, 카탈로그 리비전당 1회 구축 → `looperget/bom.py`
+from looperget.bom import *
+# [V82] STEP 3 단가 선택 변경 = 열 단위 카탈로그 뷰 gather + 수동 단가 오버레이 → `looperget/quote_pricing.py`
+from looperget.quote_pricing import *
 # ==========================================
 # 3. 메인 로직 (DB Init & 2FA Lockout)
 # ==========================================
@@ -3198,7 +3244,8 @@ with st.sidebar:
     if st.session_state.app_lang == "KR":
         # [V48] 권한 필터: 계정 로그인 시 권한 있는 모드만 노출 (공용 로그인 = 전체, 기존 동작)
         _mode_opts = [m for m, p in [("견적 작성", "quote"), ("🏪 아쿠나리스", "aqunaris"),
-                                     ("관리자 모드", "admin"), ("🇯🇵 일본 수출 분석", "jp")] if aq_can(p)]
+                                     ("관리자 모드", "admin"), ("📈 국내 견적 통계", "admin"),
+                                     ("🇯🇵 일본 수출 분석", "jp")] if aq_can(p)]
         if not _mode_opts: _mode_opts = ["견적 작성"]
         if st.session_state.get("main_sidebar_mode") not in _mode_opts:
             st.session_state["main_sidebar_mode"] = _mode_opts[0]
@@ -3287,6 +3334,34 @@ with st.sidebar:
                 st.rerun()
             except Exception as e:
                 st.error(f"삭제 실패: {e}")
+
+        # [V78] 저장 견적 일괄 출력 — 월 단위로 골라 문서를 한 번에 ZIP으로 (농협 제출·감사용)
+        with st.expander("📦 일괄 출력 (ZIP)", expanded=False):
+            _bx_rows = list(reversed(kr_quotes))
+            _bx_months = sorted({str(r.get("날짜", ""))[:7] for r in _bx_rows if str(r.get("날짜", ""))[:7]}, reverse=True)
+            _bx_m = st.selectbox("월", ["전체"] + _bx_months, key="bx_month")
+            _bx_idx = [i for i, r in enumerate(_bx_rows) if _bx_m == "전체" or str(r.get("날짜", "")).startswith(_bx_m)]
+            _bx_pick = st.multiselect("견적 선택", _bx_idx, default=_bx_idx if _bx_m != "전체" else [],
+                                      format_func=lambda i: format_quote_label(i), key="bx_pick")
+            _bx_opts = ["소비자가", "단가(현장)"] + (["매입단가", "총판가1", "총판가2", "대리점가1", "대리점가2", "계통농협", "지역농협"]
+                                               if st.session_state.auth_price else [])
+            _bx_sel = st.selectbox("출력 단가", _bx_opts, key="bx_sel")
+            _bx_pm = st.selectbox("출력 형태", ["견적별 저장값"] + QUOTE_PRINT_MODES, key="bx_pm")
+            _bx_vat = st.radio("부가세", ["포함 (기본)", "별도"], horizontal=True, key="bx_vat")
+            _bx_kinds = st.multiselect("문서", QUOTE_DOC_KINDS, default=QUOTE_DOC_KINDS[:1], key="bx_kinds")
+            if st.button(f"📦 {len(_bx_pick)}건 ZIP 생성", use_container_width=True, disabled=not (_bx_pick and _bx_kinds)):
+                _bx_bar = st.progress(0.0, text="이미지 준비 중…")
+                _bx_zip, _bx_err = quote_export_zip(
+                    [_bx_rows[i] for i in _bx_pick], st.session_state.db, [_bx_sel],
+                    print_mode=None if _bx_pm == "견적별 저장값" else _bx_pm, vat_mode=_bx_vat, kinds=_bx_kinds,
+                    progress=lambda d, t: _bx_bar.progress(d / max(1, t), text=f"렌더 {d}/{t}"))
+                st.session_state["_bx_zip"] = (_bx_zip, _bx_err, datetime.datetime.now().strftime("%Y%m%d_%H%M"))
+            if st.session_state.get("_bx_zip"):
+                _bz, _be, _bts = st.session_state["_bx_zip"]
+                for _m in _be[:8]: st.warning(_m)
+                if _bz:
+                    st.download_button("📥 ZIP 다운로드", _bz, f"quotes_{_bts}.zip", "application/zip",
+                                       type="primary", use_container_width=True)
     else:
         st.info("저장된 견적이 없습니다.")
         
@@ -3512,11 +3587,18 @@ if mode == "관리자 모드" or mode == "管理者モード":
 
                     if new_buy_input > 0:
                         # 이 카테고리의 실제 이익율 현황(중앙값) — 실시간 계산
-                        _rec = recommend_tier_margins(products_for_recalc).get(_seg, {})
+                        # [V85] 리비전 캐시 저장소 — 매입단가 입력이 바뀌어도 재계산 없음
+                        _mstats = tier_margin_stats(products_for_recalc)
+                        _rec = _mstats.medians().get(_seg, {})
                         if _rec:
-                            _cur_row = {KR_PRICE_LABELS[fk]: f"{v:.0f}%" for fk, v in _rec.items() if fk in KR_PRICE_LABELS}
-                            st.caption(f"📊 **{_seg}** 카테고리의 현재 이익율 분포(중앙값) — 이 품목이 속한 시장의 실제 위치")
-                            st.dataframe(pd.DataFrame([_cur_row]), hide_index=True, use_container_width=True)
+                            _dist_rows = []
+                            for _q, _qn in ((25, "하위 25%"), (50, "중앙값"), (75, "상위 25%")):
+                                _dist_rows.append({"구간": _qn, **{KR_PRICE_LABELS[fk]: f"{_mstats.percentile(_seg, fk, _q):.0f}%"
+                                                                  for fk in _rec if fk in KR_PRICE_LABELS}})
+                            _dist_rows.append({"구간": "표본 수", **{KR_PRICE_LABELS[fk]: f"{_mstats.count(_seg, fk)}"
+                                                                   for fk in _rec if fk in KR_PRICE_LABELS}})
+                            st.caption(f"📊 **{_seg}** 카테고리의 현재 이익율 분포(사분위) — 이 품목이 속한 시장의 실제 위치")
+                            st.dataframe(pd.DataFrame(_dist_rows), hide_index=True, use_container_width=True)
 
                         _prop = ({f: int(recalc_target.get(f, 0) or 0) for f in KR_PRICE_FIELDS}
                                  if _is_fixed else recalc_keep_margin(recalc_target, new_buy_input))
@@ -3587,11 +3669,16 @@ if mode == "관리자 모드" or mode == "管理者モード":
                                 target_code = str(recalc_target.get("code", "")).strip()
                                 today_str = datetime.datetime.now().strftime("%Y-%m-%d")
                                 updated_products = []
+                                _ms_changes = []   # [V85] 이익율 통계 증분 갱신용 (변경 전 사본, 변경 후)
                                 for p in st.session_state.db["products"]:
                                     if str(p.get("code", "")).strip() == target_code:
+                                        _ms_changes.append((dict(p), p))
                                         p.update(final_prices)
                                         p["last_updated"] = today_str  # 수정일 기록
                                     updated_products.append(p)
+                                tier_margin_stats_apply(_ms_changes, updated_products)
+                                set_rollup_apply(_ms_changes, updated_products, st.session_state.db["sets"])   # [V90]
+                                st.session_state.setdefault("reprice_codes", set()).add(target_code.zfill(5))   # [V91] 견적 재단가 대상
                                 save_products_to_sheet(updated_products)
                                 st.session_state.db["products"] = updated_products
                                 st.session_state.pending_jp_sync = True
@@ -3601,6 +3688,22 @@ if mode == "관리자 모드" or mode == "管理者モード":
                             if st.button("❌ 취소", key="btn_recalc_cancel"):
                                 st.rerun()
 
+                # [V83] 카테고리 일괄 미리보기 — 매입단가가 같은 비율로 움직일 때 기존 이익율 유지가(배열 한 번)
+                st.markdown("---")
+                st.markdown(f"**📊 일괄 미리보기 — {_sel_cat}** ({len(_pool):,}품목) · 매입단가 동일 비율 변동 시 기존 이익율 유지가")
+                _bulk_pct = st.number_input("매입단가 변동률 (%)", min_value=-50.0, max_value=200.0, value=0.0,
+                                            step=0.5, key="sim_bulk_pct")
+                if _pool and _bulk_pct:
+                    _bulk_buy = [round(float(p.get("price_buy", 0) or 0) * (1 + _bulk_pct / 100.0)) for p in _pool]
+                    _bulk = pd.DataFrame(reprice_keep_margin(_pool, _bulk_buy),
+                                         columns=[KR_PRICE_LABELS[f] for f in KR_PRICE_FIELDS])
+                    _bulk.insert(0, "품목", [("🔒 " if str(p.get("price_policy", "")).strip() == "고정" else "")
+                                            + str(p.get("name", "")) for p in _pool])
+                    _bulk.insert(0, "코드", [str(p.get("code", "")) for p in _pool])
+                    _bulk.insert(2, "기존 매입", [int(float(p.get("price_buy", 0) or 0)) for p in _pool])
+                    st.dataframe(_bulk, hide_index=True, use_container_width=True)
+                    st.caption("미리보기 전용 — 저장은 품목별 확정으로. 🔒 정책 고정가 품목은 단가 유지.")
+
                 # JP 동기화 확인 팝업
                 if st.session_state.get("pending_jp_sync"):
                     st.divider()
@@ -3622,6 +3725,123 @@ if mode == "관리자 모드" or mode == "管理者モード":
                             st.session_state.pending_jp_sync = False
                             st.rerun()
 
+            # ── [V84] 매입단가 일괄 변경 — 공급사 단가표 업로드 → 영향 분석 → 한 번에 반영 ────────────
+            with st.expander("📥 매입단가 일괄 변경 — 공급사 단가표(CSV/XLSX) 업로드 → 전 티어 영향 검토 → 일괄 반영", expanded=False):
+                st.caption("열 이름: 코드 = 품목코드/코드, 단가 = 새 매입단가/매입단가. "
+                           "🔒 정책 고정가 품목은 매입단가만 바뀌고 판매가는 그대로입니다.")
+                if "price_policy_map" not in st.session_state:
+                    st.session_state.price_policy_map = load_price_policy()
+                bulk_file = st.file_uploader("단가표 파일", ["csv", "xlsx"], key="bulk_buy_file")
+                if bulk_file is not None:
+                    try:
+                        if bulk_file.name.lower().endswith(".csv"):
+                            _raw = pd.read_csv(bulk_file, dtype=str, encoding="utf-8-sig")
+                        else:
+                            _raw = pd.read_excel(bulk_file, dtype=str)
+                        _buy_map, _skipped = read_buy_list(_raw)
+                    except Exception as _be:
+                        st.error(f"파일 읽기 실패: {_be}"); _buy_map, _skipped = {}, 0
+                    _prods = st.session_state.db["products"]
+                    _imp = buy_change_impact(_prods, _buy_map, st.session_state.price_policy_map,
+                                             [price_segment(p) for p in _prods])
+                    _unmatched = len(_buy_map) - len(_imp)
+                    st.info(f"대상 {len(_imp):,}품목 · 매입 변동 {int((_imp['기존 매입'] != _imp['새 매입']).sum()):,}품목"
+                            + (f" · 카탈로그에 없는 코드 {_unmatched:,}건" if _unmatched else "")
+                            + (f" · 읽지 못한 행 {_skipped:,}건" if _skipped else ""))
+                    if len(_imp):
+                        _tier_lbs = [KR_PRICE_LABELS[f] for f in KR_PRICE_FIELDS if f != "price_buy"]
+                        bc1, bc2 = st.columns([2, 1])
+                        with bc1:
+                            _show = st.multiselect("표시할 티어", _tier_lbs, default=["대리점가1", "소비자가"],
+                                                   key="bulk_tiers")
+                        with bc2:
+                            _basis = st.radio("반영 기준", ["유지가 (기존 이익율)", "지침가 (없으면 유지가)"],
+                                              key="bulk_basis")
+                        _view = _imp[["코드", "품목", "규격", "세그먼트", "고정", "기존 매입", "새 매입", "매입 변동%"]
+                                     + [f"{lb} {k}" for lb in _show for k in ("기존가", "유지가", "지침가", "Δ%p")]].copy()
+                        _view.insert(0, "반영", True)
+                        _edit = st.data_editor(
+                            _view, hide_index=True, use_container_width=True, key="bulk_editor",
+                            disabled=[c for c in _view.columns if c != "반영"],
+                            column_config={"고정": st.column_config.CheckboxColumn("🔒"),
+                                           "반영": st.column_config.CheckboxColumn("반영", help="체크 해제한 행은 저장하지 않음")})
+                        _acc = _imp[_edit["반영"].to_numpy(dtype=bool)]
+                        st.caption(f"Δ%p = 판매가를 그대로 둘 때 이익율 변화. 반영 대상 {len(_acc):,}품목.")
+                        if st.button(f"✅ {len(_acc):,}품목 일괄 반영", key="btn_bulk_buy_save",
+                                     type="primary", disabled=not len(_acc)):
+                            _today = datetime.datetime.now().strftime("%Y-%m-%d")
+                            _use_g = _basis.startswith("지침가")
+                            _updates = {}
+                            for _, r in _acc.iterrows():   # 기존값과 다른 칸만 — save_products_delta는 받은 칸을 그대로 쓴다
+                                d = {}
+                                if int(r["새 매입"]) != int(r["기존 매입"]):
+                                    d["price_buy"] = int(r["새 매입"])
+                                if not r["고정"]:
+                                    for f in KR_PRICE_FIELDS:
+                                        if f == "price_buy": continue
+                                        lb = KR_PRICE_LABELS[f]
+                                        old = int(r[f"{lb} 기존가"])
+                                        if old == 0: continue   # 비어 있던 티어는 유지가처럼 0 그대로
+                                        g = r[f"{lb} 지침가"]
+                                        v = int(g) if (_use_g and not pd.isna(g)) else int(r[f"{lb} 유지가"])
+                                        if v != old: d[f] = v
+                                if not d: continue
+                                d["last_updated"] = _today
+                                _updates[r["코드"]] = d
+                            try:
+                                n_cells = save_products_delta(_updates)
+                                _ms_changes = []
+                                for _, r in _acc.iterrows():
+                                    if r["코드"] not in _updates: continue
+                                    _p = _prods[int(r["_i"])]
+                                    _ms_changes.append((dict(_p), _p))
+                                    _p.update(_updates[r["코드"]])
+                                tier_margin_stats_apply(_ms_changes, _prods)   # [V85] 통계 증분 갱신
+                                _rs = set_rollup_apply(_ms_changes, _prods, st.session_state.db["sets"])   # [V90] 영향 세트만 재계산
+                                st.session_state.setdefault("reprice_codes", set()).update(str(c).zfill(5) for c in _updates)   # [V91]
+                                st.session_state.pending_jp_sync = True
+                                st.success(f"✅ {len(_updates):,}품목 · {n_cells:,}칸 반영 완료 (일본 동기화는 시뮬레이터에서 확인)"
+                                           + (f" · 세트가 재계산 {len(_rs):,}개 (세트 관리 탭에서 드리프트 확인)" if _rs else ""))
+                            except Exception as _se:
+                                st.error(f"저장 실패: {_se}")
+
+            # ── [V91] 저장 견적 재단가 — 단가를 바꾼 코드가 든 견적만 역색인으로 찾아 차이표 → 행 단위 일괄 갱신 ──
+            with st.expander("🔁 저장 견적 재단가 — 단가 변경 코드가 든 Quotes_KR 견적 찾기 → 차이 검토 → 일괄 갱신", expanded=False):
+                st.caption("이번 세션에 단가를 저장한 코드가 기본으로 채워집니다. custom_prices 중 그 코드 행만 현재 카탈로그 단가로 바뀌고, "
+                           "총액은 소비자가 × 수량으로 다시 계산합니다 (해당 코드 행의 수기 단가는 덮이므로 '변경 행'을 확인하세요).")
+                _rc_txt = st.text_area("대상 품목코드 (쉼표·줄바꿈 구분)", value=", ".join(sorted(st.session_state.get("reprice_codes", set()))),
+                                       key="rq_codes")
+                _rc_codes = _rc_txt.replace(",", " ").split()
+                _rc_types = st.multiselect("저장 유형", ["임시", "정식"], default=["임시"], key="rq_types")
+                _kr_all = st.session_state.db.get("kr_quotes", [])
+                if _rc_codes and _kr_all:
+                    _rq_wh = quote_warehouse()
+                    _rq_wh.sync(_kr_all)
+                    _rq_plan, _rq_writes = quote_reprice_plan(_kr_all, _rq_wh, st.session_state.db["products"],
+                                                              _rc_codes, tuple(_rc_types))
+                    if _rq_plan.empty:
+                        st.info("단가가 달라지는 저장 견적이 없습니다.")
+                    else:
+                        st.markdown(f"**영향 견적 {len(_rq_plan):,}건** · 총액 차이 합계 {int(_rq_plan['총액 차이'].sum()):+,}원 · "
+                                    f"견적가 차이 합계 {int(_rq_plan['견적가 차이'].sum()):+,}원")
+                        _rq_plan.insert(0, "반영", True)
+                        _rq_ed = st.data_editor(_rq_plan, width="stretch", hide_index=True, key="rq_editor",
+                                                disabled=[c for c in _rq_plan.columns if c != "반영"],
+                                                column_config={"_row": st.column_config.NumberColumn("시트 행")})
+                        _rq_acc = _rq_ed[_rq_ed["반영"]]
+                        if st.button(f"✅ 선택 {len(_rq_acc):,}건 갱신 (Quotes_KR 행 단위 쓰기)", key="rq_apply",
+                                     type="primary", disabled=not len(_rq_acc)):
+                            try:
+                                _rows = [int(r) for r in _rq_acc["_row"]]
+                                _n = update_quote_rows({r: _rq_writes[r] for r in _rows},
+                                                       {int(r["_row"]): (r["날짜"], r["현장명"]) for _, r in _rq_acc.iterrows()})
+                                st.session_state.db = load_data_from_sheet()
+                                if _n < len(_rows):
+                                    st.warning(f"{len(_rows) - _n:,}건은 시트가 그 사이 바뀌어 건너뛰었습니다 — 새로고침 후 다시 확인하세요.")
+                                st.success(f"✅ 견적 {_n:,}건 갱신 완료")
+                            except Exception as _qe:
+                                st.error(f"갱신 실패: {_qe}")
+
             # ── [V40] 가격 지침(티어별 목표 이익%) 관리 ────────────
             with st.expander("📐 가격 지침 관리 — 카테고리×티어별 목표 이익% (시뮬레이터의 '지침%' 원본)", expanded=False):
                 st.caption("여기 값이 시뮬레이터의 지침%·지침가로 표시됩니다. 초기값은 기존 데이터의 이익율 중앙값 — 회사 방침에 맞게 다듬어 저장하세요.")
@@ -3651,6 +3871,41 @@ if mode == "관리자 모드" or mode == "管理者モード":
                 else:
                     st.info("PricePolicy 시트가 비어있습니다. 시트에 지침을 입력하거나 관리자에게 문의하세요.")
 
+            # ── [V92] 가격 지침 준수 점검 — 전 품목 × 티어 지침가 대비 현재가 (looperget/price_policy.py) ──
+            with st.expander("🧭 가격 지침 준수 점검 — 전 품목 현재가 vs 지침가 (허용 오차 밖 목록 · Excel)", expanded=False):
+                if "price_policy_map" not in st.session_state:
+                    st.session_state.price_policy_map = load_price_policy()
+                if not st.session_state.price_policy_map:
+                    st.info("PricePolicy 지침이 없어 점검할 수 없습니다. 위 '가격 지침 관리'에서 먼저 지침을 정하세요.")
+                else:
+                    _scan = policy_scan(st.session_state.db["products"], st.session_state.price_policy_map)
+                    st.caption("지침가 = 매입단가 ÷ (1 − 지침%) 단위 스냅 (시뮬레이터와 같은 규칙). 🔒고정·매입 0원·지침 없는 칸은 제외.")
+                    p1, p2, p3 = st.columns([1, 2, 1])
+                    with p1:
+                        _ptol = st.number_input("허용 오차 (±%)", 0.0, 100.0, 5.0, 0.5, key="pol_scan_tol")
+                    with p2:
+                        _ptiers = st.multiselect("티어 (비우면 전체)", [lb for fk, lb in KR_PRICE_LABELS.items() if fk != "price_buy"],
+                                                 key="pol_scan_tiers")
+                    with p3:
+                        _pdir = st.radio("방향", ["both", "over", "under"], horizontal=True, key="pol_scan_dir",
+                                         format_func={"both": "전체", "over": "▲ 초과", "under": "▼ 미달"}.get)
+                    _psum = _scan.summary(_ptol, _ptiers)
+                    _pviol = _scan.violations(_ptol, _ptiers, _pdir)
+                    _n_eval = int(_psum["평가"].sum()) if len(_psum) else 0
+                    q1, q2, q3 = st.columns(3)
+                    q1.metric("평가 칸", f"{_n_eval:,}")
+                    q2.metric("허용 오차 밖", f"{len(_pviol):,}")
+                    q3.metric("준수율", f"{(1 - (_psum['▲ 초과'].sum() + _psum['▼ 미달'].sum()) / _n_eval) * 100:.1f}%" if _n_eval else "-")
+                    st.dataframe(_psum, width="stretch", hide_index=True)
+                    st.dataframe(_pviol, width="stretch", hide_index=True)
+                    _pbuf = io.BytesIO()
+                    with pd.ExcelWriter(_pbuf, engine='xlsxwriter') as writer:
+                        _pviol.to_excel(writer, index=False, sheet_name="위반목록")
+                        _psum.to_excel(writer, index=False, sheet_name="세그먼트요약")
+                    st.download_button("📥 위반 목록 Excel 다운로드", _pbuf.getvalue(),
+                                       f"PricePolicy_Audit_{datetime.datetime.now().strftime('%Y%m%d')}.xlsx",
+                                       use_container_width=True, key="pol_scan_dl")
+
             # ── [V11] 일본 Products_JP 일괄 동기화 ──────────────────────
             st.divider()
             st.markdown("##### 🇯🇵 일본 Products_JP 일괄 동기화")
@@ -3670,10 +3925,32 @@ if mode == "관리자 모드" or mode == "管理者モード":
             if ppt_data:
                 st.download_button(label="📥 세트 구성 일람표(PPT) 다운로드", data=ppt_data, file_name="Set_Composition_Master.pptx", mime="application/vnd.openxmlformats-officedocument.presentationml.presentation", use_container_width=True)
                 st.divider()
+            # ── [V90] 세트 단가 롤업 · 드리프트 점검 — looperget/set_pricing.py (레시피 × 부품 단가, 리비전 캐시) ──
+            _roll = set_rollup(st.session_state.db["products"], st.session_state.db["sets"])
+            with st.expander("📊 세트 단가 롤업 · 소비자가 드리프트 점검", expanded=False):
+                st.caption("계산 소비자가 = Σ 레시피 수량 × 부품 소비자가 (올림 없음). 등록 소비자가(Sets '소비자가')와 허용 오차 밖이면 ⚠️.")
+                d1, d2 = st.columns([1, 2])
+                with d1:
+                    _tol = st.number_input("허용 오차 (%)", 0.0, 50.0, 1.0, 0.5, key="set_drift_tol")
+                with d2:
+                    _only = st.multiselect("상태 필터 (비우면 전체)", ["⚠️ 드리프트", "❓ 부품 누락", "➖ 미등록", "✅ 일치"],
+                                           default=["⚠️ 드리프트", "❓ 부품 누락"], key="set_drift_only")
+                _drift = set_price_drift(_roll, st.session_state.db["sets"], _tol)
+                _vc = _drift["상태"].value_counts()
+                m1, m2, m3, m4 = st.columns(4)
+                m1.metric("⚠️ 드리프트", f"{int(_vc.get('⚠️ 드리프트', 0)):,}")
+                m2.metric("❓ 부품 누락", f"{int(_vc.get('❓ 부품 누락', 0)):,}")
+                m3.metric("➖ 미등록", f"{int(_vc.get('➖ 미등록', 0)):,}")
+                m4.metric("✅ 일치", f"{int(_vc.get('✅ 일치', 0)):,}")
+                st.dataframe(_drift[_drift["상태"].isin(_only)] if _only else _drift, width="stretch", hide_index=True)
+                if st.checkbox("티어별 롤업 전체 보기", key="set_rollup_tiers"):
+                    st.dataframe(_roll.table(), width="stretch", hide_index=True)
+            _calc_cons = _roll.consumer()
             cat = st.selectbox("분류", ["주배관세트", "가지관세트", "살수세트", "기타자재"])
             cset = st.session_state.db["sets"].get(cat, {})
             if cset:
-                sl = [{"세트명": k, "부품수": len(v.get("recipe", {}))} for k,v in cset.items()]
+                sl = [{"세트명": k, "부품수": len(v.get("recipe", {})), "등록 소비자가": v.get("price_consumer", ""),
+                       "계산 소비자가": _calc_cons.get(k)} for k,v in cset.items()]
                 st.dataframe(pd.DataFrame(sl), width="stretch", on_select="rerun", selection_mode="multi-row", key="set_table")
                 sel_rows = st.session_state.set_table.get("selection", {}).get("rows", [])
                 if sel_rows:
@@ -3922,13 +4199,9 @@ elif mode == "🏪 아쿠나리스":
             if _pr_site != "(전체 품목)":
                 for _srow9 in aq_load_sites():
                     if str(_srow9.get("농협명", "")).strip() == _pr_site:
-                        try:
-                            _pl9 = json.loads(str(_srow9.get("배치JSON") or "{}"))
-                            if isinstance(_pl9, dict):
-                                _sp_items = _pl9.get("items", {}) if isinstance(_pl9.get("items", {}), dict) else {}
-                                _sp_assign = _pl9.get("assign", {}) if isinstance(_pl9.get("assign", {}), dict) else {}
-                        except Exception:
-                            pass
+                        _pl9 = aq_site_plan(_srow9)   # [V98] AQ_Layouts 좌표 되붙임
+                        _sp_items = _pl9.get("items", {}) if isinstance(_pl9.get("items", {}), dict) else {}
+                        _sp_assign = _pl9.get("assign", {}) if isinstance(_pl9.get("assign", {}), dict) else {}
                 if not _sp_assign:
                     st.info(f"'{_pr_site}'에 저장된 확정 배치가 없어 전체 품목 기준으로 동작합니다 — 사이트 설계에서 배치 후 💾 저장하세요.")
 
@@ -4110,13 +4383,9 @@ elif mode == "🏪 아쿠나리스":
             if not _ib_site.startswith("(표준"):
                 for _srow0 in aq_load_sites():
                     if str(_srow0.get("농협명", "")).strip() == _ib_site:
-                        try:
-                            _pl0 = json.loads(str(_srow0.get("배치JSON") or "{}"))
-                            if isinstance(_pl0, dict):
-                                _ib_assign = _pl0.get("assign", {}) if isinstance(_pl0.get("assign", {}), dict) else {}
-                                _ib_items = _pl0.get("items", {}) if isinstance(_pl0.get("items", {}), dict) else {}
-                        except Exception:
-                            pass
+                        _pl0 = aq_site_plan(_srow0)   # [V98] AQ_Layouts 좌표 되붙임
+                        _ib_assign = _pl0.get("assign", {}) if isinstance(_pl0.get("assign", {}), dict) else {}
+                        _ib_items = _pl0.get("items", {}) if isinstance(_pl0.get("items", {}), dict) else {}
                 if not _ib_assign:
                     st.info(f"'{_ib_site}'에 저장된 확정 배치가 없습니다 — 표준 위치 컬럼으로 표시합니다. (사이트 설계에서 배치 후 💾 저장)")
             _ib_only = st.checkbox("배치된 품목만 보기", value=bool(_ib_assign), key="aq_items_only",
@@ -4539,6 +4808,99 @@ elif mode == "🏪 아쿠나리스":
         # ── [V42] 사이트 설계 (Phase B-1) — 농협별 랙 구성·진열 계획·견적 ──
         with tab_site:
             aq_sites_all = aq_load_sites()
+            # ── [V95] 전체 사이트 일괄 자동배치·검증 — aquanaris_layout.aq_batch_sites (spawn 프로세스 풀) ──
+            with st.expander("🧮 전체 사이트 일괄 자동배치 · 검증 (AQ_Items·상자 치수 변경 후)", expanded=False):
+                st.caption("AQ_Sites 전체를 한 번에 읽어 사이트마다 **저장 배치 재검증 + ⚡ 자동배치 + 새 배치 검증**을 "
+                           "워커 프로세스에서 병렬로 돌립니다. 자동배치 입력은 각 사이트의 저장된 진열 계획(분류·상자·공급·"
+                           "자유 배치·랙 순서)과 같고, 기존 상자수를 보존합니다. 저장은 아래에서 고른 사이트만 한 번에.")
+                bb1, bb2, bb3 = st.columns([1.4, 1, 1.4])
+                with bb1:
+                    _bsolve9 = st.toggle("🧠 최적화 탐색", key="aq_batch_solve",
+                                         help="사이트마다 미배치 최소화 빔 탐색(aq_solve_place) — 그리디보다 나을 때만 채택.")
+                with bb2:
+                    _bbud9 = st.number_input("사이트당 탐색(초)", 0.5, 30.0, 2.0, 0.5, key="aq_batch_budget",
+                                             disabled=not _bsolve9)
+                with bb3:
+                    _bstd9 = st.checkbox("⭐ 표준 시스템 제외", value=True, key="aq_batch_skip_std",
+                                         help="표준은 손으로 다듬는 기준 배치 — 기본은 일괄 재배치 대상에서 뺍니다.")
+                if st.button("▶ 일괄 실행", key="aq_batch_go"):
+                    _t9b = time.time()
+                    with st.spinner(f"사이트 {len(aq_sites_all)}곳 자동배치·검증 중..."):
+                        # [V98] 워커엔 AQ_Layouts 좌표를 되붙인 배치JSON을 넘기고, 원본 대조는 시트 셀 그대로
+                        _sites9b = [dict(s, 배치JSON=json.dumps(aq_site_plan(s), ensure_ascii=False)) for s in aq_sites_all]
+                        _res9b, _nw9b = aq_batch_sites(_sites9b, aq_items, aq_box_dims_map(aq_boxes), aq_groups,
+                                                       solve=_bsolve9, budget_s=float(_bbud9),
+                                                       skip=(AQ_STD_SITE,) if _bstd9 else ())
+                    st.session_state["aq_batch_res"] = {"rows": _res9b, "workers": _nw9b,
+                                                        "elapsed": round(time.time() - _t9b, 2),
+                                                        "raw": {str(s.get("농협명", "")).strip(): str(s.get("배치JSON") or "")
+                                                                for s in aq_sites_all}}
+                _bres9 = st.session_state.get("aq_batch_res")
+                if _bres9:
+                    _rows9b = _bres9["rows"]
+                    _df9b = pd.DataFrame([{
+                        "농협명": r["농협명"], "랙": r["랙"], "품목": r["품목"], "미배치": r["미배치"],
+                        "현재 폭초과": r["현재 폭초과"], "현재 높이초과": r["현재 높이초과"], "현재 기타": r["현재 기타"],
+                        "새 폭초과": r["새 폭초과"], "새 높이초과": r["새 높이초과"], "새 기타": r["새 기타"],
+                        "미배치 품목": ", ".join(r["미배치 품목"][:6]) + (" 외" if len(r["미배치 품목"]) > 6 else ""),
+                        "배치JSON(자)": len(r["배치JSON"]) if r["배치JSON"] else None,
+                        "오류": r["오류"]} for r in _rows9b])
+                    for _c9b in ("현재 폭초과", "현재 높이초과", "현재 기타", "배치JSON(자)"):
+                        _df9b[_c9b] = _df9b[_c9b].astype("Int64")   # v1 레거시 저장본 = 현재 검증 없음(빈칸)
+                    _cur_bad9 = int(((_df9b["현재 폭초과"].fillna(0) + _df9b["현재 높이초과"].fillna(0)) > 0).sum())
+                    bm1, bm2, bm3, bm4 = st.columns(4)
+                    bm1.metric("사이트", f"{len(_rows9b)}곳")
+                    bm2.metric("미배치 합계", f"{int(_df9b['미배치'].sum())}건")
+                    bm3.metric("현재 배치 초과 사이트", f"{_cur_bad9}곳")
+                    bm4.metric("오류", f"{int((_df9b['오류'] != '').sum())}곳")
+                    st.caption(f"워커 {_bres9['workers']}개 · {_bres9['elapsed']}초 — 현재 = 저장된 배치를 지금 치수로 재검증, "
+                               "새 = 일괄 자동배치 결과. 폭초과·높이초과 = 단 단위 건수.")
+                    st.dataframe(_df9b, hide_index=True, use_container_width=True)
+                    _msg9b = [f"{r['농협명']} · {m}" for r in _rows9b for m in r["검증"]]
+                    if _msg9b:
+                        with st.expander(f"새 배치 검증 문장 {len(_msg9b)}건", expanded=False):
+                            st.text("\n".join(_msg9b[:300]))
+                    _ok9b = [r["농협명"] for r in _rows9b if r["배치JSON"]]
+                    _wsel9 = st.multiselect("배치JSON을 새 결과로 덮어쓸 사이트", _ok9b, default=[], key="aq_batch_wsel",
+                                            help="선택한 사이트의 배치 좌표(AQ_Layouts)만 교체 — 진열 계획·랙 구성은 그대로.")
+                    if st.button("💾 선택 사이트 배치JSON 일괄 저장", key="aq_batch_save", disabled=not _wsel9):
+                        try:
+                            _by9b = {r["농협명"]: r for r in _rows9b}
+                            _raw9b = _bres9.get("raw", {})
+                            _go9b, _stale9b = [], []
+                            for s in aq_sites_all:
+                                _n9b = str(s.get("농협명", "")).strip()
+                                if _n9b not in _wsel9: continue
+                                if str(s.get("배치JSON") or "") != _raw9b.get(_n9b):
+                                    _stale9b.append(_n9b); continue   # 실행 후 그 사이트가 따로 저장됨 — 덮어쓰지 않는다
+                                _go9b.append(s)
+                            # [V98] 좌표는 AQ_Layouts에 한 번에 추가 → 포인터만 배치JSON에 → AQ_Sites 1회 쓰기 → 옛 조각 정리
+                            _pk9b = {n: _by9b[n]["inst2"] for n in (str(s.get("농협명", "")).strip() for s in _go9b)
+                                     if _by9b[n]["inst2"]}
+                            _ptr9b = aq_save_layouts(_pk9b)
+                            _done9b = []
+                            for s in _go9b:
+                                _n9b = str(s.get("농협명", "")).strip()
+                                _pj9b, _ = aq_plan_store(_n9b, json.loads(_by9b[_n9b]["배치JSON"]),
+                                                         _by9b[_n9b]["inst2"], _ptr9b.get(_n9b))
+                                if _pj9b is None: continue
+                                s["배치JSON"] = _pj9b
+                                _done9b.append(_n9b)
+                            if _done9b:
+                                aq_save_sites(aq_sites_all)   # 한 번의 시트 쓰기
+                                aq_load_all.clear()
+                                aq_layout_prune(_done9b, aq_sites_all)
+                                for _n9b in _done9b:   # 열려 있던 세션 배치는 저장본으로 다시 로드
+                                    st.session_state.pop(f"aq_inst_{_n9b}", None)
+                                    st.session_state.pop(f"aq_unp_{_n9b}", None)
+                                st.session_state.pop("aq_batch_res", None)
+                            if _stale9b:
+                                st.warning(f"실행 뒤 따로 저장된 사이트 {len(_stale9b)}곳은 건너뜀 — 다시 실행하세요: "
+                                           + ", ".join(_stale9b))
+                            if _done9b:
+                                st.success(f"배치JSON {len(_done9b)}곳 일괄 저장 완료"); time.sleep(0.5); st.rerun()
+                        except Exception as e:
+                            st.error(f"일괄 저장 실패: {aq_err_str(e)}")
             st.markdown("##### 🏢 농협(사이트) 선택")
             _site_names = [str(s.get("농협명", "")).strip() for s in aq_sites_all]
             # [V44] 표준 불러오기 후 자동 선택 점프 (위젯 생성 전에만 키 설정 가능)
@@ -4664,6 +5026,8 @@ elif mode == "🏪 아쿠나리스":
                                           if str(s.get("농협명", "")).strip() != sel_site]
                                 aq_save_sites(_rest9)
                                 aq_load_all.clear()
+                                try: aq_layout_prune(sel_site, _rest9)   # [V98] 다른 사이트(복제본)가 가리키는 조각은 남김
+                                except Exception: pass
                                 st.success("삭제 완료"); time.sleep(0.5); st.rerun()
                             except Exception as e:
                                 st.error(f"삭제 실패: {aq_err_str(e)}")
@@ -4935,27 +5299,16 @@ elif mode == "🏪 아쿠나리스":
                     st.caption("상자 미지정 품목(전시품·행잉·공구류)을 **폭×높이(mm)** 직접 지정으로 단에 올립니다. "
                                "형태 = 사각/원/이미지(등각 ISO 등록 품목만). **품명(코드)·수량 매칭 필수** — 수량·크기가 없으면 배치되지 않습니다. "
                                "랙·단 지정은 아래 3️⃣ 세부 조정 표에서(상자란에 '(자유)'로 표시).")
+                    # [V103] 기본행(저장값 → 표준 존 → AQ_Items 치수)은 aq_free_rows — 일괄 자동배치와 같은 규칙
                     _rows_free = []
-                    for r in aq_items:
-                        _cf = r["품목코드"]
-                        if not _aq_use(_cf): continue
-                        _boxf = str((_plan_items.get(_cf, {}) or {}).get("box") or r.get("기본상자") or "").strip()
-                        if _boxf: continue   # 상자가 있는 품목은 대상 아님
-                        _fc = _free_cur.get(_cf, {}) if isinstance(_free_cur.get(_cf, {}), dict) else {}
-                        if not _fc and aq_std_free_of(_cf):   # [V58] 표준 자유배치 존(여과기·지주대) 기본 제공
-                            _fc = dict(aq_std_free_of(_cf))
-                        _has_iso = bool(str(r.get("이미지ISO", "") or "").strip())
-                        try: _wdef = int(_fc.get("w") or 0) or int(float(str(r.get("가로") or 0))) or None
-                        except Exception: _wdef = None
-                        try: _hdef = int(_fc.get("h") or 0) or int(float(str(r.get("높이") or 0))) or None
-                        except Exception: _hdef = None
+                    for _fr in aq_free_rows(aq_items, _plan_items, _free_cur, _aq_use):
+                        _r9f = _aq_by_code.get(_fr["품목코드"], {})
                         _rows_free.append({
-                            "사용": (_cf in _free_cur) or bool(aq_std_free_of(_cf)),   # [V58] 표준 존 기본 사용
-                            "품목코드": _cf, "품목명": str(r.get("품목명_AQ", "") or ""), "규격": str(r.get("규격_AQ", "") or ""),
-                            "형태": str(_fc.get("shape") or ("이미지" if _has_iso else "사각")),
-                            "폭mm": _wdef, "높이mm": _hdef,
-                            "수량": int(_fc.get("qty") or 0),
-                            "ISO": "✓" if _has_iso else "",
+                            "사용": _fr["사용"],
+                            "품목코드": _fr["품목코드"], "품목명": str(_r9f.get("품목명_AQ", "") or ""),
+                            "규격": str(_r9f.get("규격_AQ", "") or ""),
+                            "형태": _fr["형태"], "폭mm": _fr["w"] or None, "높이mm": _fr["h"] or None,
+                            "수량": _fr["qty"], "ISO": "✓" if _fr["iso"] else "",
                         })
                     if _rows_free:
                         df_free = st.data_editor(
@@ -4995,29 +5348,11 @@ elif mode == "🏪 아쿠나리스":
                 df_asg = None   # [V49] 세부 조정 표 핸들 (랙·치수 없으면 None 유지 — 저장 시 가드)
                 if True:   # [V47] expander→상시 표시(내부 들여쓰기 보존)
                     st.caption("배치의 단위는 **단(선반)**입니다. 용도군(진열분류)별로 단에 군집 배치하고, 단 아래 **색상 자석테이프**로 영역을 표시합니다(색=분류별 지정색). 섹션(세로 열) 개념은 표준화 참고 전용입니다.")
-                    _rk_list = []
-                    for _, _rr in df_racks_eff.iterrows():   # [V54] 상속 적용본
-                        _nm3 = str(_rr.get("명칭") or "").strip()
-                        if not _nm3: continue
-                        # [V64] 단높이 합이 총높이와 안 맞아도 랙을 숨기지 않는다(입력한 단높이로 그대로 렌더·배치).
-                        #  총높이는 검증 안내용일 뿐 — 렌더는 Σ단높이+단두께, 패킹은 단별 높이라 총높이에 의존하지 않음.
-                        #  (구: _bad_racks 제외 → 단높이 한 칸만 고쳐도 랙이 통째로 사라지던 문제 해소)
-                        try: _wv3 = int(float(_rr.get("폭mm") or 0))
-                        except Exception: _wv3 = 0
-                        try:
-                            _hs3 = [int(float(x)) for x in str(_rr.get("단높이mm(콤마구분)") or "").split(",") if str(x).strip()]
-                        except Exception: _hs3 = []
-                        try:                                # [V49] 탑뷰용 깊이 정보
-                            _ds3 = [int(float(x)) for x in str(_rr.get("단깊이mm(콤마구분)") or "").split(",") if str(x).strip()]
-                        except Exception: _ds3 = []
-                        try: _dp3 = int(float(_rr.get("깊이mm") or 0))
-                        except Exception: _dp3 = 0
-                        try: _tk3 = int(float(_rr.get("단두께mm") or 0))   # [V62] 단 판 두께
-                        except Exception: _tk3 = 0
-                        if _wv3 > 0 and _hs3:
-                            _rk_list.append({"명칭": _nm3, "내측폭": _wv3 - 38, "단높이": _hs3,
-                                             "단깊이": _ds3, "깊이": _dp3 or 450, "단두께": _tk3,
-                                             "그룹": _aq_cell9(_rr.get("그룹"))})   # [V76] 통로 한쪽 줄
+                    # [V54] 상속 적용본 → 배치용 랙 (aq_site_racks — 일괄 자동배치와 같은 규칙)
+                    # [V64] 단높이 합이 총높이와 안 맞아도 랙을 숨기지 않는다(입력한 단높이로 그대로 렌더·배치).
+                    #  총높이는 검증 안내용일 뿐 — 렌더는 Σ단높이+단두께, 패킹은 단별 높이라 총높이에 의존하지 않음.
+                    #  (구: _bad_racks 제외 → 단높이 한 칸만 고쳐도 랙이 통째로 사라지던 문제 해소)
+                    _rk_list = aq_site_racks(df_racks_eff.to_dict("records"))
                     _dims_p = aq_box_dims_map(aq_boxes)
                     _dims_p.update({f"자유:{c}": (fc["w"], fc["h"]) for c, fc in _free_live.items()})   # [V49] 자유 배치 치수
                     if not _rk_list:
@@ -5056,6 +5391,12 @@ elif mode == "🏪 아쿠나리스":
                                     + (_virt_rk9 if _virt_pos == "맨 뒤" else [])) if _virt_on else _rk_list)
                         # ── [V67] 인스턴스 상태 로드 — schema 2는 좌표 그대로, v1 레거시는 1회 마이그레이션 ──
                         if _inst_key not in st.session_state:
+                            # [V98] 좌표는 인스턴스를 처음 만들 때만 AQ_Layouts에서 읽는다(리런마다 X)
+                            _plan_cur = aq_site_plan(_site)
+                            if _plan_cur.get("_layout_err"):
+                                st.error(f"🚨 배치 좌표를 읽지 못했습니다 — {_plan_cur['_layout_err']}. "
+                                         "빈 배치로 덮어쓰지 않도록 여기서 멈춥니다. 잠시 후 새로고침하세요.")
+                                st.stop()
                             _rows0 = {}
                             _sv_asg0 = _plan_cur.get("assign", {}) if isinstance(_plan_cur.get("assign", {}), dict) else {}
                             for _c0, _d0 in _sv_asg0.items():
@@ -5064,10 +5405,7 @@ elif mode == "🏪 아쿠나리스":
                                     except Exception: pass
                             def _box_of0(c):
                                 """저장본에는 상자명이 없다([V68] inst2) — items→기본상자→자유배치 순 재해석."""
-                                _r0b = _aq_by_code.get(c, {}) or {}
-                                _b0b = str((_plan_items.get(c, {}) or {}).get("box") or _r0b.get("기본상자") or "").strip()
-                                if not _b0b and c in _free_live: _b0b = "자유:" + c
-                                return _b0b
+                                return aq_eff_box(c, _plan_items, _aq_by_code.get(c), _free_live)
                             _packed0 = _plan_cur.get("inst2")
                             _insts0 = _plan_cur.get("instances")
                             if isinstance(_packed0, dict) and _packed0:
@@ -5132,6 +5470,18 @@ elif mode == "🏪 아쿠나리스":
                                 st.session_state[_inst_key] = aq_instances_from_seqs(
                                     _mig_seqs0, _rk_all + ([] if _virt_on else _virt_rk9), mstack=_sv_mst0)
                             st.session_state[_rows_key] = _rows0
+                            # [V97] 조작 로그 재생 — 스냅샷(op_base) 이후 이 세션·다른 편집자가 남긴 조작까지
+                            _lg0 = []
+                            if str(_plan_cur.get("op_base") or ""):
+                                try: _lg0 = aq_oplog_batches(aq_load_oplog(), sel_site, _plan_cur["op_base"])
+                                except Exception: _lg0 = []
+                            if _lg0:
+                                _ist0 = aq_inst_store(st.session_state[_inst_key])
+                                _nr0, _er0 = aq_ops_replay(_ist0, _lg0, _dims_p, _rk_all + ([] if _virt_on else _virt_rk9))
+                                if _er0:
+                                    st.session_state["aq_op_errs"] = [f"조작 로그 재생: {e}" for e in _er0]
+                            st.session_state[f"aq_oplog_n_{sel_site}"] = len(_lg0)
+                            st.session_state[f"aq_oplog_fp_{sel_site}"] = aq_inst_fingerprint(st.session_state[_inst_key])
                         if _HAS_JS_EVAL:
                             # [V55] 근본 수정: streamlit_js_eval 프론트는 js_expressions "문자열이 바뀔 때만"
                             #  재평가한다(index.html: if (new_value !== data_from_streamlit)). 고정 문자열이라
@@ -5180,40 +5530,25 @@ elif mode == "🏪 아쿠나리스":
                                     #  이동/복제/삭제가 그 상자에만 영향(품목 전체 재배치 없음).
                                     #  실패는 삼키지 않고 수집해 화면에 노출(무한 재시도 방지 위해 done은 유지).
                                     _ins9s = st.session_state.setdefault(_inst_key, [])
+                                    _ist9 = aq_inst_store(_ins9s)   # [V96] 조작 배치 전체가 한 색인 공유(찾기·새 id 상수 시간)
+                                    # [V97] 조작 로그 — 배치 전 상태가 로그와 일치할 때만 이어 쓴다(아니면 💾 저장 필요)
+                                    _fpk9 = f"aq_oplog_fp_{sel_site}"
+                                    _log_ok9 = (st.session_state.get(f"aq_oplog_{sel_site}", False)
+                                                and bool(str(_plan_cur.get("op_base") or ""))
+                                                and st.session_state.get(_fpk9) == aq_inst_fingerprint(_ins9s))
+                                    _log9, _unlog9 = [], False
                                     _op_errs9 = []
                                     _rack_edit9 = None   # [V71] 랙 복제·삭제로 바뀐 랙 구성 표(records)
-                                    _rk_by9 = {rk["명칭"]: rk for rk in _rk_all}
-                                    def _shelf_h9(rk, sh):
-                                        _r9h = _rk_by9.get(str(rk))
-                                        try:
-                                            return _r9h["단높이"][int(sh) - 1] \
-                                                if _r9h and 0 < int(sh) <= len(_r9h["단높이"]) else 0
-                                        except Exception:
-                                            return 0
                                     for _op9 in _new_ops:
                                         try:
                                             _t9 = _op9.get("t")
                                             _c9o = str(_op9.get("code") or "")
-                                            if _t9 == "move" and _op9.get("track") and _op9.get("iid"):
-                                                _trk9 = str(_op9["track"]); _tsh9 = int(_op9.get("tshelf") or 0)
-                                                _e9m = aq_inst_move(
-                                                    _ins9s, str(_op9["iid"]), _trk9, _tsh9,
-                                                    xr=_op9.get("xr"), onto=_op9.get("onto"),
-                                                    dims=_dims_p, shelf_h=_shelf_h9(_trk9, _tsh9),
-                                                    inner=(_rk_by9.get(_trk9) or {}).get("내측폭") or 0,
-                                                    anchor=_op9.get("anchor"))   # [V70] 놓은 쪽(좌/우)
-                                                if _e9m: _op_errs9.append(_e9m)
-                                            elif _t9 == "dup" and _op9.get("iid"):
-                                                _sd9 = next((x for x in _ins9s
-                                                             if str(x.get("id")) == str(_op9["iid"])), None)
-                                                _e9m = aq_inst_dup(
-                                                    _ins9s, str(_op9["iid"]), dims=_dims_p,
-                                                    shelf_h=(_shelf_h9(_sd9.get("rack"), _sd9.get("shelf"))
-                                                             if _sd9 else 0))
-                                                if _e9m: _op_errs9.append(_e9m)
-                                            elif _t9 == "del" and _op9.get("iid"):
-                                                _e9m = aq_inst_del(_ins9s, str(_op9["iid"]))
+                                            if _t9 in AQ_OPLOG_KINDS and _op9.get("iid"):
+                                                # move([V70] anchor=놓은 쪽 좌/우)·dup·del — [V97] 로그 재생과 같은 적용 함수
+                                                _op9l = aq_op_slim(_op9)
+                                                _e9m = aq_op_apply(_ist9, _op9l, _dims_p, _rk_all)
                                                 if _e9m: _op_errs9.append(_e9m)
+                                                elif not _unlog9: _log9.append(_op9l)   # 로그 없는 변경 뒤 조작은 재생 불가 — 거기서 끊는다
                                             elif _t9 == "box" and _op9.get("box") and _c9o:   # [V54] 상자 변경(코드 단위)
                                                 _bx9o = str(_op9["box"])
                                                 if _bx9o not in _dims_p:
@@ -5252,6 +5587,7 @@ elif mode == "🏪 아쿠나리스":
                                                     del _recs9[_ix9]
                                                     _ins9s[:] = [_x for _x in _ins9s
                                                                  if str(_x.get("rack") or "") != _rn9]
+                                                    _ist9 = aq_inst_store(_ins9s)   # 리스트를 직접 고쳤다 — 색인 다시
                                                     st.session_state[f"aq_rkord_{sel_site}"] = [
                                                         _n for _n in _ord9r if _n != _rn9]
                                                     _rack_edit9 = _recs9
@@ -5270,8 +5606,8 @@ elif mode == "🏪 아쿠나리스":
                                                                      if str(_x.get("rack") or "") == _rn9]:
                                                             _cp9r = dict(_sx9)
                                                             _cp9r["rack"] = _new9r
-                                                            _cp9r["id"] = aq_inst_new_id(_ins9s, str(_sx9.get("code")))
-                                                            _ins9s.append(_cp9r)
+                                                            _cp9r["id"] = _ist9.new_id(str(_sx9.get("code")))
+                                                            _ist9.add(_cp9r)
                                                     if _rn9 in _ord9r: _ord9r.insert(_ord9r.index(_rn9) + 1, _new9r)
                                                     else: _ord9r.append(_new9r)
                                                     st.session_state[f"aq_rkord_{sel_site}"] = _ord9r
@@ -5279,6 +5615,18 @@ elif mode == "🏪 아쿠나리스":
                                         except Exception as _oe9:
                                             _op_errs9.append(f"{_op9.get('t', '?')} {_op9.get('code', '')}: {aq_err_str(_oe9)}")
                                         _done_ids.add(_op9.get("id"))
+                                        if _t9 not in AQ_OPLOG_KINDS: _unlog9 = True   # 상자·랙 변경은 💾 저장으로만
+                                    if _log_ok9 and _log9:
+                                        try:
+                                            aq_oplog_append(sel_site, str(_plan_cur["op_base"]), _log9)
+                                            _nlg9 = st.session_state.get(f"aq_oplog_n_{sel_site}", 0) + 1
+                                            st.session_state[f"aq_oplog_n_{sel_site}"] = _nlg9
+                                            if not _unlog9:
+                                                st.session_state[_fpk9] = aq_inst_fingerprint(_ins9s)
+                                            if _nlg9 >= AQ_OPLOG_COMPACT:
+                                                st.session_state[f"aq_oplog_compact_{sel_site}"] = True
+                                        except Exception as _le9:
+                                            _op_errs9.append(f"조작 로그 저장 실패(화면 배치는 유지 — 💾 저장으로 보존): {aq_err_str(_le9)}")
                                     if _rack_edit9 is not None:
                                         # [V71] 바뀐 랙 구성을 편집표에 반영 — 다음 리런에서 표가 갱신되고,
                                         #  💾 저장 시 랙구성JSON에 그대로 기록된다.
@@ -5303,6 +5651,15 @@ elif mode == "🏪 아쿠나리스":
                             _oidx9 = {n: i for i, n in enumerate(_ord9)}
                             _rk_all = sorted(_rk_all, key=lambda rk: _oidx9.get(rk["명칭"], 999))
                             _rk_list = sorted(_rk_list, key=lambda rk: _oidx9.get(rk["명칭"], 999))
+                        # [V94] 최적화 탐색 — 미배치 최소화 빔 탐색(시간 예산). 끄면 기존 그리디 한 번.
+                        cs1, cs2 = st.columns([2, 1])
+                        with cs1:
+                            _solve9 = st.toggle("🧠 최적화 탐색 (미배치 최소화)", key=f"aq_solve_{sel_site}",
+                                                help="분류 군집·순서는 그리디와 같게 지키면서, 건너뛸 단·미배치로 둘 품목을 "
+                                                     "여러 갈래로 시험해 미배치가 가장 적은 배치를 고릅니다. 그리디보다 나을 때만 채택.")
+                        with cs2:
+                            _budget9 = st.number_input("탐색 시간(초)", 0.5, 30.0, 3.0, 0.5,
+                                                       key=f"aq_solve_budget_{sel_site}", disabled=not _solve9)
                         ca1, ca0, ca2 = st.columns([2, 1, 3])
                         with ca0:
                             if st.button("🗑 배치 초기화", key=f"aq_clear_{sel_site}"):
@@ -5314,73 +5671,43 @@ elif mode == "🏪 아쿠나리스":
                             if st.button("⚡ 자동배치 (단 중심 군집)", key=f"aq_auto_{sel_site}",
                                          help="[V67] 누를 때만 실행됩니다 — 기존 수동 배치(드래그 이동·적층 포함)를 "
                                               "전부 표준 규칙 배치로 덮어씁니다. 확정 배치는 💾 사이트 저장으로 보존하세요."):
-                                _seq = []
-                                for g in _pg:
-                                    _gi = [r for r in aq_items if (r.get("진열분류") or "(미지정)") == g]
-                                    def _eff_box(r):   # [V49] 유효 상자 — 없으면 자유 배치 치수 사용
-                                        _b0 = str((_plan_items.get(r["품목코드"], {}) or {}).get("box") or r.get("기본상자") or "")
-                                        if not _b0 and r["품목코드"] in _free_live:
-                                            _b0 = "자유:" + r["품목코드"]
-                                        return _b0
-                                    def _bw_key(r):
-                                        return (-_dims_p.get(_eff_box(r), (0, 0))[0], r["품목코드"])
-                                    for r in sorted(_gi, key=_bw_key):
-                                        if not _aq_use(r["품목코드"]): continue   # [V48] 공급 제외 반영
-                                        _seq.append((r["품목코드"], g, _eff_box(r)))
-                                # [V53] ① 표준 위치(섹션·단) 우선 — 랙 명칭이 '섹션NN'(또는 'NN')과 일치하면 그 자리에
-                                _std_pre9 = {}
-                                _rk_by_nm9 = {rk["명칭"]: rk for rk in _rk_list}
-                                for _c9s, _g9s, _b9s in _seq:
-                                    _r9s = _aq_by_code.get(_c9s, {}) or {}
-                                    _sec9 = str(_r9s.get("섹션", "") or "").strip()
-                                    try: _sh9s = int(float(_r9s.get("단") or 0))
-                                    except Exception: _sh9s = 0
-                                    if not _sec9 or _sh9s <= 0: continue
-                                    for _cand9 in (f"섹션{_sec9}", _sec9):
-                                        _rk9s = _rk_by_nm9.get(_cand9)
-                                        if _rk9s and _sh9s <= len(_rk9s["단높이"]):
-                                            _std_pre9[_c9s] = (_cand9, _sh9s); break
-                                # [V53] ② 루퍼젯 본품(루퍼젯팩)은 가운데 랙 중앙 단 우선
-                                _ctr9 = [_c9s for _c9s, _g9s, _b9s in _seq
-                                         if _b9s == "루퍼젯팩" and _c9s not in _std_pre9]
-                                def _ch_auto9(c, rk, sh):   # [V59] 시험 패킹도 렌더와 같은 열힌트 사용
-                                    _r0 = _aq_by_code.get(c, {}) or {}
-                                    _se0 = str(_r0.get("섹션", "") or "").strip()
-                                    try: _sd0 = int(float(_r0.get("단") or 0))
-                                    except Exception: _sd0 = 0
-                                    if _se0 and _sd0 == sh and rk in (f"섹션{_se0}", _se0):
-                                        return AQ_COL_ORD.get(str(_r0.get("열", "") or "").strip(), 1)
-                                    return 1
                                 # [V67] 기존 상자수 보존 = 현재 인스턴스 총 개수(분할 포함) — 없으면 표준 상자수
                                 _cnt_old9 = {}
                                 for _x9 in st.session_state.get(_inst_key, []):
                                     _cd9 = str(_x9.get("code"))
                                     _cnt_old9[_cd9] = _cnt_old9.get(_cd9, 0) + 1
-                                def _nf_auto9(c):
-                                    return _cnt_old9.get(c, 0) or aq_std_n_of(c)
-                                _asg_new, _unp = aq_auto_place(_rk_list, _seq, _dims_p, group_order=_pg,
-                                                               pre=_std_pre9, center_codes=_ctr9,
-                                                               colhint=_ch_auto9, n_of=_nf_auto9)
+                                # [V103] 입력(분류·상자 폭 순 seq, [V53] 표준 위치·루퍼젯 본품, [V59] 열힌트, 상자수)
+                                #  = aq_place_inputs — 전체 사이트 일괄 자동배치(aq_site_rebatch)와 같은 함수
+                                _seq, _std_pre9, _ctr9, _ch_auto9, _nf_auto9 = aq_place_inputs(
+                                    _rk_list, aq_items, _pg, _dims_p,
+                                    lambda c: aq_eff_box(c, _plan_items, _aq_by_code.get(c), _free_live),
+                                    _aq_use, _cnt_old9)
+                                if _solve9:
+                                    _sinfo9 = {}
+                                    _asg_new, _unp = aq_solve_place(_rk_list, _seq, _dims_p, group_order=_pg,
+                                                                    pre=_std_pre9, center_codes=_ctr9,
+                                                                    colhint=_ch_auto9, n_of=_nf_auto9,
+                                                                    budget_s=float(_budget9), info=_sinfo9)
+                                    st.session_state[f"aq_solve_info_{sel_site}"] = _sinfo9
+                                else:
+                                    _asg_new, _unp = aq_auto_place(_rk_list, _seq, _dims_p, group_order=_pg,
+                                                                   pre=_std_pre9, center_codes=_ctr9,
+                                                                   colhint=_ch_auto9, n_of=_nf_auto9)
+                                    st.session_state.pop(f"aq_solve_info_{sel_site}", None)
                                 # [V67] 결과를 인스턴스 좌표로 확정(패킹은 지금 1회만) — 이후 리런은 재계산 없음.
                                 #  ⚠ 자동배치는 '누를 때만' 기존 수동 배치(드래그·적층 포함)를 전부 덮어쓴다.
-                                _meta9 = {c: (g, b) for c, g, b in _seq}
-                                _sq_by9 = {}
-                                for _c9a, (_rk9a, _sh9a) in _asg_new.items():
-                                    _g9a, _b9a = _meta9.get(_c9a, ("(미지정)", ""))
-                                    _wh9a = _dims_p.get(_b9a)
-                                    if not _wh9a: continue
-                                    for _ in range(max(1, int(_nf_auto9(_c9a) or 1))):
-                                        _sq_by9.setdefault((_rk9a, _sh9a), []).append(
-                                            (_c9a, _g9a, _b9a, _wh9a[0], _wh9a[1],
-                                             _ch_auto9(_c9a, _rk9a, _sh9a)))
-                                for _k9a in _sq_by9:
-                                    _sq_by9[_k9a] = aq_canon_seq(_sq_by9[_k9a], _pg)
+                                _sq_by9 = aq_place_seqs(_asg_new, _seq, _dims_p, _ch_auto9, _nf_auto9, _pg)
                                 st.session_state[_inst_key] = aq_instances_from_seqs(_sq_by9, _rk_all)
                                 st.session_state[_ver_key] += 1
                                 st.session_state[f"aq_unp_{sel_site}"] = _unp
                                 st.rerun()
                         with ca2:
                             _unp_l = st.session_state.get(f"aq_unp_{sel_site}", [])
+                            _si9 = st.session_state.get(f"aq_solve_info_{sel_site}")
+                            if _si9:
+                                st.caption(f"🧠 최적화 탐색: 미배치 {_si9['greedy_unplaced']} → {_si9['unplaced']}건 · "
+                                           f"상태 {_si9['states']:,}개 · {_si9['elapsed']}초"
+                                           + (" (시간 예산 도달 — 그때까지 최선)" if _si9["timed_out"] else ""))
                             if _unp_l:
                                 st.warning(f"미배치 {len(_unp_l)}건(상자 미지정·공간 부족): {', '.join(_unp_l[:8])}{' 외' if len(_unp_l) > 8 else ''}")
                         with st.expander("✏️ 세부 조정 — 품목별 랙·단·상자·줄 (자동배치 결과 수정)", expanded=False):
@@ -5496,9 +5823,11 @@ elif mode == "🏪 아쿠나리스":
                                     if _eff5 not in _dims_p:
                                         _tbl_errs9.append(f"{_c5}: 상자 '{_eff5 or '(미지정)'}' 치수 미등록 — 배치 불가")
                                     else:
-                                        for _x5 in _old5: _ins_cur9.remove(_x5)
-                                        aq_inst_place_code(_ins_cur9, _c5, _eff5, _rk5, _sh5, _n5,
+                                        _st5 = aq_inst_store(_ins_cur9)   # [V96] 정규화는 떠난 단·놓인 단만
+                                        for _x5 in _old5: _st5.remove(_x5)
+                                        aq_inst_place_code(_st5, _c5, _eff5, _rk5, _sh5, _n5,
                                                            dims=_dims_p, shelf_h=_shelfh9v(_rk5, _sh5))
+                                        _st5.normalize([(_bl5[0], _bl5[1])])
                                 else:   # 랙 비움·단 0·상자수 0 → 본 자리 제거(미배치)
                                     for _x5 in _old5: _ins_cur9.remove(_x5)
                                     aq_inst_normalize(_ins_cur9)
@@ -5546,14 +5875,35 @@ elif mode == "🏪 아쿠나리스":
                         _view_rks = st.multiselect("표시할 랙 (기본 전체 — V1 도면처럼 나란히)", _rk_names, default=_rk_names, key=f"aq_rk_view_{sel_site}")
                         _rk_show = [rk for rk in _rk_all if rk["명칭"] in (_view_rks or _rk_names)]   # [V51] 가상랙 포함
                         import streamlit.components.v1 as _components9   # [V49] 호버 툴팁은 iframe에서만 동작
+                        # [V101] 브라우저 렌더 — 처음 1번만 배치 전체(JSON)를 보내고 이후 리런은 바뀐 단만
+                        _mdlk9 = f"aq_mdl_{sel_site}"
+                        _crc1, _crc2 = st.columns([4.4, 1.5])
+                        with _crc1:
+                            _cr9 = st.toggle("⚡ 브라우저 렌더 — 배치 전체는 처음 1번만 보내고, 이후 리런은 바뀐 단만 전송",
+                                             key=f"aq_cr_{sel_site}",
+                                             help="상자가 많은 사이트에서 드래그 반영·위젯 조작마다 그림 전체를 다시 보내지 않습니다. "
+                                                  "기준 그림은 이 브라우저(localStorage)에 남습니다.")
+                        if _cr9:
+                            with _crc2:
+                                if st.button("🖼 전체 다시 그리기", key=f"aq_mdl_full_{sel_site}",
+                                             help="그림이 비었거나 어긋나 보이면 배치 전체를 다시 보냅니다."):
+                                    st.session_state.pop(_mdlk9, None)
+                        else:
+                            st.session_state.pop(_mdlk9, None)   # 다시 켜면 전체부터
                         # [V67] 렌더 = 인스턴스 좌표 그대로 (mstack·seq 패킹 경로 폐기)
-                        _svg_all9 = aq_racks_svg_all(_rk_show, {}, info=_info_map,
-                                                     instances=_ins_eff9, dims=_dims_p)
-                        if _svg_all9:
+                        _mdl9 = aq_layout_model(_rk_show, _ins_eff9, _dims_p, info=_info_map) if _cr9 else None
+                        _svg_all9 = "" if _cr9 else aq_racks_svg_all(_rk_show, {}, info=_info_map,
+                                                                     instances=_ins_eff9, dims=_dims_p,
+                                                                     compact=True)   # [V100] 압축 SVG — 리런마다 iframe 전송량 축소
+                        if _svg_all9 or _mdl9:
                             _nonce9 = f"{st.session_state['aq_ops_salt']}|{sel_site}"   # [V53] ver 제외 — 늦은 조작 유실 방지(op id 중복 차단)
                             _ack9 = str(st.session_state.get(f"aq_ack_{sel_site}", "") or "")   # [V67] 마지막 ACK 배치 id
+                            _pl9 = None
+                            if _mdl9:
+                                _pl9, st.session_state[_mdlk9] = aq_layout_payload(_mdl9, st.session_state.get(_mdlk9))
                             _html9, _hpx9 = aq_svg_hover_html(_svg_all9, interactive=True, nonce=_nonce9,
-                                                              boxes=_box_opts4, ack=_ack9)   # [V51/V54/V67]
+                                                              boxes=_box_opts4, ack=_ack9,
+                                                              model=_pl9)   # [V51/V54/V67] [V101] 모델이면 iframe이 그림
                             _components9.html(_html9, height=min(_hpx9 + 34, 960), scrolling=True)
                             _cb1, _cbU, _cbR, _cb2 = st.columns([3.4, 1, 1, 1.5])
                             with _cb1:
@@ -5605,6 +5955,80 @@ elif mode == "🏪 아쿠나리스":
                                              help="그림에서 드래그·더블클릭한 조작을 표와 배치에 반영합니다."):
                                     st.session_state["aq_ops_bump"] = True   # [V55] 다음 턴에 브리지 재평가
                                     st.rerun()
+                            # ── [V97] 조작 로그 — 드래그 조작 배치를 AQ_LayoutOps에 1행씩 추가(시트 전체 재기록 없이 보존·공유) ──
+                            _lgk9 = f"aq_oplog_{sel_site}"
+                            _lgbase9 = str(_plan_cur.get("op_base") or "")
+                            _lgn9 = int(st.session_state.get(f"aq_oplog_n_{sel_site}", 0) or 0)
+                            _lgsync9 = st.session_state.get(f"aq_oplog_fp_{sel_site}") == aq_inst_fingerprint(_ins_eff9)
+
+                            def _aq_oplog_compact9():
+                                """시트의 스냅샷 + 같은 기준 로그를 다시 재생해 inst2로 접고 새 기준 발급 → 옛 로그 행 정리."""
+                                aq_load_all.clear()
+                                _sites9c = aq_load_sites()
+                                _s9c = next((s for s in _sites9c if str(s.get("농협명", "")).strip() == sel_site), None)
+                                if _s9c is None:
+                                    raise ValueError("AQ_Sites에서 사이트를 찾지 못했습니다")
+                                _pl9c = aq_site_plan(_s9c)   # [V98] AQ_Layouts 좌표 되붙임
+                                if not isinstance(_pl9c.get("inst2"), dict) or str(_pl9c.get("op_base") or "") != _lgbase9:
+                                    raise ValueError("시트의 배치가 그사이 다시 저장되었습니다 — 🔄 로그 불러오기 후 다시 시도하세요")
+                                _it9c = _pl9c.get("items", {}) if isinstance(_pl9c.get("items", {}), dict) else {}
+                                def _box_of9c(c):
+                                    return aq_eff_box(c, _it9c, _aq_by_code.get(c), _free_live)
+                                _rows9c = aq_load_oplog()
+                                _keys9c = aq_oplog_keys(_rows9c, sel_site, _lgbase9)   # 스냅샷에 접어 넣는 행
+                                _ins9c = aq_inst_unpack(_pl9c["inst2"], _box_of9c)
+                                aq_ops_replay(_ins9c, aq_oplog_batches(_rows9c, sel_site, _lgbase9), _dims_p, _rk_all)
+                                _pl9c["rows"] = aq_plan_rows_meta(st.session_state.get(_rows_key))
+                                _pl9c["op_base"] = aq_op_base_new()
+                                _pl9c["updated"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+                                if aq_oplog_keys(aq_load_oplog(), sel_site, _lgbase9) - _keys9c:
+                                    raise ValueError("다른 편집자의 조작이 방금 로그에 추가되었습니다 — 🔄 로그 불러오기 후 다시 압축하세요")
+                                _pj9c, _dr9c = aq_plan_store(sel_site, _pl9c, aq_inst_pack(_ins9c))
+                                if _pj9c is None:
+                                    raise ValueError("배치JSON이 시트 셀 한도(50,000자)를 넘어 압축할 수 없습니다")
+                                _s9c["배치JSON"] = _pj9c
+                                aq_save_sites(_sites9c)
+                                aq_oplog_prune(sel_site, _pl9c["op_base"], only=_keys9c)   # 재생한 행만 — 그 뒤 추가분은 남김
+                                aq_layout_prune(sel_site, _sites9c)
+                                aq_load_all.clear()
+                                st.session_state[_inst_key] = _ins9c
+                                st.session_state[f"aq_oplog_fp_{sel_site}"] = aq_inst_fingerprint(_ins9c)
+                                st.session_state[f"aq_oplog_n_{sel_site}"] = 0
+                                st.session_state[_ver_key] += 1
+
+                            _lg1, _lg2, _lg3 = st.columns([3.4, 1.25, 1.25])
+                            with _lg1:
+                                st.toggle("📝 조작 로그 저장 — 드래그(이동·복제·삭제)를 바로 시트에 1행씩 추가", key=_lgk9,
+                                          disabled=not _lgbase9,
+                                          help="💾 사이트 저장(시트 전체 재기록) 없이 그림 조작이 보존되고, 같은 사이트를 연 "
+                                               "다른 편집자도 🔄 로그 불러오기로 받아 봅니다. 상자 변경·랙 복제/삭제·자동배치·"
+                                               "되돌리기·세부 조정은 로그에 남지 않아 💾 저장이 필요합니다.")
+                                if not _lgbase9:
+                                    st.caption("📝 조작 로그는 이 사이트를 💾 저장한 뒤부터 쓸 수 있습니다(로그 기준 스냅샷 필요).")
+                                elif st.session_state.get(_lgk9):
+                                    st.caption(f"📝 스냅샷 이후 로그 {_lgn9}건 — {AQ_OPLOG_COMPACT}건이 쌓이면 자동 압축"
+                                               " · 진열품목·인쇄물은 압축(또는 💾 저장) 후 반영")
+                                    if not _lgsync9:
+                                        st.warning("📝 로그로 남길 수 없는 변경(자동배치·되돌리기·세부 조정·상자/랙 변경)이 있습니다 — "
+                                                   "💾 사이트 저장 전까지 드래그 조작은 로그에 추가되지 않습니다.")
+                            with _lg2:
+                                if st.button("🔄 로그 불러오기", key=f"aq_oplog_pull_{sel_site}", disabled=not _lgbase9,
+                                             help="시트의 스냅샷 + 조작 로그로 배치를 다시 만듭니다(다른 편집자 조작 포함). "
+                                                  "로그에 없는 이 화면의 변경은 사라집니다."):
+                                    aq_load_all.clear()
+                                    st.session_state.pop(_inst_key, None)
+                                    st.session_state[_ver_key] += 1
+                                    st.rerun()
+                            with _lg3:
+                                _cmp_go9 = st.button("🗜 로그 압축", key=f"aq_oplog_cmp_{sel_site}",
+                                                     disabled=not (_lgbase9 and _lgn9),
+                                                     help="로그를 배치JSON 스냅샷으로 접어 넣고 로그 행을 정리합니다.")
+                            if _cmp_go9 or (st.session_state.pop(f"aq_oplog_compact_{sel_site}", False) and _lgsync9):
+                                try:
+                                    _aq_oplog_compact9()
+                                    st.success("📝 조작 로그를 스냅샷으로 압축했습니다"); time.sleep(0.4); st.rerun()
+                                except Exception as e:
+                                    st.error(f"로그 압축 실패: {aq_err_str(e)}")
                             # ── [V69] 배치도 파일 저장 — 캡처 대신 벡터로(확대해도 선명) · 가상랙 제외 ──
                             _ins_real9 = [x for x in _ins_eff9 if str(x.get("rack") or "") != AQ_VIRT]
                             _rk_file9 = [rk for rk in _rk_list if rk["명칭"] != AQ_VIRT]
@@ -5853,38 +6277,29 @@ elif mode == "🏪 아쿠나리스":
                         # [V49] 자유 배치 저장 (편집표가 없던 리런에서는 기존값 보존)
                         _new_plan["free"] = _free_live if df_free is not None else _free_cur
                         # [V67] 배치 저장 = 상자 인스턴스 좌표(schema 2) — 불러오면 저장 시점 모습 그대로.
-                        #  [V68] 시트 셀 50,000자 한도 대응: 좌표는 압축 포맷 inst2(상자명 미저장 — items에서
-                        #  재해석), assign/splits는 파생 하위호환(진열품목 탭·인쇄물이 읽음).
+                        #  [V68] 시트 셀 50,000자 한도 대응: 좌표는 압축 포맷 inst2(상자명 미저장 — items에서 재해석).
+                        #  [V98] inst2는 AQ_Layouts(이진 조각 행)로 — 배치JSON엔 진열 계획 + 포인터 + 깊이 줄수(rows)만.
+                        #  assign/splits는 aq_site_plan이 읽을 때 파생(진열품목 탭·인쇄물).
                         _ins_sv = st.session_state.get(f"aq_inst_{sel_site}", [])
+                        _pk_sv = None
                         if _ins_sv:
                             _new_plan["schema_version"] = AQ_SCHEMA_V
-                            _new_plan["inst2"] = aq_inst_pack(_ins_sv)
-                            _asg_dv9, _sp_dv9 = aq_inst_derive_assign(
-                                _ins_sv, st.session_state.get(f"aq_rows_{sel_site}") or {})
-                            _new_plan["assign"] = _asg_dv9
-                            if _sp_dv9:
-                                _new_plan["splits"] = _sp_dv9
+                            _new_plan["rows"] = aq_plan_rows_meta(st.session_state.get(f"aq_rows_{sel_site}"))
+                            _pk_sv = aq_inst_pack(_ins_sv)
+                        _new_plan["op_base"] = aq_op_base_new()   # [V97] 새 스냅샷 — 옛 기준 조작 로그는 무효
                         _ord_sv = st.session_state.get(f"aq_rkord_{sel_site}")   # [V55] 랙 순서 저장
                         if _ord_sv:
                             _new_plan["rack_order"] = _ord_sv
                         elif isinstance(_plan_cur.get("rack_order"), list):
                             _new_plan["rack_order"] = _plan_cur["rack_order"]
-                        # [V68] 시트 셀 한도(50,000자) 가드 — 공백 없는 JSON + 한도 임박 시
-                        #  하위호환 필드부터 단계 생략(좌표 inst2는 항상 보존), 그래도 초과면 저장 중단·안내.
+                        # [V68] 시트 셀 한도(50,000자) 가드 — 공백 없는 JSON, 초과면 저장 중단·안내.
+                        #  [V98] 좌표는 aq_plan_store가 AQ_Layouts에 새 리비전으로 먼저 추가 → 여기선 진열 계획만 잰다.
                         _SEP9 = (",", ":")
-                        _pj9 = json.dumps(_new_plan, ensure_ascii=False, separators=_SEP9)
-                        if len(_pj9) > 49500 and "splits" in _new_plan:
-                            _new_plan.pop("splits", None)
-                            _pj9 = json.dumps(_new_plan, ensure_ascii=False, separators=_SEP9)
-                            st.warning("배치JSON이 커서 하위호환 splits를 생략하고 저장합니다 — 배치 좌표는 전부 보존됩니다.")
-                        if len(_pj9) > 49500 and "assign" in _new_plan:
-                            _new_plan.pop("assign", None)
-                            _pj9 = json.dumps(_new_plan, ensure_ascii=False, separators=_SEP9)
-                            st.warning("배치JSON이 커서 하위호환 assign을 생략하고 저장합니다 — 배치 좌표는 전부 보존되지만, "
-                                       "진열품목·인쇄물의 '확정 배치 기준' 필터가 이 사이트에선 동작하지 않을 수 있습니다.")
-                        if len(_pj9) > 50000:
-                            st.error(f"저장 불가: 배치JSON {len(_pj9):,}자 — 시트 셀 한도(50,000자) 초과. "
-                                     "배치 품목 수를 줄이거나 다음 세션에서 셀 분할 저장을 요청하세요.")
+                        _pj9, _drop9 = aq_plan_store(sel_site, _new_plan, _pk_sv)
+                        if _pj9 is None:
+                            _n9j = len(json.dumps(_new_plan, ensure_ascii=False, separators=_SEP9))
+                            st.error(f"저장 불가: 배치JSON(진열 계획) {_n9j:,}자 — 시트 셀 한도(50,000자) 초과. "
+                                     "품목별 설정(items)을 줄인 뒤 다시 저장하세요.")
                         else:
                             for s in aq_sites_all:
                                 if str(s.get("농협명", "")).strip() == sel_site:
@@ -5893,11 +6308,76 @@ elif mode == "🏪 아쿠나리스":
                             aq_save_sites(aq_sites_all)
                             aq_load_all.clear()
                             st.session_state.pop(f"aq_racks_ov_{sel_site}", None)   # [V71] 시트와 동기화됨 — 랙 오버라이드 해제
-                            st.success(f"저장 완료 (AQ_Sites 시트 · 배치JSON {len(_pj9):,}자/50,000)")
+                            st.session_state[f"aq_oplog_fp_{sel_site}"] = aq_inst_fingerprint(_ins_sv)   # [V97] 로그 기준 갱신
+                            st.session_state[f"aq_oplog_n_{sel_site}"] = 0
+                            try: aq_oplog_prune(sel_site, _new_plan.get("op_base"))
+                            except Exception: pass   # 옛 기준 행은 재생되지 않는다 — 정리는 다음 기회에
+                            try: aq_layout_prune(sel_site, aq_sites_all)
+                            except Exception: pass   # [V98] 옛 리비전 조각은 포인터가 없어 읽히지 않는다
+                            _lp9 = _new_plan.get("layout") or {}
+                            st.success(f"저장 완료 (AQ_Sites 시트 · 배치JSON {len(_pj9):,}자/50,000"
+                                       + (f" · 좌표 {_lp9.get('n', 0):,}상자 → AQ_Layouts {_lp9.get('chunks', 0)}조각"
+                                          if _lp9 else "") + ")")
                             time.sleep(0.5); st.rerun()
                     except Exception as e:
                         st.error(f"저장 실패: {aq_err_str(e)}")
 
+elif mode == "📈 국내 견적 통계":
+    # ── [V89] Quotes_KR 분석 창고 — looperget/quote_warehouse.py (새 견적만 1회 디코드, 집계는 창고 리비전별 캐시) ──
+    st.header("📈 국내 견적 통계")
+    st.info("Quotes_KR에 저장된 견적(데이터JSON)을 품목·세트·배관 사실 테이블로 모아 기간·담당자별로 집계합니다.")
+    if st.button("🔄 데이터 새로고침", key="qw_reload"):
+        st.session_state.db = load_data_from_sheet()
+        st.rerun()
+
+    _wh = quote_warehouse()
+    _wst = _wh.sync(st.session_state.db.get("kr_quotes", []))
+    st.caption(f"창고: 견적 {_wst['total']:,}건 · 이번 갱신 +{_wst['added']:,} / −{_wst['removed']:,} · "
+               + (f"Parquet ({_wh.root})" if _wh.fmt else "메모리 (디스크 저장 안 함)"))
+    if not _wst["total"]:
+        st.warning("집계할 국내 견적이 없습니다. (Quotes_KR 시트 확인)")
+    else:
+        _prods = st.session_state.db["products"]
+        f1, f2, f3 = st.columns([1, 3, 2])
+        with f1:
+            _per = st.radio("기간 단위", list(QW_PERIODS), index=1, key="qw_period")
+        with f2:
+            _pvals = qw_period_values(_wh, _per)
+            _psel = st.multiselect("기간 (비우면 전체)", _pvals, default=_pvals[:1], key=f"qw_pvals_{_per}")
+        with f3:
+            _types = st.multiselect("저장 유형 (비우면 전체)", ["정식", "임시"], key="qw_types")
+
+        _trend = qw_trend(_wh, _per, save_types=_types)
+        if len(_trend) > 1:
+            st.bar_chart(_trend.set_index(QW_PERIODS[_per])[["견적수"]])
+
+        t1, t2, t3, t4 = st.tabs(["🔩 많이 나간 부품", "🧑‍💼 담당자별 할인율", "🧩 세트", "〰️ 배관"])
+        with t1:
+            _n = st.number_input("상위 N", 5, 500, 30, 5, key="qw_top_n")
+            _top = qw_top_parts(_wh, _prods, _per, _psel, _types, int(_n))
+            st.dataframe(_top, width="stretch", hide_index=True)
+        with t2:
+            st.caption("단가 확정 라인(STEP 3 표 저장분)만 — 현재 카탈로그 소비자가 × 수량 대비 견적가(1열 단가) × 수량.")
+            _disc = qw_discount_by_manager(_wh, _prods, _per, _psel, _types)
+            st.dataframe(_disc, width="stretch", hide_index=True)
+        with t3:
+            _sets = qw_set_totals(_wh, _per, _psel, _types)
+            st.dataframe(_sets, width="stretch", hide_index=True)
+        with t4:
+            _pipes = qw_pipe_totals(_wh, _per, _psel, _types)
+            st.dataframe(_pipes, width="stretch", hide_index=True)
+
+        _xbuf = io.BytesIO()
+        with pd.ExcelWriter(_xbuf, engine='xlsxwriter') as writer:
+            _trend.to_excel(writer, index=False, sheet_name="기간추이")
+            _top.to_excel(writer, index=False, sheet_name="부품")
+            _disc.to_excel(writer, index=False, sheet_name="담당자할인율")
+            _sets.to_excel(writer, index=False, sheet_name="세트")
+            _pipes.to_excel(writer, index=False, sheet_name="배관")
+        st.download_button("📥 집계 Excel 다운로드", _xbuf.getvalue(),
+                           f"KR_Quote_Stats_{datetime.datetime.now().strftime('%Y%m%d')}.xlsx",
+                           use_container_width=True)
+
 elif mode == "🇯🇵 일본 수출 분석":
     st.header("🇯🇵 일본 수출 이익 분석 (HQ Profit Analysis)")
     st.info("일본 현지 앱의 견적 데이터와 한국 본사 DB(신정공급가, 매입가)를 매칭하여 순이익을 분석합니다.")
@@ -6033,6 +6513,56 @@ elif mode == "🇯🇵 일본 수출 분석":
                     c1.download_button("📥 분석서 PDF 다운로드", pdf_bytes, f"Export_Analysis_{target_quote.get('현장명')}.pdf", "application/pdf", use_container_width=True)
                     c2.download_button("📥 분석서 Excel 다운로드", excel_buf.getvalue(), f"Export_Analysis_{target_quote.get('현장명')}.xlsx", use_container_width=True)
 
+        # ── [V88] 전체 JP 견적 집계 + 환율 민감도 — looperget/jp_analytics.py 사실 테이블(견적 내용당 1회 파싱) ──
+        st.divider()
+        st.subheader("📊 전체 일본 견적 집계")
+        _jp_cat = load_jp_merged_products(st.session_state.db["products"], st.session_state.exchange_rate)
+        _fact = jp_fact_table(jp_quotes, st.session_state.db["products"], _jp_cat)
+        if _fact.empty:
+            st.info("집계할 품목이 없습니다.")
+        else:
+            _t_rev = int(_fact["합계매출"].sum()); _t_profit = int(_fact["순이익"].sum())
+            a1, a2, a3, a4 = st.columns(4)
+            a1.metric("견적 수", f"{_fact['견적'].nunique():,} 건")
+            a2.metric("총 수출 매출", f"{_t_rev:,} 원")
+            a3.metric("총 순이익", f"{_t_profit:,} 원")
+            a4.metric("수익률", f"{(_t_profit / _t_rev * 100) if _t_rev > 0 else 0:.1f}%")
+
+            _by = st.radio("집계 기준", list(JP_ROLLUPS), horizontal=True, key="jp_rollup_by")
+            _roll = jp_rollup(_fact, _by)
+            if _by == "월별" and len(_roll) > 1:
+                st.bar_chart(_roll.set_index("월")[["합계매출", "순이익"]])
+            st.dataframe(_roll, width="stretch", hide_index=True)
+
+            st.markdown("**💱 환율 민감도** — Products_JP 엔 단가 고정, 원 환산만 변동 (신정 마진 = 현지 대리점가 매출 − 신정공급가/1.1)")
+            _r0 = float(st.session_state.exchange_rate)
+            s1, s2 = st.columns([3, 1])
+            with s1:
+                _lo, _hi = st.slider("환율 범위 (₩/¥)", 1.0, 50.0, (round(_r0 * 0.8, 1), round(_r0 * 1.2, 1)), 0.1,
+                                     key="jp_sweep_range")
+            with s2:
+                _steps = st.number_input("구간 수", 2, 41, 9, key="jp_sweep_steps")
+            _sweep_by = st.selectbox("민감도 그룹", ["전체"] + [k for k in JP_ROLLUPS if k != "견적별"], key="jp_sweep_by")
+            _rates = np.round(np.linspace(_lo, _hi, int(_steps)), 2)
+            _sweep = jp_rate_sweep(_fact, _rates, by=None if _sweep_by == "전체" else _sweep_by)
+            if _sweep_by == "전체":
+                st.line_chart(_sweep.set_index("환율")[["신정 마진율%"]])
+                st.dataframe(_sweep, width="stretch", hide_index=True)
+            else:
+                _gcol = JP_ROLLUPS[_sweep_by][-1]
+                st.dataframe(_sweep.pivot_table(index=_gcol, columns="환율", values="신정 마진율%"),
+                             width="stretch")
+
+            _xbuf = io.BytesIO()
+            with pd.ExcelWriter(_xbuf, engine='xlsxwriter') as writer:
+                for _k in JP_ROLLUPS:
+                    jp_rollup(_fact, _k).to_excel(writer, index=False, sheet_name=_k)
+                _sweep.to_excel(writer, index=False, sheet_name="환율민감도")
+                _fact.to_excel(writer, index=False, sheet_name="사실테이블")
+            st.download_button("📥 전체 집계 Excel 다운로드", _xbuf.getvalue(),
+                               f"JP_Export_Rollup_{datetime.datetime.now().strftime('%Y%m%d')}.xlsx",
+                               use_container_width=True)
+
 else:
     # ── [V11] JP 모드 견적 작성 ──────────────────────────────────
     if st.session_state.app_lang == "JP" and mode == "見積作成":
@@ -6123,21 +6653,8 @@ else:
                 if st.button("計算する (STEP 2)", type="primary"):
                     if not st.session_state.current_quote_name: st.error("現場名を入力してください。")
                     else:
-                        res = {}
-                        all_sets_db = {}
-                        for cat, val in st.session_state.db.get("sets",{}).items(): all_sets_db.update(val)
-                        for item in st.session_state.set_cart:
-                            recipe = all_sets_db.get(item["name"],{}).get("recipe",{})
-                            for pc, pq in recipe.items(): res[str(pc)] = res.get(str(pc),0) + pq*item["qty"]
-                        code_sums = {}
-                        for pi in st.session_state.pipe_cart:
-                            c = pi.get("code")
-                            if c: code_sums[c] = code_sums.get(c,0) + pi["len"]
-                        for pc, tl in code_sums.items():
-                            prod_info = next((p for p in jp_products if str(p.get("code",""))==str(pc)), None)
-                            if prod_info:
-                                ul = prod_info.get("len_per_unit",4) or 4
-                                res[str(pc)] = res.get(str(pc),0) + math.ceil(tl/ul)
+                        res = bom_engine(jp_products, st.session_state.db.get("sets",{})).baseline(
+                            st.session_state.set_cart, st.session_state.pipe_cart)   # [V81]
                         st.session_state.quote_items = res; st.session_state.quote_step = 2; st.rerun()
 
             elif st.session_state.quote_step == 2:
@@ -6369,28 +6886,8 @@ else:
         if st.button("계산하기 (STEP 2)"):
             if not st.session_state.current_quote_name: st.error("현장명을 입력해주세요.")
             else:
-                res = {}
-                all_sets_db = {}
-                for cat, val in sets.items():
-                    all_sets_db.update(val)
-                for item in st.session_state.set_cart:
-                    s_name = item['name']
-                    s_qty = item['qty']
-                    if s_name in all_sets_db:
-                        recipe = all_sets_db[s_name].get("recipe", {})
-                        for p_code_or_name, p_qty in recipe.items():
-                            res[str(p_code_or_name)] = res.get(str(p_code_or_name), 0) + (p_qty * s_qty)
-                code_sums = {}
-                for p_item in st.session_state.pipe_cart:
-                    c = p_item.get('code')
-                    if c: code_sums[c] = code_sums.get(c, 0) + p_item['len']
-                for p_code, total_len in code_sums.items():
-                    prod_info = next((item for item in all_products if str(item["code"]) == str(p_code)), None)
-                    if prod_info:
-                        unit_len = prod_info.get("len_per_unit", 4)
-                        if unit_len <= 0: unit_len = 4
-                        qty = math.ceil(total_len / unit_len)
-                        res[str(p_code)] = res.get(str(p_code), 0) + qty
+                # [V81] 세트 전개 + 배관 롤 수 — 공용 BOM 엔진(카탈로그 리비전 캐시)
+                res = bom_engine(all_products, sets).baseline(st.session_state.set_cart, st.session_state.pipe_cart)
                 st.session_state.quote_items = res; st.session_state.quote_step = 2; st.session_state.step3_ready=False; st.session_state.files_ready = False; st.rerun()
 
     elif st.session_state.quote_step == 2:
@@ -6588,78 +7085,40 @@ else:
         if "기본" in form_type and len(sel) != 1: st.warning("출력할 단가를 1개 선택해주세요."); st.stop()
         if "이익" in form_type and len(sel) < 2: st.warning("비교할 단가를 2개 선택해주세요."); st.stop()
 
-        price_rank = {"매입단가": 0, "총판가1": 1, "총판가2": 2, "대리점가1": 3, "대리점가2": 4, "계통농협": 5, "지역농협": 6, "단가(현장)": 7, "소비자가": 8}
-        if sel: sel = sorted(sel, key=lambda x: price_rank.get(x, 9))
-        pkey = {
-            "매입단가":"price_buy", "총판가1":"price_d1", "총판가2":"price_d2", 
-            "대리점가1":"price_agy1", "대리점가2":"price_agy2",
-            "계통농협":"price_nh_sys", "지역농협":"price_nh_loc",
-            "소비자가":"price_cons", "단가(현장)":"price_site"
-        }
+        if sel: sel = sorted(sel, key=lambda x: QUOTE_PRICE_RANK.get(x, 9))
+        pkey = QUOTE_PKEY   # [V78] 단가 라벨→필드 매핑은 looperget/quote_batch.py 공용
         
         if "last_sel" not in st.session_state: st.session_state.last_sel = []
         selectors_changed = (st.session_state.last_sel != sel)
-        
-        cp_map = {}
-        if st.session_state.get("custom_prices"):
-            for cp in st.session_state.custom_prices:
-                k = str(cp.get("코드", "")).strip().zfill(5) if str(cp.get("코드", "")).strip() else str(cp.get("품목", "")).strip()
-                cp_map[k] = cp
-
-        if not st.session_state.step3_ready or selectors_changed:
-            pdb = {}
-            for p in st.session_state.db["products"]:
-                pdb[p["name"]] = p
-                if p.get("code"): pdb[str(p["code"])] = p
-            
-            pk = [pkey[l] for l in sel] if sel else ["price_cons"]
-            
-            fdata = []
-            processed_keys = set()
-            
-            for n, q in st.session_state.quote_items.items():
-                inf = pdb.get(str(n), {})
-                if not inf: continue
-                
-                if "소비자가" in sel and inf.get("category", "") == "관급비용":
-                    continue
-                
-                code_val = str(inf.get("code", "")).strip().zfill(5)
-                name_val = str(inf.get("name", n)).strip()
-                code_key = code_val if code_val and code_val != "00000" else name_val
-                
-                d = {
-                    "품목": name_val, 
-                    "규격": inf.get("spec", ""), 
-                    "코드": inf.get("code", ""), 
-                    "단위": inf.get("unit", "EA"), 
-                    "수량": int(q), 
-                    "image_data": inf.get("image")
-                }
-                
-                d["price_1"] = int(inf.get(pk[0], 0))
-                if len(pk)>1: d["price_2"] = int(inf.get(pk[1], 0))
-                else: d["price_2"] = 0
-                
-                if code_key in cp_map:
-                    d["수량"] = int(cp_map[code_key].get("수량", d["수량"]))
-                    if not selectors_changed:
-                        d["price_1"] = int(cp_map[code_key].get("price_1", d["price_1"]))
-                        d["price_2"] = int(cp_map[code_key].get("price_2", d["price_2"]))
-                    processed_keys.add(code_key)
-                    
-                fdata.append(d)
-                
-            if st.session_state.get("custom_prices"):
-                for cp in st.session_state.custom_prices:
-                    k = str(cp.get("코드", "")).strip().zfill(5) if str(cp.get("코드", "")).strip() else str(cp.get("품목", "")).strip()
-                    if k not in processed_keys:
-                        fdata.append(cp.copy())
-                        
+
+        if "price_overlay" not in st.session_state: st.session_state.price_overlay = {}
+        # [V82] '소비자가' 포함 여부가 바뀌면 관급비용 행 집합이 달라진다 → 그때만 전체 재구성
+        gov_toggled = ("소비자가" in st.session_state.last_sel) != ("소비자가" in sel)
+
+        if (not st.session_state.step3_ready or st.session_state.final_edit_df is None
+                or (selectors_changed and gov_toggled)):
+            # [V78] 행 구성은 일괄 출력과 같은 함수 — 규칙 변경 시 한 곳만 고친다
+            fdata = quote_build_fdata(st.session_state.quote_items, st.session_state.get("custom_prices"),
+                                      st.session_state.db["products"], sel,
+                                      keep_custom_price=not selectors_changed)
             st.session_state.final_edit_df = pd.DataFrame(fdata)
+            if not st.session_state.step3_ready:
+                st.session_state.price_overlay = {}
+            elif st.session_state.price_overlay:
+                st.session_state.final_edit_df = quote_retier(st.session_state.final_edit_df,
+                                                              st.session_state.db["products"], sel,
+                                                              st.session_state.price_overlay)
             st.session_state.step3_ready = True
             st.session_state.last_sel = sel
             st.session_state.files_ready = False 
+        elif selectors_changed:
+            # [V82] 단가 선택만 바뀜 → 표(수량·수기 행·순서)는 그대로, price_1/price_2 열만 카탈로그 뷰에서 gather.
+            #  수동으로 고친 단가는 오버레이(행 키×단가 필드)에서 다시 덮는다 — looperget/quote_pricing.py
+            st.session_state.final_edit_df = quote_retier(st.session_state.final_edit_df,
+                                                          st.session_state.db["products"], sel,
+                                                          st.session_state.price_overlay)
+            st.session_state.last_sel = sel
+            st.session_state.files_ready = False
 
         st.markdown("---")
         
@@ -6723,6 +7182,7 @@ else:
         )
         
         st.session_state.final_edit_df = edited
+        quote_capture_overrides(edited, st.session_state.db["products"], sel, st.session_state.price_overlay)
 
         if sel:
             st.write("")
@@ -6760,172 +7220,11 @@ else:
                     except Exception:
                         pass
 
-                    pdf_excel_services = []
-                    for s in st.session_state.services:
-                        pdf_excel_services.append(s.copy())
-                        
-                    if vat_mode == "별도":
-                        for item in safe_data:
-                            try: item['price_1'] = int(round(float(item.get('price_1', 0)) / 1.1))
-                            except: pass
-                            try: item['price_2'] = int(round(float(item.get('price_2', 0)) / 1.1))
-                            except: pass
-                        for svc in pdf_excel_services:
-                            try: svc['금액'] = int(round(float(svc.get('금액', 0)) / 1.1))
-                            except: pass
-
-                    def sort_items(item_list):
-                        high = [x for x in item_list if int(float(x.get('price_1', 0))) >= 20000]
-                        norm = [x for x in item_list if int(float(x.get('price_1', 0))) < 20000]
-                        high.sort(key=lambda x: int(float(x.get('price_1', 0))), reverse=True)
-                        norm.sort(key=lambda x: str(x.get('품목', '')))
-                        return high + norm
-
-                    individual_sorted_data = sort_items(safe_data)
-
-                    if print_mode == "세트별 부품 분해 (납품 패킹용)":
-                        expanded_data = []
-                        pool = {}; price_map_1 = {}; price_map_2 = {}
-                        for item in safe_data:
-                            k = str(item.get("코드", "")).strip().zfill(5)
-                            if k == "00000" or not k: k = str(item.get("품목", "")).strip()
-                            pool[k] = pool.get(k, 0) + int(float(item.get("수량", 0)))
-                            price_map_1[k] = int(float(item.get("price_1", 0)))
-                            price_map_2[k] = int(float(item.get("price_2", 0)))
-                        
-                        all_sets_db = {}
-                        for cat, val in st.session_state.db.get("sets", {}).items(): all_sets_db.update(val)
-                        
-                        for s_item in st.session_state.set_cart:
-                            s_name = s_item['name']
-                            s_qty = s_item['qty']
-                            if s_qty <= 0 or s_name not in all_sets_db: continue
-                            recipe = all_sets_db[s_name].get("recipe", {})
-                            
-                            for p_code_or_name, p_qty_per_set in recipe.items():
-                                p_key = str(p_code_or_name).strip().zfill(5)
-                                if p_key not in pool: p_key = str(p_code_or_name).strip()
-                                req_qty = p_qty_per_set * s_qty
-                                prod_info = next((p for p in st.session_state.db["products"] if str(p.get("code","")).strip().zfill(5) == p_key or p.get("name") == p_key), {})
-                                
-                                expanded_data.append({
-                                    "품목": f"[{s_name}] {prod_info.get('name', p_key)}",
-                                    "규격": prod_info.get("spec", ""),
-                                    "코드": prod_info.get("code", p_key),
-                                    "단위": prod_info.get("unit", "EA"),
-                                    "수량": req_qty,
-                                    "price_1": price_map_1.get(p_key, 0),
-                                    "price_2": price_map_2.get(p_key, 0),
-                                    "image_data": prod_info.get("image", "")
-                                })
-                                if p_key in pool: pool[p_key] -= req_qty
-                                
-                        for p_item in st.session_state.pipe_cart:
-                            p_code = p_item.get('code')
-                            p_len = p_item.get('len', 0)
-                            prod_info = next((p for p in st.session_state.db["products"] if str(p.get("code","")).strip().zfill(5) == p_code), {})
-                            unit_len = prod_info.get("len_per_unit", 4) if prod_info else 4
-                            req_qty = math.ceil(p_len / (unit_len if unit_len > 0 else 4))
-                            p_key = str(p_code).strip().zfill(5)
-                            
-                            expanded_data.append({
-                                "품목": f"[배관] {prod_info.get('name', p_item.get('name'))}",
-                                "규격": prod_info.get("spec", p_item.get("spec", "")),
-                                "코드": p_code,
-                                "단위": prod_info.get("unit", "EA"),
-                                "수량": req_qty,
-                                "price_1": price_map_1.get(p_key, 0),
-                                "price_2": price_map_2.get(p_key, 0),
-                                "image_data": prod_info.get("image", "")
-                            })
-                            if p_key in pool: pool[p_key] -= req_qty
-                            
-                        for item in safe_data:
-                            k = str(item.get("코드", "")).strip().zfill(5)
-                            if k == "00000" or not k: k = str(item.get("품목", "")).strip()
-                            rem_qty = pool.get(k, 0)
-                            if rem_qty > 0:
-                                new_item = item.copy()
-                                new_item["품목"] = f"[추가/별도] {item.get('품목')}"
-                                new_item["수량"] = rem_qty
-                                expanded_data.append(new_item)
-                                pool[k] = 0
-                                
-                        sorted_final_data = expanded_data
-                    elif print_mode == "세트 단위 묶음 (신규)":
-                        comp_pool = {}
-                        comp_price1 = {}
-                        comp_price2 = {}
-                        
-                        for item in safe_data:
-                            match_key = str(item.get("코드", "")).strip().zfill(5)
-                            if not match_key or match_key == "00000":
-                                match_key = str(item.get("품목", "")).strip()
-                            
-                            qty = int(float(item.get("수량", 0)))
-                            comp_pool[match_key] = comp_pool.get(match_key, 0) + qty
-                            comp_price1[match_key] = int(float(item.get("price_1", 0)))
-                            comp_price2[match_key] = int(float(item.get("price_2", 0)))
-
-                        set_items_out = []
-                        all_sets_db = {}
-                        for cat, val in st.session_state.db.get("sets", {}).items(): 
-                            all_sets_db.update(val)
-                            
-                        for s_item in st.session_state.set_cart:
-                            s_name = s_item['name']
-                            s_qty = s_item['qty']
-                            if s_qty <= 0: continue
-                            
-                            s_price1 = 0
-                            s_price2 = 0
-                            s_img = ""
-                            
-                            if s_name in all_sets_db:
-                                recipe = all_sets_db[s_name].get("recipe", {})
-                                s_img = all_sets_db[s_name].get("image", "")
-                                
-                                for p_code_or_name, p_qty_per_set in recipe.items():
-                                    p_key = str(p_code_or_name).strip().zfill(5)
-                                    if p_key not in comp_pool:
-                                        p_key = str(p_code_or_name).strip()
-                                        
-                                    p1 = comp_price1.get(p_key, 0)
-                                    p2 = comp_price2.get(p_key, 0)
-                                    
-                                    s_price1 += (p1 * p_qty_per_set)
-                                    s_price2 += (p2 * p_qty_per_set)
-                                    
-                                    if p_key in comp_pool:
-                                        comp_pool[p_key] -= (p_qty_per_set * s_qty)
-                                        
-                            set_items_out.append({
-                                "품목": s_name,
-                                "규격": "세트",
-                                "코드": s_name, 
-                                "단위": "SET",
-                                "수량": s_qty,
-                                "price_1": s_price1,
-                                "price_2": s_price2,
-                                "image_data": s_img
-                            })
-                            
-                        rem_items_out = []
-                        for item in safe_data:
-                            match_key = str(item.get("코드", "")).strip().zfill(5)
-                            if not match_key or match_key == "00000":
-                                match_key = str(item.get("품목", "")).strip()
-                                
-                            rem_qty = comp_pool.get(match_key, 0)
-                            if rem_qty > 0:
-                                new_item = item.copy()
-                                new_item["수량"] = rem_qty
-                                rem_items_out.append(new_item)
-                                comp_pool[match_key] = 0 # Prevent duplicate addition
-                        
-                        sorted_final_data = sort_items(set_items_out) + sort_items(rem_items_out)
-                    else:
-                        sorted_final_data = individual_sorted_data
+                    # [V78] 부가세·정렬·출력 형태 가공 → quote_print_rows (일괄 출력과 공용)
+                    sorted_final_data, individual_sorted_data, pdf_excel_services = quote_print_rows(
+                        safe_data, st.session_state.services, st.session_state.set_cart,
+                        st.session_state.pipe_cart, st.session_state.db["products"],
+                        st.session_state.db.get("sets", {}), print_mode, vat_mode)
                     
                     st.session_state.gen_pdf = create_advanced_pdf(sorted_final_data, pdf_excel_services, st.session_state.current_quote_name, q_date.strftime("%Y-%m-%d"), fmode, sel, st.session_state.buyer_info, st.session_state.quote_remarks)
                     st.session_state.gen_excel = create_quote_excel(sorted_final_data, pdf_excel_services, st.session_state.current_quote_name, q_date.strftime("%Y-%m-%d"), fmode, sel, st.session_state.buyer_info, st.session_state.quote_remarks)
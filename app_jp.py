@@ -155,20 +155,10 @@ def get_drive_file_map():
 def get_set_drive_file_map():
     return get_drive_file_map()
 
-# 메모리 누수 방지
-def download_image_by_id(file_id):
-    if not file_id or not drive_service: return None
-    try:
-        request = drive_service.files().get_media(fileId=file_id)
-        downloader = request.execute()
-        with Image.open(io.BytesIO(downloader)) as img:
-            img_rgb = img.convert('RGB')
-            img_rgb.thumbnail((300, 225))
-            buffer = io.BytesIO()
-            img_rgb.save(buffer, format="JPEG")
-        return f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode()}"
-    except Exception:
-        return None
+# [V80] Drive 이미지 다운로드는 KR 앱과 공용 — looperget/drive_img.py (투명 PNG 흰배경·300×225 패딩·24h 캐시)
+from looperget import drive_img as _di
+_di.bind(get_google_services=get_google_services)
+from looperget.drive_img import *
 
 @st.cache_data(ttl=3600)
 def get_image_from_drive(filename_or_id):
@@ -401,845 +391,17 @@ def save_quote_to_sheet(timestamp, q_name, manager, total, json_data):
         return False
 
 # ==========================================
-# 2. PDF 및 Excel 생성 엔진 (일본 현지화: NotoSansJP 및 용어 적용)
+# 2. PDF 및 Excel 생성 엔진 → `looperget/quote_docs.py` 공용 [V80]
 # ==========================================
-class PDF(FPDF):
-    def header(self):
-        header_font = 'Helvetica'; header_style = 'B'
-        if os.path.exists(FONT_REGULAR):
-            self.add_font('NotoSansJP', '', FONT_REGULAR, uni=True)
-            header_font = 'NotoSansJP'
-            if os.path.exists(FONT_BOLD): self.add_font('NotoSansJP', 'B', FONT_BOLD, uni=True); header_style = 'B'
-            else: header_style = ''
-        self.set_font(header_font, header_style, 20)
-        self.cell(0, 15, '御 見 積 書 (Quotation)', align='C', new_x="LMARGIN", new_y="NEXT")
-        self.set_font(header_font, '', 9)
-
-    def footer(self):
-        self.set_y(-25) 
-        footer_font = 'Helvetica'; footer_style = 'B'
-        if os.path.exists(FONT_REGULAR):
-            footer_font = 'NotoSansJP'
-            if os.path.exists(FONT_BOLD): footer_style = 'B'
-            else: footer_style = ''
-        self.set_font(footer_font, footer_style, 12)
-        self.cell(0, 5, "株式会社 SHIN JIN CHEMTECH", align='C', ln=True)
-        self.set_font(footer_font, '', 9)
-        self.cell(0, 5, "www.sjct.kr", align='C', ln=True)
-        self.cell(0, 5, f'Page {self.page_no()}', align='C')
-
-def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date, form_type, price_labels, buyer_info, remarks):
-    drive_file_map = get_drive_file_map()
-    pdf = PDF()
-    pdf.set_auto_page_break(False) 
-    pdf.add_page()
-    
-    has_font = os.path.exists(FONT_REGULAR)
-    has_bold = os.path.exists(FONT_BOLD)
-    font_name = 'NotoSansJP' if has_font else 'Helvetica'
-    b_style = 'B' if has_bold else ''
-    
-    pdf.set_font(font_name, '', 10)
-    pdf.set_fill_color(255, 255, 255)
-    pdf.cell(100, 8, f" 見積日 : {quote_date}", border=0)
-    pdf.cell(90, 8, f" 現場名 : {quote_name}", border=0, align='R', new_x="LMARGIN", new_y="NEXT")
-    pdf.ln(2)
-
-    x_start = pdf.get_x(); half_w = 95; h_line = 6
-    pdf.set_fill_color(240, 240, 240)
-    pdf.set_font(font_name, b_style, 10)
-    pdf.cell(half_w, h_line, "  [ 御中 ]", border=1, fill=True)
-    pdf.cell(half_w, h_line, "  [ 供給者 ]", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
-    pdf.set_font(font_name, '', 9)
-    
-    buy_lines = [f" 会社名(現場): {quote_name}", f" ご担当者: {buyer_info.get('manager', '')}", f" TEL: {buyer_info.get('phone', '')}", f" 住所: {buyer_info.get('addr', '')}", ""]
-    sell_lines = [" 会社名: 株式会社 SHIN JIN CHEMTECH", " 代表者: Park Hyeong-Seok (印)", " 住所: Gyeonggi-do, Icheon-si, Bubal-eup, Hwangmu-ro 1859-157", " TEL: +82-31-638-1809 / FAX: +82-31-635-1801", " Email: support@sjct.kr / Web: www.sjct.kr"]
-    for b, s in zip(buy_lines, sell_lines):
-        cur_y = pdf.get_y()
-        pdf.set_xy(x_start, cur_y); pdf.cell(half_w, h_line, " " + b, border=1)
-        pdf.set_xy(x_start + half_w, cur_y); pdf.cell(half_w, h_line, " " + s, border=1)
-        pdf.ln(h_line)
-    pdf.ln(5)
-
-    def draw_table_header():
-        pdf.set_fill_color(240, 240, 240)
-        pdf.set_font(font_name, b_style, 10)
-        h_height = 10
-        pdf.cell(15, h_height, "IMG", border=1, align='C', fill=True)
-        pdf.cell(45, h_height, "品名 / 規格 / コード", border=1, align='C', fill=True) 
-        pdf.cell(10, h_height, "単位", border=1, align='C', fill=True)
-        pdf.cell(12, h_height, "数量", border=1, align='C', fill=True)
-
-        if form_type == "基本様式":
-            pdf.cell(35, h_height, f"{price_labels[0]}", border=1, align='C', fill=True)
-            pdf.cell(35, h_height, "金額", border=1, align='C', fill=True)
-            pdf.cell(38, h_height, "備考", border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
-        else:
-            l1, l2 = price_labels[0], price_labels[1]
-            pdf.set_font(font_name, '', 8)
-            pdf.cell(18, h_height, f"{l1}", border=1, align='C', fill=True)
-            pdf.cell(22, h_height, "金額", border=1, align='C', fill=True)
-            pdf.cell(18, h_height, f"{l2}", border=1, align='C', fill=True)
-            pdf.cell(22, h_height, "金額", border=1, align='C', fill=True)
-            pdf.cell(15, h_height, "利益", border=1, align='C', fill=True)
-            pdf.cell(13, h_height, "率(%)", border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
-            pdf.set_font(font_name, '', 9)
-
-    draw_table_header()
-
-    sum_qty = 0; sum_a1 = 0; sum_a2 = 0; sum_profit = 0
-
-    for item in final_data_list:
-        h = 15
-        
-        if pdf.get_y() > 260:
-            pdf.add_page()
-            draw_table_header() 
-
-        x, y = pdf.get_x(), pdf.get_y()
-        name = str(item.get("품목", "") or "")
-        spec = str(item.get("규격", "-") or "-")
-        code = str(item.get("코드", "") or "").strip().zfill(5) 
-        
-        try: qty = int(float(item.get("수량", 0)))
-        except: qty = 0
-        
-        img_id = get_best_image_id(code, item.get("image_data"), drive_file_map)
-        img_b64 = download_image_by_id(img_id)
-        
-        sum_qty += qty
-        try: p1 = int(float(item.get("price_1", 0)))
-        except: p1 = 0
-        a1 = p1 * qty
-        sum_a1 += a1
-        
-        p2 = 0; a2 = 0; profit = 0; rate = 0
-        if form_type == "利益分析様式":
-            try: p2 = int(float(item.get("price_2", 0)))
-            except: p2 = 0
-            a2 = p2 * qty
-            sum_a2 += a2; profit = a2 - a1; sum_profit += profit
-            rate = (profit / a2 * 100) if a2 else 0
-
-        pdf.cell(15, h, "", border=1)
-        if img_b64:
-            try:
-                img_data_str = img_b64.split(",", 1)[1] if "," in img_b64 else img_b64
-                img_bytes = base64.b64decode(img_data_str)
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                    tmp.write(img_bytes)
-                    tmp_path = tmp.name
-                pdf.image(tmp_path, x=x+2, y=y+2, w=11, h=11)
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-            except: pass
-
-        pdf.set_xy(x+15, y); pdf.cell(45, h, "", border=1) 
-        pdf.set_xy(x+15, y+1.5); pdf.set_font(font_name, '', 8); pdf.multi_cell(45, 4, name, align='L')
-        pdf.set_xy(x+15, y+6.0); pdf.set_font(font_name, '', 7); pdf.cell(45, 3, f"{spec}", align='L') 
-        pdf.set_xy(x+15, y+10.0); pdf.set_font(font_name, '', 7); pdf.cell(45, 3, f"{code}", align='L') 
-
-        pdf.set_xy(x+60, y); pdf.set_font(font_name, '', 9) 
-        pdf.cell(10, h, str(item.get("단위", "EA") or "EA"), border=1, align='C')
-        pdf.cell(12, h, str(qty), border=1, align='C')
-
-        if form_type == "基本様式":
-            pdf.cell(35, h, f"¥ {p1:,}", border=1, align='R')
-            pdf.cell(35, h, f"¥ {a1:,}", border=1, align='R')
-            pdf.cell(38, h, "", border=1, align='C'); pdf.ln()
-        else:
-            pdf.set_font(font_name, '', 8)
-            pdf.cell(18, h, f"¥{p1:,}", border=1, align='R')
-            pdf.cell(22, h, f"¥{a1:,}", border=1, align='R')
-            pdf.cell(18, h, f"¥{p2:,}", border=1, align='R')
-            pdf.cell(22, h, f"¥{a2:,}", border=1, align='R')
-            pdf.set_font(font_name, b_style, 8)
-            pdf.cell(15, h, f"¥{profit:,}", border=1, align='R')
-            pdf.cell(13, h, f"{rate:.1f}%", border=1, align='C')
-            pdf.set_font(font_name, '', 9); pdf.ln()
-
-    if pdf.get_y() + 10 > 260:
-        pdf.add_page()
-        draw_table_header()
-
-    pdf.set_fill_color(230, 230, 230); pdf.set_font(font_name, b_style, 9)
-    pdf.cell(15+45+10, 10, "小 計 (Sub Total)", border=1, align='C', fill=True)
-    pdf.cell(12, 10, f"{sum_qty:,}", border=1, align='C', fill=True)
-    
-    if form_type == "基本様式":
-        pdf.cell(35, 10, "", border=1, fill=True)
-        pdf.cell(35, 10, f"¥ {sum_a1:,}", border=1, align='R', fill=True)
-        pdf.cell(38, 10, "", border=1, fill=True); pdf.ln()
-    else:
-        avg_rate = (sum_profit / sum_a2 * 100) if sum_a2 else 0
-        pdf.set_font(font_name, b_style, 8)
-        pdf.cell(18, 10, "", border=1, fill=True); pdf.cell(22, 10, f"¥ {sum_a1:,}", border=1, align='R', fill=True)
-        pdf.cell(18, 10, "", border=1, fill=True); pdf.cell(22, 10, f"¥ {sum_a2:,}", border=1, align='R', fill=True)
-        pdf.cell(15, 10, f"¥ {sum_profit:,}", border=1, align='R', fill=True)
-        pdf.cell(13, 10, f"{avg_rate:.1f}%", border=1, align='C', fill=True); pdf.ln()
-
-    svc_total = 0
-    if service_items:
-        if pdf.get_y() + (len(service_items) * 6) + 10 > 260:
-             pdf.add_page()
-             pdf.ln(2)
-        else:
-             pdf.ln(2)
-             
-        pdf.set_fill_color(255, 255, 224)
-        pdf.cell(190, 6, " [ 追加費用 ] ", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
-        for s in service_items:
-            svc_total += s['金額']; pdf.cell(155, 6, s['項目'], border=1)
-            pdf.cell(35, 6, f"¥ {s['金額']:,}", border=1, align='R', new_x="LMARGIN", new_y="NEXT")
-
-    pdf.ln(5); pdf.set_font(font_name, b_style, 12)
-    
-    if pdf.get_y() + 30 > 270:
-        pdf.add_page()
-    
-    pdf.multi_cell(0, 5, remarks, align='R')
-    pdf.ln(2)
-
-    if form_type == "基本様式":
-        final_total = sum_a1 + svc_total
-        pdf.cell(120, 10, "", border=0); pdf.cell(35, 10, "総 合 計", border=1, align='C', fill=True)
-        pdf.cell(35, 10, f"¥ {final_total:,}", border=1, align='R')
-    else:
-        t1_final = sum_a1 + svc_total; t2_final = sum_a2 + svc_total; total_profit = t2_final - t1_final
-        pdf.set_font(font_name, '', 10)
-        pdf.cell(82, 10, "総 合 計", border=1, align='C', fill=True)
-        pdf.cell(40, 10, f"¥ {t1_final:,}", border=1, align='R')
-        pdf.set_font(font_name, b_style, 10)
-        pdf.cell(40, 10, f"¥ {t2_final:,}", border=1, align='R')
-        pdf.cell(28, 10, f"(¥ {total_profit:,})", border=1, align='R')
-        
-    return bytes(pdf.output())
-
-def create_quote_excel(final_data_list, service_items, quote_name, quote_date, form_type, price_labels, buyer_info, remarks):
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-    ws = workbook.add_worksheet("御見積書")
-    
-    drive_file_map = get_drive_file_map()
-
-    # Formats
-    fmt_title = workbook.add_format({'bold': True, 'font_size': 16, 'align': 'center', 'valign': 'vcenter'})
-    fmt_header = workbook.add_format({'bold': True, 'bg_color': '#f0f0f0', 'border': 1, 'align': 'center', 'valign': 'vcenter'})
-    fmt_text_wrap = workbook.add_format({'border': 1, 'valign': 'vcenter', 'text_wrap': True}) 
-    fmt_text = workbook.add_format({'border': 1, 'valign': 'vcenter'})
-    fmt_num = workbook.add_format({'border': 1, 'num_format': '¥ #,##0', 'valign': 'vcenter'})
-    fmt_center = workbook.add_format({'border': 1, 'align': 'center', 'valign': 'vcenter'})
-
-    ws.merge_range('A1:F1', '御 見 積 書', fmt_title)
-    ws.write(1, 0, f"現場名: {quote_name}")
-    ws.write(1, 4, f"日付: {quote_date}")
-    ws.write(2, 0, f"ご担当者: {buyer_info.get('manager', '')}")
-    ws.write(2, 4, f"TEL: {buyer_info.get('phone', '')}")
-
-    headers = ["画像", "品名/規格", "単位", "数量"]
-    if form_type == "基本様式":
-        headers.extend([price_labels[0], "金額", "備考"])
-    else:
-        headers.extend([price_labels[0], "金額(1)", price_labels[1], "金額(2)", "利益", "率(%)"])
-
-    for col, h in enumerate(headers):
-        ws.write(4, col, h, fmt_header)
-
-    ws.set_column(0, 0, 15)
-    ws.set_column(1, 1, 40)
-    ws.set_column(2, 2, 8)
-    ws.set_column(3, 3, 8)
-
-    row = 5
-    total_a1 = 0
-    total_a2 = 0
-    total_profit = 0
-    
-    temp_files = [] 
-    ROW_HEIGHT_PT = 80
-
-    for item in final_data_list:
-        ws.set_row(row, ROW_HEIGHT_PT)
-        
-        try: qty = int(float(item.get("수량", 0)))
-        except: qty = 0
-        try: p1 = int(float(item.get("price_1", 0)))
-        except: p1 = 0
-        a1 = p1 * qty
-        total_a1 += a1
-        
-        code = str(item.get("코드", "") or "").strip().zfill(5)
-        
-        img_id = get_best_image_id(code, item.get("image_data"), drive_file_map)
-        img_b64 = download_image_by_id(img_id)
-            
-        if img_b64:
-            try:
-                img_data_str = img_b64.split(",", 1)[1] if "," in img_b64 else img_b64
-                img_bytes = base64.b64decode(img_data_str)
-                
-                with Image.open(io.BytesIO(img_bytes)) as pil_img:
-                    orig_w, orig_h = pil_img.size
-                    pil_img.close()
-                
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                    tmp.write(img_bytes)
-                    tmp_path = tmp.name
-                    temp_files.append(tmp_path)
-                
-                cell_w_px = 110 
-                cell_h_px = 106
-                
-                scale_x = cell_w_px / orig_w
-                scale_y = cell_h_px / orig_h
-                scale = min(scale_x, scale_y) * 0.9 
-                
-                final_w = orig_w * scale
-                final_h = orig_h * scale
-                
-                offset_x = (cell_w_px - final_w) / 2
-                offset_y = (cell_h_px - final_h) / 2
-                
-                ws.insert_image(row, 0, tmp_path, {
-                    'x_scale': scale, 
-                    'y_scale': scale, 
-                    'x_offset': offset_x, 
-                    'y_offset': offset_y,
-                    'object_position': 1
-                })
-            except:
-                ws.write(row, 0, "No Img", fmt_center)
-        else:
-            ws.write(row, 0, "", fmt_center)
-
-        item_info_text = f"{item.get('품목', '')}\n{item.get('규격', '')}\n{item.get('코드', '')}"
-        ws.write(row, 1, item_info_text, fmt_text_wrap)
-
-        ws.write(row, 2, item.get("단위", "EA"), fmt_center)
-        ws.write(row, 3, qty, fmt_center)
-
-        if form_type == "基本様式":
-            ws.write(row, 4, p1, fmt_num)
-            ws.write(row, 5, a1, fmt_num)
-            ws.write(row, 6, "", fmt_text)
-        else:
-            try: p2 = int(float(item.get("price_2", 0)))
-            except: p2 = 0
-            a2 = p2 * qty
-            profit = a2 - a1
-            rate = (profit / a2 * 100) if a2 else 0
-            total_a2 += a2
-            total_profit += profit
-
-            ws.write(row, 4, p1, fmt_num)
-            ws.write(row, 5, a1, fmt_num)
-            ws.write(row, 6, p2, fmt_num)
-            ws.write(row, 7, a2, fmt_num)
-            ws.write(row, 8, profit, fmt_num)
-            ws.write(row, 9, f"{rate:.1f}%", fmt_center)
-        row += 1
-
-    svc_total = 0
-    if service_items:
-        row += 1
-        ws.write(row, 1, "[追加費用]", fmt_header)
-        row += 1
-        for s in service_items:
-            ws.write(row, 1, s['項目'], fmt_text)
-            price_col = 5 if form_type == "基本様式" else 7
-            ws.write(row, price_col, s['金額'], fmt_num)
-            svc_total += s['金額']
-            row += 1
-
-    row += 1
-    ws.write(row, 1, "総 合 計", fmt_header)
-    final_sum = (total_a1 if form_type == "基本様式" else total_a2) + svc_total
-    col_idx = 5 if form_type == "基本様式" else 7
-    ws.write(row, col_idx, final_sum, fmt_num)
-
-    row += 2
-    ws.write(row, 1, "特約事項及び備考", fmt_header)
-    row += 1
-    ws.write(row, 1, remarks, fmt_text_wrap)
-
-    workbook.close()
-    
-    for f in temp_files:
-        try: 
-            if os.path.exists(f):
-                os.unlink(f)
-        except: pass
-        
-    return output.getvalue()
-
-def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db_sets, quote_name):
-    drive_file_map = get_drive_file_map()
-    pdf = PDF()
-    pdf.set_auto_page_break(False)
-    pdf.add_page()
-    
-    has_font = os.path.exists(FONT_REGULAR)
-    has_bold = os.path.exists(FONT_BOLD)
-    font_name = 'NotoSansJP' if has_font else 'Helvetica'
-    b_style = 'B' if has_bold else ''
-    
-    baseline_counts = {}
-    all_sets_db = {}
-    for cat, val in db_sets.items(): all_sets_db.update(val)
-    
-    for item in set_cart:
-        recipe = all_sets_db.get(item['name'], {}).get("recipe", {})
-        for p_code, p_qty in recipe.items():
-            baseline_counts[str(p_code)] = baseline_counts.get(str(p_code), 0) + (p_qty * item['qty'])
-            
-    code_sums = {}
-    for p_item in pipe_cart:
-        c = p_item.get('code')
-        if c: code_sums[c] = code_sums.get(c, 0) + p_item['len']
-    for p_code, total_len in code_sums.items():
-        prod_info = next((item for item in db_products if str(item["code"]) == str(p_code)), None)
-        if prod_info:
-            unit_len = prod_info.get("len_per_unit", 4)
-            if unit_len <= 0: unit_len = 4
-            qty = math.ceil(total_len / unit_len)
-            baseline_counts[str(p_code)] = baseline_counts.get(str(p_code), 0) + qty
-
-    additional_items_list = []
-    temp_baseline = baseline_counts.copy()
-
-    for item in final_data_list:
-        code = str(item.get("코드", "")).strip().zfill(5) if item.get("코드") else ""
-        try: total_qty = int(float(item.get("수량", 0)))
-        except: total_qty = 0
-        name = item.get("품목", "")
-        spec = item.get("규격", "")
-        img_data = item.get("image_data", "")
-
-        if code and code in temp_baseline:
-            base_qty = temp_baseline[code]
-            if total_qty > base_qty:
-                diff = total_qty - base_qty
-                additional_items_list.append({
-                    "name": name, "spec": spec, "qty": diff, 
-                    "code": code, "image": img_data
-                })
-                temp_baseline[code] = total_qty
-            else:
-                temp_baseline[code] -= total_qty
-        else:
-            if total_qty > 0:
-                additional_items_list.append({
-                    "name": name, "spec": spec, "qty": total_qty, 
-                    "code": code, "image": img_data
-                })
-
-    pdf.set_font(font_name, b_style, 16)
-    pdf.cell(0, 15, "資材構成明細書 (Material Composition Report)", align='C', new_x="LMARGIN", new_y="NEXT")
-    pdf.set_font(font_name, '', 10)
-    pdf.cell(0, 8, f"現場名: {quote_name}", align='R', new_x="LMARGIN", new_y="NEXT")
-    pdf.ln(5)
-
-    def check_page_break(h_needed):
-        if pdf.get_y() + h_needed > 270:
-            pdf.add_page()
-
-    # 1. 부속 세트 구성 -> 付属セット構成
-    pdf.set_fill_color(220, 220, 220)
-    pdf.set_font(font_name, b_style, 12)
-    pdf.cell(0, 10, "1. 付属セット構成 (Fitting Sets)", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
-    
-    pdf.set_font(font_name, '', 10)
-    row_h = 35 
-    header_h = 8
-    
-    col_w_img = 50
-    col_w_name = 70
-    col_w_type = 40
-    col_w_qty = 30
-    
-    pdf.set_fill_color(240, 240, 240)
-    pdf.cell(col_w_img, header_h, "IMG", border=1, align='C', fill=True) 
-    pdf.cell(col_w_name, header_h, "セット名 (Set Name)", border=1, align='C', fill=True)
-    pdf.cell(col_w_type, header_h, "区分", border=1, align='C', fill=True)
-    pdf.cell(col_w_qty, header_h, "数量", border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
-
-    for item in set_cart:
-        check_page_break(row_h)
-        name = item.get('name')
-        qty = item.get('qty')
-        stype = item.get('type')
-        
-        img_id = None
-        for cat, sets in db_sets.items():
-            if name in sets:
-                img_id = sets[name].get('image')
-                break
-        
-        img_b64 = download_image_by_id(img_id)
-        
-        x, y = pdf.get_x(), pdf.get_y()
-        pdf.cell(col_w_img, row_h, "", border=1)
-        if img_b64:
-            try:
-                img_data = img_b64.split(",", 1)[1]
-                img_bytes = base64.b64decode(img_data)
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                    tmp.write(img_bytes)
-                    tmp_path = tmp.name
-                
-                pdf.image(tmp_path, x=x+6.25, y=y+2.5, w=37.5, h=30)
-                os.unlink(tmp_path)
-            except: pass
-            
-        pdf.set_xy(x+col_w_img, y)
-        pdf.cell(col_w_name, row_h, name, border=1, align='L')
-        pdf.cell(col_w_type, row_h, stype, border=1, align='C')
-        pdf.cell(col_w_qty, row_h, str(qty), border=1, align='C', new_x="LMARGIN", new_y="NEXT")
-    
-    pdf.ln(5)
-
-    # 2. 배관 물량 -> 配管数量
-    pdf.set_font(font_name, b_style, 12)
-    pdf.set_fill_color(220, 220, 220)
-    check_page_break(20)
-    pdf.cell(0, 10, "2. 配管数量 (Pipe Quantities)", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
-    
-    pdf.set_font(font_name, '', 10)
-    pdf.set_fill_color(240, 240, 240)
-    pdf.cell(20, header_h, "IMG", border=1, align='C', fill=True)
-    pdf.cell(100, header_h, "品名 (Product Name)", border=1, align='C', fill=True)
-    pdf.cell(40, header_h, "総長さ(m)", border=1, align='C', fill=True)
-    pdf.cell(30, header_h, "ロール数(EA)", border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
-
-    pipe_summary = {}
-    for p in pipe_cart:
-        code = p.get('code')
-        if not code: continue
-        if code not in pipe_summary:
-            pipe_summary[code] = {'len': 0, 'name': p.get('name'), 'spec': p.get('spec')}
-        pipe_summary[code]['len'] += p.get('len', 0)
-
-    for code, info in pipe_summary.items():
-        check_page_break(15)
-        prod_info = next((item for item in db_products if str(item["code"]) == str(code)), None)
-        unit_len = prod_info.get("len_per_unit", 4) if prod_info else 4
-        if unit_len <= 0: unit_len = 4
-        rolls = math.ceil(info['len'] / unit_len)
-        img_val = prod_info.get("image") if prod_info else None
-        
-        img_id = get_best_image_id(code, img_val, drive_file_map)
-        img_b64 = download_image_by_id(img_id)
-
-        x, y = pdf.get_x(), pdf.get_y()
-        pdf.cell(20, 15, "", border=1)
-        if img_b64:
-            try:
-                img_data = img_b64.split(",", 1)[1]
-                img_bytes = base64.b64decode(img_data)
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                    tmp.write(img_bytes)
-                    tmp_path = tmp.name
-                pdf.image(tmp_path, x=x+2, y=y+2, w=11, h=11)
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-            except: pass
-            
-        pdf.set_xy(x+20, y)
-        pdf.cell(100, 15, f"{info['name']} ({info['spec']})", border=1, align='L')
-        pdf.cell(40, 15, f"{info['len']} m", border=1, align='C')
-        pdf.cell(30, 15, f"{rolls} ﾛｰﾙ", border=1, align='C', new_x="LMARGIN", new_y="NEXT")
-
-    pdf.ln(5)
-
-    # 3. 추가 자재 -> 追加資材
-    if additional_items_list:
-        pdf.set_font(font_name, b_style, 12)
-        pdf.set_fill_color(220, 220, 220)
-        check_page_break(20)
-        pdf.cell(0, 10, "3. 追加資材 (Additional Components / Spares)", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
-        
-        pdf.set_font(font_name, '', 10)
-        pdf.set_fill_color(240, 240, 240)
-        pdf.cell(20, header_h, "IMG", border=1, align='C', fill=True)
-        pdf.cell(130, header_h, "品名 / 規格 (Name/Spec)", border=1, align='C', fill=True)
-        pdf.cell(40, header_h, "追加数量", border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
-
-        for item in additional_items_list:
-            check_page_break(15)
-            name = item['name']
-            spec = item['spec'] if item['spec'] else '-'
-            qty = item['qty']
-            code = item.get('code')
-            img_val = item.get('image')
-            
-            img_id = get_best_image_id(code, img_val, drive_file_map)
-            img_b64 = download_image_by_id(img_id)
-
-            x, y = pdf.get_x(), pdf.get_y()
-            pdf.cell(20, 15, "", border=1)
-            if img_b64:
-                try:
-                    img_data = img_b64.split(",", 1)[1]
-                    img_bytes = base64.b64decode(img_data)
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                        tmp.write(img_bytes)
-                        tmp_path = tmp.name
-                    pdf.image(tmp_path, x=x+2, y=y+2, w=11, h=11)
-                    if os.path.exists(tmp_path):
-                        os.unlink(tmp_path)
-                except: pass
-                
-            pdf.set_xy(x+20, y)
-            pdf.cell(130, 15, f"{name} ({spec})", border=1, align='L')
-            pdf.cell(40, 15, f"{int(qty)} EA", border=1, align='C', new_x="LMARGIN", new_y="NEXT")
-        
-        pdf.ln(5)
-
-    # 4. 전체 자재 산출 목록 -> 全体資材一覧
-    pdf.set_font(font_name, b_style, 12)
-    pdf.set_fill_color(220, 220, 220)
-    check_page_break(20)
-    idx_num = "4" if additional_items_list else "3"
-    pdf.cell(0, 10, f"{idx_num}. 全体資材一覧 (Total Components)", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
-    
-    pdf.set_font(font_name, '', 10)
-    pdf.set_fill_color(240, 240, 240)
-    pdf.cell(20, header_h, "IMG", border=1, align='C', fill=True)
-    pdf.cell(130, header_h, "品名 / 規格 (Name/Spec)", border=1, align='C', fill=True)
-    pdf.cell(40, header_h, "総数量", border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
-
-    for item in final_data_list:
-        try: qty = int(float(item.get("수량", 0)))
-        except: qty = 0
-        if qty == 0: continue
-
-        check_page_break(15)
-        name = item.get("품목", "")
-        spec = item.get("규격", "-")
-        code = item.get("코드", "")
-        img_val = item.get("image_data")
-        
-        img_id = get_best_image_id(code, img_val, drive_file_map)
-        img_b64 = download_image_by_id(img_id)
-
-        x, y = pdf.get_x(), pdf.get_y()
-        pdf.cell(20, 15, "", border=1)
-        if img_b64:
-            try:
-                img_data = img_b64.split(",", 1)[1]
-                img_bytes = base64.b64decode(img_data)
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                    tmp.write(img_bytes)
-                    tmp_path = tmp.name
-                pdf.image(tmp_path, x=x+2, y=y+2, w=11, h=11)
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-            except: pass
-            
-        pdf.set_xy(x+20, y)
-        pdf.cell(130, 15, f"{name} ({spec})", border=1, align='L')
-        pdf.cell(40, 15, f"{int(qty)} EA", border=1, align='C', new_x="LMARGIN", new_y="NEXT")
-
-    return bytes(pdf.output())
-
-def create_composition_excel(set_cart, pipe_cart, final_data_list, db_products, db_sets, quote_name):
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-    drive_file_map = get_drive_file_map()
-    
-    fmt_header = workbook.add_format({'bold': True, 'bg_color': '#f0f0f0', 'border': 1, 'align': 'center', 'valign': 'vcenter'})
-    fmt_center = workbook.add_format({'border': 1, 'align': 'center', 'valign': 'vcenter'})
-    fmt_left = workbook.add_format({'border': 1, 'align': 'left', 'valign': 'vcenter'})
-
-    baseline_counts = {}
-    all_sets_db = {}
-    for cat, val in db_sets.items(): all_sets_db.update(val)
-    for item in set_cart:
-        recipe = all_sets_db.get(item['name'], {}).get("recipe", {})
-        for p, q in recipe.items(): baseline_counts[str(p)] = baseline_counts.get(str(p), 0) + (q * item['qty'])
-    
-    code_sums = {}
-    for p_item in pipe_cart:
-        c = p_item.get('code')
-        if c: code_sums[c] = code_sums.get(c, 0) + p_item['len']
-    for p_code, total_len in code_sums.items():
-        prod_info = next((item for item in db_products if str(item["code"]) == str(p_code)), None)
-        if prod_info:
-            unit_len = prod_info.get("len_per_unit", 4)
-            if unit_len <= 0: unit_len = 4
-            baseline_counts[str(p_code)] = baseline_counts.get(str(p_code), 0) + math.ceil(total_len / unit_len)
-
-    additional_items_list = []
-    temp_baseline = baseline_counts.copy()
-
-    for item in final_data_list:
-        code = str(item.get("코드", "")).strip().zfill(5) if item.get("코드") else ""
-        try: total_qty = int(float(item.get("수량", 0)))
-        except: total_qty = 0
-        name = item.get("품목", "")
-        spec = item.get("규격", "")
-        img_data = item.get("image_data", "")
-
-        if code and code in temp_baseline:
-            base_qty = temp_baseline[code]
-            if total_qty > base_qty:
-                diff = total_qty - base_qty
-                additional_items_list.append({"name": name, "spec": spec, "qty": diff, "code": code, "image": img_data})
-                temp_baseline[code] = total_qty
-            else:
-                temp_baseline[code] -= total_qty
-        else:
-            if total_qty > 0:
-                additional_items_list.append({"name": name, "spec": spec, "qty": total_qty, "code": code, "image": img_data})
-
-    temp_files = []
-
-    def insert_scaled_image(ws, row, col, img_b64):
-        if not img_b64: 
-            ws.write(row, col, "", fmt_center)
-            return
-        try:
-            img_data = img_b64.split(",", 1)[1] if "," in img_b64 else img_b64
-            img_bytes = base64.b64decode(img_data)
-            
-            with Image.open(io.BytesIO(img_bytes)) as pil_img:
-                orig_w, orig_h = pil_img.size
-                pil_img.close()
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                tmp.write(img_bytes)
-                tmp_path = tmp.name
-                temp_files.append(tmp_path)
-            
-            cell_w_px = 110
-            cell_h_px = 106
-            
-            scale_x = cell_w_px / orig_w
-            scale_y = cell_h_px / orig_h
-            scale = min(scale_x, scale_y) * 0.9 
-            
-            final_w = orig_w * scale
-            final_h = orig_h * scale
-            
-            offset_x = (cell_w_px - final_w) / 2
-            offset_y = (cell_h_px - final_h) / 2
-            
-            ws.insert_image(row, col, tmp_path, {
-                'x_scale': scale, 'y_scale': scale,
-                'x_offset': offset_x, 'y_offset': offset_y,
-                'object_position': 1
-            })
-        except:
-            ws.write(row, col, "Err", fmt_center)
-
-    ws1 = workbook.add_worksheet("付属セット")
-    ws1.write(0, 0, "画像", fmt_header)
-    ws1.write(0, 1, "セット名", fmt_header)
-    ws1.write(0, 2, "区分", fmt_header)
-    ws1.write(0, 3, "数量", fmt_header)
-    ws1.set_column(0, 0, 15)
-    ws1.set_column(1, 1, 30)
-    
-    row = 1
-    for item in set_cart:
-        ws1.set_row(row, 80)
-        name = item.get('name')
-        img_id = None
-        for cat, sets in db_sets.items():
-            if name in sets:
-                img_id = sets[name].get('image')
-                break
-        insert_scaled_image(ws1, row, 0, download_image_by_id(img_id))
-        ws1.write(row, 1, name, fmt_left)
-        ws1.write(row, 2, item.get('type'), fmt_center)
-        ws1.write(row, 3, item.get('qty'), fmt_center)
-        row += 1
-
-    ws2 = workbook.add_worksheet("配管数量")
-    ws2.write(0, 0, "画像", fmt_header)
-    ws2.write(0, 1, "品名", fmt_header)
-    ws2.write(0, 2, "総長さ(m)", fmt_header)
-    ws2.write(0, 3, "ロール数", fmt_header)
-    ws2.set_column(0, 0, 15)
-    ws2.set_column(1, 1, 30)
-
-    pipe_summary = {}
-    for p in pipe_cart:
-        code = p.get('code')
-        if not code: continue
-        if code not in pipe_summary:
-            pipe_summary[code] = {'len': 0, 'name': p.get('name'), 'spec': p.get('spec')}
-        pipe_summary[code]['len'] += p.get('len', 0)
-
-    row = 1
-    for code, info in pipe_summary.items():
-        ws2.set_row(row, 80)
-        prod_info = next((item for item in db_products if str(item["code"]) == str(code)), None)
-        unit_len = prod_info.get("len_per_unit", 4) if prod_info else 4
-        if unit_len <= 0: unit_len = 4
-        rolls = math.ceil(info['len'] / unit_len)
-        img_val = prod_info.get("image") if prod_info else None
-        
-        insert_scaled_image(ws2, row, 0, download_image_by_id(get_best_image_id(code, img_val, drive_file_map)))
-        ws2.write(row, 1, f"{info['name']} ({info['spec']})", fmt_left)
-        ws2.write(row, 2, info['len'], fmt_center)
-        ws2.write(row, 3, rolls, fmt_center)
-        row += 1
-
-    if additional_items_list:
-        ws_add = workbook.add_worksheet("追加資材")
-        ws_add.write(0, 0, "画像", fmt_header)
-        ws_add.write(0, 1, "品名", fmt_header)
-        ws_add.write(0, 2, "規格", fmt_header)
-        ws_add.write(0, 3, "追加数量", fmt_header)
-        ws_add.set_column(0, 0, 15)
-        ws_add.set_column(1, 1, 30)
-        
-        row = 1
-        for item in additional_items_list:
-            ws_add.set_row(row, 80)
-            img_val = item.get('image')
-            code = item.get('code')
-            
-            insert_scaled_image(ws_add, row, 0, download_image_by_id(get_best_image_id(code, img_val, drive_file_map)))
-            ws_add.write(row, 1, item['name'], fmt_left)
-            ws_add.write(row, 2, item['spec'], fmt_center)
-            ws_add.write(row, 3, item['qty'], fmt_center)
-            row += 1
-
-    ws3 = workbook.add_worksheet("全体資材一覧")
-    ws3.write(0, 0, "画像", fmt_header)
-    ws3.write(0, 1, "品名", fmt_header)
-    ws3.write(0, 2, "規格", fmt_header)
-    ws3.write(0, 3, "総数量", fmt_header)
-    ws3.set_column(0, 0, 15)
-    ws3.set_column(1, 1, 30)
-
-    row = 1
-    for item in final_data_list:
-        try: qty = int(float(item.get("수량", 0)))
-        except: qty = 0
-        if qty == 0: continue
-        
-        ws3.set_row(row, 80)
-        code = item.get("코드", "")
-        img_val = item.get("image_data")
-        
-        insert_scaled_image(ws3, row, 0, download_image_by_id(get_best_image_id(code, img_val, drive_file_map)))
-        ws3.write(row, 1, item.get("품목", ""), fmt_left)
-        ws3.write(row, 2, item.get("규격", "-"), fmt_center)
-        ws3.write(row, 3, qty, fmt_center)
-        row += 1
-
-    workbook.close()
-    
-    for f in temp_files:
-        try: 
-            if os.path.exists(f):
-                os.unlink(f)
-        except: pass
-        
-    return output.getvalue()
+# KR 앱과 같은 엔진을 locale="JP"로 호출한다(문구·¥ 표기·NotoSansJP만 다름).
+# 예전 복사본 4종(L395-1244)은 삭제 — KR 쪽 개선(V79 줄바꿈·쪽 나눔 등)이 그대로 따라온다.
+from looperget import quote_docs as _qd
+_qd.bind(FONT_REGULAR_JP=FONT_REGULAR, FONT_BOLD_JP=FONT_BOLD,
+         get_drive_file_map_deep=get_drive_file_map,
+         get_best_image_id=get_best_image_id,
+         download_image_by_id=download_image_by_id)
+from looperget.quote_docs import DOC_LOCALES, doc_vat_exclude, create_advanced_pdf, create_quote_excel, create_composition_pdf, create_composition_excel
+from looperget.bom import bom_engine   # [V81] 세트 전개 공용 엔진
 
 # ==========================================
 # 3. 메인 로직 (DB Init & 2FA Lockout)
@@ -1821,28 +983,8 @@ else:
         if st.button("計算する (STEP 2)"):
             if not st.session_state.current_quote_name: st.error("現場名を入力してください。")
             else:
-                res = {}
-                all_sets_db = {}
-                for cat, val in sets.items():
-                    all_sets_db.update(val)
-                for item in st.session_state.set_cart:
-                    s_name = item['name']
-                    s_qty = item['qty']
-                    if s_name in all_sets_db:
-                        recipe = all_sets_db[s_name].get("recipe", {})
-                        for p_code_or_name, p_qty in recipe.items():
-                            res[str(p_code_or_name)] = res.get(str(p_code_or_name), 0) + (p_qty * s_qty)
-                code_sums = {}
-                for p_item in st.session_state.pipe_cart:
-                    c = p_item.get('code')
-                    if c: code_sums[c] = code_sums.get(c, 0) + p_item['len']
-                for p_code, total_len in code_sums.items():
-                    prod_info = next((item for item in all_products if str(item["code"]) == str(p_code)), None)
-                    if prod_info:
-                        unit_len = prod_info.get("len_per_unit", 4)
-                        if unit_len <= 0: unit_len = 4
-                        qty = math.ceil(total_len / unit_len)
-                        res[str(p_code)] = res.get(str(p_code), 0) + qty
+                # [V81] 세트 전개 + 배관 롤 수 — KR 앱과 같은 BOM 엔진
+                res = bom_engine(all_products, sets).baseline(st.session_state.set_cart, st.session_state.pipe_cart)
                 st.session_state.quote_items = res; st.session_state.quote_step = 2; st.session_state.step3_ready=False; st.session_state.files_ready = False; st.rerun()
 
     elif st.session_state.quote_step == 2:
@@ -2169,19 +1311,10 @@ else:
                     fmode = "基本様式" if "基本" in form_type else "利益分析様式"
                     safe_data = edited.fillna(0).to_dict('records')
                     
-                    pdf_excel_services = []
-                    for s in st.session_state.services:
-                        pdf_excel_services.append(s.copy())
-                        
                     if vat_mode == "税抜 (別)":
-                        for item in safe_data:
-                            try: item['price_1'] = int(round(float(item.get('price_1', 0)) / 1.1))
-                            except: pass
-                            try: item['price_2'] = int(round(float(item.get('price_2', 0)) / 1.1))
-                            except: pass
-                        for svc in pdf_excel_services:
-                            try: svc['金額'] = int(round(float(svc.get('金額', 0)) / 1.1))
-                            except: pass
+                        pdf_excel_services = doc_vat_exclude(safe_data, st.session_state.services, locale="JP")
+                    else:
+                        pdf_excel_services = [s.copy() for s in st.session_state.services]
 
                     def sort_items(item_list):
                         high = [x for x in item_list if int(float(x.get('price_1', 0))) >= 20000]
@@ -2208,9 +1341,7 @@ else:
                             comp_price2[match_key] = int(float(item.get("price_2", 0)))
 
                         set_items_out = []
-                        all_sets_db = {}
-                        for cat, val in st.session_state.db.get("sets", {}).items(): 
-                            all_sets_db.update(val)
+                        bom = bom_engine(st.session_state.db['products'], st.session_state.db.get("sets", {}))
                             
                         for s_item in st.session_state.set_cart:
                             s_name = s_item['name']
@@ -2221,9 +1352,9 @@ else:
                             s_price2 = 0
                             s_img = ""
                             
-                            if s_name in all_sets_db:
-                                recipe = all_sets_db[s_name].get("recipe", {})
-                                s_img = all_sets_db[s_name].get("image", "")
+                            if s_name in bom.sets:
+                                recipe = bom.recipe(s_name)
+                                s_img = bom.info(s_name).get("image", "")
                                 
                                 for p_code_or_name, p_qty_per_set in recipe.items():
                                     p_key = str(p_code_or_name).strip().zfill(5)
@@ -2267,11 +1398,14 @@ else:
                     else:
                         sorted_final_data = individual_sorted_data
                     
-                    st.session_state.gen_pdf = create_advanced_pdf(sorted_final_data, pdf_excel_services, st.session_state.current_quote_name, q_date.strftime("%Y-%m-%d"), fmode, sel, st.session_state.buyer_info, st.session_state.quote_remarks)
-                    st.session_state.gen_excel = create_quote_excel(sorted_final_data, pdf_excel_services, st.session_state.current_quote_name, q_date.strftime("%Y-%m-%d"), fmode, sel, st.session_state.buyer_info, st.session_state.quote_remarks)
+                    # 공용 양식: recipient=御中(현장/회사), ref=ご担当者(고객), manager=자사 担当者(미입력)
+                    _bi = st.session_state.buyer_info
+                    doc_buyer = {**_bi, "recipient": st.session_state.current_quote_name, "ref": _bi.get("manager", ""), "manager": ""}
+                    st.session_state.gen_pdf = create_advanced_pdf(sorted_final_data, pdf_excel_services, st.session_state.current_quote_name, q_date.strftime("%Y-%m-%d"), fmode, sel, doc_buyer, st.session_state.quote_remarks, locale="JP")
+                    st.session_state.gen_excel = create_quote_excel(sorted_final_data, pdf_excel_services, st.session_state.current_quote_name, q_date.strftime("%Y-%m-%d"), fmode, sel, doc_buyer, st.session_state.quote_remarks, locale="JP")
                     
-                    st.session_state.gen_comp_pdf = create_composition_pdf(st.session_state.set_cart, st.session_state.pipe_cart, individual_sorted_data, st.session_state.db['products'], st.session_state.db['sets'], st.session_state.current_quote_name)
-                    st.session_state.gen_comp_excel = create_composition_excel(st.session_state.set_cart, st.session_state.pipe_cart, individual_sorted_data, st.session_state.db['products'], st.session_state.db['sets'], st.session_state.current_quote_name)
+                    st.session_state.gen_comp_pdf = create_composition_pdf(st.session_state.set_cart, st.session_state.pipe_cart, individual_sorted_data, st.session_state.db['products'], st.session_state.db['sets'], st.session_state.current_quote_name, locale="JP")
+                    st.session_state.gen_comp_excel = create_composition_excel(st.session_state.set_cart, st.session_state.pipe_cart, individual_sorted_data, st.session_state.db['products'], st.session_state.db['sets'], st.session_state.current_quote_name, locale="JP")
                     
                     st.session_state.files_ready = True
                 st.rerun()
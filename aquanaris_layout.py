@@ -3,12 +3,22 @@
 #  ⚠ 배포 시 app.py와 함께 이 파일도 반드시 GitHub에 올릴 것(하나만 올리면 import 오류로 앱이 죽음).
 #  순수 모듈: streamlit 미사용, app.py 함수 미호출(표준상수·패킹·자동배치·SVG 렌더러·hover HTML).
 import json
+import os
+import functools
+import time
+import zlib
+import base64
+import struct
 import datetime
+from bisect import bisect_left
+from collections import OrderedDict
+
+from looperget.rev_cache import rev_cache
 
 # [V67] 모듈 버전 — app.py가 신구 짝(app.py↔이 파일)을 검증하는 데 사용.
 #  두 파일 중 하나만 배포되면 NameError 대신 친절한 안내가 뜨도록 한다.
 #  ⚠ 모듈에 새 함수를 추가하는 버전업마다 이 숫자와 app.py 가드 기준을 함께 올릴 것.
-AQ_LAYOUT_VER = 77   # [V77] 통로 묶음 — 그룹명 '통로-쪽'으로 여러 통로·홀수 면을 지면에 정확히 싣는다
+AQ_LAYOUT_VER = 103  # [V103] 자동배치 입력 공용화(aq_free_rows·aq_eff_box·aq_place_inputs·aq_place_seqs)
 
 # 렌더러가 쓰는 색상 헬퍼(app.py에도 동일 정의가 있으나 순수함수라 모듈 자체 보유)
 def _aq_hexrgb(h):
@@ -297,29 +307,104 @@ def aq_pack_shelf_stacks(box_seq, inner, shelf_h, max_layers=3, force=None):
             cur[2].append(it); fitted.append(it)
     return cols, fitted, rejected
 
-def aq_auto_place(rack_list, items_seq, box_dims, group_order=None, pre=None, center_codes=None, colhint=None, n_of=None):
-    """단 중심 자동배치(군집): 랙 순서·단은 아래→위, 품목은 분류 군집 순서 그대로 채움.
-    rack_list=[{명칭,내측폭,단높이:[...]}], items_seq=[(코드,분류,상자)] (분류별 연속 정렬).
-    패킹은 정준 정렬(aq_canon_seq) 기준 — 편집표 재검증과 동일 결과 보장.
-    [V53] pre={코드:(랙명,단번호)} = 표준 위치 우선 배치(표준 실측 검증 근거로 존중) /
-          center_codes = 루퍼젯 본품 등 → 가운데 랙의 중앙 단부터 우선 배치.
-    [V59] colhint(code, rack, shelf)→열힌트 — 렌더 패킹과 동일한 런 분할로 시험 배치(불일치 방지).
-    반환: (assign={코드:(랙명,단번호)}, unplaced=[코드...])"""
+class AqShelfPack:
+    """[V93] 단 하나의 증분 패킹 상태 — aq_pack_shelf_stacks(aq_canon_seq(seq))와 같은 판정을 재패킹 없이.
+    정준 정렬 키에서 코드만 뺀 블록 키 (열힌트, 분류순번, -높이, -폭, 상자) → 상자 수를 정렬 목록으로 유지.
+    패킹 규칙상 같은 (상자, 폭, 높이, 열힌트) 블록이 이웃하면 한 런(열 공유) — 런 폭 = ceil(수/층수) × 폭,
+    단 전체 소모 폭 = Σ 런 폭. 상자 하나 추가는 이분 탐색 + 앞뒤 이웃 런만 다시 세면 끝(단 전체 재정렬 없음).
+    fits(t) ⇔ 정준 재패킹의 rejected가 비어 있음: 모든 런이 층수 ≥1·폭 ≤ 내측폭이고 Σ 런 폭 ≤ 내측폭.
+    t = (코드, 분류, 상자, 폭, 높이, 열힌트) — aq_auto_place의 _t6 튜플. force(수동 고정)는 다루지 않는다."""
+
+    def __init__(self, inner, shelf_h, group_order=None, max_layers=3):
+        self.inner, self.h, self.max_layers = inner, shelf_h, max_layers
+        self.gp = {g: i for i, g in enumerate(group_order or [])}
+        self.keys, self.cnt = [], {}
+        self.used = 0          # Σ 런 폭
+        self.bad = 0           # 못 싣는 런(층수 0·폭 초과) 수 — 표준 위치 강제 배치로 생길 수 있음
+
+    def _key(self, t):
+        return (t[5] if len(t) > 5 else 1, self.gp.get(t[1], 99), -t[4], -t[3], t[2])
+
+    def _layers(self, k):
+        h = -k[2]
+        n = min(self.max_layers, int(self.h // h)) if h > 0 else 0
+        return min(n, 1) if k[4] == "루퍼젯팩" else n   # [V61] 팩은 적층 안 함
+
+    @staticmethod
+    def _run(k):
+        return (k[4], -k[3], -k[2], k[0])   # 패킹의 런 키 (상자, 폭, 높이, 열힌트)
+
+    def _span(self, lo, hi, keys, cnt):
+        """keys[lo:hi] (런 경계 정렬 구간) → (런 폭 합, 못 싣는 런 수)."""
+        used = bad = 0
+        i = lo
+        while i < hi:
+            r, n, j = self._run(keys[i]), 0, i
+            while j < hi and self._run(keys[j]) == r:
+                n += cnt[keys[j]]; j += 1
+            L, w = self._layers(keys[i]), -keys[i][3]
+            if L < 1 or w > self.inner: bad += 1
+            else: used += -(-n // L) * w
+            i = j
+        return used, bad
+
+    def _region(self, i, keys):
+        """삽입 위치 i 앞뒤 블록이 속한 런 전체 [lo, hi)."""
+        lo, hi = max(i - 1, 0), min(i + 1, len(keys))
+        while lo > 0 and self._run(keys[lo - 1]) == self._run(keys[lo]): lo -= 1
+        while hi < len(keys) and self._run(keys[hi]) == self._run(keys[hi - 1]): hi += 1
+        return lo, hi
+
+    def _delta(self, t, n):
+        k = self._key(t)
+        i = bisect_left(self.keys, k)
+        lo, hi = self._region(i, self.keys)
+        old = self._span(lo, hi, self.keys, self.cnt)
+        if i < len(self.keys) and self.keys[i] == k:
+            cnt = dict(self.cnt); cnt[k] += n
+            new = self._span(lo, hi, self.keys, cnt)
+        else:
+            keys = self.keys[lo:i] + [k] + self.keys[i:hi]
+            new = self._span(0, len(keys), keys, {**self.cnt, k: n})
+        return k, i, new[0] - old[0], new[1] - old[1]
+
+    def fits(self, t, n=1):
+        """상자 n개를 더 실어도 정준 재패킹에 탈락이 없는가."""
+        _k, _i, du, db = self._delta(t, n)
+        return not (self.bad + db) and self.used + du <= self.inner
+
+    def copy(self):
+        c = AqShelfPack.__new__(AqShelfPack)
+        c.__dict__.update(self.__dict__)
+        c.keys, c.cnt = list(self.keys), dict(self.cnt)
+        return c
+
+    def add(self, t, n=1):
+        """상자 n개 확정(맞는지 검사하지 않음 — 표준 위치 강제 배치용). 확정 후 fits 판정과 일관."""
+        k, i, du, db = self._delta(t, n)
+        if i < len(self.keys) and self.keys[i] == k:
+            self.cnt[k] += n
+        else:
+            self.keys.insert(i, k); self.cnt[k] = n
+        self.used += du; self.bad += db
+
+def _aq_place_fixed(rack_list, items_seq, box_dims, group_order, pre, center_codes, colhint, n_of):
+    """aq_auto_place ①②단계 공용 — 단 목록(증분 패킹 상태 포함) 만들고 표준 위치·루퍼젯 본품을 먼저 싣는다.
+    반환: (shelves, assign, unplaced, rest, tn) — rest=③단계로 넘길 [(코드,분류,상자,폭,높이)],
+    tn(t, s) → (그 단의 열힌트를 붙인 6튜플, 전면 상자수)."""
     shelves, shelf_by = [], {}
     for rk in rack_list:
         for si, h in enumerate(rk["단높이"], 1):
-            s = {"rack": rk["명칭"], "no": si, "h": h, "inner": rk["내측폭"], "seq": []}
+            s = {"rack": rk["명칭"], "no": si, "h": h, "inner": rk["내측폭"],
+                 "pack": AqShelfPack(rk["내측폭"], h, group_order)}
             shelves.append(s); shelf_by[(rk["명칭"], si)] = s
     pre = pre or {}
     center_codes = set(center_codes or [])
     _ch = colhint or (lambda c, rk, sh: 1)
     _nf = n_of or (lambda c: 1)
-    def _t6(t, s):   # 시험 대상 단(s)에 맞는 열힌트를 6번째 원소로
-        return (t[0], t[1], t[2], t[3], t[4], _ch(t[0], s["rack"], s["no"]))
-    def _seq6(s, t):
-        # [V59] 전면 상자수(n)만큼 복제해 시험 — 렌더 패킹과 동일한 폭 소모(여과기 3×2 등)
-        return aq_canon_seq([_t6(x, s) for x in s["seq"]] + [_t6(t, s)] * max(1, int(_nf(t[0]) or 1)),
-                            group_order)
+    def tn(t, s):
+        # 시험 대상 단(s)에 맞는 열힌트를 6번째 원소로 + [V59] 전면 상자수(n)만큼 — 렌더 패킹과 동일한 폭 소모(여과기 3×2 등)
+        return (t[0], t[1], t[2], t[3], t[4], _ch(t[0], s["rack"], s["no"])), max(1, int(_nf(t[0]) or 1))
     assign, unplaced = {}, []
     rest = []
     for code, grp, box in items_seq:
@@ -329,8 +414,7 @@ def aq_auto_place(rack_list, items_seq, box_dims, group_order=None, pre=None, ce
         t = (code, grp, box, wh[0], wh[1])
         tgt = pre.get(code)
         if tgt and tgt in shelf_by:                          # ① [V53] 표준 위치 우선
-            s = shelf_by[tgt]
-            s["seq"] = _seq6(s, t)
+            shelf_by[tgt]["pack"].add(*tn(t, shelf_by[tgt]))
             assign[code] = tgt
             continue
         rest.append(t)
@@ -349,29 +433,128 @@ def aq_auto_place(rack_list, items_seq, box_dims, group_order=None, pre=None, ce
             placed = False
             for no in order_sh:
                 s = shelf_by[(mid_rk["명칭"], no)]
-                trial = _seq6(s, t)
-                if not aq_pack_shelf_stacks(trial, s["inner"], s["h"])[2]:
-                    s["seq"] = trial; assign[t[0]] = (s["rack"], s["no"]); placed = True; break
+                if s["pack"].fits(*tn(t, s)):
+                    s["pack"].add(*tn(t, s)); assign[t[0]] = (s["rack"], s["no"]); placed = True; break
             if not placed:
                 still.append(t)
         rest = still
+    return shelves, assign, unplaced, rest, tn
+
+def aq_auto_place(rack_list, items_seq, box_dims, group_order=None, pre=None, center_codes=None, colhint=None, n_of=None):
+    """단 중심 자동배치(군집): 랙 순서·단은 아래→위, 품목은 분류 군집 순서 그대로 채움.
+    rack_list=[{명칭,내측폭,단높이:[...]}], items_seq=[(코드,분류,상자)] (분류별 연속 정렬).
+    패킹은 정준 정렬(aq_canon_seq) 기준 — 편집표 재검증과 동일 결과 보장.
+    [V53] pre={코드:(랙명,단번호)} = 표준 위치 우선 배치(표준 실측 검증 근거로 존중) /
+          center_codes = 루퍼젯 본품 등 → 가운데 랙의 중앙 단부터 우선 배치.
+    [V59] colhint(code, rack, shelf)→열힌트 — 렌더 패킹과 동일한 런 분할로 시험 배치(불일치 방지).
+    [V93] 단마다 증분 패킹 상태(AqShelfPack) — 시험 배치가 단 전체 재정렬·재패킹이 아니라 이웃 런만 다시 셈(판정 동일).
+    반환: (assign={코드:(랙명,단번호)}, unplaced=[코드...])"""
+    shelves, assign, unplaced, rest, tn = _aq_place_fixed(rack_list, items_seq, box_dims, group_order,
+                                                          pre, center_codes, colhint, n_of)
     cur = 0                                                   # ③ 나머지 그리디(기존 로직)
-    for code, grp, box, w, h in rest:
+    for t in rest:
         placed = False
         i = cur
         while i < len(shelves):
             s = shelves[i]
-            trial = _seq6(s, (code, grp, box, w, h))
-            _cols, fitted, rej = aq_pack_shelf_stacks(trial, s["inner"], s["h"])   # [V49] 스택 패킹
-            if not rej:
-                s["seq"] = trial
-                assign[code] = (s["rack"], s["no"])
+            if s["pack"].fits(*tn(t, s)):   # [V49] 스택 패킹 규칙 — [V93] 증분 판정
+                s["pack"].add(*tn(t, s))
+                assign[t[0]] = (s["rack"], s["no"])
                 cur = i
                 placed = True
                 break
             i += 1
         if not placed:
-            unplaced.append(code)
+            unplaced.append(t[0])
+    return assign, unplaced
+
+def aq_solve_place(rack_list, items_seq, box_dims, group_order=None, pre=None, center_codes=None, colhint=None,
+                   n_of=None, budget_s=3.0, beam=48, branch=3, info=None):
+    """[V94] 최적화 자동배치 — 미배치 최소화 빔 탐색(시간 예산). aq_auto_place와 같은 인자·반환.
+    ①② 표준 위치·루퍼젯 본품은 aq_auto_place와 같고, ③ 나머지 품목만 탐색한다.
+    ③ 규칙: 품목을 group_order 군집 순서대로 단 순서(랙 순서·아래→위)에 '뒤로만' 싣는다(단 번호 비감소)
+       → 분류 군집이 끊기지 않고 group_order 순서를 지킨다(그리디와 같은 제약).
+       그리디는 지금 단에 안 맞으면 처음 맞는 단으로 건너뛴다 — 빔은 ⓐ 처음 맞는 단 ⓑ 그 뒤로 맞는 단(branch개)
+       ⓒ 이 품목을 미배치로 두고 지금 단 유지(큰 상자 하나 때문에 여러 단을 버리는 경우) 를 함께 펼친다.
+    상태 = (미배치 수, 현재 단, 현재 단 패킹 상태[AqShelfPack]) — 미배치·현재 단·사용 폭이 모두 나쁘지 않은 상태에
+    지배되는 상태는 버리고, 남은 것 중 beam개만 유지. 판정은 aq_pack_shelf_stacks 규칙 그대로(AqShelfPack).
+    budget_s(초)를 넘기면 그때까지의 최선 상태에서 나머지를 그리디로 마무리해 돌려준다.
+    결과가 그리디보다 미배치가 많지 않을 때만 채택(같으면 그리디 결과 — 익숙한 배치 유지).
+    info(dict)를 주면 {"greedy_unplaced","unplaced","states","timed_out","elapsed"}를 채운다."""
+    t0 = time.monotonic()
+    g_asg, g_unp = aq_auto_place(rack_list, items_seq, box_dims, group_order, pre, center_codes, colhint, n_of)
+    shelves, assign, unplaced, rest, tn = _aq_place_fixed(rack_list, items_seq, box_dims, group_order,
+                                                          pre, center_codes, colhint, n_of)
+    gp = {g: i for i, g in enumerate(group_order or [])}
+    rest = sorted(rest, key=lambda t: gp.get(t[1], 99))
+    INF = float("inf")
+
+    def _pk(st):   # 상태의 현재 단 패킹(없으면 ①② 단계 기본 상태 — 복사 전 공유)
+        return st[2] if st[2] is not None else shelves[st[1]]["pack"]
+
+    def _used(st):
+        p = _pk(st) if st[1] < len(shelves) else None
+        return INF if p is None else (p.used if not p.bad else INF)
+
+    def _children(st, t):
+        unp, cur, _p, chain, skipped = st
+        if cur < len(shelves):
+            p = _pk(st)
+            t6, n = tn(t, shelves[cur])
+            if p.fits(t6, n):
+                q = p.copy(); q.add(t6, n)
+                return [(unp, cur, q, (t[0], cur, chain), skipped)]
+        out, found = [], 0
+        for j in range(cur + 1, len(shelves)):
+            t6, n = tn(t, shelves[j])
+            if shelves[j]["pack"].fits(t6, n):
+                q = shelves[j]["pack"].copy(); q.add(t6, n)
+                out.append((unp, j, q, (t[0], j, chain), skipped))
+                found += 1
+                if found >= branch: break
+        out.append((unp + 1, cur, _p, chain, (t[0], skipped)))   # ⓒ 미배치로 두고 현재 단 유지
+        return out
+
+    def _prune(states):
+        states.sort(key=lambda st: (st[0], st[1], _used(st)))
+        kept = []
+        for st in states:
+            u = _used(st)
+            if any(k[0] <= st[0] and k[1] <= st[1] and (k[1] < st[1] or _used(k) <= u) for k in kept):
+                continue
+            kept.append(st)
+            if len(kept) >= beam: break
+        return kept
+
+    front = [(0, 0, None, None, None)]
+    n_states, timed_out, k = 0, False, 0
+    for k, t in enumerate(rest):
+        if time.monotonic() - t0 > budget_s:
+            timed_out = True
+            break
+        nxt = []
+        for st in front:
+            nxt.extend(_children(st, t))
+        n_states += len(nxt)
+        front = _prune(nxt)
+    else:
+        k = len(rest)
+    best = min(front, key=lambda st: (st[0], st[1], _used(st)))
+    for t in rest[k:]:                                        # 예산 초과 — 최선 상태에서 그리디 마무리
+        best = _children(best, t)[0]
+    chain, skipped = best[3], best[4]
+    while chain is not None:
+        code, si, chain = chain
+        assign[code] = (shelves[si]["rack"], shelves[si]["no"])
+    sk = []
+    while skipped is not None:
+        sk.append(skipped[0]); skipped = skipped[1]
+    unplaced.extend(reversed(sk))
+    if info is not None:
+        info.update({"greedy_unplaced": len(g_unp), "unplaced": min(len(unplaced), len(g_unp)),
+                     "states": n_states, "timed_out": timed_out, "elapsed": round(time.monotonic() - t0, 3)})
+    if len(unplaced) >= len(g_unp):
+        return g_asg, g_unp
     return assign, unplaced
 
 # ── [V67] 상자 인스턴스 모델 (2단계, 핸드오프 §3-68·CODEX_REVIEW) ──
@@ -382,8 +565,79 @@ def aq_auto_place(rack_list, items_seq, box_dims, group_order=None, pre=None, ce
 #  (진열분류·치수는 저장하지 않고 렌더 시점에 AQ_Items/AQ_Boxes에서 해석 — 정본 우선)
 AQ_SCHEMA_V = 2
 
+class AqInstStore:
+    """[V96] 인스턴스 색인 — 정본 리스트(items)를 감싸 id→인스턴스, (랙,단)→인스턴스 목록, 코드별 최대 일련을 유지.
+    aq_inst_* 조작은 전부 이 색인 위에서 돈다 — 찾기·새 id는 상수 시간, 정규화는 건드린 단만.
+    리스트를 넘기면 함수마다 한 번 색인을 만들고(선형), 조작을 여러 번 할 호출부는 한 번 만든 저장소를 넘긴다.
+    ⚠ 저장소를 넘겨받은 뒤 리스트를 직접 고치면(추가·삭제·랙/단 변경) 색인을 다시 만들어야 한다(상자명 변경은 무관)."""
+
+    def __init__(self, instances=None):
+        self.items = instances if instances is not None else []
+        self.by_id, self.by_shelf, self.serial = {}, {}, {}
+        for it in self.items:
+            self._index(it)
+
+    @staticmethod
+    def loc(it):
+        return (str(it.get("rack") or ""), int(it.get("shelf") or 0))
+
+    def _index(self, it):
+        sid = str(it.get("id"))
+        self.by_id.setdefault(sid, it)              # 같은 id가 둘이면 앞의 것(종전 선형 탐색과 같음)
+        self.by_shelf.setdefault(self.loc(it), []).append(it)
+        code, _sep, no = sid.rpartition(":")
+        if _sep:
+            try: self.serial[code] = max(self.serial.get(code, 0), int(no))
+            except Exception: pass
+
+    def find(self, iid):
+        return self.by_id.get(str(iid))
+
+    def shelf(self, rack, shelf, but=None):
+        return [it for it in self.by_shelf.get((str(rack), int(shelf)), []) if it is not but]
+
+    def new_id(self, code):
+        """새 id "코드:일련"(코드별 최대 일련+1) — 바로 add()할 인스턴스용(호출마다 일련이 올라간다)."""
+        n = self.serial.get(code, 0) + 1
+        self.serial[code] = n
+        return f"{code}:{n}"
+
+    def add(self, it):
+        self.items.append(it)
+        self._index(it)
+        return it
+
+    def remove(self, it):
+        self.items.remove(it)
+        sid = str(it.get("id"))
+        if self.by_id.get(sid) is it:
+            self.by_id.pop(sid)
+        lst = self.by_shelf.get(self.loc(it), [])
+        if it in lst: lst.remove(it)
+
+    def relocate(self, it, rack, shelf):
+        """인스턴스를 (rack, shelf)로 — 단 색인만 옮긴다. 반환 = 떠난 단 위치."""
+        old = self.loc(it)
+        lst = self.by_shelf.get(old, [])
+        if it in lst: lst.remove(it)
+        it["rack"], it["shelf"] = str(rack), int(shelf)
+        self.by_shelf.setdefault(self.loc(it), []).append(it)
+        return old
+
+    def normalize(self, locs=None):
+        """aq_inst_normalize — locs(단 위치 목록)만, 비우면 전체."""
+        for loc in (self.by_shelf if locs is None else set(locs)):
+            _aq_norm_shelf(self.by_shelf.get(loc, []))
+        return self.items
+
+def aq_inst_store(instances):
+    """[V96] 리스트 또는 AqInstStore → AqInstStore (이미 저장소면 그대로)."""
+    return instances if isinstance(instances, AqInstStore) else AqInstStore(instances)
+
 def aq_inst_new_id(instances, code):
-    """새 인스턴스 id — "코드:일련"(현 목록 최대 일련+1)."""
+    """새 인스턴스 id — "코드:일련"(현 목록 최대 일련+1). [V96] 저장소를 넘기면 코드별 일련 카운터(상수 시간)."""
+    if isinstance(instances, AqInstStore):
+        return instances.new_id(code)
     mx = 0
     pre = f"{code}:"
     for it in instances:
@@ -400,25 +654,32 @@ def _aq_anc(it):
 def aq_inst_normalize(instances):
     """좌표 정규화(제자리) — 단별 col을 0..k-1 연속 번호로, 열 안 layer를 0..m-1(바닥부터)로.
     상자를 빼면 위 상자가 내려앉고(붕 뜸 구조적 불가), 빈 열 번호가 사라진다. 삽입은 col=x.5 후 호출.
-    [V70] 왼쪽 정렬(L)·오른쪽 정렬(R) 그룹을 **각각** 번호 매긴다 — 한쪽에서 상자를 빼도 반대쪽은 그대로."""
+    [V70] 왼쪽 정렬(L)·오른쪽 정렬(R) 그룹을 **각각** 번호 매긴다 — 한쪽에서 상자를 빼도 반대쪽은 그대로.
+    [V96] AqInstStore를 넘기면 단 색인을 그대로 쓴다(반환은 정본 리스트)."""
+    if isinstance(instances, AqInstStore):
+        return instances.normalize()
     by_shelf = {}
     for it in instances:
         by_shelf.setdefault((str(it.get("rack") or ""), int(it.get("shelf") or 0)), []).append(it)
+    for _loc, lst in by_shelf.items():
+        _aq_norm_shelf(lst)
+    return instances
+
+def _aq_norm_shelf(lst):
+    """단 하나의 인스턴스 정규화(제자리) — aq_inst_normalize 본체."""
     def _ly(t):
         try: return float(t.get("layer") or 0)
         except Exception: return 0.0
-    for _loc, lst in by_shelf.items():
-        for anc in ("L", "R"):
-            cols = {}
-            for it in lst:
-                if _aq_anc(it) != anc: continue
-                try: cv = float(it.get("col") or 0)
-                except Exception: cv = 0.0
-                cols.setdefault(cv, []).append(it)
-            for ci, cv in enumerate(sorted(cols)):
-                for li, it in enumerate(sorted(cols[cv], key=_ly)):
-                    it["col"] = ci; it["layer"] = li
-    return instances
+    for anc in ("L", "R"):
+        cols = {}
+        for it in lst:
+            if _aq_anc(it) != anc: continue
+            try: cv = float(it.get("col") or 0)
+            except Exception: cv = 0.0
+            cols.setdefault(cv, []).append(it)
+        for ci, cv in enumerate(sorted(cols)):
+            for li, it in enumerate(sorted(cols[cv], key=_ly)):
+                it["col"] = ci; it["layer"] = li
 
 def aq_inst_cols(shelf_insts, dims, inner=0):
     """단 위 인스턴스 → 렌더 열 목록. 반환: (cols, unknown)
@@ -456,50 +717,49 @@ def aq_inst_cols(shelf_insts, dims, inner=0):
     return out, unknown
 
 def _aq_inst_find(instances, iid):
-    for it in instances:
-        if str(it.get("id")) == str(iid): return it
-    return None
+    return aq_inst_store(instances).find(iid)
 
 def _aq_inst_shelf(instances, rack, shelf, but=None):
-    return [it for it in instances if it is not but
-            and str(it.get("rack") or "") == str(rack) and int(it.get("shelf") or 0) == int(shelf)]
+    return aq_inst_store(instances).shelf(rack, shelf, but=but)
 
 def aq_inst_move(instances, iid, track, tshelf, xr=None, onto=None, dims=None, shelf_h=0, inner=0, anchor=None):
     """iid 상자를 (track,tshelf)로 이동(제자리 수정). onto=아래 상자 인스턴스 id → 그 열 맨 위 적층
     (Σ열높이 ≤ 단높이 검증 — 초과 시 이동하지 않고 오류 문장 반환), 아니면 xr(0~1) 위치에 새 열 삽입(layer 0).
     [V70] anchor='R'이면 **단 오른쪽 끝 기준**으로 붙는다(왼쪽이 비어도 오른쪽에 정렬).
     적층(onto)일 때는 아래 상자의 정렬 기준을 그대로 물려받는다.
-    반환: "" = 성공, 그 외 = 오류 메시지(호출부가 화면에 노출)."""
+    반환: "" = 성공, 그 외 = 오류 메시지(호출부가 화면에 노출).
+    [V96] instances = 리스트 또는 AqInstStore — 정규화는 떠난 단·놓인 단만."""
     dims = dims or {}
-    tgt = _aq_inst_find(instances, iid)
+    st = aq_inst_store(instances)
+    tgt = st.find(iid)
     if tgt is None:
         return f"이동 실패: 상자 {iid}를 찾을 수 없음(이미 삭제되었거나 다른 세션 조작)"
     def _set_anc(it, anc):
         if anc == "R": it["anchor"] = "R"
         else: it.pop("anchor", None)     # 기본값은 키를 두지 않는다(저장 용량·구 데이터 호환)
     if onto:
-        base = _aq_inst_find(instances, onto)
+        base = st.find(onto)
         if base is not None and base is not tgt and str(base.get("rack")) == str(track) \
                 and int(base.get("shelf") or 0) == int(tshelf):
             _anc_b = _aq_anc(base)       # [V70] 적층은 아래 상자의 정렬 기준을 물려받는다
             try: col_v = float(base.get("col") or 0)
             except Exception: col_v = 0.0
-            stack = [it for it in _aq_inst_shelf(instances, track, tshelf, but=tgt)
+            stack = [it for it in st.shelf(track, tshelf, but=tgt)
                      if _aq_anc(it) == _anc_b and float(it.get("col") or 0) == col_v]
             hsum = sum((dims.get(str(it.get("box") or "")) or (0, 0))[1] for it in stack)
             h_t = (dims.get(str(tgt.get("box") or "")) or (0, 0))[1]
             if shelf_h and h_t and hsum + h_t > shelf_h:
                 return (f"적층 불가: {tgt.get('code')} — 열 높이 {hsum}+{h_t} > 단높이 {shelf_h}mm"
                         f" (단높이를 늘리거나 옆에 놓으세요)")
-            tgt["rack"], tgt["shelf"] = str(track), int(tshelf)
+            src = st.relocate(tgt, track, tshelf)
             _set_anc(tgt, _anc_b)
             tgt["col"] = col_v
             tgt["layer"] = max([float(it.get("layer") or 0) for it in stack] or [-1.0]) + 1.0
-            aq_inst_normalize(instances)
+            st.normalize([src, st.loc(tgt)])
             return ""
         # onto 대상이 사라졌으면 새 열 삽입으로 폴백(조작 자체는 유실시키지 않음)
     _anc = "R" if str(anchor or "").upper() == "R" else "L"   # [V70] 놓은 쪽에 붙는다
-    others = [it for it in _aq_inst_shelf(instances, track, tshelf, but=tgt) if _aq_anc(it) == _anc]
+    others = [it for it in st.shelf(track, tshelf, but=tgt) if _aq_anc(it) == _anc]
     cols, _unk = aq_inst_cols(others, dims, inner if _anc == "R" else 0)
     total_w = (cols[-1][0] + cols[-1][1]) if cols else 0
     try: _xr = max(0.0, min(1.0, float(1.0 if xr is None else xr)))
@@ -511,28 +771,31 @@ def aq_inst_move(instances, iid, track, tshelf, xr=None, onto=None, dims=None, s
             idx = i; break
     for i, (_x, _w, stck) in enumerate(cols):   # 같은 정렬 그룹의 열을 정수 인덱스로 재부여 후 그 사이에 삽입
         for _it, _wh in stck: _it["col"] = i
-    tgt["rack"], tgt["shelf"] = str(track), int(tshelf)
+    src = st.relocate(tgt, track, tshelf)
     _set_anc(tgt, _anc)
     tgt["col"] = idx - 0.5
     tgt["layer"] = 0
-    aq_inst_normalize(instances)
+    st.normalize([src, st.loc(tgt)])
     return ""
 
-def aq_inst_dup(instances, iid, dims=None, shelf_h=0):
-    """iid 상자 1개 복제 — 열 높이가 허용하면 같은 열 맨 위, 아니면 바로 옆 새 열. 반환 오류 문장/""."""
+def aq_inst_dup(instances, iid, dims=None, shelf_h=0, new_id=None):
+    """iid 상자 1개 복제 — 열 높이가 허용하면 같은 열 맨 위, 아니면 바로 옆 새 열. 반환 오류 문장/"".
+    [V97] new_id = 복제본 id 지정(조작 로그 재생 — 원 세션과 같은 id). 이미 있는 id면 새로 발급."""
     dims = dims or {}
-    src = _aq_inst_find(instances, iid)
+    st = aq_inst_store(instances)
+    src = st.find(iid)
     if src is None:
         return f"복제 실패: 상자 {iid}를 찾을 수 없음"
     try: col_v = float(src.get("col") or 0)
     except Exception: col_v = 0.0
     rack, shelf = str(src.get("rack")), int(src.get("shelf") or 0)
     _anc_s = _aq_anc(src)   # [V70] 복제본은 원본과 같은 쪽(좌/우)에 붙는다
-    stack = [it for it in _aq_inst_shelf(instances, rack, shelf)
+    stack = [it for it in st.shelf(rack, shelf)
              if _aq_anc(it) == _anc_s and float(it.get("col") or 0) == col_v]
     h_s = (dims.get(str(src.get("box") or "")) or (0, 0))[1]
     hsum = sum((dims.get(str(it.get("box") or "")) or (0, 0))[1] for it in stack)
-    new = {"id": aq_inst_new_id(instances, str(src.get("code"))), "code": str(src.get("code")),
+    nid = str(new_id) if new_id and st.find(new_id) is None else st.new_id(str(src.get("code")))
+    new = {"id": nid, "code": str(src.get("code")),
            "box": str(src.get("box") or ""), "rack": rack, "shelf": shelf}
     if _anc_s == "R": new["anchor"] = "R"
     if shelf_h and h_s and hsum + h_s <= shelf_h and str(src.get("box")) != "루퍼젯팩":
@@ -541,17 +804,18 @@ def aq_inst_dup(instances, iid, dims=None, shelf_h=0):
     else:
         new["col"] = col_v + 0.5
         new["layer"] = 0
-    instances.append(new)
-    aq_inst_normalize(instances)
+    st.add(new)
+    st.normalize([(rack, shelf)])
     return ""
 
 def aq_inst_del(instances, iid):
     """iid 상자 제거 — 위 상자는 정규화로 내려앉음. 반환 오류 문장/""."""
-    tgt = _aq_inst_find(instances, iid)
+    st = aq_inst_store(instances)
+    tgt = st.find(iid)
     if tgt is None:
         return f"삭제 실패: 상자 {iid}를 찾을 수 없음"
-    instances.remove(tgt)
-    aq_inst_normalize(instances)
+    st.remove(tgt)
+    st.normalize([st.loc(tgt)])
     return ""
 
 def aq_inst_place_code(instances, code, box, rack, shelf, count, dims=None, shelf_h=0, max_layers=3):
@@ -563,25 +827,26 @@ def aq_inst_place_code(instances, code, box, rack, shelf, count, dims=None, shel
     layers = min(max_layers, int(shelf_h // h)) if (h and shelf_h) else 1
     if str(box) == "루퍼젯팩": layers = 1
     layers = max(1, layers)
-    on = [it for it in _aq_inst_shelf(instances, rack, shelf) if _aq_anc(it) == "L"]   # [V70] 왼쪽 그룹 뒤에
+    st = aq_inst_store(instances)
+    on = [it for it in st.shelf(rack, shelf) if _aq_anc(it) == "L"]   # [V70] 왼쪽 그룹 뒤에
     col = max([float(it.get("col") or 0) for it in on] or [-1.0]) + 1.0
     li = 0
     for _k in range(max(0, int(count))):
         if li >= layers:
             li = 0; col += 1
-        instances.append({"id": aq_inst_new_id(instances, str(code)), "code": str(code),
-                          "box": str(box or ""), "rack": str(rack), "shelf": int(shelf),
-                          "col": col, "layer": li})
+        st.add({"id": st.new_id(str(code)), "code": str(code),
+                "box": str(box or ""), "rack": str(rack), "shelf": int(shelf),
+                "col": col, "layer": li})
         li += 1
-    aq_inst_normalize(instances)
-    return instances
+    st.normalize([(str(rack), int(shelf))])
+    return st.items
 
 def aq_instances_from_seqs(seq_by_shelf, rack_list, mstack=None):
     """[마이그레이션·자동배치 전용] 패킹 1회 실행으로 (rack,shelf)별 시퀀스에 좌표를 부여해
     인스턴스 리스트 생성. seq 튜플 = (코드,분류,상자,폭,높이[,열힌트]).
     rejected(안 들어가는 상자)도 버리지 않고 오른쪽 끝 열로 보존 — 검증이 문장으로 노출."""
     rk_by = {rk["명칭"]: rk for rk in rack_list}
-    out = []
+    st = AqInstStore([])
     for (rack, shelf), seq in sorted(seq_by_shelf.items()):
         rk = rk_by.get(rack)
         try: _sh_i = int(shelf)
@@ -594,14 +859,14 @@ def aq_instances_from_seqs(seq_by_shelf, rack_list, mstack=None):
         ci = -1
         for ci, (_x, _w, stack) in enumerate(cols_p):
             for li, t in enumerate(stack):
-                out.append({"id": aq_inst_new_id(out, str(t[0])), "code": str(t[0]),
-                            "box": str(t[2]), "rack": str(rack), "shelf": _sh_i,
-                            "col": ci, "layer": li})
-        for j, t in enumerate(rej):
-            out.append({"id": aq_inst_new_id(out, str(t[0])), "code": str(t[0]),
+                st.add({"id": st.new_id(str(t[0])), "code": str(t[0]),
                         "box": str(t[2]), "rack": str(rack), "shelf": _sh_i,
-                        "col": ci + 1 + j, "layer": 0})
-    return out
+                        "col": ci, "layer": li})
+        for j, t in enumerate(rej):
+            st.add({"id": st.new_id(str(t[0])), "code": str(t[0]),
+                    "box": str(t[2]), "rack": str(rack), "shelf": _sh_i,
+                    "col": ci + 1 + j, "layer": 0})
+    return st.items
 
 def aq_inst_validate(instances, rack_list, dims):
     """좌표 기반 물리 검증 — 문제를 조용히 숨기지 않고 문장 리스트로 반환.
@@ -679,7 +944,8 @@ def aq_inst_pack(instances):
 def aq_inst_unpack(packed, box_of):
     """[V68] `inst2` → 인스턴스 리스트(id 재발급·정규화). box_of(code)→상자명 콜러블.
     저장 좌표를 그대로 신뢰 — 재계산 없음. [V70] 세 번째 원소가 있으면 오른쪽 정렬."""
-    out = []
+    st = AqInstStore([])
+    out = st.items
     if not isinstance(packed, dict): return out
     for rk, shs in packed.items():
         if not isinstance(shs, dict): continue
@@ -693,16 +959,449 @@ def aq_inst_unpack(packed, box_of):
                 for e in pairs:
                     try: cl, ly = float(e[0]), float(e[1])
                     except Exception: continue
-                    _it = {"id": aq_inst_new_id(out, str(c)), "code": str(c), "box": b,
+                    _it = {"id": st.new_id(str(c)), "code": str(c), "box": b,
                            "rack": str(rk), "shelf": sh_i, "col": cl, "layer": ly}
                     try:
                         if len(e) > 2 and int(e[2]): _it["anchor"] = "R"
                     except Exception:
                         pass
-                    out.append(_it)
-    aq_inst_normalize(out)
+                    st.add(_it)
+    st.normalize()
     return out
 
+# ── [V98] 배치 좌표 저장소(AQ_Layouts) — 이진 열 배열 인코딩 + 행 조각 ──
+#  배치JSON 셀(50,000자 한도)에 상자 좌표(inst2)·파생 assign/splits까지 담던 것을 분리한다.
+#  AQ_Sites 배치JSON = 진열 계획 메타(groups·items·free·rack_order·rows·op_base) + "layout" 포인터만 —
+#  사이트 목록을 읽을 때 좌표는 오지 않는다. 좌표는 AQ_Layouts 행 [농협명, 리비전, 조각, 조각수, 데이터].
+#  데이터 = "AQL1:" + base64(zlib(헤더 + 랙·코드 표 + 열 배열 rack/shelf/code/col/layer/flag)) — 45,000자씩 조각.
+#  저장은 새 리비전 행을 먼저 추가하고 포인터를 바꾼 뒤 옛 리비전을 정리한다(쓰는 중에도 읽기는 항상 온전).
+AQ_LAYOUT_WS = "AQ_Layouts"
+AQ_LAYOUT_HDR = ["농협명", "리비전", "조각", "조각수", "데이터"]
+AQ_LAYOUT_CHUNK = 45000
+_AQ_LAYOUT_MAGIC = "AQL1:"
+
+def aq_layout_encode(packed):
+    """inst2({랙: {단: {코드: [[col,layer(,1)], ...]}}}) → 압축 문자열. 열 배열(struct)이라 zlib가 잘 줄인다."""
+    racks, codes, ri, ci = [], [], {}, {}
+    cols = ([], [], [], [], [], [])          # rack, shelf, code, col, layer, flag
+    for rk, shs in (packed or {}).items():
+        for sh, cds in shs.items():
+            for c, pairs in cds.items():
+                for e in pairs:
+                    if rk not in ri: ri[rk] = len(racks); racks.append(rk)
+                    if c not in ci: ci[c] = len(codes); codes.append(c)
+                    for a, v in zip(cols, (ri[rk], int(sh), ci[c], int(e[0]), int(e[1]),
+                                           1 if len(e) > 2 and int(e[2]) else 0)):
+                        a.append(v)
+    n = len(cols[0])
+    tbl = "\x1f".join(racks).encode("utf-8"), "\x1f".join(codes).encode("utf-8")
+    raw = b"".join([struct.pack("<HHIII", len(racks), len(codes), n, len(tbl[0]), len(tbl[1])), tbl[0], tbl[1],
+                    struct.pack(f"<{n}H", *cols[0]), struct.pack(f"<{n}H", *cols[1]),
+                    struct.pack(f"<{n}H", *cols[2]), struct.pack(f"<{n}H", *cols[3]),
+                    struct.pack(f"<{n}H", *cols[4]), struct.pack(f"<{n}B", *cols[5])])
+    return _AQ_LAYOUT_MAGIC + base64.b64encode(zlib.compress(raw, 9)).decode("ascii")
+
+def aq_layout_decode(s):
+    """aq_layout_encode의 역 — 압축 문자열 → inst2. 형식이 다르면 ValueError."""
+    if not str(s or "").startswith(_AQ_LAYOUT_MAGIC):
+        raise ValueError("AQ_Layouts 데이터 형식이 아닙니다")
+    raw = zlib.decompress(base64.b64decode(str(s)[len(_AQ_LAYOUT_MAGIC):]))
+    n_rk, n_cd, n, l_rk, l_cd = struct.unpack_from("<HHIII", raw, 0)
+    p = struct.calcsize("<HHIII")
+    racks = raw[p:p + l_rk].decode("utf-8").split("\x1f") if n_rk else []
+    p += l_rk
+    codes = raw[p:p + l_cd].decode("utf-8").split("\x1f") if n_cd else []
+    p += l_cd
+    arr = []
+    for fmt in ("H", "H", "H", "H", "H", "B"):
+        arr.append(struct.unpack_from(f"<{n}{fmt}", raw, p))
+        p += struct.calcsize(f"<{n}{fmt}")
+    out = {}
+    for r, sh, c, cl, ly, fl in zip(*arr):
+        out.setdefault(racks[r], {}).setdefault(str(sh), {}).setdefault(codes[c], []).append(
+            [cl, ly, 1] if fl else [cl, ly])
+    return out
+
+def aq_layout_chunks(s, size=AQ_LAYOUT_CHUNK):
+    """압축 문자열 → 시트 셀 크기 조각 목록(최소 1개)."""
+    return [s[i:i + size] for i in range(0, len(s), size)] or [""]
+
+def aq_layout_join(rows, site, rev):
+    """AQ_Layouts 행 → (site, rev) 조각을 순서대로 이은 문자열. 조각이 모자라면 None(쓰는 중·손상)."""
+    parts = {}
+    total = None
+    for r in rows or []:
+        if str(r.get("농협명", "")).strip() != site or str(r.get("리비전", "")).strip() != str(rev):
+            continue
+        try:
+            parts[int(r.get("조각") or 0)] = str(r.get("데이터") or "")
+            total = int(r.get("조각수") or 0)
+        except Exception:
+            continue
+    if not total or any(i not in parts for i in range(total)):
+        return None
+    return "".join(parts[i] for i in range(total))
+
+def aq_plan_attach(plan, packed):
+    """저장소에서 읽은 inst2를 plan에 되붙인다 — 읽는 쪽(사이트 설계·진열품목·인쇄물)은 종전처럼
+    plan["inst2"]·plan["assign"]·plan["splits"]를 본다. assign의 rows는 plan["rows"]에서."""
+    plan["inst2"] = packed
+    asg, sp = aq_inst_derive_assign(aq_inst_unpack(packed, lambda c: ""), plan.get("rows") or {})
+    plan["assign"] = asg
+    if sp: plan["splits"] = sp
+    else: plan.pop("splits", None)
+    return plan
+
+def aq_plan_rows_meta(rows_meta):
+    """{코드: 깊이 줄수} → 배치JSON 'rows'(2 이상만 — [V68] 다이어트 규칙과 같음)."""
+    out = {}
+    for c, v in (rows_meta or {}).items():
+        try:
+            if int(v or 1) > 1: out[str(c)] = int(v)
+        except Exception:
+            pass
+    return out
+
+# ── [V97] 배치 조작 로그(이벤트 소싱) ──
+#  그림 드래그 한 번마다 배치JSON 전체를 다시 쓰는 대신(💾 = AQ_Sites 시트 전체 재기록),
+#  상자 조작(move·dup·del, 정렬 기준 anchor는 move에 포함)을 AQ_LayoutOps 시트에 '배치 1건 = 1행'으로 추가만 한다.
+#  사이트 상태 = 배치JSON 스냅샷(inst2, 기준 op_base) + 같은 기준의 로그 행을 시트 순서대로 재생.
+#  압축 = 재생 결과를 inst2로 접어 넣고 op_base를 새로 발급(옛 기준 로그는 무효 → 정리).
+#  dup은 만든 id(nid)를 로그에 남긴다 — 어느 세션에서 재생해도 같은 id가 나와 뒤 조작이 같은 상자를 가리킨다.
+AQ_OPLOG_KINDS = ("move", "dup", "del")
+AQ_OPLOG_WS = "AQ_LayoutOps"
+AQ_OPLOG_HDR = ["농협명", "기준", "세션", "순번", "시각", "조작JSON"]
+AQ_OPLOG_COMPACT = 60   # 같은 기준 로그가 이만큼 쌓이면 자동 압축
+_AQ_OP_KEYS = ("t", "iid", "code", "track", "tshelf", "xr", "onto", "anchor", "nid")
+
+def aq_op_base_new():
+    """새 스냅샷 기준(op_base) — 밀리초 16진. 💾 저장·압축·일괄 자동배치가 발급."""
+    return f"{int(time.time() * 1000):x}"
+
+def aq_op_slim(op):
+    """로그에 남길 조작 필드만 (브리지의 id·시각 등 제외)."""
+    return {k: op[k] for k in _AQ_OP_KEYS if op.get(k) is not None}
+
+def aq_op_apply(instances, op, dims, rack_list):
+    """로그 조작 1건 적용 — 그림 조작 반영과 재생이 같은 함수를 쓴다. instances = 리스트 또는 AqInstStore.
+    dup은 op["nid"]가 있으면 그 id로, 없으면 새 id를 발급해 op["nid"]에 적어 둔다. 반환 오류 문장/""."""
+    rk_by = {rk["명칭"]: rk for rk in rack_list}
+    def _sh_h(rk, sh):
+        r = rk_by.get(str(rk))
+        try: return r["단높이"][int(sh) - 1] if r and 0 < int(sh) <= len(r["단높이"]) else 0
+        except Exception: return 0
+    t, iid = op.get("t"), str(op.get("iid") or "")
+    if not iid:
+        return ""
+    if t == "move" and op.get("track"):
+        trk, tsh = str(op["track"]), int(op.get("tshelf") or 0)
+        return aq_inst_move(instances, iid, trk, tsh, xr=op.get("xr"), onto=op.get("onto"), dims=dims,
+                            shelf_h=_sh_h(trk, tsh), inner=(rk_by.get(trk) or {}).get("내측폭") or 0,
+                            anchor=op.get("anchor"))
+    if t == "dup":
+        st = aq_inst_store(instances)
+        src = st.find(iid)
+        e = aq_inst_dup(st, iid, dims=dims, shelf_h=_sh_h(src.get("rack"), src.get("shelf")) if src else 0,
+                        new_id=op.get("nid"))
+        if not e:
+            op["nid"] = st.items[-1]["id"]
+        return e
+    if t == "del":
+        return aq_inst_del(instances, iid)
+    return ""
+
+def aq_oplog_batches(rows, site, base):
+    """AQ_LayoutOps 행 → 이 사이트·기준의 조작 배치 목록(시트 순서 = 재생 순서). (세션, 순번) 중복은 1번만."""
+    out, seen = [], set()
+    for r in rows or []:
+        if str(r.get("농협명", "")).strip() != site or str(r.get("기준", "")).strip() != str(base or ""):
+            continue
+        k = (str(r.get("세션", "")), str(r.get("순번", "")))
+        if k in seen: continue
+        seen.add(k)
+        try: ops = json.loads(str(r.get("조작JSON") or "[]"))
+        except Exception: continue
+        if isinstance(ops, list):
+            out.append([o for o in ops if isinstance(o, dict) and o.get("t") in AQ_OPLOG_KINDS])
+    return out
+
+def aq_ops_replay(instances, batches, dims, rack_list):
+    """스냅샷 인스턴스에 로그 배치를 차례로 재생(제자리). 반환 (적용 조작 수, 오류 문장 목록)."""
+    st = aq_inst_store(instances)
+    n, errs = 0, []
+    for ops in batches:
+        for op in ops:
+            e = aq_op_apply(st, op, dims, rack_list)
+            if e: errs.append(e)
+            else: n += 1
+    return n, errs
+
+def aq_inst_fingerprint(instances):
+    """인스턴스 배치 지문 — 로그로 설명되지 않는 변경(자동배치·되돌리기·세부 조정) 감지용."""
+    return hash(json.dumps(aq_inst_pack(instances), sort_keys=True, ensure_ascii=False))
+
+# ── [V95] 전체 사이트 일괄 자동배치·검증 ──
+#  AQ_Items·상자 치수가 바뀌면 농협 사이트마다 사이트 설계 탭을 열어 자동배치·검증을 다시 해야 했다.
+#  사이트 1곳 = 순수 함수 1회(aq_site_rebatch) — 탭의 자동배치 입력(진열 계획·자유 배치·표준 위치·
+#  루퍼젯 본품·열힌트·기존 상자수)을 저장된 배치JSON에서 그대로 재구성하므로 워커 프로세스에서 돌릴 수 있다.
+#  aq_batch_sites = spawn 프로세스 풀(사이트별 병렬) — 서버가 프로세스 생성을 막으면 직렬로 같은 결과.
+def aq_site_racks(rack_rows, rack_order=None):
+    """[V95] 랙구성JSON 행(또는 편집표 records) → 배치용 rack_list — [V103] 사이트 설계 탭 _rk_list도 이 함수."""
+    def _cell(v):   # 편집표 새 행은 NaN — 'nan' 문자열이 명칭·그룹이 되지 않게
+        return "" if v is None or (isinstance(v, float) and v != v) else str(v).strip()
+    out = []
+    for rr in rack_rows or []:
+        if not hasattr(rr, "get"): continue
+        nm = _cell(rr.get("명칭"))
+        if not nm: continue
+        try: wv = int(float(rr.get("폭mm") or 0))
+        except Exception: wv = 0
+        try: hs = [int(float(x)) for x in str(rr.get("단높이mm(콤마구분)") or "").split(",") if str(x).strip()]
+        except Exception: hs = []
+        try: ds = [int(float(x)) for x in str(rr.get("단깊이mm(콤마구분)") or "").split(",") if str(x).strip()]
+        except Exception: ds = []
+        try: dp = int(float(rr.get("깊이mm") or 0))
+        except Exception: dp = 0
+        try: tk = int(float(rr.get("단두께mm") or 0))
+        except Exception: tk = 0
+        if wv > 0 and hs:
+            out.append({"명칭": nm, "내측폭": wv - 38, "단높이": hs, "단깊이": ds, "깊이": dp or 450,
+                        "단두께": tk, "그룹": _cell(rr.get("그룹"))})
+    if rack_order:
+        oidx = {n: i for i, n in enumerate(rack_order)}
+        out.sort(key=lambda rk: oidx.get(rk["명칭"], 999))
+    return out
+
+# ── [V103] 자동배치 입력 — 사이트 설계 탭 ⚡ 자동배치와 aq_site_rebatch가 같은 함수로 만든다 ──
+def aq_box0(c, plan_items, rec):
+    """지정 상자 — 진열 계획 items[c].box → AQ_Items 기본상자 (없으면 "")."""
+    return str((plan_items.get(c, {}) or {}).get("box") or (rec or {}).get("기본상자") or "").strip()
+
+def aq_eff_box(c, plan_items, rec, free_live):
+    """[V49] 유효 상자 — 지정 상자가 없고 자유 배치 품목이면 '자유:코드'."""
+    b = aq_box0(c, plan_items, rec)
+    return b or ("자유:" + c if c in free_live else "")
+
+def aq_free_rows(aq_items, plan_items, free_cur, use):
+    """[V49] 자유 배치 편집표 기본행 — 상자 없는 사용 품목마다 {품목코드·사용·형태·w·h·qty·iso}.
+    값 순서 = 저장값 → [V58] 표준 자유배치 존 → AQ_Items 가로·높이. 사용 = 저장돼 있거나 표준 존."""
+    out = []
+    for r in aq_items:
+        c = r["품목코드"]
+        if not use(c) or aq_box0(c, plan_items, r): continue
+        fc = free_cur.get(c, {}) if isinstance(free_cur.get(c, {}), dict) else {}
+        if not fc and aq_std_free_of(c): fc = dict(aq_std_free_of(c))
+        iso = bool(str(r.get("이미지ISO", "") or "").strip())
+        try: w = int(fc.get("w") or 0) or int(float(str(r.get("가로") or 0)))
+        except Exception: w = 0
+        try: h = int(fc.get("h") or 0) or int(float(str(r.get("높이") or 0)))
+        except Exception: h = 0
+        try: q = int(fc.get("qty") or 0)
+        except Exception: q = 0
+        out.append({"품목코드": c, "사용": (c in free_cur) or bool(aq_std_free_of(c)),
+                    "형태": str(fc.get("shape") or ("이미지" if iso else "사각")),
+                    "w": w, "h": h, "qty": q, "iso": iso})
+    return out
+
+def aq_place_inputs(rk_list, aq_items, groups, dims, box_of, use, n_old=None):
+    """⚡ 자동배치 입력 → (seq, pre, center_codes, colhint, n_of) — aq_auto_place/aq_solve_place 인자 그대로.
+    seq = 분류 순 · 분류 안은 상자 폭 큰 순 (코드, 분류, 유효 상자) — 공급 제외(use False) 품목은 빠진다.
+    pre = [V53] 표준 위치(섹션·단) — 랙 명칭이 '섹션NN'/'NN'이면 그 단. center_codes = 루퍼젯 본품(루퍼젯팩).
+    colhint = [V59] 표준 위치 단이면 열(좌·중·우) 순서. n_of = [V67] 기존 상자수(n_old) → 없으면 표준 상자수."""
+    by_code = {r["품목코드"]: r for r in aq_items}
+    seq = []
+    for g in groups:
+        gi = [r for r in aq_items if (r.get("진열분류") or "(미지정)") == g]
+        for r in sorted(gi, key=lambda r: (-dims.get(box_of(r["품목코드"]), (0, 0))[0], r["품목코드"])):
+            if use(r["품목코드"]):
+                seq.append((r["품목코드"], g, box_of(r["품목코드"])))
+    rk_by = {rk["명칭"]: rk for rk in rk_list}
+    def _std(c):
+        r = by_code.get(c, {}) or {}
+        sec = str(r.get("섹션", "") or "").strip()
+        try: sh = int(float(r.get("단") or 0))
+        except Exception: sh = 0
+        return r, sec, sh
+    pre = {}
+    for c, _g, _b in seq:
+        _r, sec, sh = _std(c)
+        if not sec or sh <= 0: continue
+        for cand in (f"섹션{sec}", sec):
+            if cand in rk_by and sh <= len(rk_by[cand]["단높이"]):
+                pre[c] = (cand, sh); break
+    ctr = [c for c, _g, b in seq if b == "루퍼젯팩" and c not in pre]
+    def colhint(c, rk, sh):
+        r, se, sd = _std(c)
+        if se and sd == sh and rk in (f"섹션{se}", se):
+            return AQ_COL_ORD.get(str(r.get("열", "") or "").strip(), 1)
+        return 1
+    n_old = n_old or {}
+    def n_of(c):
+        return n_old.get(c, 0) or aq_std_n_of(c)
+    return seq, pre, ctr, colhint, n_of
+
+def aq_place_seqs(asg, seq, dims, colhint, n_of, group_order):
+    """자동배치 결과 {코드: (랙, 단)} → {(랙, 단): 정렬 seq} (aq_instances_from_seqs 입력). 상자 치수 없는 품목은 뺀다."""
+    meta = {c: (g, b) for c, g, b in seq}
+    sq_by = {}
+    for c, (rk, sh) in asg.items():
+        g, b = meta.get(c, ("(미지정)", ""))
+        wh = dims.get(b)
+        if not wh: continue
+        for _ in range(max(1, int(n_of(c) or 1))):
+            sq_by.setdefault((rk, sh), []).append((c, g, b, wh[0], wh[1], colhint(c, rk, sh)))
+    for k in sq_by:
+        sq_by[k] = aq_canon_seq(sq_by[k], group_order)
+    return sq_by
+
+def aq_plan_dumps(plan, limit=50000):
+    """[V68→V95 공용화] 배치JSON 직렬화 — 공백 없는 JSON, 49,500자 임박 시 하위호환 splits → assign 순으로 생략.
+    반환: (JSON 문자열 또는 None(시트 셀 한도 초과), 생략한 필드 목록). plan은 제자리에서 줄어든다."""
+    sep = (",", ":")
+    pj = json.dumps(plan, ensure_ascii=False, separators=sep)
+    dropped = []
+    for f in ("splits", "assign"):
+        if len(pj) > limit - 500 and f in plan:
+            plan.pop(f, None)
+            dropped.append(f)
+            pj = json.dumps(plan, ensure_ascii=False, separators=sep)
+    return (pj if len(pj) <= limit else None), dropped
+
+def _aq_plan_insts(plan, box_of):
+    """저장 배치JSON의 인스턴스(inst2·초기 schema 2) — v1 레거시(assign/splits만)는 None."""
+    packed = plan.get("inst2")
+    if isinstance(packed, dict) and packed:
+        return aq_inst_unpack(packed, box_of)
+    if isinstance(plan.get("instances"), list):
+        out = []
+        for x in plan["instances"]:
+            if not isinstance(x, dict): continue
+            try:
+                e = {"id": str(x.get("id") or ""), "code": str(x.get("code") or ""), "box": str(x.get("box") or ""),
+                     "rack": str(x.get("rack") or ""), "shelf": int(x.get("shelf") or 0),
+                     "col": float(x.get("col") or 0), "layer": float(x.get("layer") or 0)}
+            except Exception:
+                continue
+            if e["id"] and e["code"] and e["rack"] and e["shelf"] > 0:
+                out.append(e)
+        return aq_inst_normalize(out)
+    return None
+
+def _aq_val_counts(msgs):
+    """aq_inst_validate 문장 → (폭 초과, 높이 초과, 기타) 건수."""
+    w = sum(1 for m in msgs if "폭 초과" in m)
+    h = sum(1 for m in msgs if "적층 높이 초과" in m)
+    return w, h, len(msgs) - w - h
+
+def aq_site_rebatch(site, aq_items, box_dims, groups_all, solve=False, budget_s=3.0):
+    """[V95] 사이트 1곳 — 저장 배치 재검증 + 자동배치 + 새 배치 검증 (순수 함수 · 워커 프로세스용).
+    입력: AQ_Sites 행, AQ_Items 레코드, aq_box_dims_map(AQ_Boxes), 진열분류 전체 목록.
+    반환 dict: 농협명·랙·품목·미배치(+코드)·현재/새 폭·높이 초과·기타·오류 + 배치JSON(새 문자열, 저장 불가면 None)
+    + inst2(새 좌표 — [V98] 배치JSON엔 없음, AQ_Layouts에 따로 저장)
+    + 원본(실행 시점 배치JSON — 일괄 저장 때 그사이 수정된 사이트를 건너뛰는 대조용).
+    [V98] site의 배치JSON에 좌표 포인터만 있으면 호출 쪽이 aq_plan_attach로 inst2를 되붙여 넘긴다.
+    자동배치 입력은 사이트 설계 탭의 ⚡ 자동배치와 같다(편집표를 건드리지 않은 상태 = 저장값·기본값)."""
+    name = str(site.get("농협명", "") or "").strip()
+    raw = str(site.get("배치JSON") or "")
+    rep = {"농협명": name, "랙": 0, "품목": 0, "미배치": 0, "미배치 품목": [],
+           "현재 폭초과": None, "현재 높이초과": None, "현재 기타": None,
+           "새 폭초과": 0, "새 높이초과": 0, "새 기타": 0, "검증": [], "오류": "",
+           "배치JSON": None, "inst2": None, "원본": raw}
+    try:
+        try: plan = json.loads(raw or "{}")
+        except Exception: plan = {}
+        if not isinstance(plan, dict): plan = {}
+        try: racks_raw = json.loads(str(site.get("랙구성JSON") or "[]"))
+        except Exception: racks_raw = []
+        order = [n for n in (plan.get("rack_order") or []) if isinstance(n, str)]
+        rk_list = aq_site_racks(racks_raw if isinstance(racks_raw, list) else [], order)
+        rep["랙"] = len(rk_list)
+        if not rk_list:
+            rep["오류"] = "랙 구성 없음(폭mm·단높이 필요)"; return rep
+        items = plan.get("items", {}) if isinstance(plan.get("items", {}), dict) else {}
+        free_cur = plan.get("free", {}) if isinstance(plan.get("free", {}), dict) else {}
+        by_code = {r["품목코드"]: r for r in aq_items}
+        def _use(c):
+            o = items.get(c, {})
+            return (o.get("use", True) is not False) if isinstance(o, dict) else True
+        # 자유 배치 — 탭 편집표를 건드리지 않은 상태(aq_free_rows 기본행)와 같다
+        free_live = {f["품목코드"]: (f["w"], f["h"]) for f in aq_free_rows(aq_items, items, free_cur, _use)
+                     if f["사용"] and f["w"] > 0 and f["h"] > 0 and f["qty"] > 0}
+        dims = dict(box_dims)
+        dims.update({f"자유:{c}": wh for c, wh in free_live.items()})
+        def _eff_box(c):
+            return aq_eff_box(c, items, by_code.get(c), free_live)
+        # 저장 배치 재검증(상자 치수가 바뀌었으면 여기서 드러난다) + 기존 상자수 보존
+        cur = _aq_plan_insts(plan, _eff_box)
+        cnt_old = {}
+        if cur is not None:
+            for it in cur:
+                cnt_old[it["code"]] = cnt_old.get(it["code"], 0) + 1
+            (rep["현재 폭초과"], rep["현재 높이초과"],
+             rep["현재 기타"]) = _aq_val_counts(aq_inst_validate(cur, rk_list, dims))
+        pg = [g for g in (aq_grp_norm(x) for x in plan.get("groups", []) or []) if g in groups_all] or list(groups_all)
+        seq, pre, ctr, _ch, _nf = aq_place_inputs(rk_list, aq_items, pg, dims, _eff_box, _use, cnt_old)
+        rep["품목"] = len(seq)
+        place = aq_solve_place if solve else aq_auto_place
+        kw = {"budget_s": budget_s} if solve else {}
+        asg, unp = place(rk_list, seq, dims, group_order=pg, pre=pre, center_codes=ctr, colhint=_ch, n_of=_nf, **kw)
+        rep["미배치"], rep["미배치 품목"] = len(unp), list(unp)
+        insts = aq_instances_from_seqs(aq_place_seqs(asg, seq, dims, _ch, _nf, pg), rk_list)
+        msgs = aq_inst_validate(insts, rk_list, dims)
+        rep["새 폭초과"], rep["새 높이초과"], rep["새 기타"] = _aq_val_counts(msgs)
+        rep["검증"] = msgs
+        # 새 배치JSON — 배치 좌표·파생 하위호환만 교체, 진열 계획(groups·items·free·rack_order)은 그대로
+        rows_meta = dict(plan.get("rows") or {}) if isinstance(plan.get("rows"), dict) else {}
+        for c, d in (plan.get("assign", {}) if isinstance(plan.get("assign", {}), dict) else {}).items():
+            if isinstance(d, dict):
+                try: rows_meta[str(c)] = max(1, int(d.get("rows") or 1))
+                except Exception: pass
+        # [V98] 좌표(inst2)는 rep["inst2"]로 따로 — 저장 시 AQ_Layouts에 쓰고 배치JSON엔 포인터만
+        new = dict(plan)
+        for f in ("instances", "inst2", "assign", "splits", "layout"):
+            new.pop(f, None)
+        new["schema_version"] = AQ_SCHEMA_V
+        new["rows"] = aq_plan_rows_meta(rows_meta)
+        rep["inst2"] = aq_inst_pack(insts)
+        new["updated"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+        new["op_base"] = aq_op_base_new()   # [V97] 새 스냅샷 — 옛 기준 조작 로그는 재생되지 않는다
+        pj, _dropped = aq_plan_dumps(new)
+        rep["배치JSON"] = pj
+        if pj is None:
+            rep["오류"] = "배치JSON(진열 계획)이 시트 셀 한도(50,000자) 초과 — 저장 불가"
+    except Exception as e:
+        rep["오류"] = f"{type(e).__name__}: {e}"
+    return rep
+
+_AQ_BATCH_CTX = {}
+
+def _aq_batch_init(ctx):
+    """워커 프로세스 초기화 — 공통 입력(AQ_Items·상자 치수·분류)은 워커당 1번만 받는다."""
+    _AQ_BATCH_CTX.clear()
+    _AQ_BATCH_CTX.update(ctx)
+
+def _aq_batch_one(site):
+    return aq_site_rebatch(site, **_AQ_BATCH_CTX)
+
+def aq_batch_sites(sites, aq_items, box_dims, groups_all, solve=False, budget_s=3.0, workers=None, skip=()):
+    """[V95] 전체 사이트 일괄 자동배치·검증 — 반환 (사이트별 aq_site_rebatch 결과 목록(시트 순서), 쓴 워커 수).
+    spawn 프로세스 풀(사이트 1곳 = 작업 1건). 사이트가 1곳뿐이거나 풀을 못 띄우면 직렬. skip = 제외할 농협명."""
+    jobs = [s for s in sites or [] if str(s.get("농협명", "") or "").strip()
+            and str(s.get("농협명", "") or "").strip() not in set(skip or ())]
+    ctx = {"aq_items": list(aq_items or []), "box_dims": dict(box_dims or {}),
+           "groups_all": list(groups_all or []), "solve": bool(solve), "budget_s": float(budget_s)}
+    n = min(len(jobs), workers or os.cpu_count() or 1)
+    if n > 1:
+        try:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_aq_batch_init, initargs=(ctx,)) as ex:
+                return list(ex.map(_aq_batch_one, jobs)), n
+        except Exception:
+            pass   # 프로세스 생성 불가(호스팅 제한·BrokenProcessPool) → 직렬로 같은 결과
+    return [aq_site_rebatch(s, **ctx) for s in jobs], 1
+
 def _aq_esc(s):
     """[V49] SVG/HTML 속성용 이스케이프."""
     return (str(s).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;"))
@@ -713,18 +1412,27 @@ _AQ_CW = {   # [V57] 문자별 폭(em) — 크롬 sans-serif(Arial+맑은고딕)
     "-": 0.36, "(": 0.36, ")": 0.36, "·": 0.36, "'": 0.20, ":": 0.30,
 }
 
-def _aq_txt_w(s, fs=1.0):
-    """[V57] SVG text 근사 폭(px). 한글·전각=1.0em · 숫자 0.57 · 대문자 0.62 · 소문자 0.52(표 우선).
-    실측(크롬) 대비 5% 여유를 둬 '박스 밖으로 나가는' 오차 방향을 차단한다."""
-    w = 0.0
-    for ch in str(s):
+# [V102] 라벨 측정 캐시 — 같은 품목명·규격이 상자·랙·리런마다 되풀이되므로 문자열 단위로 한 번만 잰다
+#  (quote_docs._text_lines와 같은 방식). 누적 폭 배열이 있으면 말줄임 후보 t[:i]의 폭은 pre[i] 한 번 조회.
+@functools.lru_cache(maxsize=8192)
+def _aq_txt_em(s):
+    """[V102] 문자열 → 누적 폭(em) 튜플 — pre[i] = 앞 i글자 폭, pre[-1] = 전체. 글자별 폭 규칙은 _aq_txt_w."""
+    w, pre = 0.0, [0.0]
+    for ch in s:
         if ord(ch) > 0x2E80: w += 1.0
         elif ch in _AQ_CW:   w += _AQ_CW[ch]
         elif ch.isdigit():   w += 0.57
         elif ch.isupper():   w += 0.62
         else:                w += 0.52
-    return w * fs * 1.05
+        pre.append(w)
+    return tuple(pre)
+
+def _aq_txt_w(s, fs=1.0):
+    """[V57] SVG text 근사 폭(px). 한글·전각=1.0em · 숫자 0.57 · 대문자 0.62 · 소문자 0.52(표 우선).
+    실측(크롬) 대비 5% 여유를 둬 '박스 밖으로 나가는' 오차 방향을 차단한다. [V102] 폭은 _aq_txt_em 캐시에서."""
+    return _aq_txt_em(str(s))[-1] * fs * 1.05
 
+@functools.lru_cache(maxsize=4096)
 def _aq_strip_paren(s):
     """[V57] 괄호부 제거 — '밸브바디(조임식연결구)' → '밸브바디'. 괄호만 남으면 원문 유지."""
     t, out, depth = str(s), [], 0
@@ -737,9 +1445,11 @@ def _aq_strip_paren(s):
     r = "".join(out).strip(" ·-/,")
     return r or t.strip()
 
+@functools.lru_cache(maxsize=16384)
 def _aq_fit_label(s, max_px, fs, min_fs=2.4):
     """[V57] 박스 폭 안에 들어가도록 (텍스트, 폰트크기) 조정.
-    ① 괄호부 제거 ② 폰트 축소(min_fs까지) ③ 그래도 넘치면 말줄임(…). 안 들어가면 ('', fs)."""
+    ① 괄호부 제거 ② 폰트 축소(min_fs까지) ③ 그래도 넘치면 말줄임(…). 안 들어가면 ('', fs).
+    [V102] (문구, 폭, 크기) 단위 캐시 — 같은 치수 상자의 같은 품목은 다시 계산하지 않는다."""
     t = str(s).strip()
     if not t or max_px <= 1: return "", fs
     if _aq_txt_w(t, fs) > max_px:
@@ -750,28 +1460,55 @@ def _aq_fit_label(s, max_px, fs, min_fs=2.4):
         fs = max(min_fs, max_px / w1)
     fs = int(fs * 10) / 10.0 or min_fs     # SVG에 소수 1자리로 찍히므로 내림 = 반올림 확대 방지
     if _aq_txt_w(t, fs) > max_px:          # 최소 폰트에서도 넘침 → 말줄임
-        while t and _aq_txt_w(t + "…", fs) > max_px:
-            t = t[:-1]
-        t = (t + "…") if t else ""
+        pre, ell, i = _aq_txt_em(t), _aq_txt_em("…")[-1], len(t)
+        while i and (pre[i] + ell) * fs * 1.05 > max_px:   # = _aq_txt_w(t[:i] + "…", fs)
+            i -= 1
+        t = (t[:i] + "…") if i else ""
     return t, fs
 
-def _aq_hover_attrs(it, info):
-    """[V49] 상자 rect의 호버 툴팁 데이터 속성. info={코드:{name,spec,box,cap,...}} 없으면 빈 문자열."""
+def _aq_hover_attrs(it, info, tbl=None):
+    """[V49] 상자 rect의 호버 툴팁 데이터 속성. info={코드:{name,spec,box,cap,...}} 없으면 빈 문자열.
+    [V100] tbl(dict)이 주어지면(압축 SVG) 툴팁 값은 tbl[코드]=[name,spec,box,cap]에 한 번만 적고 class만 반환."""
     if not info: return ""
     meta = info.get(it[0])
     if not meta: return ""
+    if tbl is not None:
+        tbl[it[0]] = [str(meta.get("name") or it[0]), str(meta.get("spec") or ""),
+                      str(meta.get("box") or it[2]), str(meta.get("cap") or "")]
+        return ' class="aqbox"'
     return (f' class="aqbox" data-name="{_aq_esc(meta.get("name") or it[0])}"'
             f' data-spec="{_aq_esc(meta.get("spec") or "")}"'
             f' data-box="{_aq_esc(meta.get("box") or it[2])}"'
             f' data-cap="{_aq_esc(meta.get("cap") or "")}"')
 
-def _aq_rack_parts(out, x0, y0, rack_name, inner, shelf_hs, shelf_seqs, frame_t=19, scale=0.22, show_dims=True, info=None, shelf_t=0, force=None, inst_by_shelf=None, dims=None):
+def _aq_hex(c):
+    """[V100] 'rgb(r,g,b)' → '#rrggbb' (압축 SVG). 그 밖의 값은 그대로."""
+    c = str(c)
+    if not c.startswith("rgb("): return c
+    try: return "#" + "".join(f"{int(v):02X}" for v in c[4:-1].split(","))
+    except Exception: return c
+
+def _aq_num(v):
+    """[V100] 압축 SVG 숫자 — 소수 1자리, 끝의 .0 생략('12.0'→'12')."""
+    t = f"{v:.1f}"
+    if t.endswith(".0"): t = t[:-2]
+    return "0" if t == "-0" else t
+
+# [V100] 압축 SVG 공통 스타일 — 상자마다 되풀이하던 표시 속성을 클래스 하나로
+_AQ_SVG_CSS = ('<style>.aqb,.aqbox{stroke:#191414;stroke-width:.6;fill-opacity:.72}'
+               '.aqtag{text-anchor:middle;font-weight:bold;fill:#191414;pointer-events:none}'
+               '.aqlbl{display:none;text-anchor:middle;pointer-events:none}'
+               'svg{fill:#191414}</style>')   # 라벨 기본 글자색 = 상속(속성 fill이 있으면 그쪽이 우선)
+
+def _aq_rack_parts(out, x0, y0, rack_name, inner, shelf_hs, shelf_seqs, frame_t=19, scale=0.22, show_dims=True, info=None, shelf_t=0, force=None, inst_by_shelf=None, dims=None, compact=None):
     """(x0,y0) 기준으로 랙 1대의 SVG 요소들을 out 리스트에 추가. 반환: (폭px, 높이px).
     [V49] 스택 패킹 렌더(동일상자 열 적층) + info 있으면 호버 데이터 속성 + 도형/이미지(자유 배치) 지원.
     [V62] shelf_t = 단(선반 판) 두께 — 단높이(개구부)는 총높이−단두께×(단수−1)이라, 판 두께를
           높이·단 바닥 y에 더해야 단수가 달라도 랙 총높이가 동일하게(=실제) 그려진다.
     [V67] inst_by_shelf={(랙명,단):[인스턴스]} + dims={상자:(폭,높이)} — 주어지면 패킹하지 않고
-          저장된 좌표(col·layer) 그대로 그린다(인스턴스 모델). 상자에 data-iid 부여."""
+          저장된 좌표(col·layer) 그대로 그린다(인스턴스 모델). 상자에 data-iid 부여.
+    [V100] compact={"sym": {}, "tbl": {}} → 압축 SVG: 사각 상자 = <use href="#심볼">(심볼 정의는 compact["sym"]),
+          툴팁 값은 compact["tbl"], 표시 속성은 _AQ_SVG_CSS 클래스, 숫자는 _aq_num."""
     W = inner + frame_t * 2
     _nsh = len(shelf_hs)
     H = sum(shelf_hs) + shelf_t * max(0, _nsh - 1) + frame_t   # [V62] 단두께 반영
@@ -816,6 +1553,8 @@ def _aq_rack_parts(out, x0, y0, rack_name, inner, shelf_hs, shelf_seqs, frame_t=
             if not seq: continue
             _cp9, _fit9, _rej9 = aq_pack_shelf_stacks(seq, inner, sh, force=force)   # [V64] 수동 적층 고정
             cols_p = [(cx, cw, [(it, "") for it in stack]) for cx, cw, stack in _cp9]
+        if compact is not None:   # [V100] 단 묶음 — 상자별 data-rack·data-shelf는 iframe JS가 여기서 채운다
+            out.append(f'<g class="aqsg" data-shelf="{si}">')
         tape = []
         for cx, cw, stack in cols_p:
             _ycum9 = 0.0   # [V67] 열 안 누적 높이 — 서로 다른 상자 적층(수동)도 정확히 그려짐
@@ -825,14 +1564,28 @@ def _aq_rack_parts(out, x0, y0, rack_name, inner, shelf_hs, shelf_seqs, frame_t=
                 bx = x0 + frame_t * scale + cx * scale
                 _ycum9 += bh
                 by = base - _ycum9 * scale
-                attrs = _aq_hover_attrs(it, info)
-                if attrs:   # [V51] 드래그·더블클릭용 위치 데이터
+                attrs = _aq_hover_attrs(it, info, None if compact is None else compact["tbl"])
+                if compact is not None:
+                    attrs = attrs or ' class="aqb"'
+                    if attrs.startswith(' class="aqbox'):
+                        attrs += f' data-code="{_aq_esc(it[0])}"'
+                elif attrs:   # [V51] 드래그·더블클릭용 위치 데이터
                     attrs += f' data-code="{_aq_esc(it[0])}" data-rack="{_aq_esc(rack_name)}" data-shelf="{si}"'
+                if attrs.startswith(' class="aqbox'):
                     if _iid9:   # [V67] 상자 인스턴스 id — 조작(op)의 단위
                         attrs += f' data-iid="{_aq_esc(_iid9)}"'
                 meta = (info or {}).get(it[0]) or {}
                 shape = meta.get("shape") or ""
-                if shape == "원":
+                if compact is not None and shape not in ("원", "이미지"):   # [V100] 같은 (치수·색) 상자 = 심볼 1개
+                    _w9c, _h9c = _aq_num(bw * scale), _aq_num(bh * scale)
+                    _sid9 = f"s{_w9c}_{_h9c}_{col[1:]}".replace(".", "d")
+                    compact["sym"].setdefault(_sid9, f'<symbol id="{_sid9}" overflow="visible">'
+                                                     f'<rect width="{_w9c}" height="{_h9c}" fill="{col}"/></symbol>')
+                    out.append(f'<use href="#{_sid9}" x="{_aq_num(bx)}" y="{_aq_num(by)}"{attrs}/>')
+                elif compact is not None and shape == "원":
+                    out.append(f'<ellipse cx="{_aq_num(bx + bw*scale/2)}" cy="{_aq_num(by + bh*scale/2)}" '
+                               f'rx="{_aq_num(bw*scale/2)}" ry="{_aq_num(bh*scale/2)}" fill="{col}"{attrs}/>')
+                elif shape == "원":
                     out.append(f'<ellipse cx="{bx + bw*scale/2:.1f}" cy="{by + bh*scale/2:.1f}" rx="{bw*scale/2:.1f}" ry="{bh*scale/2:.1f}" '
                                f'fill="{col}" fill-opacity="0.72" stroke="#191414" stroke-width="0.6"{attrs}/>')
                 elif shape == "이미지" and meta.get("img"):
@@ -851,7 +1604,10 @@ def _aq_rack_parts(out, x0, y0, rack_name, inner, shelf_hs, shelf_seqs, frame_t=
                 if _tag9:   # [V57] 평소(비전체화면) 뒷표기 — 전체화면에서는 aqlbl 라벨로 교체(JS가 숨김)
                     _tg9t, _tg9f = _aq_fit_label(_tag9, _bwin9,
                                                  max(4.5, min(9.0, bw * scale * 0.30, _bhin9 * 0.62)), min_fs=3.2)
-                    if _tg9t:
+                    if _tg9t and compact is not None:
+                        out.append(f'<text class="aqtag" x="{_aq_num(_cx9)}" y="{_aq_num(_cy9 + _tg9f*0.36)}" '
+                                   f'font-size="{_aq_num(_tg9f)}">{_aq_esc(_tg9t)}</text>')
+                    elif _tg9t:
                         out.append(f'<text class="aqtag" x="{_cx9:.1f}" y="{_cy9 + _tg9f*0.36:.1f}" '
                                    f'font-size="{_tg9f:.1f}" text-anchor="middle" font-weight="bold" '
                                    f'fill="#191414" pointer-events="none">{_aq_esc(_tg9t)}</text>')
@@ -885,6 +1641,19 @@ def _aq_rack_parts(out, x0, y0, rack_name, inner, shelf_hs, shelf_seqs, frame_t=
                     _gap9 = _l1f9 * 0.22
                     _tot9 = 1.16 * _l1f9 + ((_gap9 + 1.30 * _l2f9) if _l2t9 else 0.30 * _l1f9)
                     _y19 = _cy9 - _tot9 / 2 + 1.16 * _l1f9
+                    if compact is not None:
+                        if _l1t9:
+                            out.append(f'<text class="aqlbl" x="{_aq_num(_cx9)}" y="{_aq_num(_y19)}" '
+                                       f'font-size="{_aq_num(_l1f9)}"'
+                                       + ("" if _aq_hex(_l1c9) == "#191414" else f' fill="{_aq_hex(_l1c9)}"')
+                                       + (' font-weight="bold"' if _l1w9 == "bold" else "")
+                                       + f'>{_aq_esc(_l1t9)}</text>')
+                        if _l2t9:
+                            out.append(f'<text class="aqlbl" x="{_aq_num(_cx9)}" y="{_aq_num(_y19 + _gap9 + _l2f9)}" '
+                                       f'font-size="{_aq_num(_l2f9)}"'
+                                       + ("" if _aq_hex(_lfill9) == "#191414" else f' fill="{_aq_hex(_lfill9)}"')
+                                       + f'>{_aq_esc(_l2t9)}</text>')
+                        continue
                     if _l1t9:
                         out.append(f'<text class="aqlbl" x="{_cx9:.1f}" y="{_y19:.1f}" '
                                    f'font-size="{_l1f9:.1f}" text-anchor="middle" fill="{_l1c9}" '
@@ -894,8 +1663,22 @@ def _aq_rack_parts(out, x0, y0, rack_name, inner, shelf_hs, shelf_seqs, frame_t=
                                    f'font-size="{_l2f9:.1f}" text-anchor="middle" fill="{_lfill9}" '
                                    f'pointer-events="none" style="display:none">{_aq_esc(_l2t9)}</text>')
             tape.append((cx, cx + cw, AQ_GROUP_COLORS.get(aq_grp_norm(stack[0][0][1]), "#9AA0A6")))   # [V67] (it,iid) 구조
+        if compact is not None:   # [V100] 맞붙은 같은 색 테이프는 한 장으로
+            _tm9 = []
+            for tx0, tx1, col in tape:
+                if _tm9 and _tm9[-1][2] == col and abs(tx0 - _tm9[-1][1]) < 0.5:
+                    _tm9[-1] = (_tm9[-1][0], tx1, col)
+                else:
+                    _tm9.append((tx0, tx1, col))
+            tape = _tm9
         for tx0, tx1, col in tape:   # 색상 자석테이프(단 전면 하단 밴드)
+            if compact is not None:
+                out.append(f'<rect class="aqtape" x="{_aq_num(x0 + frame_t*scale + tx0*scale)}" y="{_aq_num(base - 3)}" '
+                           f'width="{_aq_num((tx1-tx0)*scale)}" height="3.4" fill="{col}"/>')
+                continue
             out.append(f'<rect class="aqtape" x="{x0 + frame_t*scale + tx0*scale:.1f}" y="{base - 3:.1f}" width="{(tx1-tx0)*scale:.1f}" height="3.4" fill="{col}"/>')
+        if compact is not None:
+            out.append('</g>')
     return pw, ph
 
 def aq_rack_svg(rack_name, inner, shelf_hs, shelf_seqs, frame_t=19, scale=0.22, info=None):
@@ -906,26 +1689,67 @@ def aq_rack_svg(rack_name, inner, shelf_hs, shelf_seqs, frame_t=19, scale=0.22,
     return (f'<svg width="{pw + pad*2:.0f}" height="{ph + pad*2 + 14:.0f}" xmlns="http://www.w3.org/2000/svg">'
             + "".join(out) + '</svg>')
 
-def aq_racks_svg_all(rack_list, seq_by_shelf, per_row=6, scale=None, info=None, mstack=None, instances=None, dims=None, rows=None):
-    """[V47] 전체 배치 뷰 — V1 도면처럼 랙들을 줄당 per_row대씩 나란히 렌더.
-    rack_list=[{명칭,내측폭,단높이}], seq_by_shelf={(랙명,단):[...]}. [V49] info=호버 툴팁 데이터.
-    [V64] mstack=수동 적층 고정 코드 집합(렌더 전용 — 검증·견적 패킹엔 미적용).
-    [V67] instances(인스턴스 리스트)+dims 주어지면 패킹 없이 저장 좌표대로 렌더(seq_by_shelf 무시).
-    [V76] rows=줄 구성을 밖에서 지정. 생략해도 랙에 '그룹'이 있으면 **그룹 = 한 줄**로 자동 렌더 —
-          화면 배치도와 가이드북 지면이 같은 줄을 쓰게 하려는 것(대표님 지시 2026-08-11)."""
-    if not rack_list: return ""
+# ── [V99] 랙 <g> 조각 캐시 — 리런(드래그 ACK·위젯 변경)마다 전 랙·전 상자를 다시 그리던 것을,
+#  내용이 바뀐 랙만 다시 그린다. 키 = (랙 치수, 위치, 배율, 단별 인스턴스, 쓰인 상자 치수·품목 info) —
+#  위치(x,y)도 키에 넣어 출력 SVG는 캐시 전과 글자 하나 다르지 않다(앞 랙 폭이 바뀌면 뒤 랙은 새로 그림).
+#  세션 스레드끼리 공유 — 조회·등록은 looperget.rev_cache(lock)로.
+_AQ_RACK_FRAG = OrderedDict()
+_AQ_RACK_FRAG_MAX = 256
+
+def _aq_frag_val(v):
+    return v if isinstance(v, (str, int, float, bool, type(None))) else repr(v)
+
+def _aq_rack_frag_key(x, y, rk, scale, show_dims, info, iby, dims, compact=False):
+    """인스턴스 렌더 경로의 랙 조각 키. 해시할 수 없는 값이 섞이면 None(캐시 생략)."""
+    name = rk["명칭"]
+    shelves, codes, boxes = [], set(), set()
+    for si in range(1, len(rk["단높이"]) + 1):
+        lst = iby.get((name, si)) or ()
+        shelves.append(tuple(tuple(sorted((k, _aq_frag_val(v)) for k, v in it.items())) for it in lst))
+        for it in lst:
+            codes.add(str(it.get("code") or "")); boxes.add(str(it.get("box") or ""))
+    key = (name, rk["내측폭"], tuple(rk["단높이"]), int(rk.get("단두께") or 0), round(x, 3), round(y, 3),
+           scale, show_dims, compact, tuple(shelves),
+           tuple(sorted((b, tuple((dims or {}).get(b) or ())) for b in boxes)),
+           tuple(sorted((c, tuple(sorted((k, _aq_frag_val(v)) for k, v in ((info or {}).get(c) or {}).items())))
+                        for c in codes)) if info else None)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+def _aq_rack_frag(x, y, rk, seq_by_shelf, scale, show_dims, info, mstack, iby, dims, compact=False):
+    """랙 1대 → ('<g class="aqrackg">…</g>', 폭px, 높이px, 심볼 {id: 정의}, 툴팁 {코드: [...]}).
+    인스턴스 경로는 _AQ_RACK_FRAG에서 재사용. [V100] compact=False면 심볼·툴팁은 빈 dict."""
+    key = _aq_rack_frag_key(x, y, rk, scale, show_dims, info, iby, dims, compact) if iby is not None else None
+
+    def _build():
+        _parts9 = []   # [V55] 랙 단위 <g> 그룹 — 랙 전체 드래그(순서 변경)용
+        _cp9 = {"sym": {}, "tbl": {}} if compact else None
+        pw, ph = _aq_rack_parts(_parts9, x, y, rk["명칭"], rk["내측폭"], rk["단높이"], seq_by_shelf,
+                                scale=scale, show_dims=show_dims, info=info,
+                                shelf_t=int(rk.get("단두께") or 0),   # [V62] 단 판 두께 반영
+                                force=mstack,   # [V64] 수동 적층 고정(구 경로)
+                                inst_by_shelf=iby, dims=dims,   # [V67] 인스턴스 좌표 렌더
+                                compact=_cp9)   # [V100] 압축 SVG
+        return (f'<g class="aqrackg" data-rack="{_aq_esc(rk["명칭"])}">' + "".join(_parts9) + '</g>', pw, ph,
+                _cp9["sym"] if _cp9 else {}, _cp9["tbl"] if _cp9 else {})
+
+    if key is None:
+        return _build()
+    return rev_cache(_AQ_RACK_FRAG, key, _build, _AQ_RACK_FRAG_MAX)
+
+def _aq_racks_place(rack_list, per_row=6, scale=None, rows=None):
+    """[V101] 전체 배치 뷰의 랙 자리 — aq_racks_svg_all(SVG)·aq_layout_model(브라우저 렌더) 공용.
+    반환 (배율, [(랙, x, y, 폭px, 높이px)], 전체 폭px, 전체 높이px). 폭·높이 계산은 _aq_rack_parts와 같다."""
     if rows is None:
         _gr9 = aq_rack_groups(rack_list)
         rows = [rks for _g9, rks in _gr9] if _gr9 else None
-    _iby9 = None
-    if instances is not None:
-        _iby9 = {}
-        for _it9 in instances:
-            _iby9.setdefault((str(_it9.get("rack") or ""), int(_it9.get("shelf") or 0)), []).append(_it9)
     if scale is None:
         n = len(rack_list)
         scale = 0.22 if n <= 2 else (0.16 if n <= 4 else 0.105)
-    pad, gap_x, gap_y = 16, 12, 26
+    pad, gap_x, gap_y, frame_t = 16, 12, 26, 19
     rows = [r for r in (rows or []) if r] or \
            [rack_list[i:i + per_row] for i in range(0, len(rack_list), per_row)]
     out, y = [], pad + 4
@@ -934,19 +1758,229 @@ def aq_racks_svg_all(rack_list, seq_by_shelf, per_row=6, scale=None, info=None,
         x = pad
         row_h = 0
         for rk in row:
-            _parts9 = []   # [V55] 랙 단위 <g> 그룹 — 랙 전체 드래그(순서 변경)용
-            pw, ph = _aq_rack_parts(_parts9, x, y + 10, rk["명칭"], rk["내측폭"], rk["단높이"], seq_by_shelf,
-                                    scale=scale, show_dims=(scale >= 0.15), info=info,
-                                    shelf_t=int(rk.get("단두께") or 0),   # [V62] 단 판 두께 반영
-                                    force=mstack,   # [V64] 수동 적층 고정(구 경로)
-                                    inst_by_shelf=_iby9, dims=dims)   # [V67] 인스턴스 좌표 렌더
-            out.append(f'<g class="aqrackg" data-rack="{_aq_esc(rk["명칭"])}">' + "".join(_parts9) + '</g>')
+            _hs9 = rk["단높이"]
+            pw = (rk["내측폭"] + frame_t * 2) * scale
+            ph = (sum(_hs9) + int(rk.get("단두께") or 0) * max(0, len(_hs9) - 1) + frame_t) * scale
+            out.append((rk, x, y + 10, pw, ph))
             x += pw + gap_x
             row_h = max(row_h, ph)
         total_w = max(total_w, x)
         y += row_h + gap_y
-    return (f'<svg width="{total_w + pad:.0f}" height="{y + pad:.0f}" xmlns="http://www.w3.org/2000/svg">'
-            + "".join(out) + '</svg>')
+    return scale, out, total_w + pad, y + pad
+
+def aq_racks_svg_all(rack_list, seq_by_shelf, per_row=6, scale=None, info=None, mstack=None, instances=None, dims=None, rows=None, compact=False):
+    """[V47] 전체 배치 뷰 — V1 도면처럼 랙들을 줄당 per_row대씩 나란히 렌더.
+    rack_list=[{명칭,내측폭,단높이}], seq_by_shelf={(랙명,단):[...]}. [V49] info=호버 툴팁 데이터.
+    [V64] mstack=수동 적층 고정 코드 집합(렌더 전용 — 검증·견적 패킹엔 미적용).
+    [V67] instances(인스턴스 리스트)+dims 주어지면 패킹 없이 저장 좌표대로 렌더(seq_by_shelf 무시).
+    [V76] rows=줄 구성을 밖에서 지정. 생략해도 랙에 '그룹'이 있으면 **그룹 = 한 줄**로 자동 렌더 —
+          화면 배치도와 가이드북 지면이 같은 줄을 쓰게 하려는 것(대표님 지시 2026-08-11).
+    [V99] 인스턴스 렌더는 랙 <g> 조각을 캐시(_AQ_RACK_FRAG) — 내용이 같은 랙은 다시 그리지 않는다.
+    [V100] compact=True → 화면용 압축 SVG(같은 치수·색 상자 = <symbol> 1개 + <use>, 툴팁 값은
+          <metadata id="aqinfo"> JSON 표 1개, 표시 속성은 CSS 클래스, 숫자 소수 .0 생략).
+          aq_svg_hover_html만 읽는 형식 — 파일 저장(_aq_svg_for_file)·가이드북은 기본 형식을 쓴다."""
+    if not rack_list: return ""
+    _iby9 = None
+    if instances is not None:
+        _iby9 = {}
+        for _it9 in instances:
+            _iby9.setdefault((str(_it9.get("rack") or ""), int(_it9.get("shelf") or 0)), []).append(_it9)
+    scale, _pl9, W, H = _aq_racks_place(rack_list, per_row, scale, rows)
+    out = []
+    syms, tbl = {}, {}
+    for rk, x, y, _pw9, _ph9 in _pl9:
+        _g9, pw, ph, _sy9, _tb9 = _aq_rack_frag(x, y, rk, seq_by_shelf, scale, scale >= 0.15, info, mstack,
+                                                _iby9, dims, compact)   # [V99] 바뀐 랙만 다시 그림
+        out.append(_g9)
+        syms.update(_sy9)
+        tbl.update(_tb9)
+    head = ""
+    if compact:
+        head = _AQ_SVG_CSS + "<defs>" + "".join(syms.values()) + "</defs>"
+        if tbl:
+            head += ('<metadata id="aqinfo">'
+                     + _aq_esc(json.dumps(tbl, ensure_ascii=False, separators=(",", ":"))) + '</metadata>')
+    return (f'<svg width="{W:.0f}" height="{H:.0f}" xmlns="http://www.w3.org/2000/svg">'
+            + head + "".join(out) + '</svg>')
+
+# ── [V101] 브라우저 렌더(JSON 모델) — 사이트 설계 iframe에 SVG 대신 배치 데이터를 보내고 JS가 그린다 ──
+#  리런마다 수천 상자 SVG(압축해도 ~100KB)를 다시 보내던 것을, 랙 자리·상자 치수·품목 표·단별 인스턴스만
+#  보낸다. 첫 전송(전체)은 부모 localStorage 'AQ_MDL'에 기준으로 남고, 이후 리런은 그 기준과 달라진
+#  단(랙,단)·품목·치수만 보낸다(누적 차이). 그리는 규칙(열 배치·라벨 맞춤·DOM 클래스)은
+#  aq_racks_svg_all(compact=True)과 같다 — 드래그·툴팁 JS는 그대로 동작한다.
+#  ⚠ Streamlit components.html은 html이 바뀌면 iframe을 새로 만든다 → 리런 사이의 상태는 localStorage가 잇는다.
+_AQ_MDL_FIX = ("s", "d", "W", "H", "rk")   # 이 값이 기준과 다르면 차이 대신 전체를 보낸다
+
+def _aq_mdl_num(v):
+    try: v = float(v or 0)
+    except Exception: return 0
+    return int(v) if v == int(v) else v
+
+def aq_layout_model(rack_list, instances, dims, info=None, per_row=6, scale=None, rows=None):
+    """[V101] 인스턴스 배치 → 브라우저 렌더 모델(JSON 직렬화 가능 dict). 랙이 없으면 None.
+    s·d = 배율·단 치수 표기 · W·H = 그림 크기 · rk = [[랙명, x, y, 내측폭, [단높이], 단두께]] ·
+    bx = {상자: [폭, 높이]} · cd = {코드: [색, 라벨색, 품목명, 규격, 상자, 수량, 뒷표기, 도형, 이미지]} ·
+    sh = {"랙번호:단": [[id, 코드, 상자, col, layer, 오른쪽정렬]]} (인스턴스 순서 = 렌더 순서)."""
+    if not rack_list: return None
+    scale, pl, W, H = _aq_racks_place(rack_list, per_row, scale, rows)
+    ri = {}
+    rk = []
+    for r, x, y, _pw, _ph in pl:
+        ri.setdefault(r["명칭"], len(rk))
+        rk.append([r["명칭"], x, y, r["내측폭"], list(r["단높이"]), int(r.get("단두께") or 0)])
+    sh, bx, cd = {}, {}, {}
+    for it in instances or []:
+        k = ri.get(str(it.get("rack") or ""))
+        if k is None: continue
+        c, b = str(it.get("code") or ""), str(it.get("box") or "")
+        sh.setdefault(f"{k}:{int(it.get('shelf') or 0)}", []).append(
+            [str(it.get("id") or ""), c, b, _aq_mdl_num(it.get("col")), _aq_mdl_num(it.get("layer")),
+             1 if _aq_anc(it) == "R" else 0])
+        if b in (dims or {}) and b not in bx:
+            bx[b] = list(dims[b])[:2]
+        meta = (info or {}).get(c)
+        if meta and c not in cd:
+            col = AQ_GROUP_COLORS.get(aq_grp_norm(str(meta.get("grp") or "(미지정)")), "#9AA0A6")
+            lum = _aq_lum_txt(_aq_hexrgb(col))
+            cd[c] = [col, _aq_hex(f"rgb({lum[0]},{lum[1]},{lum[2]})"), str(meta.get("name") or c),
+                     str(meta.get("spec") or ""), str(meta.get("box") or ""), str(meta.get("cap") or ""),
+                     str(meta.get("tag") or ""), str(meta.get("shape") or ""), str(meta.get("img") or "")]
+    return {"s": scale, "d": scale >= 0.15, "W": W, "H": H, "rk": rk,
+            "bx": bx, "cd": cd, "sh": sh}
+
+def _aq_mdl_rev(m):
+    return "%08x" % zlib.crc32(json.dumps(m, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+
+def aq_layout_payload(model, base=None, full_ratio=0.5):
+    """[V101] 이번 리런에 iframe으로 보낼 것 → (payload, 새 기준).
+    base = 직전에 돌려받은 기준({"rev", "m"}) — iframe이 localStorage에 가진 전체 모델과 같은 것.
+    기준이 없거나 랙 자리·배율이 바뀌었거나 바뀐 단이 full_ratio를 넘으면 전체 {"full", "rev", "H"},
+    아니면 기준 대비 누적 차이 {"base", "rev", "H", "sh", "cd", "bx"}(지워진 키 = null)."""
+    rev = _aq_mdl_rev(model)
+    if base and base.get("rev") and all(base["m"].get(k) == model.get(k) for k in _AQ_MDL_FIX):
+        d = {"base": base["rev"], "rev": rev, "H": model["H"]}
+        for k in ("sh", "cd", "bx"):
+            old, new = base["m"].get(k) or {}, model.get(k) or {}
+            d[k] = {n: v for n, v in new.items() if old.get(n) != v}
+            d[k].update({n: None for n in old if n not in new})
+        if len(d["sh"]) <= full_ratio * max(1, len(model.get("sh") or {})):
+            return d, base
+    return {"full": model, "rev": rev, "H": model["H"]}, {"rev": rev, "m": model}
+
+# [V101] 브라우저 렌더 스크립트 — #aqzoom 안에서 자기 자리 앞에 SVG를 만들어 넣고 스스로 빠진다.
+#  _aq_txt_w·_aq_strip_paren·_aq_fit_label·aq_inst_cols·_aq_rack_parts(compact)의 JS 이식 — 규칙을 바꾸면 양쪽 같이.
+_AQ_MDL_JS = """<script>(function(){
+var P=__MODEL__,N="__NONCE__",CW=__CW__,CSS=__CSS__,sc=document.currentScript,M=null,st={};
+function f1(v){var t=v*20;   /* 파이썬 '.1f'와 같게 — 정확한 .x5 동점은 짝수 쪽으로 */
+ if(t===Math.floor(t)&&t%2&&v*4===Math.floor(v*4)){var n=Math.floor(v*10);return ((n%2?n+1:n)/10).toFixed(1);}
+ return v.toFixed(1);}
+function f0(v){var t=v*2;return (t===Math.floor(t)&&t%2)?String(Math.floor(v)+(Math.floor(v)%2?1:0)):v.toFixed(0);}
+function nm(v){var t=f1(v);if(t.slice(-2)==='.0')t=t.slice(0,-2);return t==='-0'?'0':t;}
+function esc(s){return String(s).replace(/&/g,'&amp;').replace(/</g,'&lt;').replace(/>/g,'&gt;').replace(/"/g,'&quot;');}
+function tw(s,fs){var w=0;Array.from(String(s)).forEach(function(ch){
+ if(ch.codePointAt(0)>0x2E80)w+=1;else if(CW.hasOwnProperty(ch))w+=CW[ch];
+ else if(ch>='0'&&ch<='9')w+=0.57;else if(ch!==ch.toLowerCase())w+=0.62;else w+=0.52;});return w*fs*1.05;}
+function strip(s){var t=String(s),o='',d=0;Array.from(t).forEach(function(ch){
+ if('(\\uFF08['.indexOf(ch)>-1)d++;else if(')\\uFF09]'.indexOf(ch)>-1)d=Math.max(0,d-1);else if(d===0)o+=ch;});
+ o=o.replace(/^[ \\u00B7\\-\\/,]+|[ \\u00B7\\-\\/,]+$/g,'');return o||t.trim();}
+var FIT={};   /* [V102] (문구, 폭, 크기) 캐시 — _aq_fit_label과 같음 */
+function fit(s,mx,fs,mn){var k=s+'\u0001'+mx+'\u0001'+fs+'\u0001'+mn;
+ return FIT.hasOwnProperty(k)?FIT[k]:(FIT[k]=fit0(s,mx,fs,mn));}
+function fit0(s,mx,fs,mn){var t=String(s).trim();if(!t||mx<=1)return ['',fs];
+ if(tw(t,fs)>mx){var t2=strip(t);if(t2&&tw(t2,fs)<tw(t,fs))t=t2;}
+ var w1=tw(t,1)||1;if(w1*fs>mx)fs=Math.max(mn,mx/w1);
+ fs=Math.floor(fs*10)/10||mn;
+ if(tw(t,fs)>mx){var a=Array.from(t);while(a.length&&tw(a.join('')+'\\u2026',fs)>mx)a.pop();
+  t=a.length?a.join('')+'\\u2026':'';}
+ return [t,fs];}
+function cols(L,inner){var cl={},cr={},kl=[],kr=[],out=[],x=0;
+ L.forEach(function(e){var wh=M.bx[e[2]];if(!wh)return;var cv=+e[3]||0,R=inner&&e[5],m=R?cr:cl;
+  if(!m.hasOwnProperty(cv)){m[cv]=[];(R?kr:kl).push(cv);}m[cv].push([e,wh]);});
+ function stk(a){return a.slice().sort(function(p,q){return (+p[0][4]||0)-(+q[0][4]||0);});}
+ function wm(a){return Math.max.apply(null,a.map(function(p){return p[1][0];}));}
+ function asc(a,b){return a-b;}
+ kl.sort(asc).forEach(function(cv){var a=stk(cl[cv]),w=wm(a);out.push([x,w,a]);x+=w;});
+ if(kr.length){var runs=kr.sort(asc).map(function(cv){var a=stk(cr[cv]);return [a,wm(a)];});
+  var xr=Math.max(x,inner-runs.reduce(function(t,r){return t+r[1];},0));
+  runs.forEach(function(r){out.push([xr,r[1],r[0]]);xr+=r[1];});}
+ return out;}
+function draw(){var o=[],sym={},tbl={},s=M.s,ft=19;
+ M.rk.forEach(function(r,ri){var x0=r[1],y0=r[2],inner=r[3],hs=r[4],t=r[5],en=esc(r[0]),v=r[0].indexOf('\\uD83C\\uDD65')===0;
+  var pw=(inner+ft*2)*s,ph=(hs.reduce(function(a,b){return a+b;},0)+t*Math.max(0,hs.length-1)+ft)*s,yr=0;
+  o.push('<g class="aqrackg" data-rack="'+en+'"><rect class="aqrackbg" data-rack="'+en+'" x="'+f1(x0)+'" y="'+f1(y0)
+   +'" width="'+f1(pw)+'" height="'+f1(ph)+'" fill="'+(v?'#FFFBEB':'#FAFAF7')+'" stroke="#191414" stroke-width="1.6"'
+   +(v?' stroke-dasharray="7,4"':'')+'/><text class="aqrackhandle" data-rack="'+en+'" x="'+f1(x0)+'" y="'+f1(y0-4)
+   +'" font-size="11" fill="#8C8681">\\u2261 '+en+'</text>');
+  hs.forEach(function(h,i){var si=i+1,base=y0+ph-yr*s;yr+=h;var yp=y0+ph-yr*s;
+   o.push('<line x1="'+f1(x0)+'" y1="'+f1(yp)+'" x2="'+f1(x0+pw)+'" y2="'+f1(yp)+'" stroke="#191414" stroke-width="1.6"/>');
+   if(M.d)o.push('<text x="'+f1(x0+2)+'" y="'+f1(yp+9)+'" font-size="7" fill="#B9B3AD">'+si+'\\u00B7'+h+'</text>');
+   o.push('<rect class="aqshelf" data-rack="'+en+'" data-shelf="'+si+'" x="'+f1(x0+ft*s)+'" y="'+f1(yp)+'" width="'
+    +f1(inner*s)+'" height="'+f1(h*s)+'" fill="none" stroke="none"/>');
+   yr+=t;
+   var L=M.sh[ri+':'+si];if(!L||!L.length)return;
+   o.push('<g class="aqsg" data-shelf="'+si+'">');var tp=[];
+   cols(L,inner).forEach(function(c){var yc=0;
+    c[2].forEach(function(p,li){var e=p[0],code=e[1],m=M.cd[code],col=m?m[0]:'#9AA0A6',sh=m?m[7]:'';
+     var bw=p[1][0]*s,bh=p[1][1]*s,bx=x0+ft*s+c[0]*s;yc+=p[1][1];var by=base-yc*s,at=' class="aqb"';
+     if(m){tbl[code]=[m[2],m[3],m[4]||e[2],m[5]];
+      at=' class="aqbox" data-code="'+esc(code)+'"'+(e[0]?' data-iid="'+esc(e[0])+'"':'');}
+     if(sh!=='\\uC6D0'&&sh!=='\\uC774\\uBBF8\\uC9C0'){var w=nm(bw),hh=nm(bh),id=('s'+w+'_'+hh+'_'+col.slice(1)).replace(/\\./g,'d');
+      if(!sym[id])sym[id]='<symbol id="'+id+'" overflow="visible"><rect width="'+w+'" height="'+hh+'" fill="'+col+'"/></symbol>';
+      o.push('<use href="#'+id+'" x="'+nm(bx)+'" y="'+nm(by)+'"'+at+'/>');}
+     else if(sh==='\\uC6D0')o.push('<ellipse cx="'+nm(bx+bw/2)+'" cy="'+nm(by+bh/2)+'" rx="'+nm(bw/2)+'" ry="'+nm(bh/2)
+      +'" fill="'+col+'"'+at+'/>');
+     else if(m[8])o.push('<image x="'+f1(bx)+'" y="'+f1(by)+'" width="'+f1(bw)+'" height="'+f1(bh)+'" href="'+m[8]
+      +'" preserveAspectRatio="xMidYMid meet"'+at+'/>');
+     else o.push('<rect x="'+f1(bx)+'" y="'+f1(by)+'" width="'+f1(bw)+'" height="'+f1(bh)+'" fill="'+col
+      +'" fill-opacity="0.72" stroke="#191414" stroke-width="0.6"'+at+'/>');
+     var tag=m?m[6]:'',cx=bx+bw/2,bwin=Math.max(2,bw-2.4),bhin=Math.max(2,bh-0.9-(li===0?4:0.9)),cy=by+0.9+bhin/2;
+     if(tag){var q=fit(tag,bwin,Math.max(4.5,Math.min(9,bw*0.30,bhin*0.62)),3.2);
+      if(q[0])o.push('<text class="aqtag" x="'+nm(cx)+'" y="'+nm(cy+q[1]*0.36)+'" font-size="'+nm(q[1])+'">'+esc(q[0])+'</text>');}
+     var lf=m?m[1]:'#191414',sp=m?m[3]:'',b9=Math.max(2.6,Math.min(7,bw*0.16)),l1=b9*(tag?1.3:1),l2=sp?b9*0.88:0;
+     if(l2){var ink=1.16*l1+0.22*l1+1.30*l2;
+      if(ink>bhin){var k=bhin/ink;if(l1*k<2.4){sp='';l2=0;}else{l1=l1*k;l2=l2*k;}}}
+     if(!l2&&1.46*l1>bhin)l1=bhin/1.46;
+     var a1=fit(tag||(m?m[2]:code),bwin,l1,1.8),c1=tag?'#191414':lf,a2=sp?fit(sp,bwin,l2,1.8):['',0];
+     var gp=a1[1]*0.22,tot=1.16*a1[1]+(a2[0]?(gp+1.30*a2[1]):0.30*a1[1]),y1=cy-tot/2+1.16*a1[1];
+     if(a1[0])o.push('<text class="aqlbl" x="'+nm(cx)+'" y="'+nm(y1)+'" font-size="'+nm(a1[1])+'"'
+      +(c1==='#191414'?'':' fill="'+c1+'"')+(tag?' font-weight="bold"':'')+'>'+esc(a1[0])+'</text>');
+     if(a2[0])o.push('<text class="aqlbl" x="'+nm(cx)+'" y="'+nm(y1+gp+a2[1])+'" font-size="'+nm(a2[1])+'"'
+      +(lf==='#191414'?'':' fill="'+lf+'"')+'>'+esc(a2[0])+'</text>');});
+    var m0=M.cd[c[2][0][0][1]];tp.push([c[0],c[0]+c[1],m0?m0[0]:'#9AA0A6']);});
+   var tm=[];tp.forEach(function(q){var l=tm[tm.length-1];
+    if(l&&l[2]===q[2]&&Math.abs(q[0]-l[1])<0.5)l[1]=q[1];else tm.push(q.slice());});
+   tm.forEach(function(q){o.push('<rect class="aqtape" x="'+nm(x0+ft*s+q[0]*s)+'" y="'+nm(base-3)+'" width="'
+    +nm((q[1]-q[0])*s)+'" height="3.4" fill="'+q[2]+'"/>');});
+   o.push('</g>');});
+  o.push('</g>');});
+ sc.insertAdjacentHTML('beforebegin','<svg width="'+f0(M.W)+'" height="'+f0(M.H)
+  +'" xmlns="http://www.w3.org/2000/svg">'+CSS+'<defs>'+Object.keys(sym).map(function(k){return sym[k];}).join('')+'</defs>'
+  +(Object.keys(tbl).length?'<metadata id="aqinfo">'+esc(JSON.stringify(tbl))+'</metadata>':'')+o.join('')+'</svg>');}
+try{st=JSON.parse(window.parent.localStorage.getItem('AQ_MDL')||'{}')||{};}catch(e){st={};}
+if(P.full){M=P.full;st[N]={rev:P.rev,m:M,ts:Date.now()};   /* 기준 저장 — 최근 4개 사이트만 */
+ Object.keys(st).sort(function(a,b){return (st[b].ts||0)-(st[a].ts||0);}).slice(4).forEach(function(k){delete st[k];});
+ try{window.parent.localStorage.setItem('AQ_MDL',JSON.stringify(st));}catch(e){}}
+else if(st[N]&&st[N].rev===P.base){M=st[N].m;   /* 기준 + 누적 차이(null = 삭제) */
+ ['sh','cd','bx'].forEach(function(k){var d=P[k]||{};M[k]=M[k]||{};
+  Object.keys(d).forEach(function(n){if(d[n]===null)delete M[k][n];else M[k][n]=d[n];});});}
+if(M){draw();}
+else{   /* 기준 없음(다른 브라우저·저장소 삭제) → 전체 다시 받기를 1번만 자동 요청 */
+ sc.insertAdjacentHTML('beforebegin','<div style="padding:18px;font-size:13px;color:#8C8681;">'
+  +'\\uD83D\\uDDBC \\uBC30\\uCE58 \\uADF8\\uB9BC \\uAE30\\uC900 \\uC5C6\\uC74C \\u2014 '
+  +'\\uC544\\uB798 \\uC804\\uCCB4 \\uB2E4\\uC2DC \\uADF8\\uB9AC\\uAE30</div>');
+ var k9=N+'|'+P.base,ask='';try{ask=window.parent.sessionStorage.getItem('AQ_MDL_ASK')||'';}catch(e){}
+ if(ask!==k9)setTimeout(function(){try{window.parent.sessionStorage.setItem('AQ_MDL_ASK',k9);
+  var bs=window.parent.document.querySelectorAll('button');
+  for(var i=0;i<bs.length;i++){if((bs[i].innerText||'').indexOf('\\uC804\\uCCB4 \\uB2E4\\uC2DC \\uADF8\\uB9AC\\uAE30')>-1){bs[i].click();break;}}
+ }catch(e){}},300);}
+sc.parentNode.removeChild(sc);})();</script>"""
+
+def _aq_model_script(payload, nonce=""):
+    """[V101] aq_layout_payload 결과 → #aqzoom 안에 넣을 그리기 스크립트."""
+    return (_AQ_MDL_JS.replace("__NONCE__", str(nonce).replace('"', ''))
+            .replace("__CW__", json.dumps(_AQ_CW, ensure_ascii=False))
+            .replace("__CSS__", json.dumps(_AQ_SVG_CSS).replace("</", "<\\/"))
+            .replace("__MODEL__", json.dumps(payload, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")))
 
 def aq_shelf_top_svg(rack_name, shelf_no, inner, shelf_h, depth, seq, rows_by_code=None, box_depths=None, info=None, scale=0.5, cols=None):
     """[V49] 단 탑뷰 — 위에서 내려다본 배치. 전면 x좌표는 정면 패킹과 동일, 깊이 방향 줄수 표시.
@@ -991,20 +2025,25 @@ def _aq_svg_for_file(svg):
     return (str(svg).replace('<text class="aqtag" ', '<text class="aqtag" style="display:none" ')
                     .replace('style="display:none">', '>'))
 
-def aq_svg_hover_html(svg, interactive=False, nonce="", boxes=None, committed_ts=0, ack=""):
+def aq_svg_hover_html(svg, interactive=False, nonce="", boxes=None, committed_ts=0, ack="", model=None):
     """[V49] SVG를 호버 툴팁(품목명 크게·규격·상자·최대수량)과 함께 iframe HTML로 래핑.
     반환: (html, 권장 iframe 높이px). components.html로 렌더해야 JS 툴팁이 동작.
     [V51] interactive=True → 드래그 이동·더블클릭 복제/삭제·전체화면/줌 툴바.
     [V67] 조작 = 상자 인스턴스(iid) 단위. 부모 localStorage 'AQ_OPS'({nonce,batch,ts,ops})에
     기록 → 서버 적용 후 ack(배치 id)를 iframe에 주입 → 다음 로드에서 일치하면 localStorage 삭제.
     ACK 前 재시도는 1회만, 처리된 배치는 재전송하지 않는다(무한 버퍼링 차단).
-    (committed_ts는 V63 잔재 — 하위호환용으로만 받고 사용하지 않음)"""
+    (committed_ts는 V63 잔재 — 하위호환용으로만 받고 사용하지 않음)
+    [V101] model=aq_layout_payload(...)[0] → svg 대신 배치 모델(JSON)을 싣고 iframe JS가 같은 SVG를 그린다(svg 무시)."""
     h = 400
-    try:
-        _i = svg.index('height="')
-        h = int("".join(ch for ch in svg[_i + 8:_i + 16] if ch.isdigit()) or 400)
-    except Exception:
-        pass
+    if model is not None:
+        h = int(f"{float(model.get('H') or 400):.0f}")
+        svg = _aq_model_script(model, nonce)
+    else:
+        try:
+            _i = svg.index('height="')
+            h = int("".join(ch for ch in svg[_i + 8:_i + 16] if ch.isdigit()) or 400)
+        except Exception:
+            pass
     _btn = ('margin-left:4px;padding:3px 9px;border:1px solid #B9B3AD;background:#FFFFFF;'
             'border-radius:6px;cursor:pointer;font-size:12px;')
     tools = ''
@@ -1032,9 +2071,8 @@ function aqOff(el){return {x:parseFloat(el.dataset.ox||0),y:parseFloat(el.datase
 function aqSetT(el,x,y){el.dataset.ox=x;el.dataset.oy=y;   /* 누적 오프셋 — 미반영 이동 위에 추가 이동 가능 */
  if(x||y)el.setAttribute('transform','translate('+x+','+y+')');else el.removeAttribute('transform');}
 function aqSelHas(el){return aqSel.indexOf(el)>-1;}
-function aqSelMark(el,on){
- if(on){el.setAttribute('stroke','#F4D624');el.setAttribute('stroke-width','2.6');}
- else{el.setAttribute('stroke','#191414');el.setAttribute('stroke-width','0.6');}}
+function aqSelMark(el,on){   /* [V100] 인라인 스타일 — 압축 SVG의 CSS 클래스(.aqb)보다 우선, 해제 시 원래 표시로 */
+ el.style.stroke=on?'#F4D624':'';el.style.strokeWidth=on?'2.6':'';}
 function aqSelSet(arr){aqSel.forEach(function(b){aqSelMark(b,false);});
  aqSel=arr.slice();aqSel.forEach(function(b){aqSelMark(b,true);});aqStat();}
 function aqSelClear(){aqSelSet([]);}
@@ -1146,7 +2184,7 @@ function aqSnapBox(b,z,skip){/* [V60] 드롭 스냅 — 단 바닥/동일상자
   return x.getBoundingClientRect().width>0;});
  var cx=rb.left+rb.width/2,dy=null;
  var unders=others.filter(function(x){var r=x.getBoundingClientRect();   /* 드롭 지점 아래 동일 상자 → 위에 적층 */
-  return x.dataset.box===b.dataset.box&&r.left<cx&&cx<r.right;});
+  return aqMeta(x).box===aqMeta(b).box&&r.left<cx&&cx<r.right;});
  if(unders.length){var top=Math.min.apply(null,unders.map(function(x){return x.getBoundingClientRect().top;}));
   if(top-rb.height>=zr.top-2)dy=top-rb.bottom;}
  if(dy===null)dy=zr.bottom-rb.bottom;   /* 그 외 → 단 바닥에 밀착 */
@@ -1197,7 +2235,7 @@ function aqMenuShow(el,ev){aqMenuHide();
  var m=document.createElement('div');aqMenu=m;m.id='aqmenu';
  m.style.cssText='position:fixed;z-index:120;background:#191414;border:2px solid #F4D624;'
   +'border-radius:8px;padding:8px;font-family:sans-serif;left:'+(ev.clientX+6)+'px;top:'+(ev.clientY+6)+'px;';
- var nm=el.getAttribute('data-name')||el.dataset.code;
+ var nm=aqMeta(el).name||el.dataset.code;
  var t=document.createElement('div');
  t.style.cssText='color:#F4D624;font-weight:700;font-size:12px;margin-bottom:6px;';
  t.textContent=nm; m.appendChild(t);
@@ -1213,7 +2251,7 @@ function aqMenuShow(el,ev){aqMenuHide();
  b1.onclick=function(){if(!el.dataset.iid){aqMenuHide();return;}
   aqPush({t:'dup',iid:el.dataset.iid,code:el.dataset.code});   /* [V67] 인스턴스 단위 복제 */
   var g=aqGrp(el),last=g[g.length-1];   /* [V58] 반영 전에도 보이게 유령 복제 */
-  try{var c=last.cloneNode(false);c.removeAttribute('class');c.setAttribute('pointer-events','none');
+  try{var c=last.cloneNode(false);c.classList.remove('aqbox');c.setAttribute('pointer-events','none');
    var o=aqOff(last),hh=(last.getBBox?last.getBBox().height:12)||12;
    aqSvg.appendChild(c);aqSetT(c,o.x,o.y-hh);}catch(e){}
   aqMenuHide();};
@@ -1223,7 +2261,7 @@ function aqMenuShow(el,ev){aqMenuHide();
  if(AQB&&AQB.length){var bt=document.createElement('div');
   bt.style.cssText='color:#CFC9C3;font-size:10px;margin:7px 0 3px 0;';bt.textContent='📦 상자 변경';m.appendChild(bt);
   var bw=document.createElement('div');bw.style.cssText='max-width:230px;';
-  AQB.forEach(function(bn){if(bn===el.getAttribute('data-box'))return;
+  AQB.forEach(function(bn){if(bn===aqMeta(el).box)return;
    var bb=document.createElement('button');bb.textContent=bn;
    bb.style.cssText='margin:0 4px 4px 0;padding:3px 7px;border:1px solid #8C8681;'
     +'background:#2B2626;color:#FFFFFF;border-radius:5px;cursor:pointer;font-size:11px;';
@@ -1366,10 +2404,20 @@ document.addEventListener('mouseup',function(ev){if(!aqRDrag)return;
         '</div>'
         '<script>'
         'var tip=document.getElementById("aqtip");'
-        'function aqShow(el,ev){'
-        ' document.getElementById("aqtip-name").textContent=el.getAttribute("data-name")||"";'
-        ' document.getElementById("aqtip-spec").textContent=el.getAttribute("data-spec")||"";'
-        ' var b=el.getAttribute("data-box")||"", c=el.getAttribute("data-cap")||"";'
+        # [V100] 압축 SVG면 툴팁 값은 <metadata id="aqinfo"> 표 1개에서, 아니면 상자별 data-* 속성에서
+        'var AQI=(function(){var m=document.getElementById("aqinfo");'
+        ' try{return m?JSON.parse(m.textContent||"{}"):null;}catch(e){return null;}})();'
+        'function aqMeta(el){var r=AQI&&AQI[el.getAttribute("data-code")];'
+        ' if(r)return {name:r[0],spec:r[1],box:r[2],cap:r[3]};'
+        ' return {name:el.getAttribute("data-name")||"",spec:el.getAttribute("data-spec")||"",'
+        '  box:el.getAttribute("data-box")||"",cap:el.getAttribute("data-cap")||""};}'
+        'document.querySelectorAll("g.aqsg").forEach(function(g){'   # [V100] 압축 SVG — 단 묶음 → 상자 위치 데이터
+        ' var rk=g.closest("g.aqrackg"),r=rk?rk.getAttribute("data-rack"):"",s=g.getAttribute("data-shelf");'
+        ' g.querySelectorAll(".aqbox").forEach(function(b){b.setAttribute("data-rack",r);b.setAttribute("data-shelf",s);});});'
+        'function aqShow(el,ev){var mt=aqMeta(el);'
+        ' document.getElementById("aqtip-name").textContent=mt.name;'
+        ' document.getElementById("aqtip-spec").textContent=mt.spec;'
+        ' var b=mt.box, c=mt.cap;'
         ' var ctxt=c?(c==="\\uc5c6\\uc74c"?" \\u00B7 \\uc218\\ub7c9\\uc815\\ubcf4 \\uc5c6\\uc74c":(" \\u00B7 \\ucd5c\\ub300 "+c+"\\uac1c")):"";'
         ' document.getElementById("aqtip-cap").textContent=(b?("\\uD83D\\uDCE6 "+b):"")+ctxt;'
         ' tip.style.display="block"; aqMove(ev);}'
@@ -12,6 +12,6 @@ app.py에서 **자립도가 높은 출력 엔진**을 기계적으로 추출해
 📌 모듈을 추가/변경할 때는 `PKG_VER`를 올리고, app.py의 가드 기준도 함께 올린다.
 """
 
-PKG_VER = 77   # [V77, 2026-08-11] aq_print 가이드북 지면 — 통로 묶음(그룹명 '통로-쪽')·한 펼침면 한 통로
+PKG_VER = 95   # [V95, 2026-10-19] rev_cache.py — 모듈마다 복사돼 있던 리비전 LRU 캐시 공용화
 
 __all__ = ["PKG_VER"]
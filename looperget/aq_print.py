@@ -8,12 +8,14 @@ app.py가 bind()로 주입하는 것:
     FONT_REGULAR, FONT_BOLD          폰트 파일 경로 상수
     aq_err_str                       시트 예외 → 한국어 문장
     aq_load_items/sites/boxes        AQ_* 시트 로더 (st.cache_data 경유)
+    aq_site_plan                     [V98] AQ_Sites 행 → 배치JSON dict (AQ_Layouts 좌표 되붙임)
     download_image_by_id             Drive 이미지 다운로드
 """
 import os
 import io
 import math
 import json
+import functools
 import base64
 import datetime
 
@@ -29,6 +31,7 @@ FONT_BOLD = "NanumGothic-Bold.ttf"
 aq_err_str = None
 aq_load_items = None
 aq_load_sites = None
+aq_site_plan = None      # [V98] 배치JSON + AQ_Layouts 좌표 되붙이기
 aq_load_boxes = None
 download_image_by_id = None
 
@@ -529,6 +532,8 @@ _AQ_LBL_GAP = 0.10     # 두 줄 사이 간격 / em
 # [V74] 글자 높이는 _AQ_INK_KO/_AQ_INK_LAT(실측)로 잡는다 — 구 _AQ_LBL_K=0.70은 한글 잉크를
 #  0.18em 과소평가해 12~14pt 라벨이 상자 위아래로 삐져나왔다(대표님 지적: "박스 밖으로 나가는 것들").
 
+# [V94] 줄임 후보는 문구마다 정해져 있다 — 같은 품목이 상자·랙·쪽마다 되풀이되므로 문구 단위 캐시(튜플 반환).
+@functools.lru_cache(maxsize=4096)
 def _aq_lbl_cands(s, keep_min=2):
     """라벨 줄임 단계 — (문자열, 잘랐는가) 를 긴 것부터. 말줄임표(…)는 쓰지 않는다.
     '잘랐는가'=False인 단계까지는 **대표 명칭**(괄호부·뒤 수식어 제거)이라 뜻이 온전하다."""
@@ -540,15 +545,16 @@ def _aq_lbl_cands(s, keep_min=2):
             seen.add(t); out.append((t, cut))
     _add(s, False)
     _add(_aq_strip_paren(s), False)          # 괄호부 제거 — 밸브바디(조임식연결구) → 밸브바디
-    if not out: return []
+    if not out: return ()
     toks = out[-1][0].split()
     while len(toks) > 1:                     # 뒤 수식어부터 제거 — '엘보 20mm 조임식' → '엘보 20mm' → '엘보'
         toks = toks[:-1]; _add(" ".join(toks), False)
     head = out[-1][0]
     for n in range(len(head) - 1, keep_min - 1, -1):   # 그래도 넘치면 앞 n글자(줄임말)
         _add(head[:n], True)
-    return out
+    return tuple(out)
 
+@functools.lru_cache(maxsize=4096)
 def _aq_lbl_spec_cands(s):
     """규격 전용 줄임 — **절대 자르지 않는다**(25mm→25m가 되면 뜻이 달라짐).
     괄호부 제거 후 구분자(+ * × / , 공백) 단위로 뒤에서부터 덜어낸다.
@@ -577,7 +583,7 @@ def _aq_lbl_spec_cands(s):
             seen.add(u); alt.append((u, False))
     out.sort(key=lambda p: -len(p[0]))   # 정보가 많은(긴) 것부터 시도
     alt.sort(key=lambda p: -len(p[0]))
-    return out + alt
+    return tuple(out + alt)
 
 def _aq_lbl_fit(pdf, cands, pt, bold, room_w, allow_cut):
     """이 크기에서 폭에 들어가는 가장 온전한 후보. 하나도 없으면 None."""
@@ -598,7 +604,7 @@ def _aq_pdf_box_label(pdf, bx, by, bwp, bhp, name, spec, tc, short=""):
     """상자 안에 품명(굵게)+규격 2줄을 그린다.
     우선순위 — ①12pt 이상을 확보한 채 **자르지 않은** 대표 명칭 ②12pt에서 줄임말
                ③그래도 안 들어가면 그때 비로소 글자 크기를 낮춘다(대표님 지시)."""
-    nm_c = _aq_lbl_cands(name)
+    nm_c = list(_aq_lbl_cands(name))
     if short:
         _sh = _aq_pr_clean(short)
         if _sh and _sh not in [t for t, _c in nm_c]:
@@ -765,8 +771,7 @@ def aq_site_layout(site, recs=None, boxes=None):
         if str(srow.get("농협명", "")).strip() == str(site).strip():
             try: racks_raw = json.loads(str(srow.get("랙구성JSON") or "[]"))
             except Exception: racks_raw = []
-            try: plan = json.loads(str(srow.get("배치JSON") or "{}"))
-            except Exception: plan = {}
+            plan = aq_site_plan(srow)
             break
     if not isinstance(plan, dict): plan = {}
     if not isinstance(racks_raw, list): racks_raw = []
@@ -1040,11 +1045,8 @@ def aq_guidebook_pdf_bytes(recs, site, bc_mode, img_of=None):
     if site and site != "(전체 품목)":
         for srow in aq_load_sites():
             if str(srow.get("농협명", "")).strip() == site:
-                try:
-                    plan = json.loads(srow.get("배치JSON") or "{}")
-                    assign = plan.get("assign", {}) if isinstance(plan, dict) else {}
-                except Exception:
-                    assign = {}
+                plan = aq_site_plan(srow)
+                assign = plan.get("assign", {}) if isinstance(plan.get("assign", {}), dict) else {}
     use_assign = bool(assign)
     items = [_aq_pr_item(r) for r in recs]
     sel = []
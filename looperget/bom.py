@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — 자재 전개(BOM) 엔진
+
+[V81, 2026-10-19] 세트 카트 → 부품 수량(레시피 × 세트 수), 배관 카트 → 롤 수(ceil(총길이/1롤길이))
+계산이 STEP 1→2 전환(KR·JP), STEP 3 출력 형태 2종, 자재명세 PDF·엑셀, app_jp.py에
+제각각 복사돼 있었다. 복사본마다 all_sets_db를 다시 만들고 제품 목록을 선형 탐색(next(...))했다.
+→ 카탈로그 리비전당 한 번만 세트×부품 희소 행렬(CSR)과 제품 색인을 만들고,
+   카트 전개는 행렬-벡터 곱 한 번으로 끝낸다.
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+부품 키는 레시피에 적힌 그대로(str) — 기존 복사본들의 res[str(p_code)] 규칙과 같다.
+코드 정규화(zfill 5)가 필요한 쪽(STEP 3 출력 형태)은 결과를 받아서 직접 한다.
+
+주입 의존 없음(순수 계산 + numpy). bind() 불필요.
+"""
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from looperget.rev_cache import rev_cache
+
+__all__ = ["BomEngine", "bom_engine"]
+
+
+def _unit_len(info):
+    """1롤길이(m) — 비었거나 0 이하면 4m (기존 복사본 공통 기본값)."""
+    ul = (info or {}).get("len_per_unit", 4) or 4
+    try:
+        ul = float(ul)
+    except (TypeError, ValueError):
+        return 4
+    return ul if ul > 0 else 4
+
+
+class BomEngine:
+    """세트×부품 희소 행렬(CSR) + 제품 색인. 카탈로그(products, sets) 한 벌에 1개 — bom_engine()이 캐시."""
+
+    def __init__(self, products, sets):
+        # 세트: 카테고리를 평탄화 (기존 all_sets_db.update 규칙 — 같은 이름이면 뒤 카테고리가 이김)
+        self.sets = {}
+        for _cat, val in (sets or {}).items():
+            self.sets.update(val or {})
+        # 제품 색인 — 기존 next(...) 선형 탐색과 같은 '첫 항목 우선'
+        self.by_code, self.by_code5, self.by_name = {}, {}, {}
+        for p in products or []:
+            c = str(p.get("code", "")).strip()
+            if c:
+                self.by_code.setdefault(c, p)
+                self.by_code5.setdefault(c.zfill(5), p)
+            if p.get("name"):
+                self.by_name.setdefault(p.get("name"), p)
+        # CSR: 행 = 세트, 열 = 부품 키(레시피에 적힌 그대로의 str)
+        self.set_index, self.part_keys, self.part_index = {}, [], {}
+        indptr, indices, data = [0], [], []
+        for s_name, info in self.sets.items():
+            self.set_index[s_name] = len(self.set_index)
+            row = {}
+            for k, q in ((info or {}).get("recipe") or {}).items():
+                col = self.part_index.get(str(k))
+                if col is None:
+                    col = self.part_index[str(k)] = len(self.part_keys)
+                    self.part_keys.append(str(k))
+                row[col] = row.get(col, 0) + q
+            indices.extend(row.keys()); data.extend(row.values())
+            indptr.append(len(indices))
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data) if data else np.zeros(0, dtype=np.int64)
+        if self.data.dtype.kind not in "if":   # 레시피 수량이 문자열 등으로 섞여 들어온 경우
+            self.data = self.data.astype(np.float64)
+        # 비영 원소별 행 번호 — Aᵀq를 np.add.at 한 번으로
+        self._nnz_row = np.repeat(np.arange(len(self.set_index), dtype=np.int64), np.diff(self.indptr))
+
+    # ── 조회 ──────────────────────────────────────────────────────
+    def info(self, s_name):
+        return self.sets.get(s_name) or {}
+
+    def recipe(self, s_name):
+        return self.info(s_name).get("recipe") or {}
+
+    def product(self, key):
+        """코드(그대로 → zfill 5) → 이름 순으로 찾는다. 없으면 {}."""
+        k = str(key or "").strip()
+        return self.by_code.get(k) or self.by_code5.get(k.zfill(5)) or self.by_name.get(k) or {}
+
+    def unit_len(self, code):
+        """1롤길이(m) — product() 규칙으로 찾고, 없거나 0 이하면 4m."""
+        return _unit_len(self.product(code))
+
+    # ── 전개 ──────────────────────────────────────────────────────
+    def explode(self, set_cart):
+        """세트 카트 → {부품 키: 수량}. 키 순서는 카트·레시피 순서(기존 dict 누적과 동일).
+        카탈로그에 없는 세트는 건너뛴다."""
+        rows, qtys = [], []
+        for it in set_cart or []:
+            r = self.set_index.get(it.get("name"))
+            if r is not None:
+                rows.append(r); qtys.append(it.get("qty", 0))
+        if not rows:
+            return {}
+        rows = np.asarray(rows, dtype=np.int64)
+        q = np.zeros(len(self.set_index), dtype=np.result_type(np.asarray(qtys).dtype, np.int64))
+        np.add.at(q, rows, qtys)
+        out = np.zeros(len(self.part_keys), dtype=np.result_type(self.data.dtype, q.dtype))
+        np.add.at(out, self.indices, self.data * q[self._nnz_row])   # Aᵀq
+        cols = dict.fromkeys(np.concatenate(
+            [self.indices[self.indptr[r]:self.indptr[r + 1]] for r in rows.tolist()]).tolist())
+        vals = out.tolist()
+        return {self.part_keys[c]: vals[c] for c in cols}
+
+    def per_set(self, set_cart):
+        """세트별 분해 — [(세트명, 세트 수, {부품 키: 세트 수 × 세트당 수량})]. 카탈로그에 없는 세트는 빈 dict."""
+        res = []
+        for it in set_cart or []:
+            s_name, s_qty = it.get("name"), it.get("qty", 0)
+            r = self.set_index.get(s_name)
+            if r is None:
+                res.append((s_name, s_qty, {})); continue
+            lo, hi = self.indptr[r], self.indptr[r + 1]
+            res.append((s_name, s_qty, {self.part_keys[c]: q * s_qty
+                                        for c, q in zip(self.indices[lo:hi].tolist(), self.data[lo:hi].tolist())}))
+        return res
+
+    def pipe_rolls(self, pipe_cart):
+        """배관 카트 → {코드: 롤 수}. 코드별 총길이를 합친 뒤 올림. 카탈로그에 없는 코드는 제외."""
+        code_sums = {}
+        for p_item in pipe_cart or []:
+            c = p_item.get("code")
+            if c: code_sums[c] = code_sums.get(c, 0) + p_item.get("len", 0)
+        res = {}
+        for c, total_len in code_sums.items():
+            prod = self.by_code.get(str(c).strip())
+            if prod:
+                res[str(c)] = res.get(str(c), 0) + math.ceil(total_len / _unit_len(prod))
+        return res
+
+    def baseline(self, set_cart, pipe_cart):
+        """STEP 1→2 물량·자재명세 기준 수량 = 세트 전개 + 배관 롤 수."""
+        res = self.explode(set_cart)
+        for c, n in self.pipe_rolls(pipe_cart).items():
+            res[c] = res.get(c, 0) + n
+        return res
+
+
+# ── 카탈로그 리비전별 캐시 (looperget.rev_cache) ─────────────────────
+# 리비전 = 엔진이 읽는 필드의 내용 해시. 세트 관리 탭의 제자리 수정(레시피 저장)도 새 리비전으로 잡힌다.
+_ENGINES = OrderedDict()
+_ENGINES_MAX = 4
+_PROD_FIELDS = ("code", "name", "spec", "unit", "len_per_unit", "image")
+
+
+def _catalog_rev(products, sets):
+    prod_sig = tuple(tuple(p.get(f) for f in _PROD_FIELDS) for p in (products or []))
+    return hash((prod_sig, repr(sets)))
+
+
+def bom_engine(products, sets):
+    """(products, sets) → BomEngine. 같은 리비전이면 이미 만든 엔진을 돌려준다."""
+    return rev_cache(_ENGINES, _catalog_rev(products, sets), lambda: BomEngine(products, sets), _ENGINES_MAX)
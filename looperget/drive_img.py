@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — Drive 이미지 다운로드 + 캐시 (KR·JP 앱 공용)
+
+[V80, 2026-10-19] app.py L349-404에서 추출. 본문 로직 무변경.
+app_jp.py는 예전에 캐시 없는 복사본(패딩·투명 PNG 처리 없음)을 따로 들고 있었다 —
+이제 두 앱이 같은 다운로드·같은 24h 캐시(파일ID 키)를 쓴다.
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+app.py(또는 app_jp.py)가 bind()로 주입하는 것:
+    get_google_services    (gc, drive_service) — st.cache_resource (.clear()로 재인증)
+    _SOCKET_ERRS           소켓 끊김 감지 키워드 (V32)
+"""
+import io
+import base64
+
+import streamlit as st
+from PIL import Image
+
+# ── app.py 주입 슬롯 — bind()가 채운다 ──────────────────────────────
+get_google_services = None
+_SOCKET_ERRS = ("Broken pipe", "Errno 32", "Errno 104", "10053", "10054",
+                "Connection reset", "Connection aborted", "ConnectionReset",
+                "RemoteDisconnected", "EOF occurred", "IncompleteRead", "timed out")
+
+
+def bind(**fns):
+    """app.py가 Drive 서비스 의존을 주입한다. import 직후 1회 호출."""
+    globals().update(fns)
+
+
+__all__ = [
+    "_do_download_image", "_download_image_cached", "download_image_by_id",
+]
+
+
+def _do_download_image(ds, file_id):
+    """실제 드라이브 다운로드 (재시도 로직 분리)
+    - 원본 비율 유지 (지주대 등 세장형 품목 대응)
+    - 300×225 박스 안에 중앙 패딩 배치
+    - 드라이브 파일 원본은 건드리지 않음
+    """
+    request = ds.files().get_media(fileId=file_id)
+    downloader = request.execute(num_retries=3)   # [V36] 소켓 끊김 자동 재시도
+    with Image.open(io.BytesIO(downloader)) as img:
+        # [V29] 투명 PNG(RGBA/LA/P+투명) → 흰 배경에 합성 후 RGB.
+        #  기존 convert('RGB')는 알파를 검정으로 채워, 누끼 PNG가 빌더·견적서에서 검정배경이 되는 사고 유발(V15 §2-6).
+        #  흰 배경 합성 시 빌더의 흰배경 키아웃(makeTransparentBg)·여백자르기가 정상 동작.
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            _rgba = img.convert('RGBA')
+            _wbg = Image.new('RGBA', _rgba.size, (255, 255, 255, 255))
+            _wbg.paste(_rgba, (0, 0), _rgba)   # 알파를 마스크로 → 투명영역은 흰색
+            img_rgb = _wbg.convert('RGB')
+        else:
+            img_rgb = img.convert('RGB')
+        # 비율 유지하면서 300×225 박스 안에 맞춤 (LANCZOS: 고품질 다운샘플링)
+        img_rgb.thumbnail((300, 225), Image.LANCZOS)
+        # 흰 배경 300×225 캔버스에 중앙 배치 (비율이 달라도 여백으로 채움)
+        padded = Image.new('RGB', (300, 225), (255, 255, 255))
+        offset_x = (300 - img_rgb.width) // 2
+        offset_y = (225 - img_rgb.height) // 2
+        padded.paste(img_rgb, (offset_x, offset_y))
+        img_rgb.close()
+        buffer = io.BytesIO()
+        padded.save(buffer, format="JPEG", quality=85)
+    return f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
+# 이미지 다운로드 + 캐시 (ttl=3600)
+# [V33] 실패(None)를 캐시하지 않는다 — 예전엔 Broken pipe 한 번이면 None이 1시간 캐시돼
+#  해당 부속이 리런마다 계속 빈칸/사라진 것처럼 보였음. st.cache_data는 예외를 캐시하지 않으므로,
+#  캐시되는 내부 함수는 실패 시 예외를 던지고 외부 래퍼가 None으로 감싼다. (다음 리런에 자동 재시도)
+# [V35] ttl 1h→24h — 키가 파일ID라 안전(이미지 교체 시 새 ID 발급 → 자동 반영). 매시간 전체 재다운로드 폭풍 제거.
+@st.cache_data(ttl=86400, show_spinner=False)
+def _download_image_cached(file_id):
+    ds = get_google_services()[1]  # 항상 최신 서비스 객체 사용
+    if not ds: raise RuntimeError("drive service unavailable")
+    try:
+        return _do_download_image(ds, file_id)
+    except Exception as e:
+        if any(k in str(e) for k in _SOCKET_ERRS):
+            get_google_services.clear()  # 소켓 끊김 → 재인증 후 1회 재시도
+            ds2 = get_google_services()[1]
+            if ds2:
+                return _do_download_image(ds2, file_id)
+        raise
+
+def download_image_by_id(file_id):
+    if not file_id: return None
+    try:
+        return _download_image_cached(file_id)
+    except Exception:
+        return None
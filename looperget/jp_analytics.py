@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — 일본 수출 이익 집계 (Quotes_JP 전체 → 열 단위 사실 테이블)
+
+[V88, 2026-10-19] '🇯🇵 일본 수출 분석' 페이지는 고른 견적 1건의 items를 품목마다 dict 조회로 돌았다.
+경영진 요청: 전체 JP 견적 합계(월별·품목별·카테고리별) + 환율 가정(what-if) 스윕.
+→ Quotes_JP 데이터JSON을 견적 내용당 한 번만 파싱해 (견적 × 품목) 행 사실 테이블을 만들고
+   카탈로그(KR 매입·신정공급가, JP 대리점가·소비자가)를 열 조인, 집계는 pandas group-by,
+   환율 민감도는 그룹 합계 × 환율 벡터 외적 한 번.
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+금액 규칙 (견적별 분석과 같음)
+    합계매출 = 신정공급가(원) × 수량      본사 매출
+    합계원가 = 매입단가(원) × 수량        본사 원가
+    순이익   = 합계매출 − 합계원가
+환율 민감도 (엔 단가 고정, 원 환산만 움직임 — Products_JP 엔 단가는 환율을 따라 바뀌지 않는다)
+    현지 대리점 매출(원) = Σ 수량 × 대리점가(엔, 별도) × 환율
+    신정 매입(원, 별도) = 합계매출 / 1.1
+    신정 마진(원)       = 현지 대리점 매출(원) − 신정 매입(원)
+
+주입 의존 없음(pandas + numpy). bind() 불필요.
+"""
+import json
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from looperget.rev_cache import rev_cache
+
+__all__ = ["JP_ROLLUPS", "jp_fact_table", "jp_rollup", "jp_rate_sweep"]
+
+# 집계 기준 라벨 → group-by 열
+JP_ROLLUPS = {
+    "월별": ["월"],
+    "품목별": ["품목코드", "품목명"],
+    "카테고리별": ["카테고리"],
+    "견적별": ["날짜", "현장명"],
+}
+
+_FACT_COLS = ["견적", "날짜", "월", "현장명", "담당자", "품목코드", "품목명", "규격", "카테고리", "수량",
+              "매입단가(원)", "신정공급가(원)", "대리점가(엔)", "소비자가(엔)", "합계매출", "합계원가", "순이익"]
+
+
+# ── 견적 파싱 — 데이터JSON 내용당 1회 ─────────────────────────────
+_PARSED = OrderedDict()
+_PARSED_MAX = 5000
+
+
+def _items_of(payload):
+    """데이터JSON 문자열 → [(품목 키, 수량)] (견적별 분석의 items 해석 규칙 그대로). 파싱 실패 = []."""
+    return rev_cache(_PARSED, payload, lambda: _parse_items(payload), _PARSED_MAX)
+
+
+def _parse_items(payload):
+    try:
+        full = json.loads(payload or "{}")
+        items = full.get("items", {}) if isinstance(full, dict) and "items" in full else full
+        return [(str(k).strip().zfill(5), q) for k, q in (items or {}).items()] if isinstance(items, dict) else []
+    except Exception:
+        return []
+
+
+def _catalog_frame(products, jp_products):
+    """코드 zfill(5) 색인 카탈로그 열 (같은 코드면 뒤 품목 — 견적별 분석의 dict 규칙)."""
+    kr = pd.DataFrame({
+        "품목코드": [str(p.get("code")).strip().zfill(5) for p in products or []],
+        "품목명": [p.get("name", "") for p in products or []],
+        "규격": [p.get("spec", "-") for p in products or []],
+        "카테고리": [str(p.get("category", "") or "기타") for p in products or []],
+        "매입단가(원)": [p.get("price_buy", 0) for p in products or []],
+        "신정공급가(원)": [p.get("price_supply_jp", 0) for p in products or []],
+    }).drop_duplicates("품목코드", keep="last").set_index("품목코드")
+    for c in ("매입단가(원)", "신정공급가(원)"):
+        kr[c] = pd.to_numeric(kr[c], errors="coerce").fillna(0).astype(np.int64)
+    jp = pd.DataFrame({
+        "품목코드": [str(p.get("code", "")).strip().zfill(5) for p in jp_products or []],
+        "대리점가(엔)": [p.get("price_d1", 0) for p in jp_products or []],
+        "소비자가(엔)": [p.get("price_cons", 0) for p in jp_products or []],
+    }).drop_duplicates("품목코드", keep="last").set_index("품목코드")
+    for c in ("대리점가(엔)", "소비자가(엔)"):
+        jp[c] = pd.to_numeric(jp[c], errors="coerce").fillna(0).astype(np.float64)
+    return kr, jp
+
+
+def _build_fact(jp_quotes, products, jp_products):
+    q_idx, keys, qtys = [], [], []
+    for i, q in enumerate(jp_quotes or []):
+        for k, n in _items_of(str(q.get("데이터JSON", "{}"))):
+            q_idx.append(i); keys.append(k); qtys.append(n)
+    quotes = pd.DataFrame({
+        "날짜": [str(q.get("날짜", "")) for q in jp_quotes or []],
+        "현장명": [str(q.get("현장명", "")) for q in jp_quotes or []],
+        "담당자": [str(q.get("담당자", "")) for q in jp_quotes or []],
+    })
+    quotes["월"] = quotes["날짜"].str[:7]
+    fact = pd.DataFrame({"견적": np.asarray(q_idx, dtype=np.int64), "품목코드": keys,
+                         "수량": pd.to_numeric(pd.Series(qtys, dtype=object), errors="coerce")
+                                   .fillna(0).astype(np.int64)})
+    fact = fact.join(quotes, on="견적")
+    kr, jp = _catalog_frame(products, jp_products)
+    fact = fact.join(kr, on="품목코드").join(jp, on="품목코드")
+    known = fact["품목명"].notna()
+    fact["품목명"] = fact["품목명"].where(known, "미등록 품목")
+    fact["규격"] = fact["규격"].where(known, "-")
+    fact["카테고리"] = fact["카테고리"].where(known, "미등록")
+    for c in ("매입단가(원)", "신정공급가(원)"):
+        fact[c] = fact[c].fillna(0).astype(np.int64)
+    for c in ("대리점가(엔)", "소비자가(엔)"):
+        fact[c] = fact[c].fillna(0)
+    fact["합계매출"] = fact["신정공급가(원)"] * fact["수량"]
+    fact["합계원가"] = fact["매입단가(원)"] * fact["수량"]
+    fact["순이익"] = fact["합계매출"] - fact["합계원가"]
+    return fact[_FACT_COLS]
+
+
+# ── 리비전 캐시 (looperget.rev_cache) ─────────────────────────────────
+_FACTS = OrderedDict()
+_FACTS_MAX = 4
+_Q_FIELDS = ("날짜", "현장명", "담당자", "데이터JSON")
+_P_FIELDS = ("code", "name", "spec", "category", "price_buy", "price_supply_jp")
+_J_FIELDS = ("code", "price_d1", "price_cons")
+
+
+def _fact_rev(jp_quotes, products, jp_products):
+    return hash((tuple(tuple(str(q.get(f, "")) for f in _Q_FIELDS) for q in jp_quotes or []),
+                 tuple(tuple(p.get(f) for f in _P_FIELDS) for p in products or []),
+                 tuple(tuple(p.get(f) for f in _J_FIELDS) for p in jp_products or [])))
+
+
+def jp_fact_table(jp_quotes, products, jp_products=None):
+    """Quotes_JP 행 + KR 카탈로그 (+ JP 병합 카탈로그) → (견적 × 품목) 사실 테이블 DataFrame.
+    같은 리비전이면 이미 만든 테이블을 돌려준다(읽기 전용으로 쓸 것)."""
+    return rev_cache(_FACTS, _fact_rev(jp_quotes, products, jp_products),
+                     lambda: _build_fact(jp_quotes, products, jp_products), _FACTS_MAX)
+
+
+def jp_rollup(fact, by="월별"):
+    """사실 테이블 → 집계표 (견적수·수량·매출·원가·순이익·수익률%). by = JP_ROLLUPS 키."""
+    keys = JP_ROLLUPS[by]
+    g = fact.groupby(keys, sort=True, dropna=False)
+    out = g.agg(견적수=("견적", "nunique"), 수량=("수량", "sum"), 합계매출=("합계매출", "sum"),
+                합계원가=("합계원가", "sum"), 순이익=("순이익", "sum")).reset_index()
+    out["수익률%"] = np.round(np.where(out["합계매출"] > 0,
+                                     out["순이익"] / out["합계매출"].where(out["합계매출"] > 0, 1) * 100, 0), 1)
+    if by != "월별":
+        out = out.sort_values("순이익", ascending=False, kind="stable").reset_index(drop=True)
+    return out
+
+
+def jp_rate_sweep(fact, rates, by=None):
+    """환율 목록 × (전체 또는 by 그룹) → 민감도 표 (long format). 그룹 합계를 한 번 구하고 환율 벡터와 외적."""
+    rates = np.asarray(rates, dtype=np.float64)
+    f = fact.assign(_d1=fact["대리점가(엔)"] * fact["수량"])
+    if by:
+        g = f.groupby(JP_ROLLUPS[by], sort=True, dropna=False)[["_d1", "합계매출", "순이익"]].sum()
+        labels = g.index.to_frame(index=False)
+    else:
+        g = f[["_d1", "합계매출", "순이익"]].sum().to_frame().T
+        labels = pd.DataFrame(index=range(1))
+    d1 = g["_d1"].to_numpy(dtype=np.float64)[:, None]            # 그룹 × 1
+    sup = (g["합계매출"].to_numpy(dtype=np.float64) / 1.1)[:, None]
+    local = d1 * rates[None, :]                                   # 그룹 × 환율
+    margin = local - sup
+    with np.errstate(divide="ignore", invalid="ignore"):
+        m_pct = np.where(local > 0, margin / np.where(local > 0, local, 1) * 100, np.nan)
+    n_g, n_r = local.shape
+    out = labels.loc[np.repeat(np.arange(n_g), n_r)].reset_index(drop=True)
+    out["환율"] = np.tile(rates, n_g)
+    out["현지 대리점 매출(원)"] = np.rint(local.ravel()).astype(np.int64)
+    out["신정 매입(원)"] = np.rint(np.repeat(sup.ravel(), n_r)).astype(np.int64)
+    out["신정 마진(원)"] = np.rint(margin.ravel()).astype(np.int64)
+    out["신정 마진율%"] = np.round(m_pct.ravel(), 1)
+    out["본사 순이익(원)"] = np.repeat(g["순이익"].to_numpy(dtype=np.int64), n_r)
+    return out
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — JP 병합 카탈로그 (KR Products + Products_JP) 캐시
+
+[V86, 2026-10-19] load_jp_merged_products가 언어 토글·사이드바 환율 변경(jp_products_loaded=False)
+때마다 Products_JP 시트를 통째로 다시 읽고 병합 목록을 새로 만들었다.
+→ 시트 행은 app.py가 캐시(load_products_jp_records)하고, 여기서는
+   (KR 카탈로그 리비전, Products_JP 리비전)당 한 번 코드 조인·고정 필드를 만들어 두고
+   환율별 엔화 단가는 배열 변환 한 번(smart_roundup_vec)으로 계산, 최근 환율 몇 개를 기억한다.
+   토글·환율 조정은 네트워크를 타지 않는다.
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+산식은 load_jp_merged_products 그대로(V11):
+    매입(원)  = round(신정공급가 / 1.1)
+    매입(엔)  = round(매입(원) / 환율)
+    대리점가·소비자가 = Products_JP 기존값, 없으면 smart_roundup(매입(엔) × 1.3 / × 1.65)
+
+[V87] Products_JP 동기화 = 증분 기록. jp_sync_rows(새 격자, 배열 계산) → jp_sync_plan(시트 현재 값과
+칸 단위 비교 → 바뀐 칸·신규 행·단가 변동 코드). 시트 I/O는 app.py sync_products_jp_to_sheet.
+
+주입 의존 없음(순수 계산 + numpy). bind() 불필요.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from looperget.reprice import smart_roundup_vec
+from looperget.rev_cache import rev_cache
+
+__all__ = ["JP_CAT_MAP", "JpCatalog", "jp_catalog", "jp_merged_products",
+           "jp_sync_rows", "jp_sync_plan"]
+
+JP_CAT_MAP = {
+    "주배관": "メイン配管", "주배관세트": "メイン配管",
+    "가지관": "分岐配管",  "가지관세트": "分岐配管",
+    "살수": "散水",      "살수세트": "散水セット",
+    "부속": "付属",
+    "기타": "その他資材",  "기타자재": "その他資材",
+    "관급비용": "管給費用"
+}
+
+
+def _roundup_values(v):
+    """smart_roundup_vec 결과를 스칼라 판과 같은 파이썬 타입으로 (1000 미만 입력 = float, 이상 = int)."""
+    r = smart_roundup_vec(v)
+    return [x if vi < 1000 else int(x) for vi, x in zip(v.tolist(), r.tolist())]
+
+
+class JpCatalog:
+    """KR 품목 ↔ Products_JP 행 조인 결과 (환율과 무관한 부분). jp_catalog()가 리비전별로 캐시."""
+
+    _RATES_MAX = 8
+
+    def __init__(self, kr_products, jp_records):
+        jp_dict = {str(r.get("품목코드", "")).zfill(5): r for r in (jp_records or []) if r.get("품목코드")}
+        self.base, self.images, supply, d1, cons = [], [], [], [], []
+        for p in kr_products or []:
+            code = str(p.get("code", "")).strip().zfill(5)
+            if not code or code == "00000":
+                continue
+            jp_row = jp_dict.get(code, {})
+            supply.append(float(p.get("price_supply_jp", 0) or 0))
+            d1.append(int(jp_row.get("대리점가(별도가,엔)", 0) or 0))
+            cons.append(int(jp_row.get("소비자가(포함가,엔)", 0) or 0))
+            self.base.append({
+                "seq_no": p.get("seq_no", ""),
+                "code": code,
+                "category": JP_CAT_MAP.get(p.get("category", ""), p.get("category", "")),
+                "name": jp_row.get("일본용 제품명", p.get("name", "")),
+                "spec": p.get("spec", ""),
+                "unit": p.get("unit", "EA"),
+                "len_per_unit": p.get("len_per_unit", ""),
+            })
+            self.images.append(p.get("image", ""))
+        self.supply = np.asarray(supply, dtype=np.float64)
+        self.d1 = np.asarray(d1, dtype=np.int64)
+        self.cons = np.asarray(cons, dtype=np.int64)
+        # 매입(원)은 환율과 무관 — round()의 짝수 반올림 = np.rint
+        self.buy_krw = np.where(self.supply != 0, np.rint(self.supply / 1.1), 0).astype(np.int64)
+        self._by_rate = OrderedDict()
+
+    def jpy_prices(self, rate):
+        """환율 → (매입(엔), 대리점가, 소비자가) 파이썬 값 목록 3개."""
+        if rate and len(self.buy_krw):
+            buy_jpy = np.where(self.buy_krw != 0, np.rint(self.buy_krw / float(rate)), 0).astype(np.int64)
+        else:
+            buy_jpy = np.zeros(len(self.buy_krw), dtype=np.int64)
+        d1 = _roundup_values(buy_jpy * 1.3)
+        cons = _roundup_values(buy_jpy * 1.65)
+        d1 = [int(e) if e > 0 else r for e, r in zip(self.d1.tolist(), d1)]
+        cons = [int(e) if e > 0 else r for e, r in zip(self.cons.tolist(), cons)]
+        return buy_jpy.tolist(), d1, cons
+
+    def merged(self, rate):
+        """환율 → JP 모드 제품 리스트 (load_jp_merged_products 반환 형태). 최근 환율은 기억."""
+        def build():
+            buy_jpy, d1, cons = self.jpy_prices(rate)
+            return [{**b, "price_buy_krw": k, "price_buy": j, "price_d1": a, "price_cons": c, "image": img}
+                    for b, k, j, a, c, img in zip(self.base, self.buy_krw.tolist(), buy_jpy, d1, cons, self.images)]
+        return rev_cache(self._by_rate, float(rate or 0), build, self._RATES_MAX)
+
+
+# ── 리비전별 캐시 (looperget.rev_cache) ─────────────────────────────
+_CATALOGS = OrderedDict()
+_CATALOGS_MAX = 4
+_KR_FIELDS = ("seq_no", "code", "category", "name", "spec", "unit", "len_per_unit", "price_supply_jp", "image")
+_JP_FIELDS = ("품목코드", "일본용 제품명", "대리점가(별도가,엔)", "소비자가(포함가,엔)")
+
+
+def _jp_rev(kr_products, jp_records):
+    kr = tuple(tuple(p.get(f) for f in _KR_FIELDS) for p in (kr_products or []))
+    jp = tuple(tuple(r.get(f) for f in _JP_FIELDS) for r in (jp_records or []))
+    return hash((kr, jp))
+
+
+def jp_catalog(kr_products, jp_records):
+    """(KR products, Products_JP 행) → JpCatalog. 같은 리비전이면 이미 만든 것을 돌려준다."""
+    return rev_cache(_CATALOGS, _jp_rev(kr_products, jp_records),
+                     lambda: JpCatalog(kr_products, jp_records), _CATALOGS_MAX)
+
+
+def jp_merged_products(kr_products, jp_records, exchange_rate):
+    """KR Products + Products_JP 행 + 환율 → JP 모드 제품 리스트 (캐시 경유)."""
+    return jp_catalog(kr_products, jp_records).merged(exchange_rate)
+
+
+# ── [V87] Products_JP 증분 동기화 ──────────────────────────────────
+# 동기화 격자의 열 순서 (app.py COL_MAP_JP 키 순서와 같다)
+_SYNC_COLS = ("순번", "품목코드", "카테고리", "일본용 제품명", "규격", "단위", "1롤길이(m)",
+              "매입가(별도가,원)", "매입가(별도가,엔)", "대리점가(별도가,엔)", "소비자가(포함가,엔)", "이미지데이터")
+_SYNC_PRICE_COLS = ("매입가(별도가,원)", "매입가(별도가,엔)", "대리점가(별도가,엔)", "소비자가(포함가,엔)")
+
+
+def _num(x):
+    """시트 칸 → float (빈칸·숫자 아님 = 0, 천단위 쉼표 허용)."""
+    try: return float(str(x).replace(",", "").strip() or 0)
+    except ValueError: return 0.0
+
+
+def jp_sync_rows(kr_products, jp_records, exchange_rate):
+    """KR Products + 기존 Products_JP 행 → [(코드, 행 값 목록)] — 열 순서 _SYNC_COLS.
+    기존 JP 단가 비율 유지(V11 sync 규칙): 기존 매입(엔)·새 매입(엔)이 모두 있으면
+    대리점가·소비자가 × (새/기존), 없으면 매입(엔) × 1.3 / × 1.65 — smart_roundup은 배열판 한 번."""
+    jp_dict = {str(r.get("품목코드", "")).zfill(5): r for r in (jp_records or []) if r.get("품목코드")}
+    keep, codes, jp_rows = [], [], []
+    for i, p in enumerate(kr_products or []):
+        code = str(p.get("code", "")).strip().zfill(5)
+        if not code or code == "00000":
+            continue
+        keep.append((i, p)); codes.append(code); jp_rows.append(jp_dict.get(code, {}))
+    supply = np.array([float(p.get("price_supply_jp", 0) or 0) for _, p in keep], dtype=np.float64)
+    buy_krw = np.where(supply != 0, np.rint(supply / 1.1), 0).astype(np.int64)
+    if exchange_rate:
+        buy_jpy = np.where(buy_krw != 0, np.rint(buy_krw / float(exchange_rate)), 0).astype(np.int64)
+    else:
+        buy_jpy = np.zeros(len(keep), dtype=np.int64)
+    old_buy = np.array([_num(r.get("매입가(별도가,엔)", 0)) for r in jp_rows], dtype=np.float64)
+    old_d1 = np.array([_num(r.get("대리점가(별도가,엔)", 0)) for r in jp_rows], dtype=np.float64)
+    old_cons = np.array([_num(r.get("소비자가(포함가,엔)", 0)) for r in jp_rows], dtype=np.float64)
+    scale = (old_buy > 0) & (buy_jpy > 0)
+    ratio = np.where(scale, buy_jpy / np.where(scale, old_buy, 1.0), 0)
+    d1 = _roundup_values(np.where(scale & (old_d1 > 0), old_d1 * ratio, buy_jpy * 1.3))
+    cons = _roundup_values(np.where(scale & (old_cons > 0), old_cons * ratio, buy_jpy * 1.65))
+    out = []
+    for (i, p), code, jp_row, k, j, a, c in zip(keep, codes, jp_rows, buy_krw.tolist(), buy_jpy.tolist(), d1, cons):
+        out.append((code, [
+            f"{i+1:03d}", code, JP_CAT_MAP.get(p.get("category", ""), p.get("category", "")),
+            jp_row.get("일본용 제품명", p.get("name", "")),
+            p.get("spec", ""), p.get("unit", "EA"), p.get("len_per_unit", ""),
+            k, j, a, c, p.get("image", "")
+        ]))
+    return out
+
+
+def _same_cell(old, new):
+    """시트 칸(문자열) vs 새 값 — 숫자는 수치로, 나머지는 문자열로 비교. 코드는 zfill 무시."""
+    if isinstance(new, (int, float)) and not isinstance(new, bool):
+        s = str(old).replace(",", "").strip()
+        try: return float(s or 0) == float(new)
+        except ValueError: return False
+    return str(old).strip() == str(new if new is not None else "").strip()
+
+
+def jp_sync_plan(values, new_rows):
+    """시트 현재 값(get_all_values, 첫 행 = 헤더) + jp_sync_rows 결과 → 증분 계획 dict:
+        cells   [(행, 열, 값)]  1-based, 바뀐 칸만
+        appends [행 값 목록]    시트에 없는 코드 (시트 헤더 순서로 재배열)
+        moved   [코드]          단가 4열 중 하나라도 바뀐 기존 코드
+        stale   [코드]          시트에는 있지만 KR에 없는 코드 (지우지 않음)
+    헤더에 동기화 열이 하나라도 없으면 None — 호출 측이 전체 재기록으로 간다."""
+    header = [str(h).strip() for h in (values[0] if values else [])]
+    if not set(_SYNC_COLS) <= set(header):
+        return None
+    col_of = {h: header.index(h) for h in _SYNC_COLS}
+    code_col = col_of["품목코드"]
+    row_of = {}
+    for r, row in enumerate(values[1:], start=2):
+        c = str(row[code_col]).strip() if code_col < len(row) else ""
+        if c: row_of.setdefault(c.zfill(5), (r, row))
+    cells, appends, moved, seen = [], [], [], set()
+    for code, vals in new_rows:
+        seen.add(code)
+        hit = row_of.get(code)
+        if hit is None:
+            line = [""] * len(header)
+            for h, v in zip(_SYNC_COLS, vals):
+                line[col_of[h]] = v
+            appends.append(line); continue
+        r, row = hit
+        price_moved = False
+        for h, v in zip(_SYNC_COLS, vals):
+            j = col_of[h]
+            old = row[j] if j < len(row) else ""
+            same = (str(old).strip().zfill(5) == v) if h == "품목코드" else _same_cell(old, v)
+            if not same:
+                cells.append((r, j + 1, v))
+                price_moved = price_moved or h in _SYNC_PRICE_COLS
+        if price_moved: moved.append(code)
+    stale = [c for c in row_of if c not in seen]
+    return {"cells": cells, "appends": appends, "moved": moved, "stale": stale}
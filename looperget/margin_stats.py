@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — 세그먼트×티어 이익율 통계 (리비전 캐시 + 증분 갱신)
+
+[V85, 2026-10-19] recommend_tier_margins가 시뮬레이터 expander 리런마다(새 매입단가 입력이
+바뀔 때마다) 전 품목×티어를 돌며 세그먼트별 statistics.median을 다시 계산했다.
+→ 카탈로그 리비전당 한 번만 (세그먼트, 단가 필드)별 이익율을 정렬 배열로 만들어 두고,
+   중앙값·백분위·히스토그램을 그 배열에서 바로 읽는다.
+   한 품목 저장은 그 품목의 기여분만 빼고 넣는다(tier_margin_stats_apply — 전체 재구축 없음).
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+price_segment·recommend_tier_margins는 app.py L619-645에서 이동(규칙 무변경).
+표본 규칙 그대로: 매입단가 > 0 품목, 판매가 > 0 티어, -50 < 이익율 < 99.
+
+주입 의존 없음(순수 계산 + numpy). bind() 불필요.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from looperget.reprice import KR_PRICE_FIELDS, margin_pct
+from looperget.rev_cache import rev_cache, rev_pop, rev_put
+
+__all__ = [
+    "price_segment", "recommend_tier_margins",
+    "TierMarginStats", "tier_margin_stats", "tier_margin_stats_apply",
+]
+
+_TIERS = tuple(f for f in KR_PRICE_FIELDS if f != "price_buy")
+
+
+def price_segment(prod) -> str:
+    """추천 이익율 산출용 세그먼트: [V40] 세부카테고리 우선(첫 태그), 없으면 구 로직(매입가 밴드)."""
+    sub = str(prod.get("subcategory", "")).split(",")[0].strip()
+    if sub: return sub
+    cat = str(prod.get("category", "")).strip() or "기타"
+    if cat != "부속": return cat
+    try: buy = float(prod.get("price_buy", 0) or 0)
+    except (TypeError, ValueError): buy = 0
+    if buy < 3000: return "부속·소형"
+    if buy < 20000: return "부속·중형"
+    if buy < 100000: return "부속·대형"
+    return "부속·고가(펌프류)"
+
+
+def _samples(p):
+    """품목 하나의 기여분 — (세그먼트, [(필드, 이익율)]). 표본 아니면 (None, [])."""
+    try: buy = float(p.get("price_buy", 0) or 0)
+    except (TypeError, ValueError): buy = 0
+    if buy <= 0: return None, []
+    out = []
+    for f in _TIERS:
+        m = margin_pct(p.get(f), buy)
+        if m is not None and -50 < m < 99:
+            out.append((f, m))
+    return price_segment(p), out
+
+
+class TierMarginStats:
+    """(세그먼트, 단가 필드) → 이익율% 정렬 배열(float64). tier_margin_stats()가 리비전별로 캐시."""
+
+    def __init__(self, products):
+        pool = {}
+        for p in products or []:
+            seg, ms = _samples(p)
+            for f, m in ms:
+                pool.setdefault((seg, f), []).append(m)
+        self.arr = {k: np.sort(np.asarray(v, dtype=np.float64)) for k, v in pool.items()}
+        self._med = None
+
+    # ── 조회 ──────────────────────────────────────────────────────
+    def values(self, seg, field):
+        return self.arr.get((seg, field), np.zeros(0))
+
+    def count(self, seg, field):
+        return len(self.values(seg, field))
+
+    def median(self, seg, field):
+        """statistics.median과 같은 값 (짝수 개면 가운데 두 값의 평균). 표본 없으면 None."""
+        a = self.values(seg, field)
+        n = len(a)
+        if not n: return None
+        return float(a[n // 2]) if n % 2 else float((a[n // 2 - 1] + a[n // 2]) / 2)
+
+    def percentile(self, seg, field, q):
+        """q(0~100, 스칼라 또는 목록) 백분위 — 선형 보간(np.percentile 기본). 표본 없으면 None."""
+        a = self.values(seg, field)
+        if not len(a): return None
+        r = np.percentile(a, q)
+        return r.tolist() if np.ndim(r) else float(r)
+
+    def histogram(self, seg, field, bins=10, span=(-50, 100)):
+        """(도수 배열, 구간 경계 배열) — np.histogram(range=span) 그대로."""
+        return np.histogram(self.values(seg, field), bins=bins, range=span)
+
+    def medians(self):
+        """{세그먼트: {필드: 중앙값}} — recommend_tier_margins 반환 형태. 필드는 KR_PRICE_FIELDS 순."""
+        if self._med is None:
+            out = {}
+            for (seg, f) in sorted(self.arr, key=lambda k: _TIERS.index(k[1])):
+                if len(self.arr[(seg, f)]):
+                    out.setdefault(seg, {})[f] = self.median(seg, f)
+            self._med = out
+        return self._med
+
+    # ── 증분 갱신 ────────────────────────────────────────────────
+    def _remove(self, seg, f, m):
+        a = self.arr.get((seg, f))
+        if a is None: return
+        i = int(np.searchsorted(a, m))
+        if i < len(a) and a[i] == m:
+            self.arr[(seg, f)] = np.delete(a, i)
+
+    def _insert(self, seg, f, m):
+        a = self.arr.get((seg, f), np.zeros(0))
+        self.arr[(seg, f)] = np.insert(a, int(np.searchsorted(a, m)), m)
+
+    def update(self, old_prod, new_prod):
+        """한 품목이 old → new로 바뀜: 기존 기여분을 빼고 새 기여분을 넣는다. 추가는 old=None, 삭제는 new=None."""
+        if old_prod is not None:
+            seg, ms = _samples(old_prod)
+            for f, m in ms: self._remove(seg, f, m)
+        if new_prod is not None:
+            seg, ms = _samples(new_prod)
+            for f, m in ms: self._insert(seg, f, m)
+        self._med = None
+
+
+def recommend_tier_margins(products: list) -> dict:
+    """세그먼트×단가필드별 권장 이익율%(중앙값) — 데이터가 쌓일수록 추천이 진화.
+    [V85] 리비전 캐시 저장소에서 읽는다(같은 카탈로그면 재계산 없음)."""
+    return tier_margin_stats(products).medians()
+
+
+# ── 카탈로그 리비전별 캐시 (looperget.rev_cache) ─────────────────────
+_STORES = OrderedDict()
+_STORES_MAX = 4
+_REV_FIELDS = ("subcategory", "category") + tuple(KR_PRICE_FIELDS)
+
+
+def _stats_rev(products):
+    return hash(tuple(tuple(p.get(f) for f in _REV_FIELDS) for p in (products or [])))
+
+
+def tier_margin_stats(products):
+    """products → TierMarginStats. 같은 리비전이면 이미 만든 저장소를 돌려준다."""
+    return rev_cache(_STORES, _stats_rev(products), lambda: TierMarginStats(products), _STORES_MAX)
+
+
+def tier_margin_stats_apply(changes, products):
+    """품목 저장 직후 호출 — changes = [(변경 전 품목 사본, 변경 후 품목)].
+    변경 전 리비전의 저장소를 증분 갱신해 변경 후 리비전으로 다시 등록한다.
+    변경 전 저장소가 캐시에 없으면 아무것도 하지 않는다(다음 조회 때 새로 만든다)."""
+    if not changes: return
+    new_rev = _stats_rev(products)
+    if new_rev in _STORES: return
+    old_of = {id(new): old for old, new in changes}
+    before = [old_of.get(id(p), p) for p in products]
+    store = rev_pop(_STORES, _stats_rev(before))
+    if store is None: return
+    for old, new in changes:
+        store.update(old, new)
+    rev_put(_STORES, new_rev, store, _STORES_MAX)
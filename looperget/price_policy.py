@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — 가격 지침(PricePolicy) 준수 점검 (카탈로그 전체, 한 번의 배열 계산)
+
+[V92, 2026-10-19] load_price_policy()의 {세부카테고리: {티어라벨: 목표%}}는 시뮬레이터 미리보기에서
+품목 하나씩에만 쓰였다 — 수천 개 단가가 지침에서 얼마나 벗어났는지 한눈에 볼 방법이 없었다.
+→ (카탈로그, 지침) 리비전당 한 번 [품목 × 티어] 지침가·현재가·차이% 행렬을 만들고,
+   허용 오차 판정·위반 목록은 그 행렬에서 바로 잘라 낸다(오차를 바꿔도 재계산 없음).
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+지침가 규칙 (시뮬레이터·buy_change_impact와 같음)
+    지침가 = snap_band_price(매입단가 / (1 − 목표% / 100))
+    대상 아님: 매입단가 0 이하, 🔒고정(price_policy == '고정'), 지침 없음, 목표% ≥ 100
+    세그먼트 = margin_stats.price_segment (세부카테고리 첫 태그 → 카테고리 → 부속 매입가 밴드)
+차이% = (현재가 − 지침가) / 지침가 × 100  — 현재가 0원(미입력)은 −100%
+
+주입 의존 없음(pandas + numpy). bind() 불필요.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from looperget.margin_stats import price_segment
+from looperget.reprice import KR_PRICE_FIELDS, KR_PRICE_LABELS, price_matrix, snap_band_price_vec
+from looperget.rev_cache import rev_cache
+
+__all__ = ["PolicyScan", "policy_scan"]
+
+_TIERS = tuple(f for f in KR_PRICE_FIELDS if f != "price_buy")
+_BUY = KR_PRICE_FIELDS.index("price_buy")
+_VIOL_COLS = ["코드", "품목", "규격", "세그먼트", "티어", "매입단가", "현재가", "지침%", "지침가",
+              "차이", "차이%", "현재 이익율%", "판정"]
+
+
+class PolicyScan:
+    """[품목 × 티어] 지침가(guide)·현재가(cur)·차이%(dev) 행렬. 평가 불가 칸 = NaN. policy_scan()이 캐시."""
+
+    def __init__(self, products, policy):
+        products = list(products or [])
+        P = price_matrix(products)
+        self.codes = [str(p.get("code", "")).strip().zfill(5) for p in products]
+        self.names = [str(p.get("name", "")) for p in products]
+        self.specs = [str(p.get("spec", "")) for p in products]
+        self.segments = [price_segment(p) for p in products]
+        self.buy = P[:, _BUY]
+        self.cur = P[:, [KR_PRICE_FIELDS.index(f) for f in _TIERS]]
+        fixed = np.array([str(p.get("price_policy", "")).strip() == "고정" for p in products], dtype=bool)
+        # 세그먼트별 목표% 행 — 세그먼트 수만큼만 dict 조회
+        seg_ids, seg_idx = np.unique(np.asarray(self.segments, dtype=object), return_inverse=True) \
+            if products else (np.zeros(0, dtype=object), np.zeros(0, dtype=np.int64))
+        table = np.array([[(policy or {}).get(s, {}).get(KR_PRICE_LABELS[f], np.nan) for f in _TIERS]
+                          for s in seg_ids], dtype=np.float64).reshape(len(seg_ids), len(_TIERS))
+        self.target = table[seg_idx] if len(seg_ids) else np.zeros((0, len(_TIERS)))
+        ok = ~np.isnan(self.target) & (self.target < 100) & (self.buy > 0)[:, None] & ~fixed[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            raw = np.where(ok, self.buy[:, None] / (1 - np.where(ok, self.target, 0) / 100.0), 0)
+        self.guide = np.where(ok, snap_band_price_vec(raw), np.nan)
+        ok &= self.guide > 0
+        self.guide[~ok] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.dev = np.where(ok, (self.cur - self.guide) / self.guide * 100.0, np.nan)
+            self.margin = np.where(self.cur > 0, (self.cur - self.buy[:, None]) / np.where(self.cur > 0, self.cur, 1) * 100.0,
+                                   np.nan)
+
+    def _tier_mask(self, tiers):
+        if not tiers:
+            return np.ones(len(_TIERS), dtype=bool)
+        return np.array([KR_PRICE_LABELS[f] in tiers or f in tiers for f in _TIERS], dtype=bool)
+
+    def flags(self, tol_pct, tiers=None):
+        """(위 이탈, 아래 이탈) 불리언 행렬 — |차이%| > tol_pct. tiers = 티어 라벨 목록(비우면 전체)."""
+        m = self._tier_mask(tiers)[None, :]
+        with np.errstate(invalid="ignore"):
+            return (self.dev > tol_pct) & m, (self.dev < -tol_pct) & m
+
+    def summary(self, tol_pct, tiers=None):
+        """세그먼트 × 티어 판정 요약 — 평가 칸 수·초과·미달·준수율%."""
+        over, under = self.flags(tol_pct, tiers)
+        m = self._tier_mask(tiers)
+        rows = []
+        seg = np.asarray(self.segments, dtype=object)
+        for j in np.flatnonzero(m).tolist():
+            df = pd.DataFrame({"세그먼트": seg, "_e": ~np.isnan(self.dev[:, j]), "_o": over[:, j], "_u": under[:, j]})
+            g = df.groupby("세그먼트", sort=True)[["_e", "_o", "_u"]].sum()
+            g = g[g["_e"] > 0]
+            for s, r in g.iterrows():
+                rows.append({"세그먼트": s, "티어": KR_PRICE_LABELS[_TIERS[j]], "평가": int(r["_e"]),
+                             "▲ 초과": int(r["_o"]), "▼ 미달": int(r["_u"]),
+                             "준수율%": round((1 - (r["_o"] + r["_u"]) / r["_e"]) * 100, 1)})
+        return pd.DataFrame(rows, columns=["세그먼트", "티어", "평가", "▲ 초과", "▼ 미달", "준수율%"])
+
+    def violations(self, tol_pct, tiers=None, direction="both"):
+        """허용 오차 밖 (품목, 티어) 목록 — long format, |차이%| 큰 순. direction = both / over / under."""
+        over, under = self.flags(tol_pct, tiers)
+        hit = over | under if direction == "both" else (over if direction == "over" else under)
+        i, j = np.nonzero(hit)
+        if not len(i):
+            return pd.DataFrame(columns=_VIOL_COLS)
+        guide = self.guide[i, j]
+        cur = self.cur[i, j]
+        out = pd.DataFrame({
+            "코드": np.asarray(self.codes, dtype=object)[i],
+            "품목": np.asarray(self.names, dtype=object)[i],
+            "규격": np.asarray(self.specs, dtype=object)[i],
+            "세그먼트": np.asarray(self.segments, dtype=object)[i],
+            "티어": [KR_PRICE_LABELS[_TIERS[k]] for k in j.tolist()],
+            "매입단가": self.buy[i].astype(np.int64),
+            "현재가": cur.astype(np.int64),
+            "지침%": self.target[i, j],
+            "지침가": guide.astype(np.int64),
+            "차이": (cur - guide).astype(np.int64),
+            "차이%": np.round(self.dev[i, j], 1),
+            "현재 이익율%": np.round(self.margin[i, j], 1),
+            "판정": np.where(over[i, j], "▲ 지침 초과", "▼ 지침 미달"),
+        })
+        order = np.argsort(-np.abs(out["차이%"].to_numpy()), kind="stable")
+        return out.iloc[order].reset_index(drop=True)
+
+
+# ── (카탈로그, 지침) 리비전별 캐시 (looperget.rev_cache) ──────────────
+_SCANS = OrderedDict()
+_SCANS_MAX = 4
+_REV_FIELDS = ("code", "name", "spec", "category", "subcategory", "price_policy") + tuple(KR_PRICE_FIELDS)
+
+
+def _scan_rev(products, policy):
+    pol = tuple(sorted((str(s), tuple(sorted((str(k), v) for k, v in (d or {}).items())))
+                       for s, d in (policy or {}).items()))
+    return hash((tuple(tuple(p.get(f) for f in _REV_FIELDS) for p in (products or [])), pol))
+
+
+def policy_scan(products, policy):
+    """(products, PricePolicy) → PolicyScan. 같은 리비전이면 이미 만든 점검 결과를 돌려준다."""
+    return rev_cache(_SCANS, _scan_rev(products, policy), lambda: PolicyScan(products, policy), _SCANS_MAX)
@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — 저장 견적 일괄 출력 (ZIP)
+
+[V78, 2026-10-19] Quotes_KR 여러 건을 한 번에 PDF/엑셀로 뽑아 ZIP 하나로 내려받는다.
+한 달치 농협 제출·감사 자료를 견적마다 불러오기→생성 버튼으로 만들던 반복 작업 대체.
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+구성
+    quote_build_fdata    저장 items + custom_prices → STEP 3 표 행 (app.py STEP 3에서 추출)
+    quote_print_rows     부가세·정렬·출력 형태(개별/세트 묶음/부품 분해) 적용 (STEP 3에서 추출)
+    quote_export_zip     N건 재계산 → 이미지 선다운로드 → 프로세스 풀 렌더 → ZIP 바이트
+
+이미지: Drive 호출은 **메인 프로세스에서만** 한다(인증·st.cache_data가 자식 프로세스에 없음).
+        필요한 이미지를 먼저 전부 받아 두고, 자식 프로세스에는 {파일ID: data URI}만 넘긴다.
+        풀 기동이 막힌 환경(권한·메모리)에서는 같은 프로세스에서 순차 렌더로 폴백.
+
+app.py가 bind()로 주입하는 것:
+    FONT_REGULAR, FONT_BOLD    폰트 파일 경로 상수
+    get_drive_file_map_deep    하위폴더 재귀 드라이브맵 (V15 §2-8)
+    get_best_image_id          이미지 해석 우선순위       (V15 §2-9)
+    download_image_by_id       Drive 이미지 다운로드
+"""
+import os
+import io
+import json
+import math
+import zipfile
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from looperget import quote_docs as _qd
+from looperget.bom import bom_engine
+
+# ── app.py 주입 슬롯 — bind()가 채운다 ──────────────────────────────
+FONT_REGULAR = "NanumGothic.ttf"
+FONT_BOLD = "NanumGothic-Bold.ttf"
+get_drive_file_map_deep = None
+get_best_image_id = None
+download_image_by_id = None
+
+
+def bind(**fns):
+    """app.py가 Drive·폰트 의존을 주입한다. import 직후 1회 호출."""
+    globals().update(fns)
+
+
+__all__ = [
+    "QUOTE_PKEY", "QUOTE_PRICE_RANK", "QUOTE_PRINT_MODES", "QUOTE_DOC_KINDS",
+    "quote_build_fdata", "quote_print_rows", "quote_export_zip",
+]
+
+QUOTE_PKEY = {
+    "매입단가": "price_buy", "총판가1": "price_d1", "총판가2": "price_d2",
+    "대리점가1": "price_agy1", "대리점가2": "price_agy2",
+    "계통농협": "price_nh_sys", "지역농협": "price_nh_loc",
+    "소비자가": "price_cons", "단가(현장)": "price_site",
+}
+QUOTE_PRICE_RANK = {"매입단가": 0, "총판가1": 1, "총판가2": 2, "대리점가1": 3, "대리점가2": 4,
+                    "계통농협": 5, "지역농협": 6, "단가(현장)": 7, "소비자가": 8}
+QUOTE_PRINT_MODES = ["개별 품목 나열 (기존)", "세트 단위 묶음 (신규)", "세트별 부품 분해 (납품 패킹용)"]
+QUOTE_DOC_KINDS = ["견적서 PDF", "견적서 엑셀", "자재명세 PDF", "자재명세 엑셀"]
+
+
+def _cp_key(cp):
+    c = str(cp.get("코드", "")).strip()
+    return c.zfill(5) if c else str(cp.get("품목", "")).strip()
+
+
+def _match_key(item):
+    k = str(item.get("코드", "")).strip().zfill(5)
+    if not k or k == "00000": k = str(item.get("품목", "")).strip()
+    return k
+
+
+def quote_build_fdata(quote_items, custom_prices, products, sel, keep_custom_price=True):
+    """저장 items({코드/품목명: 수량}) → STEP 3 표 행 리스트.
+    custom_prices(수정 단가 행)는 수량을 항상 덮고, keep_custom_price=True일 때만 단가도 덮는다
+    (출력 단가를 바꾸면 저장 단가는 버리고 새 단가로 — STEP 3 selectors_changed 규칙 그대로).
+    DB에 없는 수기 행은 그대로 뒤에 붙인다."""
+    sel = sel or []
+    pdb = {}
+    for p in products:
+        pdb[p["name"]] = p
+        if p.get("code"): pdb[str(p["code"])] = p
+    pk = [QUOTE_PKEY[l] for l in sel] if sel else ["price_cons"]
+    cp_map = {_cp_key(cp): cp for cp in (custom_prices or [])}
+    fdata, processed_keys = [], set()
+    for n, q in (quote_items or {}).items():
+        inf = pdb.get(str(n), {})
+        if not inf: continue
+        if "소비자가" in sel and inf.get("category", "") == "관급비용":
+            continue
+        code_val = str(inf.get("code", "")).strip().zfill(5)
+        name_val = str(inf.get("name", n)).strip()
+        code_key = code_val if code_val and code_val != "00000" else name_val
+        d = {"품목": name_val, "규격": inf.get("spec", ""), "코드": inf.get("code", ""),
+             "단위": inf.get("unit", "EA"), "수량": int(q), "image_data": inf.get("image")}
+        d["price_1"] = int(inf.get(pk[0], 0))
+        d["price_2"] = int(inf.get(pk[1], 0)) if len(pk) > 1 else 0
+        if code_key in cp_map:
+            d["수량"] = int(cp_map[code_key].get("수량", d["수량"]))
+            if keep_custom_price:
+                d["price_1"] = int(cp_map[code_key].get("price_1", d["price_1"]))
+                d["price_2"] = int(cp_map[code_key].get("price_2", d["price_2"]))
+            processed_keys.add(code_key)
+        fdata.append(d)
+    for cp in (custom_prices or []):
+        if _cp_key(cp) not in processed_keys:
+            fdata.append(cp.copy())
+    return fdata
+
+
+def _sort_items(item_list):
+    high = [x for x in item_list if int(float(x.get('price_1', 0))) >= 20000]
+    norm = [x for x in item_list if int(float(x.get('price_1', 0))) < 20000]
+    high.sort(key=lambda x: int(float(x.get('price_1', 0))), reverse=True)
+    norm.sort(key=lambda x: str(x.get('품목', '')))
+    return high + norm
+
+
+def quote_print_rows(safe_data, services, set_cart, pipe_cart, products, sets, print_mode, vat_mode):
+    """STEP 3 '파일 생성' 직전 가공. safe_data는 제자리 수정(부가세 별도 시 ÷1.1).
+    반환: (sorted_final_data 견적서용, individual_sorted_data 자재명세용, services 복사본)."""
+    if vat_mode == "별도":
+        svcs = _qd.doc_vat_exclude(safe_data, services)   # [V80] 부가세 규칙은 quote_docs 로케일 표
+    else:
+        svcs = [s.copy() for s in (services or [])]
+    individual_sorted_data = _sort_items(safe_data)
+    bom = bom_engine(products, sets)   # [V81] 세트 전개·제품 색인 공용 (리비전 캐시)
+
+    if print_mode == "세트별 부품 분해 (납품 패킹용)":
+        expanded_data = []
+        pool = {}; price_map_1 = {}; price_map_2 = {}
+        for item in safe_data:
+            k = _match_key(item)
+            pool[k] = pool.get(k, 0) + int(float(item.get("수량", 0)))
+            price_map_1[k] = int(float(item.get("price_1", 0)))
+            price_map_2[k] = int(float(item.get("price_2", 0)))
+        for s_name, s_qty, parts in bom.per_set(set_cart):
+            if s_qty <= 0: continue
+            for p_code_or_name, req_qty in parts.items():
+                p_key = str(p_code_or_name).strip().zfill(5)
+                if p_key not in pool: p_key = str(p_code_or_name).strip()
+                prod_info = bom.by_code5.get(p_key) or bom.by_name.get(p_key) or {}
+                expanded_data.append({
+                    "품목": f"[{s_name}] {prod_info.get('name', p_key)}",
+                    "규격": prod_info.get("spec", ""),
+                    "코드": prod_info.get("code", p_key),
+                    "단위": prod_info.get("unit", "EA"),
+                    "수량": req_qty,
+                    "price_1": price_map_1.get(p_key, 0),
+                    "price_2": price_map_2.get(p_key, 0),
+                    "image_data": prod_info.get("image", "")
+                })
+                if p_key in pool: pool[p_key] -= req_qty
+        for p_item in pipe_cart:
+            p_code = p_item.get('code')
+            p_len = p_item.get('len', 0)
+            prod_info = bom.product(p_code)
+            req_qty = math.ceil(p_len / bom.unit_len(p_code))
+            p_key = str(p_code).strip().zfill(5)
+            expanded_data.append({
+                "품목": f"[배관] {prod_info.get('name', p_item.get('name'))}",
+                "규격": prod_info.get("spec", p_item.get("spec", "")),
+                "코드": p_code,
+                "단위": prod_info.get("unit", "EA"),
+                "수량": req_qty,
+                "price_1": price_map_1.get(p_key, 0),
+                "price_2": price_map_2.get(p_key, 0),
+                "image_data": prod_info.get("image", "")
+            })
+            if p_key in pool: pool[p_key] -= req_qty
+        for item in safe_data:
+            k = _match_key(item)
+            rem_qty = pool.get(k, 0)
+            if rem_qty > 0:
+                new_item = item.copy()
+                new_item["품목"] = f"[추가/별도] {item.get('품목')}"
+                new_item["수량"] = rem_qty
+                expanded_data.append(new_item)
+                pool[k] = 0
+        sorted_final_data = expanded_data
+    elif print_mode == "세트 단위 묶음 (신규)":
+        comp_pool = {}; comp_price1 = {}; comp_price2 = {}
+        for item in safe_data:
+            match_key = _match_key(item)
+            comp_pool[match_key] = comp_pool.get(match_key, 0) + int(float(item.get("수량", 0)))
+            comp_price1[match_key] = int(float(item.get("price_1", 0)))
+            comp_price2[match_key] = int(float(item.get("price_2", 0)))
+        set_items_out = []
+        for s_item in set_cart:
+            s_name = s_item['name']
+            s_qty = s_item['qty']
+            if s_qty <= 0: continue
+            s_price1 = 0; s_price2 = 0; s_img = ""
+            if s_name in bom.sets:
+                recipe = bom.recipe(s_name)
+                s_img = bom.info(s_name).get("image", "")
+                for p_code_or_name, p_qty_per_set in recipe.items():
+                    p_key = str(p_code_or_name).strip().zfill(5)
+                    if p_key not in comp_pool:
+                        p_key = str(p_code_or_name).strip()
+                    s_price1 += (comp_price1.get(p_key, 0) * p_qty_per_set)
+                    s_price2 += (comp_price2.get(p_key, 0) * p_qty_per_set)
+                    if p_key in comp_pool:
+                        comp_pool[p_key] -= (p_qty_per_set * s_qty)
+            set_items_out.append({"품목": s_name, "규격": "세트", "코드": s_name, "단위": "SET",
+                                  "수량": s_qty, "price_1": s_price1, "price_2": s_price2,
+                                  "image_data": s_img})
+        rem_items_out = []
+        for item in safe_data:
+            match_key = _match_key(item)
+            rem_qty = comp_pool.get(match_key, 0)
+            if rem_qty > 0:
+                new_item = item.copy()
+                new_item["수량"] = rem_qty
+                rem_items_out.append(new_item)
+                comp_pool[match_key] = 0   # 중복 추가 방지
+        sorted_final_data = _sort_items(set_items_out) + _sort_items(rem_items_out)
+    else:
+        sorted_final_data = individual_sorted_data
+    return sorted_final_data, individual_sorted_data, svcs
+
+
+# ══ 일괄 출력 ══════════════════════════════════════════════════════
+def _safe_fname(s):
+    t = "".join(ch if (ch.isalnum() or ch in " -_.()[]") else "_" for ch in str(s)).strip()
+    return t[:60] or "quote"
+
+
+def _prod_image_index(products):
+    """코드(zfill5) → 카탈로그 image(드라이브 ID). app.py `_product_image_index`와 같은 규칙(세션 없이)."""
+    idx = {}
+    for p in products:
+        c = str(p.get("code", "")).strip().zfill(5)
+        iv = p.get("image", "")
+        if c and c != "00000" and iv and len(str(iv)) > 10:
+            idx[c] = str(iv)
+    return idx
+
+
+def _resolve_image_id(code, db_image_val, file_map, pidx):
+    """app.py `get_best_image_id`와 같은 우선순위: 코드명 파일 → 카탈로그 image → 항목 image_data."""
+    clean_code = str(code).strip().zfill(5)
+    if clean_code in file_map: return file_map[clean_code]
+    if clean_code in pidx: return pidx[clean_code]
+    if db_image_val and len(str(db_image_val)) > 10: return db_image_val
+    return None
+
+
+def _job_image_ids(job, file_map, products, sets):
+    """이 견적의 문서 4종이 요청할 이미지 파일 ID 전부(중복 제거 전)."""
+    ids = []
+    for row in job["rows"] + job["individual"]:
+        ids.append(get_best_image_id(row.get("코드", ""), row.get("image_data"), file_map))
+    bom = bom_engine(products, sets)
+    for s_item in job["set_cart"]:
+        ids.append(bom.info(s_item.get("name")).get("image"))
+        for p_code in bom.recipe(s_item.get("name")):
+            pc = str(p_code).strip().zfill(5)
+            ids.append(get_best_image_id(pc, (bom.by_code5.get(pc) or {}).get("image", ""), file_map))
+    for p_item in job["pipe_cart"]:
+        pc = str(p_item.get("code", "")).strip().zfill(5)
+        ids.append(get_best_image_id(pc, (bom.by_code5.get(pc) or {}).get("image", ""), file_map))
+    return ids
+
+
+def _render_job(job, products, sets, kinds):
+    """견적 1건 → [(파일명, 바이트)]. quote_docs의 현재 바인딩으로 그린다."""
+    nm, dt = job["name"], job["date"]
+    base = f'{dt}_{_safe_fname(nm)}_{job["idx"]:03d}'
+    out = []
+    if "견적서 PDF" in kinds:
+        out.append((f"{base}_견적서.pdf", _qd.create_advanced_pdf(
+            job["rows"], job["services"], nm, dt, job["fmode"], job["sel"], job["buyer"], job["remarks"])))
+    if "견적서 엑셀" in kinds:
+        out.append((f"{base}_견적서.xlsx", _qd.create_quote_excel(
+            job["rows"], job["services"], nm, dt, job["fmode"], job["sel"], job["buyer"], job["remarks"])))
+    if "자재명세 PDF" in kinds:
+        out.append((f"{base}_자재명세.pdf", _qd.create_composition_pdf(
+            job["set_cart"], job["pipe_cart"], job["individual"], products, sets, nm)))
+    if "자재명세 엑셀" in kinds:
+        out.append((f"{base}_자재명세.xlsx", _qd.create_composition_excel(
+            job["set_cart"], job["pipe_cart"], job["individual"], products, sets, nm)))
+    return out
+
+
+# ── 자식 프로세스 전역 — 풀 initializer가 1회 채운다(견적마다 이미지·DB를 다시 피클하지 않음) ──
+_W = {}
+
+
+def _worker_init(font_regular, font_bold, file_map, images, products, sets, kinds):
+    pidx = _prod_image_index(products)
+    _W.update(products=products, sets=sets, kinds=kinds)
+    _qd.bind(FONT_REGULAR=font_regular, FONT_BOLD=font_bold,
+             get_drive_file_map_deep=lambda: file_map,
+             get_best_image_id=lambda code, val, fmap: _resolve_image_id(code, val, fmap, pidx),
+             download_image_by_id=lambda fid: images.get(fid) if fid else None)
+
+
+def _worker_run(job):
+    try:
+        return job["idx"], _render_job(job, _W["products"], _W["sets"], _W["kinds"]), ""
+    except Exception as e:
+        return job["idx"], [], f"{job['name']}: {e}"
+
+
+def quote_export_zip(rows, db, sel, form_type="기본 양식", print_mode=None, vat_mode="포함 (기본)",
+                     kinds=None, workers=None, progress=None):
+    """Quotes_KR 행 N건 → ZIP 바이트. 반환 (zip_bytes, 오류 문장 리스트).
+    rows=시트 레코드(dict, '데이터JSON' 포함) · sel=출력 단가 라벨(기본 1개/이익 2개).
+    print_mode=None이면 견적마다 저장된 출력 형태를 따른다. 저장 단가(custom_prices)는 저장 당시
+    출력 단가와 sel이 같을 때만 살린다 — 다른 단가로 뽑으면 DB 단가로 재계산(STEP 3와 동일 규칙).
+    progress(done, total) 콜백이 있으면 렌더 완료마다 호출."""
+    kinds = list(kinds or QUOTE_DOC_KINDS)
+    products = db.get("products", []) or []
+    sets = db.get("sets", {}) or {}
+    sel = sorted(sel or ["소비자가"], key=lambda x: QUOTE_PRICE_RANK.get(x, 9))
+    fmode = "basic" if "기본" in form_type else "profit"
+    errs, jobs = [], []
+    for i, r in enumerate(rows):
+        try:
+            d = json.loads(str(r.get("데이터JSON", "{}")) or "{}")
+        except Exception as e:
+            errs.append(f"{r.get('현장명', '')}: 저장 데이터 해석 실패({e})"); continue
+        saved_sel = (d.get("ui_state") or {}).get("sel") or ["소비자가"]
+        saved_sel = sorted(saved_sel, key=lambda x: QUOTE_PRICE_RANK.get(x, 9))
+        fdata = quote_build_fdata(d.get("items", {}), d.get("custom_prices", []), products, sel,
+                                  keep_custom_price=(saved_sel == sel))
+        safe_data = [{k: (0 if v is None else v) for k, v in row.items()} for row in fdata]
+        pm = print_mode or (d.get("ui_state") or {}).get("print_mode") or QUOTE_PRINT_MODES[0]
+        set_cart, pipe_cart = d.get("set_cart", []) or [], d.get("pipe_cart", []) or []
+        rows_out, individual, svcs = quote_print_rows(safe_data, d.get("services", []), set_cart, pipe_cart,
+                                                      products, sets, pm, vat_mode)
+        dt = str(r.get("날짜", ""))[:10] or datetime.date.today().strftime("%Y-%m-%d")
+        jobs.append({"idx": i + 1, "name": str(r.get("현장명", "")), "date": dt,
+                     "rows": rows_out, "individual": individual, "services": svcs,
+                     "set_cart": set_cart, "pipe_cart": pipe_cart, "fmode": fmode, "sel": sel,
+                     "buyer": d.get("buyer", {}) or {},
+                     "remarks": d.get("remarks", "") or ""})
+    if not jobs:
+        return b"", errs
+
+    # ① 이미지 선다운로드 — 메인 프로세스(캐시 경유), 파일ID 기준 1회씩
+    file_map = get_drive_file_map_deep() or {}
+    images = {}
+    for job in jobs:
+        for fid in _job_image_ids(job, file_map, products, sets):
+            if fid and fid not in images:
+                images[fid] = download_image_by_id(fid)
+
+    # ② 렌더 — 프로세스 풀(spawn: 스트림릿 스레드를 fork로 복제하지 않음), 완료 순서대로 ZIP에 기록
+    buf = io.BytesIO()
+    n_w = workers if workers is not None else min(4, os.cpu_count() or 1)
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        rendered = set()
+        if n_w > 1 and len(jobs) > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=min(n_w, len(jobs)),
+                                         mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_worker_init,
+                                         initargs=(os.path.abspath(FONT_REGULAR), os.path.abspath(FONT_BOLD),
+                                                   file_map, images, products, sets, kinds)) as ex:
+                    futs = [ex.submit(_worker_run, job) for job in jobs]
+                    for fu in as_completed(futs):
+                        _idx, files, err = fu.result()
+                        if err: errs.append(err)
+                        for fn, data in files: zf.writestr(fn, data)
+                        rendered.add(_idx)
+                        if progress: progress(len(rendered), len(jobs))
+            except Exception as e:
+                errs.append(f"병렬 렌더 불가 — 순차 렌더로 전환({e})")
+        for job in jobs:   # 풀 미사용·중도 실패 → 남은 견적만 같은 프로세스에서 순차
+            if job["idx"] in rendered: continue
+            try:
+                for fn, data in _render_job(job, products, sets, kinds): zf.writestr(fn, data)
+            except Exception as e:
+                errs.append(f"{job['name']}: {e}")
+            rendered.add(job["idx"])
+            if progress: progress(len(rendered), len(jobs))
+    return buf.getvalue(), errs
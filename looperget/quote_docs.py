@@ -9,51 +9,218 @@ app.py가 bind()로 주입하는 것:
     get_drive_file_map_deep    하위폴더 재귀 드라이브맵 (V15 §2-8)
     get_best_image_id          이미지 해석 우선순위       (V15 §2-9)
     download_image_by_id       Drive 이미지 다운로드
+app_jp.py는 FONT_REGULAR_JP, FONT_BOLD_JP를 주입하고 locale="JP"로 호출한다 (V80).
 """
 import os
 import io
 import math
 import base64
 import tempfile
+import functools
+import threading
 
 import xlsxwriter
 from fpdf import FPDF
 from PIL import Image
 
+from looperget.bom import bom_engine
+
 # ── app.py 주입 슬롯 — bind()가 채운다 ──────────────────────────────
 FONT_REGULAR = "NanumGothic.ttf"
 FONT_BOLD = "NanumGothic-Bold.ttf"
+FONT_REGULAR_JP = "NotoSansJP-Regular.ttf"
+FONT_BOLD_JP = "NotoSansJP-Bold.ttf"
 get_drive_file_map_deep = None
 get_best_image_id = None
 download_image_by_id = None
 
 
 def bind(**fns):
-    """app.py가 Drive·폰트 의존을 주입한다. import 직후 1회 호출."""
+    """app.py(또는 app_jp.py)가 Drive·폰트 의존을 주입한다. import 직후 1회 호출."""
     globals().update(fns)
 
 
 __all__ = [
+    "DOC_LOCALES", "doc_vat_exclude",
     "PDF",
     "create_advanced_pdf", "create_quote_excel",
     "create_composition_pdf", "create_composition_excel",
     "bind",
 ]
 
+# ── [V80] 문서 로케일 — KR(본사)·JP(일본 수출) 공용 엔진 ─────────────────────
+# 레이아웃(열 폭·행 높이·쪽 나눔)은 하나. 달라지는 것은 문구·통화 표기·폰트뿐이다.
+# 예전 app_jp.py는 엔진 4종을 통째로 복사해 들고 있어서 KR 쪽 수정(V79 줄바꿈 등)이 JP에 안 갔다.
+# left = (레이블, buyer_info 키) 6행 · right의 None 값 = buyer_info['manager'](자사 담당자).
+DOC_LOCALES = {
+    "KR": {
+        "font": ("NanumGothic", "FONT_REGULAR", "FONT_BOLD"),
+        "xl_font": "맑은 고딕", "xl_num": "#,##0",
+        "money": "{:,}", "svc_money": "{:,} 원",
+        "vat_rate": 0.10, "svc_keys": ("항목", "금액"),
+        "title": "견 적 서", "corp": "주식회사 신진켐텍",
+        "left": (("일련번호", "serial"), ("수  신", "recipient"), ("참  조", "ref"),
+                 ("TEL / FAX", "phone"), ("결재조건", "pay_cond"), ("유효기간", "valid_period")),
+        "valid_default": "견적 후 15일 이내",
+        "right": (("사업자등록번호", "411-81-91898"),
+                  ("회사명/대표", "주식회사 신진켐텍 / 박형석"),
+                  ("주  소", "경기도 이천시 부발읍 황무로 1859-157"),
+                  ("업태/종목", "제조,도소매/산업용 밸브, 파이프 및 부속품 제조업"),
+                  ("담당자", None),
+                  ("TEL/FAX", "031-638-1809 / 031-635-1801")),
+        "manager_default": "문창근 부장",
+        "greeting": "1.귀사의 일의 번창을 기원합니다.\n2.하기와 같이 견적드리오니 검토하기 바랍니다.",
+        "th": ("이미지", "품목정보", "단위", "수량", "금액", "비고", "이익율"),
+        "price_default": ("소비자가", "단가1", "단가2"),
+        "svc_hdr": "[ 추가 비용 ]", "total": "자재비 합계", "rmk_hdr": "특약사항 및 비고",
+        "xl_sheet": "견적서",
+        "comp_title": "자재 구성 명세서 (Composition Report)", "site": "현장명",
+        "comp_sec": ("부속 세트 구성 (Fitting Sets)", "배관 물량 (Pipe Quantities)",
+                     "추가 자재 (Additional Components / Spares)", "전체 자재 산출 목록 (Total Components)"),
+        "comp_th": ("세트명 (Set Name)", "구분", "수량", "품목명 (Product Name)", "총 길이(m)", "롤 수(EA)",
+                    "품목정보 (Name/Spec)", "추가 수량", "총 수량"),
+        "roll": "{} 롤",
+        "comp_sheets": ("부속세트", "배관물량", "추가자재", "전체자재"),
+        "comp_xl_th": ("이미지", "세트명", "구성품 (품목명 / 규격 / 코드 / 수량)", "구분", "수량",
+                       "품목명", "총길이(m)", "롤수", "규격", "추가수량", "총수량"),
+    },
+    "JP": {
+        "font": ("NotoSansJP", "FONT_REGULAR_JP", "FONT_BOLD_JP"),
+        "xl_font": "Meiryo", "xl_num": "¥ #,##0",
+        "money": "¥ {:,}", "svc_money": "¥ {:,}",
+        "vat_rate": 0.10, "svc_keys": ("項目", "金額"),
+        "title": "御 見 積 書", "corp": "株式会社 SHIN JIN CHEMTECH",
+        "left": (("見積番号", "serial"), ("御  中", "recipient"), ("ご担当者", "ref"),
+                 ("TEL / FAX", "phone"), ("住  所", "addr"), ("有効期限", "valid_period")),
+        "valid_default": "見積日より15日間",
+        "right": (("会社名", "株式会社 SHIN JIN CHEMTECH"),
+                  ("代表者", "Park Hyeong-Seok"),
+                  ("住  所", "Gyeonggi-do, Icheon-si, Bubal-eup, Hwangmu-ro 1859-157"),
+                  ("Email/Web", "support@sjct.kr / www.sjct.kr"),
+                  ("担当者", None),
+                  ("TEL/FAX", "+82-31-638-1809 / +82-31-635-1801")),
+        "manager_default": "",
+        "greeting": "1.貴社ますますご清栄のこととお慶び申し上げます。\n2.下記の通りお見積り申し上げますので、ご検討のほどお願い申し上げます。",
+        "th": ("画像", "品名 / 規格 / コード", "単位", "数量", "金額", "備考", "利益率"),
+        "price_default": ("単価", "単価1", "単価2"),
+        "svc_hdr": "[ 追加費用 ]", "total": "総 合 計", "rmk_hdr": "特約事項及び備考",
+        "xl_sheet": "御見積書",
+        "comp_title": "資材構成明細書 (Material Composition Report)", "site": "現場名",
+        "comp_sec": ("付属セット構成 (Fitting Sets)", "配管数量 (Pipe Quantities)",
+                     "追加資材 (Additional Components / Spares)", "全体資材一覧 (Total Components)"),
+        "comp_th": ("セット名 (Set Name)", "区分", "数量", "品名 (Product Name)", "総長さ(m)", "ロール数(EA)",
+                    "品名 / 規格 (Name/Spec)", "追加数量", "総数量"),
+        "roll": "{} ﾛｰﾙ",
+        "comp_sheets": ("付属セット", "配管数量", "追加資材", "全体資材一覧"),
+        "comp_xl_th": ("画像", "セット名", "構成品 (品名 / 規格 / コード / 数量)", "区分", "数量",
+                       "品名", "総長さ(m)", "ロール数", "規格", "追加数量", "総数量"),
+    },
+}
+
+
+def _doc_loc(locale):
+    return DOC_LOCALES.get(locale) or DOC_LOCALES["KR"]
+
+
+def _doc_fonts(T):
+    """(폰트 패밀리, 본문 파일, 굵은 파일) — 파일 경로는 bind()된 슬롯에서 읽는다."""
+    fam, reg, bold = T["font"]
+    return fam, globals()[reg], globals()[bold]
+
+
+def _is_basic(form_type):
+    """KR 'basic' · JP '基本様式' — 그 외는 이익 분석 양식."""
+    return form_type in ("basic", "基本様式")
+
+
+def _svc(s):
+    """추가 비용 1행 → (항목, 금액). KR '항목/금액' · JP '項目/金額' 어느 키든 읽는다."""
+    return s.get("항목", s.get("項目", "")), s.get("금액", s.get("金額", 0))
+
+
+def doc_vat_exclude(rows, services, locale="KR"):
+    """부가세(소비세) 별도 표기 — rows의 price_1/price_2는 제자리 수정, services는 복사본을 돌려준다."""
+    T = _doc_loc(locale)
+    div = 1 + T["vat_rate"]
+    amt_key = T["svc_keys"][1]
+    for item in rows:
+        try: item['price_1'] = int(round(float(item.get('price_1', 0)) / div))
+        except: pass
+        try: item['price_2'] = int(round(float(item.get('price_2', 0)) / div))
+        except: pass
+    svcs = [s.copy() for s in (services or [])]
+    for svc in svcs:
+        try: svc[amt_key] = int(round(float(svc.get(amt_key, 0)) / div))
+        except: pass
+    return svcs
+
+
+# ── [V79] 2단계 레이아웃 — ① 측정·배치(행 높이·쪽 나눔 확정) ② 그리기 ──────────
+# 같은 품목명·구성품 문구가 견적마다 반복되므로 (폰트, 크기, 폭, 문구) 단위로 측정 결과를 캐시한다.
+# 측정은 전용 FPDF로만 — 그리는 문서의 커서·폰트 상태를 건드리지 않는다.
+# 측정용 FPDF는 set_font·multi_cell로 상태가 바뀌므로 스레드(= Streamlit 세션 실행)마다 따로 두고,
+# 공유하는 것은 불변 결과(줄 튜플) 캐시뿐이다.
+_MEASURE = threading.local()
+
+
+def _measure_pdf(family, font_regular, font_bold):
+    """이 스레드의 측정 전용 FPDF (폰트 조합별 1개)."""
+    pdfs = getattr(_MEASURE, "pdfs", None)
+    if pdfs is None:
+        pdfs = _MEASURE.pdfs = {}
+    key = (family, font_regular, font_bold)
+    m = pdfs.get(key)
+    if m is None:
+        m = FPDF()
+        if os.path.exists(font_regular):
+            m.add_font(family, '', font_regular, uni=True)
+            if os.path.exists(font_bold): m.add_font(family, 'B', font_bold, uni=True)
+        m.add_page()
+        pdfs[key] = m
+    return m
+
+
+@functools.lru_cache(maxsize=8192)
+def _text_lines(fonts, font_name, style, size, width, text, line_h):
+    """multi_cell과 같은 규칙으로 줄바꿈한 결과(튜플). fonts=(패밀리, 본문 파일, 굵은 파일) — 캐시 키용."""
+    m = _measure_pdf(*fonts)
+    m.set_font(font_name, style, size)
+    return tuple(m.multi_cell(width, line_h, text, dry_run=True, output="LINES", max_line_height=line_h))
+
+
+def _paginate(heights, y_first, y_top, y_max):
+    """행 높이 목록 → ([(새 쪽 여부, y)], 쪽 수). y_first=첫 행 y, y_top=새 쪽 첫 행 y.
+    (반응형 check_page_break와 같은 규칙: y + h > y_max 이면 다음 쪽)"""
+    plan, y, pages = [], y_first, 1
+    for h in heights:
+        brk = y + h > y_max
+        if brk:
+            y, pages = y_top, pages + 1
+        plan.append((brk, y))
+        y += h
+    return plan, pages
+
+
 # ==========================================
 # 2. PDF 및 Excel 생성 엔진
 # ==========================================
 class PDF(FPDF):
+    def __init__(self, *args, locale="KR", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.locale = locale   # [V80] 머리말·꼬리말 문구와 폰트
+
     def header(self):
+        T = _doc_loc(self.locale)
+        fam, f_reg, f_bold = _doc_fonts(T)
         header_font = 'Helvetica'; header_style = 'B'
-        if os.path.exists(FONT_REGULAR):
-            self.add_font('NanumGothic', '', FONT_REGULAR, uni=True)
-            header_font = 'NanumGothic'
-            if os.path.exists(FONT_BOLD): self.add_font('NanumGothic', 'B', FONT_BOLD, uni=True); header_style = 'B'
+        if os.path.exists(f_reg):
+            self.add_font(fam, '', f_reg, uni=True)
+            header_font = fam
+            if os.path.exists(f_bold): self.add_font(fam, 'B', f_bold, uni=True); header_style = 'B'
             else: header_style = ''
         # 제목 중앙 + 우측에 회사명
         self.set_font(header_font, header_style, 20)
-        title_txt = self.title_text if hasattr(self, 'title_text') else '견 적 서'
+        title_txt = self.title_text if hasattr(self, 'title_text') else T["title"]
         self.cell(130, 16, title_txt, align='C', border=0)
         self.set_font(header_font, header_style, 11)
         self.cell(60, 16, 'ShinJinChemTech', align='C', border=0, new_x="LMARGIN", new_y="NEXT")
@@ -65,30 +232,38 @@ class PDF(FPDF):
 
     def footer(self):
         self.set_y(-25) 
+        T = _doc_loc(self.locale)
+        fam, f_reg, f_bold = _doc_fonts(T)
         footer_font = 'Helvetica'; footer_style = 'B'
-        if os.path.exists(FONT_REGULAR):
-            footer_font = 'NanumGothic'
-            if os.path.exists(FONT_BOLD): footer_style = 'B'
+        if os.path.exists(f_reg):
+            footer_font = fam
+            if os.path.exists(f_bold): footer_style = 'B'
             else: footer_style = ''
         self.set_font(footer_font, footer_style, 12)
-        self.cell(0, 5, "주식회사 신진켐텍", align='C', ln=True)
+        self.cell(0, 5, T["corp"], align='C', ln=True)
         self.set_font(footer_font, '', 9)
         self.cell(0, 5, "www.sjct.kr", align='C', ln=True)
-        self.cell(0, 5, f'Page {self.page_no()}', align='C')
+        total = getattr(self, 'pages_total', 0)   # [V79] 배치 단계에서 미리 센 전체 쪽 수
+        self.cell(0, 5, f'Page {self.page_no()} / {total}' if total else f'Page {self.page_no()}', align='C')
 
-def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date, form_type, price_labels, buyer_info, remarks):
+def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date, form_type, price_labels, buyer_info, remarks, locale="KR"):
     """
     견적서 PDF 생성 — 첨부 이미지 양식과 동일한 레이아웃
     """
+    T = _doc_loc(locale)
+    basic = _is_basic(form_type)
+    money = T["money"].format
     drive_file_map = get_drive_file_map_deep()
-    pdf = PDF()
-    pdf.title_text = '견 적 서'
+    pdf = PDF(locale=locale)
+    pdf.title_text = T["title"]
     pdf.set_auto_page_break(False)
     pdf.add_page()
+    y_page_top = pdf.get_y()   # [V79] 머리말 아래 — 새 쪽 첫 행 위치 계산용
 
-    has_font = os.path.exists(FONT_REGULAR)
-    has_bold = os.path.exists(FONT_BOLD)
-    font_name = 'NanumGothic' if has_font else 'Helvetica'
+    fonts = _doc_fonts(T)
+    has_font = os.path.exists(fonts[1])
+    has_bold = os.path.exists(fonts[2])
+    font_name = fonts[0] if has_font else 'Helvetica'
     b_style = 'B' if has_bold else ''
 
     L = pdf.l_margin
@@ -108,26 +283,22 @@ def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date,
     ref       = buyer_info.get('ref', '')
     tel_buyer = buyer_info.get('phone', '')
     pay_cond  = buyer_info.get('pay_cond', '/')
-    valid_period = buyer_info.get('valid_period', '견적 후 15일 이내')
-
-    left_rows = [
-        ("일련번호", serial if serial else quote_date.replace('-', '/') if quote_date else '/'),
-        ("수  신", recipient or '/'),
-        ("참  조", ref or '/'),
-        ("TEL / FAX", tel_buyer or '/'),
-        ("결재조건", pay_cond),
-        ("유효기간", valid_period),
-    ]
+    valid_period = buyer_info.get('valid_period', T["valid_default"])
+
+    left_vals = {
+        "serial": serial if serial else quote_date.replace('-', '/') if quote_date else '/',
+        "recipient": recipient or '/',
+        "ref": ref or '/',
+        "phone": tel_buyer or '/',
+        "pay_cond": pay_cond,
+        "valid_period": valid_period,
+        "addr": buyer_info.get('addr', '') or '/',
+    }
+    left_rows = [(lbl, left_vals[k]) for lbl, k in T["left"]]
 
     RVAL_W = RIGHT_W - LBL_W
-    right_rows = [
-        ("사업자등록번호", "411-81-91898"),
-        ("회사명/대표", "주식회사 신진켐텍 / 박형석"),
-        ("주  소", "경기도 이천시 부발읍 황무로 1859-157"),
-        ("업태/종목", "제조,도소매/산업용 밸브, 파이프 및 부속품 제조업"),
-        ("담당자", buyer_info.get('manager', '문창근 부장')),
-        ("TEL/FAX", "031-638-1809 / 031-635-1801"),
-    ]
+    right_rows = [(lbl, buyer_info.get('manager', T["manager_default"]) if val is None else val)
+                  for lbl, val in T["right"]]
 
     y_info = pdf.get_y()
 
@@ -150,10 +321,7 @@ def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date,
 
     pdf.set_y(y_info + len(left_rows) * H_ROW)
 
-    greeting = (
-        "1.귀사의 일의 번창을 기원합니다.\n"
-        "2.하기와 같이 견적드리오니 검토하기 바랍니다."
-    )
+    greeting = T["greeting"]
     pdf.set_xy(L, pdf.get_y())
     pdf.set_font(font_name, '', 8.5)   # ↑ 7.5→8.5
     pdf.set_fill_color(255, 255, 255)
@@ -164,7 +332,7 @@ def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date,
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     # [2] 품목 테이블
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    if form_type == "basic":
+    if basic:
         COL_IMG  = 25
         COL_INFO = 63
         COL_UNIT = 13
@@ -187,36 +355,55 @@ def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date,
         pdf.set_fill_color(240, 240, 240)
         pdf.set_font(font_name, b_style, 9.5)   # ↑ 8.5→9.5
         H_HDR = 10
-        pdf.cell(COL_IMG,  H_HDR, "이미지",    border=1, align='C', fill=True)
-        pdf.cell(COL_INFO, H_HDR, "품목정보",   border=1, align='C', fill=True)
-        pdf.cell(COL_UNIT, H_HDR, "단위",      border=1, align='C', fill=True)
-        pdf.cell(COL_QTY,  H_HDR, "수량",      border=1, align='C', fill=True)
-        if form_type == "basic":
-            pdf.cell(COL_P1,  H_HDR, price_labels[0] if price_labels else "소비자가", border=1, align='C', fill=True)
-            pdf.cell(COL_AMT, H_HDR, "금액",   border=1, align='C', fill=True)
-            pdf.cell(COL_RMK, H_HDR, "비고",   border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
+        th_img, th_info, th_unit, th_qty, th_amt, th_rmk, th_rate = T["th"]
+        pdf.cell(COL_IMG,  H_HDR, th_img,   border=1, align='C', fill=True)
+        pdf.cell(COL_INFO, H_HDR, th_info,  border=1, align='C', fill=True)
+        pdf.cell(COL_UNIT, H_HDR, th_unit,  border=1, align='C', fill=True)
+        pdf.cell(COL_QTY,  H_HDR, th_qty,   border=1, align='C', fill=True)
+        if basic:
+            pdf.cell(COL_P1,  H_HDR, price_labels[0] if price_labels else T["price_default"][0], border=1, align='C', fill=True)
+            pdf.cell(COL_AMT, H_HDR, th_amt,   border=1, align='C', fill=True)
+            pdf.cell(COL_RMK, H_HDR, th_rmk,   border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
         else:
-            l1 = price_labels[0] if price_labels else "단가1"
-            l2 = price_labels[1] if len(price_labels) > 1 else "단가2"
+            l1 = price_labels[0] if price_labels else T["price_default"][1]
+            l2 = price_labels[1] if len(price_labels) > 1 else T["price_default"][2]
             pdf.set_font(font_name, b_style, 8)
-            pdf.cell(COL_P1,   H_HDR, l1,     border=1, align='C', fill=True)
-            pdf.cell(COL_AMT1, H_HDR, "금액",  border=1, align='C', fill=True)
-            pdf.cell(COL_P2,   H_HDR, l2,     border=1, align='C', fill=True)
-            pdf.cell(COL_AMT2, H_HDR, "금액",  border=1, align='C', fill=True)
-            pdf.cell(COL_PROF, H_HDR, "이익율", border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
+            pdf.cell(COL_P1,   H_HDR, l1,      border=1, align='C', fill=True)
+            pdf.cell(COL_AMT1, H_HDR, th_amt,  border=1, align='C', fill=True)
+            pdf.cell(COL_P2,   H_HDR, l2,      border=1, align='C', fill=True)
+            pdf.cell(COL_AMT2, H_HDR, th_amt,  border=1, align='C', fill=True)
+            pdf.cell(COL_PROF, H_HDR, th_rate, border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
 
     draw_table_header()
 
     sum_qty = 0; sum_a1 = 0; sum_a2 = 0; sum_profit = 0
     ITEM_H = 18  # ↑ 17→18
 
-    for item in final_data_list:
-        if pdf.get_y() + ITEM_H > 265:
+    # [V79] ① 측정·배치 — 품목명 줄바꿈을 미리 재서 행 높이를 정한다(3줄 이상이면 규격/코드와 겹치지 않게 늘림)
+    name_lines = [_text_lines(fonts, font_name, b_style, 9, COL_INFO - 3, str(it.get("품목", "") or ""), 4.2)
+                  for it in final_data_list]
+    row_hs = [max(ITEM_H, 1.5 + len(nl) * 4.2 + 7.0) for nl in name_lines]
+    plan, n_pages = _paginate(row_hs, pdf.get_y(), y_page_top + 10, 265)
+    # 표 뒤(서비스 비용·합계·비고)도 아래 그리기와 같은 규칙으로 미리 넘겨 전체 쪽 수를 정한다 → 꼬리말 'Page n / N'
+    y_end = plan[-1][1] + row_hs[-1] if plan else pdf.get_y()
+    if service_items:
+        if y_end + len(service_items) * 7 + 10 > 265:
+            y_end, n_pages = y_page_top, n_pages + 1
+        y_end += 1 + 7 + len(service_items) * 7
+    if y_end + 12 > 265:
+        y_end, n_pages = y_page_top, n_pages + 1
+    y_end += 11
+    if remarks and y_end + 2 + 20 > 270:
+        n_pages += 1
+    pdf.pages_total = n_pages
+
+    # ② 그리기 — 쪽 나눔·줄바꿈은 ①의 결과 그대로
+    for item, nl, row_h, (brk, _py) in zip(final_data_list, name_lines, row_hs, plan):
+        if brk:
             pdf.add_page()
             draw_table_header()
 
         x, y = pdf.get_x(), pdf.get_y()
-        name = str(item.get("품목", "") or "")
         spec = str(item.get("규격", "-") or "-")
         code = str(item.get("코드", "") or "").strip().zfill(5)
 
@@ -233,7 +420,7 @@ def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date,
         sum_a1 += a1
 
         p2 = 0; a2 = 0; profit = 0; rate = 0
-        if form_type == "profit":
+        if not basic:
             try: p2 = int(float(item.get("price_2", 0)))
             except: p2 = 0
             a2 = p2 * qty
@@ -243,7 +430,7 @@ def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date,
             rate = (profit / a2 * 100) if a2 else 0
 
         # 이미지 셀
-        pdf.cell(COL_IMG, ITEM_H, "", border=1)
+        pdf.cell(COL_IMG, row_h, "", border=1)
         if img_b64:
             try:
                 img_data_str = img_b64.split(",", 1)[1] if "," in img_b64 else img_b64
@@ -251,49 +438,50 @@ def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date,
                 with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
                     tmp.write(img_bytes)
                     tmp_path = tmp.name
-                img_sz = min(COL_IMG - 4, ITEM_H - 4, 14)
+                img_sz = min(COL_IMG - 4, row_h - 4, 14)
                 pdf.image(tmp_path, x=x + (COL_IMG - img_sz) / 2,
-                          y=y + (ITEM_H - img_sz) / 2, w=img_sz, h=img_sz)
+                          y=y + (row_h - img_sz) / 2, w=img_sz, h=img_sz)
                 if os.path.exists(tmp_path): os.unlink(tmp_path)
             except: pass
 
         # 품목정보 셀
         pdf.set_xy(x + COL_IMG, y)
-        pdf.cell(COL_INFO, ITEM_H, "", border=1)
+        pdf.cell(COL_INFO, row_h, "", border=1)
         # 품목명 — 굵게 9pt
-        pdf.set_xy(x + COL_IMG + 1.5, y + 1.5)
         pdf.set_font(font_name, b_style, 9)    # ↑ 7.5→9
-        pdf.multi_cell(COL_INFO - 3, 4.2, name, align='L', max_line_height=4.2)
+        for li, ln_txt in enumerate(nl):
+            pdf.set_xy(x + COL_IMG + 1.5, y + 1.5 + li * 4.2)
+            pdf.cell(COL_INFO - 3, 4.2, ln_txt, align='L')
         # 규격
-        pdf.set_xy(x + COL_IMG + 1.5, y + ITEM_H - 6.5)
+        pdf.set_xy(x + COL_IMG + 1.5, y + row_h - 6.5)
         pdf.set_font(font_name, '', 7.5)        # ↑ 6.5→7.5
         pdf.cell(COL_INFO - 3, 3.2, spec, align='L')
         # 코드
-        pdf.set_xy(x + COL_IMG + 1.5, y + ITEM_H - 3.5)
+        pdf.set_xy(x + COL_IMG + 1.5, y + row_h - 3.5)
         pdf.set_font(font_name, '', 7.5)        # ↑ 6.5→7.5
         pdf.cell(COL_INFO - 3, 3.2, code, align='L')
 
         # 단위 / 수량
         pdf.set_xy(x + COL_IMG + COL_INFO, y)
         pdf.set_font(font_name, '', 9.5)        # ↑ 8→9.5
-        pdf.cell(COL_UNIT, ITEM_H, str(item.get("단위", "EA") or "EA"), border=1, align='C')
-        pdf.cell(COL_QTY,  ITEM_H, str(qty), border=1, align='C')
+        pdf.cell(COL_UNIT, row_h, str(item.get("단위", "EA") or "EA"), border=1, align='C')
+        pdf.cell(COL_QTY,  row_h, str(qty), border=1, align='C')
 
         # 단가 / 금액
-        if form_type == "basic":
+        if basic:
             pdf.set_font(font_name, '', 9)      # ↑ 명시 설정
-            pdf.cell(COL_P1,  ITEM_H, f"{p1:,}", border=1, align='R')
-            pdf.cell(COL_AMT, ITEM_H, f"{a1:,}", border=1, align='R')
-            pdf.cell(COL_RMK, ITEM_H, "", border=1)
+            pdf.cell(COL_P1,  row_h, money(p1), border=1, align='R')
+            pdf.cell(COL_AMT, row_h, money(a1), border=1, align='R')
+            pdf.cell(COL_RMK, row_h, "", border=1)
             pdf.ln()
         else:
             pdf.set_font(font_name, '', 8.5)
-            pdf.cell(COL_P1,   ITEM_H, f"{p1:,}", border=1, align='R')
-            pdf.cell(COL_AMT1, ITEM_H, f"{a1:,}", border=1, align='R')
-            pdf.cell(COL_P2,   ITEM_H, f"{p2:,}", border=1, align='R')
-            pdf.cell(COL_AMT2, ITEM_H, f"{a2:,}", border=1, align='R')
+            pdf.cell(COL_P1,   row_h, money(p1), border=1, align='R')
+            pdf.cell(COL_AMT1, row_h, money(a1), border=1, align='R')
+            pdf.cell(COL_P2,   row_h, money(p2), border=1, align='R')
+            pdf.cell(COL_AMT2, row_h, money(a2), border=1, align='R')
             pdf.set_font(font_name, b_style, 8)
-            pdf.cell(COL_PROF, ITEM_H, f"{rate:.1f}%", border=1, align='C')
+            pdf.cell(COL_PROF, row_h, f"{rate:.1f}%", border=1, align='C')
             pdf.ln()
 
     # 서비스 비용
@@ -306,12 +494,13 @@ def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date,
             pdf.ln(1)
         pdf.set_fill_color(255, 255, 224)
         pdf.set_font(font_name, b_style, 9)
-        pdf.cell(PAGE_W, 7, " [ 추가 비용 ]", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
+        pdf.cell(PAGE_W, 7, f" {T['svc_hdr']}", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
         for s in service_items:
-            svc_total += s['금액']
+            s_name, s_amt = _svc(s)
+            svc_total += s_amt
             pdf.set_font(font_name, '', 9)
-            pdf.cell(PAGE_W - 35, 7, f"  {s['항목']}", border=1)
-            pdf.cell(35, 7, f"{s['금액']:,} 원", border=1, align='R', new_x="LMARGIN", new_y="NEXT")
+            pdf.cell(PAGE_W - 35, 7, f"  {s_name}", border=1)
+            pdf.cell(35, 7, T["svc_money"].format(s_amt), border=1, align='R', new_x="LMARGIN", new_y="NEXT")
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     # [3] 자재비 합계 행
@@ -319,22 +508,22 @@ def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date,
     if pdf.get_y() + 12 > 265:
         pdf.add_page()
 
-    final_total = (sum_a1 if form_type == "basic" else sum_a2) + svc_total
+    final_total = (sum_a1 if basic else sum_a2) + svc_total
     TOTAL_H = 11
 
     pdf.set_fill_color(230, 230, 230)
     pdf.set_font(font_name, b_style, 10)   # ↑ 9→10
 
-    if form_type == "basic":
+    if basic:
         label_w = COL_IMG + COL_INFO + COL_UNIT + COL_QTY + COL_P1
-        pdf.cell(label_w, TOTAL_H, "자재비 합계", border=1, align='C', fill=True)
-        pdf.cell(COL_AMT, TOTAL_H, f"{final_total:,}", border=1, align='R', fill=True)
+        pdf.cell(label_w, TOTAL_H, T["total"], border=1, align='C', fill=True)
+        pdf.cell(COL_AMT, TOTAL_H, money(final_total), border=1, align='R', fill=True)
         pdf.cell(COL_RMK, TOTAL_H, "", border=1, fill=True)
         pdf.ln()
     else:
         label_w = COL_IMG + COL_INFO + COL_UNIT + COL_QTY + COL_P1 + COL_AMT1 + COL_P2
-        pdf.cell(label_w, TOTAL_H, "자재비 합계", border=1, align='C', fill=True)
-        pdf.cell(COL_AMT2, TOTAL_H, f"{final_total:,}", border=1, align='R', fill=True)
+        pdf.cell(label_w, TOTAL_H, T["total"], border=1, align='C', fill=True)
+        pdf.cell(COL_AMT2, TOTAL_H, money(final_total), border=1, align='R', fill=True)
         pdf.cell(COL_PROF, TOTAL_H, "", border=1, fill=True)
         pdf.ln()
 
@@ -347,14 +536,14 @@ def create_advanced_pdf(final_data_list, service_items, quote_name, quote_date,
             pdf.add_page()
         pdf.set_fill_color(240, 240, 240)
         pdf.set_font(font_name, b_style, 9.5)  # ↑ 8.5→9.5
-        pdf.cell(PAGE_W, 8, "  특약사항 및 비고", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
+        pdf.cell(PAGE_W, 8, f"  {T['rmk_hdr']}", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
         pdf.set_font(font_name, '', 9)          # ↑ 8→9
         pdf.set_fill_color(255, 255, 255)
         pdf.multi_cell(PAGE_W, 6, remarks, border=1)
 
     return bytes(pdf.output())
 
-def create_quote_excel(final_data_list, service_items, quote_name, quote_date, form_type, price_labels, buyer_info, remarks):
+def create_quote_excel(final_data_list, service_items, quote_name, quote_date, form_type, price_labels, buyer_info, remarks, locale="KR"):
     """
     견적서 Excel 생성
     ─ 사용자 지정 폰트 크기 기준 ─
@@ -363,12 +552,15 @@ def create_quote_excel(final_data_list, service_items, quote_name, quote_date, f
     품목정보: 12pt  |  단위/수량/단가/금액: 14pt
     자재비합계: 16pt  |  특약사항 헤더+내용: 14pt
     """
+    T = _doc_loc(locale)
+    basic = _is_basic(form_type)
     output = io.BytesIO()
     workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-    ws = workbook.add_worksheet("견적서")
+    ws = workbook.add_worksheet(T["xl_sheet"])
     drive_file_map = get_drive_file_map_deep()
 
-    FN = '맑은 고딕'  # 기본 폰트
+    FN = T["xl_font"]  # 기본 폰트
+    NUM = T["xl_num"]  # 금액 표시 형식 (KR '#,##0' · JP '¥ #,##0')
 
     def fmt(**kw):
         base = {'font_name': FN, 'valign': 'vcenter', 'border': 1}
@@ -395,20 +587,20 @@ def create_quote_excel(final_data_list, service_items, quote_name, quote_date, f
 
     # 단위 / 수량 / 단가 / 금액 — 14pt
     f_center_14 = fmt(align='center', font_size=14)
-    f_num_14    = fmt(align='right',  font_size=14, num_format='#,##0')
+    f_num_14    = fmt(align='right',  font_size=14, num_format=NUM)
 
     # 이미지 셀
     f_img_cell  = fmt(align='center', font_size=11)
 
     # 자재비 합계 — 16pt 굵게
     f_total_lbl = fmt(bold=True, bg_color='#E6E6E6', align='center', font_size=16)
-    f_total_val = fmt(bold=True, bg_color='#E6E6E6', align='right',  font_size=16, num_format='#,##0')
+    f_total_val = fmt(bold=True, bg_color='#E6E6E6', align='right',  font_size=16, num_format=NUM)
     f_total_emp = fmt(bold=True, bg_color='#E6E6E6', align='center', font_size=16)
 
     # 추가비용
     f_svc_hdr  = fmt(bold=True, bg_color='#FFF9C4', align='center', font_size=13)
     f_svc_val  = fmt(align='left', font_size=12)
-    f_svc_num  = fmt(align='right', font_size=12, num_format='#,##0')
+    f_svc_num  = fmt(align='right', font_size=12, num_format=NUM)
 
     # 특약사항 — 14pt
     f_rmk_hdr  = fmt(bold=True, bg_color='#F0F0F0', align='center', font_size=14)
@@ -421,7 +613,7 @@ def create_quote_excel(final_data_list, service_items, quote_name, quote_date, f
     # 정보 테이블 열 역할 (basic 기준):
     #   col0(A)=좌레이블 | col1(B)=좌값(단독)
     #   col2~3(C~D)=우레이블 병합 | col4~6(E~G)=우값 병합
-    if form_type == "basic":
+    if basic:
         NUM_COLS = 7
         # A=14, B=25, C=6, D=8, E=10, F=13, G=10
         col_widths = [14, 25, 6, 8, 10, 13, 10]
@@ -439,11 +631,11 @@ def create_quote_excel(final_data_list, service_items, quote_name, quote_date, f
 
     # 합계 금액 — shrink_to_fit 버전 포맷 (####방지)
     f_total_val_shrink = fmt(bold=True, bg_color='#E6E6E6', align='right',
-                             font_size=16, num_format='#,##0', shrink=True)
+                             font_size=16, num_format=NUM, shrink=True)
 
     # 수량 / 소비자가 / 금액 — 14pt + shrink_to_fit (셀 폭 부족 시 자동 축소)
     f_center_14_shrink = fmt(align='center', font_size=14, shrink=True)
-    f_num_14_shrink    = fmt(align='right',  font_size=14, num_format='#,##0', shrink=True)
+    f_num_14_shrink    = fmt(align='right',  font_size=14, num_format=NUM, shrink=True)
 
     # A열(이미지 열) 폭을 픽셀로 환산: 14 chars * 7.5px/char ≈ 105px
     # 이미지가 이 셀 폭을 절대 넘지 않도록 cell_w_px를 A열 실제 폭에 맞춤
@@ -452,7 +644,7 @@ def create_quote_excel(final_data_list, service_items, quote_name, quote_date, f
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     # ROW 0 : 제목
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    ws.merge_range(0, 0, 0, LAST_COL, '견 적 서', f_title)
+    ws.merge_range(0, 0, 0, LAST_COL, T["title"], f_title)
     ws.set_row(0, 36)
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -465,25 +657,20 @@ def create_quote_excel(final_data_list, service_items, quote_name, quote_date, f
     ref       = buyer_info.get('ref', '')
     tel_buyer = buyer_info.get('phone', '/')
     pay_cond  = buyer_info.get('pay_cond', '/')
-    valid_per = buyer_info.get('valid_period', '견적 후 15일 이내')
+    valid_per = buyer_info.get('valid_period', T["valid_default"])
     manager   = buyer_info.get('manager', '')
 
-    left_rows  = [
-        ("일련번호",  serial or '/'),
-        ("수  신",    recipient or '/'),
-        ("참  조",    ref or '/'),
-        ("TEL / FAX", tel_buyer or '/'),
-        ("결재조건",  pay_cond),
-        ("유효기간",  valid_per),
-    ]
-    right_rows = [
-        ("사업자등록번호", "411-81-91898"),
-        ("회사명/대표",   "주식회사 신진켐텍 / 박형석"),
-        ("주  소",        "경기도 이천시 부발읍 황무로 1859-157"),
-        ("업태/종목",     "제조,도소매/산업용 밸브, 파이프 및 부속품 제조업"),
-        ("담당자",        manager),
-        ("TEL/FAX",       "031-638-1809 / 031-635-1801"),
-    ]
+    left_vals  = {
+        "serial":       serial or '/',
+        "recipient":    recipient or '/',
+        "ref":          ref or '/',
+        "phone":        tel_buyer or '/',
+        "pay_cond":     pay_cond,
+        "valid_period": valid_per,
+        "addr":         buyer_info.get('addr', '') or '/',
+    }
+    left_rows  = [(lbl, left_vals[k]) for lbl, k in T["left"]]
+    right_rows = [(lbl, manager if val is None else val) for lbl, val in T["right"]]
 
     # 컬럼 인덱스
     L_LBL   = 0          # 좌 레이블: A (단독)
@@ -515,30 +702,30 @@ def create_quote_excel(final_data_list, service_items, quote_name, quote_date, f
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     # ROW 7 : 인사말 — 11pt, 행 높이 36.4
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    greeting = "1.귀사의 일의 번창을 기원합니다.\n2.하기와 같이 견적드리오니 검토하기 바랍니다."
-    ws.merge_range(7, 0, 7, LAST_COL, greeting, f_greet)
+    ws.merge_range(7, 0, 7, LAST_COL, T["greeting"], f_greet)
     ws.set_row(7, 36.4)
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     # ROW 8 : 테이블 헤더 — 12pt
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     ws.set_row(8, 24)
-    ws.write(8, COL_IMG,  "이미지", f_hdr)
-    ws.write(8, COL_INFO, "품목정보", f_hdr)
-    ws.write(8, COL_UNIT, "단위", f_hdr)
-    ws.write(8, COL_QTY,  "수량", f_hdr)
-    if form_type == "basic":
-        ws.write(8, COL_P1,  price_labels[0] if price_labels else "소비자가", f_hdr)
-        ws.write(8, COL_AMT, "금액", f_hdr)
-        ws.write(8, COL_RMK, "비고", f_hdr)
+    th_img, th_info, th_unit, th_qty, th_amt, th_rmk, th_rate = T["th"]
+    ws.write(8, COL_IMG,  th_img, f_hdr)
+    ws.write(8, COL_INFO, th_info, f_hdr)
+    ws.write(8, COL_UNIT, th_unit, f_hdr)
+    ws.write(8, COL_QTY,  th_qty, f_hdr)
+    if basic:
+        ws.write(8, COL_P1,  price_labels[0] if price_labels else T["price_default"][0], f_hdr)
+        ws.write(8, COL_AMT, th_amt, f_hdr)
+        ws.write(8, COL_RMK, th_rmk, f_hdr)
     else:
-        l1 = price_labels[0] if price_labels else "단가1"
-        l2 = price_labels[1] if len(price_labels) > 1 else "단가2"
+        l1 = price_labels[0] if price_labels else T["price_default"][1]
+        l2 = price_labels[1] if len(price_labels) > 1 else T["price_default"][2]
         ws.write(8, COL_P1,   l1,      f_hdr)
-        ws.write(8, COL_AMT1, "금액",   f_hdr)
+        ws.write(8, COL_AMT1, th_amt,  f_hdr)
         ws.write(8, COL_P2,   l2,      f_hdr)
-        ws.write(8, COL_AMT2, "금액",   f_hdr)
-        ws.write(8, COL_PROF, "이익율", f_hdr)
+        ws.write(8, COL_AMT2, th_amt,  f_hdr)
+        ws.write(8, COL_PROF, th_rate, f_hdr)
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     # ROW 9~ : 품목 데이터
@@ -607,7 +794,7 @@ def create_quote_excel(final_data_list, service_items, quote_name, quote_date, f
         ws.write(data_row, COL_UNIT, item.get("단위", "EA") or "EA", f_center_14)
 
         # 수량 / 단가 / 금액 — 14pt + shrink_to_fit
-        if form_type == "basic":
+        if basic:
             ws.write(data_row, COL_QTY,  qty, f_center_14_shrink)
             ws.write(data_row, COL_P1,   p1,  f_num_14_shrink)
             ws.write(data_row, COL_AMT,  a1,  f_num_14_shrink)
@@ -631,32 +818,33 @@ def create_quote_excel(final_data_list, service_items, quote_name, quote_date, f
     # ── 추가 비용 ──
     if service_items:
         ws.set_row(data_row, 20)
-        ws.merge_range(data_row, 0, data_row, LAST_COL, "[ 추가 비용 ]", f_svc_hdr)
+        ws.merge_range(data_row, 0, data_row, LAST_COL, T["svc_hdr"], f_svc_hdr)
         data_row += 1
         for s in service_items:
+            s_name, s_amt = _svc(s)
             ws.set_row(data_row, 20)
-            amt_col = COL_AMT if form_type == "basic" else COL_AMT2
+            amt_col = COL_AMT if basic else COL_AMT2
             if amt_col > 0:
-                ws.merge_range(data_row, 0, data_row, amt_col - 1, s['항목'], f_svc_val)
+                ws.merge_range(data_row, 0, data_row, amt_col - 1, s_name, f_svc_val)
             else:
-                ws.write(data_row, 0, s['항목'], f_svc_val)
-            ws.write(data_row, amt_col, s['금액'], f_svc_num)
+                ws.write(data_row, 0, s_name, f_svc_val)
+            ws.write(data_row, amt_col, s_amt, f_svc_num)
             for c in range(amt_col + 1, NUM_COLS):
                 ws.write(data_row, c, "", f_img_cell)
-            svc_total += s['금액']
+            svc_total += s_amt
             data_row += 1
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     # 자재비 합계 — 16pt, 행 높이 30
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    final_total = (total_a1 if form_type == "basic" else total_a2) + svc_total
+    final_total = (total_a1 if basic else total_a2) + svc_total
     ws.set_row(data_row, 30)
-    if form_type == "basic":
-        ws.merge_range(data_row, 0, data_row, COL_P1, "자재비 합계", f_total_lbl)
+    if basic:
+        ws.merge_range(data_row, 0, data_row, COL_P1, T["total"], f_total_lbl)
         ws.write(data_row, COL_AMT, final_total, f_total_val_shrink)
         ws.write(data_row, COL_RMK, "",          f_total_emp)
     else:
-        ws.merge_range(data_row, 0, data_row, COL_P2, "자재비 합계", f_total_lbl)
+        ws.merge_range(data_row, 0, data_row, COL_P2, T["total"], f_total_lbl)
         ws.write(data_row, COL_AMT2, final_total, f_total_val_shrink)
         ws.write(data_row, COL_PROF, "",           f_total_emp)
     data_row += 1
@@ -674,7 +862,7 @@ def create_quote_excel(final_data_list, service_items, quote_name, quote_date, f
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     if remarks:
         ws.set_row(data_row, 24)
-        ws.merge_range(data_row, 0, data_row, LAST_COL, "특약사항 및 비고", f_rmk_hdr)
+        ws.merge_range(data_row, 0, data_row, LAST_COL, T["rmk_hdr"], f_rmk_hdr)
         data_row += 1
         line_count = max(remarks.count('\n') + 1, 2)
         ws.set_row(data_row, max(20 * line_count, 40))
@@ -687,38 +875,26 @@ def create_quote_excel(final_data_list, service_items, quote_name, quote_date, f
         except: pass
     return output.getvalue()
 
-def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db_sets, quote_name):
+def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db_sets, quote_name, locale="KR"):
+    T = _doc_loc(locale)
+    sec1, sec2, sec3, sec4 = T["comp_sec"]
+    (th_set, th_type, th_qty, th_pipe, th_len, th_rolls,
+     th_info, th_add, th_total) = T["comp_th"]
     drive_file_map = get_drive_file_map_deep()
-    pdf = PDF()
-    pdf.title_text = "자재 구성 명세서 (Composition Report)"
+    pdf = PDF(locale=locale)
+    pdf.title_text = T["comp_title"]
     pdf.set_auto_page_break(False)
     pdf.add_page()
+    y_page_top = pdf.get_y()   # [V79] 새 쪽 첫 행 위치
     
-    has_font = os.path.exists(FONT_REGULAR)
-    has_bold = os.path.exists(FONT_BOLD)
-    font_name = 'NanumGothic' if has_font else 'Helvetica'
+    fonts = _doc_fonts(T)
+    has_font = os.path.exists(fonts[1])
+    has_bold = os.path.exists(fonts[2])
+    font_name = fonts[0] if has_font else 'Helvetica'
     b_style = 'B' if has_bold else ''
     
-    baseline_counts = {}
-    all_sets_db = {}
-    for cat, val in db_sets.items(): all_sets_db.update(val)
-    
-    for item in set_cart:
-        recipe = all_sets_db.get(item['name'], {}).get("recipe", {})
-        for p_code, p_qty in recipe.items():
-            baseline_counts[str(p_code)] = baseline_counts.get(str(p_code), 0) + (p_qty * item['qty'])
-            
-    code_sums = {}
-    for p_item in pipe_cart:
-        c = p_item.get('code')
-        if c: code_sums[c] = code_sums.get(c, 0) + p_item['len']
-    for p_code, total_len in code_sums.items():
-        prod_info = next((item for item in db_products if str(item["code"]) == str(p_code)), None)
-        if prod_info:
-            unit_len = prod_info.get("len_per_unit", 4)
-            if unit_len <= 0: unit_len = 4
-            qty = math.ceil(total_len / unit_len)
-            baseline_counts[str(p_code)] = baseline_counts.get(str(p_code), 0) + qty
+    bom = bom_engine(db_products, db_sets)   # [V81] 세트 전개·배관 롤 수·제품 색인 공용
+    baseline_counts = bom.baseline(set_cart, pipe_cart)
 
     additional_items_list = []
     temp_baseline = baseline_counts.copy()
@@ -750,7 +926,7 @@ def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db
                 })
 
     pdf.set_font(font_name, '', 10)
-    pdf.cell(0, 8, f"현장명: {quote_name}", align='R', new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 8, f"{T['site']}: {quote_name}", align='R', new_x="LMARGIN", new_y="NEXT")
     pdf.ln(5)
 
     def check_page_break(h_needed):
@@ -760,7 +936,7 @@ def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db
     # 1. 부속 세트 구성
     pdf.set_fill_color(220, 220, 220)
     pdf.set_font(font_name, b_style, 12)
-    pdf.cell(0, 10, "1. 부속 세트 구성 (Fitting Sets)", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 10, f"1. {sec1}", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
     
     header_h = 8
     # ── 컬럼 폭 재배분: 구분·수량 줄이고 세트명 늘림 ──
@@ -773,51 +949,45 @@ def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db
     pdf.set_fill_color(240, 240, 240)
     pdf.set_font(font_name, b_style, 9)
     pdf.cell(col_w_img,  header_h, "IMG",            border=1, align='C', fill=True)
-    pdf.cell(col_w_name, header_h, "세트명 (Set Name)", border=1, align='C', fill=True)
-    pdf.cell(col_w_type, header_h, "구분",            border=1, align='C', fill=True)
-    pdf.cell(col_w_qty,  header_h, "수량",            border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
-
-    # 품목 코드 → 이름 맵
-    prod_code_to_name = {str(p.get("code","")).strip().zfill(5): p.get("name","") for p in db_products}
+    pdf.cell(col_w_name, header_h, th_set,           border=1, align='C', fill=True)
+    pdf.cell(col_w_type, header_h, th_type,          border=1, align='C', fill=True)
+    pdf.cell(col_w_qty,  header_h, th_qty,           border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
 
+    # [V79] ① 측정·배치 — 구성품 문구의 실제 줄바꿈 수로 행 높이를 정하고 쪽 나눔을 먼저 확정
+    set_rows = []
     for item in set_cart:
         name  = item.get('name')
-        qty   = item.get('qty')
-        stype = item.get('type')
 
         # 세트의 레시피(구성품) 가져오기
-        recipe = {}
-        for cat, sets in db_sets.items():
-            if name in sets:
-                recipe = sets[name].get('recipe', {})
-                break
+        recipe = bom.recipe(name)
 
         # 구성품 텍스트 (코드 → 이름+규격+코드 변환)
         recipe_lines = []
         for p_code, p_qty in recipe.items():
             norm_code = str(p_code).strip().zfill(5)
-            p_name = prod_code_to_name.get(norm_code, str(p_code))
-            # 규격 조회
-            p_prod = next((p for p in db_products if str(p.get("code","")).strip().zfill(5) == norm_code), None)
+            p_prod = bom.by_code5.get(norm_code)
+            p_name = p_prod.get("name", "") if p_prod else str(p_code)
             p_spec = p_prod.get("spec", "") if p_prod else ""
             spec_str = f" [{p_spec}]" if p_spec and p_spec != "-" else ""
             recipe_lines.append(f"  · {p_name}{spec_str}  ×{p_qty}  (#{norm_code})")
         recipe_text = "\n".join(recipe_lines)
+        wrapped = _text_lines(fonts, font_name, '', 8.5, col_w_name - 4, recipe_text, 4.5) if recipe_text else ()
 
-        # 행 높이: 세트명 1줄 + 구성품 줄 수 기준
-        n_lines = max(len(recipe_lines), 1)
+        # 행 높이: 세트명 1줄 + 구성품 줄 수(줄바꿈 포함) 기준
+        n_lines = max(len(wrapped), 1)
         # 세트명 11pt(5mm) + 구성품 1줄당 4.5mm + 상하 여백 4mm
-        row_h = max(5 + n_lines * 4.5 + 4, 22)
+        set_rows.append((item, wrapped, max(5 + n_lines * 4.5 + 4, 22)))
+    set_plan, _ = _paginate([r[2] for r in set_rows], pdf.get_y(), y_page_top, 270)   # 뒤 배관 표는 반응형 — 전체 쪽 수는 모름
 
-        check_page_break(row_h)
+    # ② 그리기
+    for (item, wrapped, row_h), (brk, _py) in zip(set_rows, set_plan):
+        name  = item.get('name')
+        qty   = item.get('qty')
+        stype = item.get('type')
+        if brk: pdf.add_page()
 
         # 이미지 셀
-        img_id = None
-        for cat, sets in db_sets.items():
-            if name in sets:
-                img_id = sets[name].get('image')
-                break
-        img_b64 = download_image_by_id(img_id)
+        img_b64 = download_image_by_id(bom.info(name).get('image'))
 
         x, y = pdf.get_x(), pdf.get_y()
         pdf.cell(col_w_img, row_h, "", border=1)
@@ -843,11 +1013,12 @@ def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db
         pdf.set_font(font_name, b_style, 11)
         pdf.cell(col_w_name - 4, 5.5, name, align='L')
 
-        # 구성품 텍스트 (보통, 9pt)
-        if recipe_text:
-            pdf.set_xy(x + col_w_img + 2, y + 8)
+        # 구성품 텍스트 (보통, 9pt) — ①에서 잰 줄 그대로
+        if wrapped:
             pdf.set_font(font_name, '', 8.5)
-            pdf.multi_cell(col_w_name - 4, 4.5, recipe_text, align='L', max_line_height=4.5)
+            for li, ln_txt in enumerate(wrapped):
+                pdf.set_xy(x + col_w_img + 2, y + 8 + li * 4.5)
+                pdf.cell(col_w_name - 4, 4.5, ln_txt, align='L')
 
         # 구분 / 수량 셀
         pdf.set_xy(x + col_w_img + col_w_name, y)
@@ -861,14 +1032,14 @@ def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db
     pdf.set_font(font_name, b_style, 12)
     pdf.set_fill_color(220, 220, 220)
     check_page_break(20)
-    pdf.cell(0, 10, "2. 배관 물량 (Pipe Quantities)", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 10, f"2. {sec2}", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
     
     pdf.set_fill_color(240, 240, 240)
     pdf.set_font(font_name, b_style, 9)
     pdf.cell(22, header_h, "IMG", border=1, align='C', fill=True)
-    pdf.cell(108, header_h, "품목명 (Product Name)", border=1, align='C', fill=True)
-    pdf.cell(35, header_h, "총 길이(m)", border=1, align='C', fill=True)
-    pdf.cell(25, header_h, "롤 수(EA)", border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(108, header_h, th_pipe, border=1, align='C', fill=True)
+    pdf.cell(35, header_h, th_len, border=1, align='C', fill=True)
+    pdf.cell(25, header_h, th_rolls, border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
 
     pipe_summary = {}
     for p in pipe_cart:
@@ -880,10 +1051,8 @@ def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db
 
     for code, info in pipe_summary.items():
         check_page_break(16)
-        prod_info = next((item for item in db_products if str(item["code"]) == str(code)), None)
-        unit_len = prod_info.get("len_per_unit", 4) if prod_info else 4
-        if unit_len <= 0: unit_len = 4
-        rolls = math.ceil(info['len'] / unit_len)
+        prod_info = bom.by_code.get(str(code).strip())
+        rolls = math.ceil(info['len'] / bom.unit_len(code))
         img_val = prod_info.get("image") if prod_info else None
         
         img_id = get_best_image_id(code, img_val, drive_file_map)
@@ -907,7 +1076,7 @@ def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db
         pdf.set_font(font_name, '', 10)
         pdf.cell(108, 16, f"{info['name']} ({info['spec']})", border=1, align='L')
         pdf.cell(35,  16, f"{info['len']} m", border=1, align='C')
-        pdf.cell(25,  16, f"{rolls} 롤", border=1, align='C', new_x="LMARGIN", new_y="NEXT")
+        pdf.cell(25,  16, T["roll"].format(rolls), border=1, align='C', new_x="LMARGIN", new_y="NEXT")
 
     pdf.ln(5)
 
@@ -916,13 +1085,13 @@ def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db
         pdf.set_font(font_name, b_style, 12)
         pdf.set_fill_color(220, 220, 220)
         check_page_break(20)
-        pdf.cell(0, 10, "3. 추가 자재 (Additional Components / Spares)", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
+        pdf.cell(0, 10, f"3. {sec3}", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
         
         pdf.set_fill_color(240, 240, 240)
         pdf.set_font(font_name, b_style, 9)
         pdf.cell(22, header_h, "IMG", border=1, align='C', fill=True)
-        pdf.cell(133, header_h, "품목정보 (Name/Spec)", border=1, align='C', fill=True)
-        pdf.cell(35, header_h, "추가 수량", border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
+        pdf.cell(133, header_h, th_info, border=1, align='C', fill=True)
+        pdf.cell(35, header_h, th_add, border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
 
         for item in additional_items_list:
             check_page_break(16)
@@ -961,13 +1130,13 @@ def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db
     pdf.set_fill_color(220, 220, 220)
     check_page_break(20)
     idx_num = "4" if additional_items_list else "3"
-    pdf.cell(0, 10, f"{idx_num}. 전체 자재 산출 목록 (Total Components)", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 10, f"{idx_num}. {sec4}", border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
     
     pdf.set_fill_color(240, 240, 240)
     pdf.set_font(font_name, b_style, 9)
     pdf.cell(22, header_h, "IMG", border=1, align='C', fill=True)
-    pdf.cell(133, header_h, "품목정보 (Name/Spec)", border=1, align='C', fill=True)
-    pdf.cell(35, header_h, "총 수량", border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(133, header_h, th_info, border=1, align='C', fill=True)
+    pdf.cell(35, header_h, th_total, border=1, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
 
     for item in final_data_list:
         try: qty = int(float(item.get("수량", 0)))
@@ -1004,7 +1173,11 @@ def create_composition_pdf(set_cart, pipe_cart, final_data_list, db_products, db
 
     return bytes(pdf.output())
 
-def create_composition_excel(set_cart, pipe_cart, final_data_list, db_products, db_sets, quote_name):
+def create_composition_excel(set_cart, pipe_cart, final_data_list, db_products, db_sets, quote_name, locale="KR"):
+    T = _doc_loc(locale)
+    sh_set, sh_pipe, sh_add, sh_all = T["comp_sheets"]
+    (xh_img, xh_set, xh_recipe, xh_type, xh_qty,
+     xh_name, xh_len, xh_rolls, xh_spec, xh_add, xh_total) = T["comp_xl_th"]
     output = io.BytesIO()
     workbook = xlsxwriter.Workbook(output, {'in_memory': True})
     drive_file_map = get_drive_file_map_deep()
@@ -1013,23 +1186,8 @@ def create_composition_excel(set_cart, pipe_cart, final_data_list, db_products,
     fmt_center = workbook.add_format({'border': 1, 'align': 'center', 'valign': 'vcenter'})
     fmt_left = workbook.add_format({'border': 1, 'align': 'left', 'valign': 'vcenter'})
 
-    baseline_counts = {}
-    all_sets_db = {}
-    for cat, val in db_sets.items(): all_sets_db.update(val)
-    for item in set_cart:
-        recipe = all_sets_db.get(item['name'], {}).get("recipe", {})
-        for p, q in recipe.items(): baseline_counts[str(p)] = baseline_counts.get(str(p), 0) + (q * item['qty'])
-    
-    code_sums = {}
-    for p_item in pipe_cart:
-        c = p_item.get('code')
-        if c: code_sums[c] = code_sums.get(c, 0) + p_item['len']
-    for p_code, total_len in code_sums.items():
-        prod_info = next((item for item in db_products if str(item["code"]) == str(p_code)), None)
-        if prod_info:
-            unit_len = prod_info.get("len_per_unit", 4)
-            if unit_len <= 0: unit_len = 4
-            baseline_counts[str(p_code)] = baseline_counts.get(str(p_code), 0) + math.ceil(total_len / unit_len)
+    bom = bom_engine(db_products, db_sets)   # [V81] 세트 전개·배관 롤 수·제품 색인 공용
+    baseline_counts = bom.baseline(set_cart, pipe_cart)
 
     additional_items_list = []
     temp_baseline = baseline_counts.copy()
@@ -1094,12 +1252,12 @@ def create_composition_excel(set_cart, pipe_cart, final_data_list, db_products,
         except:
             ws.write(row, col, "Err", fmt_center)
 
-    ws1 = workbook.add_worksheet("부속세트")
-    ws1.write(0, 0, "이미지", fmt_header)
-    ws1.write(0, 1, "세트명", fmt_header)
-    ws1.write(0, 2, "구성품 (품목명 / 규격 / 코드 / 수량)", fmt_header)
-    ws1.write(0, 3, "구분", fmt_header)
-    ws1.write(0, 4, "수량", fmt_header)
+    ws1 = workbook.add_worksheet(sh_set)
+    ws1.write(0, 0, xh_img, fmt_header)
+    ws1.write(0, 1, xh_set, fmt_header)
+    ws1.write(0, 2, xh_recipe, fmt_header)
+    ws1.write(0, 3, xh_type, fmt_header)
+    ws1.write(0, 4, xh_qty, fmt_header)
     ws1.set_column(0, 0, 15)
     ws1.set_column(1, 1, 22)
     ws1.set_column(2, 2, 55)
@@ -1109,26 +1267,17 @@ def create_composition_excel(set_cart, pipe_cart, final_data_list, db_products,
     # 엑셀용 구성품 포맷
     fmt_recipe = workbook.add_format({'border': 1, 'align': 'left', 'valign': 'top', 'text_wrap': True, 'font_size': 9})
 
-    prod_code_to_info = {
-        str(p.get("code","")).strip().zfill(5): p
-        for p in db_products
-    }
-
     row = 1
     for item in set_cart:
         name = item.get('name')
         # 세트 레시피 조회
-        recipe = {}
-        for cat, sets in db_sets.items():
-            if name in sets:
-                recipe = sets[name].get('recipe', {})
-                break
+        recipe = bom.recipe(name)
 
         # 구성품 텍스트 조합
         recipe_lines = []
         for p_code, p_qty in recipe.items():
             norm = str(p_code).strip().zfill(5)
-            p_info = prod_code_to_info.get(norm, {})
+            p_info = bom.by_code5.get(norm, {})
             p_name = p_info.get("name", norm)
             p_spec = p_info.get("spec", "")
             spec_str = f" [{p_spec}]" if p_spec and p_spec != "-" else ""
@@ -1139,23 +1288,18 @@ def create_composition_excel(set_cart, pipe_cart, final_data_list, db_products,
         row_h = max(80, n_lines * 18)
         ws1.set_row(row, row_h)
 
-        img_id = None
-        for cat, sets in db_sets.items():
-            if name in sets:
-                img_id = sets[name].get('image')
-                break
-        insert_scaled_image(ws1, row, 0, download_image_by_id(img_id))
+        insert_scaled_image(ws1, row, 0, download_image_by_id(bom.info(name).get('image')))
         ws1.write(row, 1, name, fmt_left)
         ws1.write(row, 2, recipe_text, fmt_recipe)
         ws1.write(row, 3, item.get('type'), fmt_center)
         ws1.write(row, 4, item.get('qty'), fmt_center)
         row += 1
 
-    ws2 = workbook.add_worksheet("배관물량")
-    ws2.write(0, 0, "이미지", fmt_header)
-    ws2.write(0, 1, "품목명", fmt_header)
-    ws2.write(0, 2, "총길이(m)", fmt_header)
-    ws2.write(0, 3, "롤수", fmt_header)
+    ws2 = workbook.add_worksheet(sh_pipe)
+    ws2.write(0, 0, xh_img, fmt_header)
+    ws2.write(0, 1, xh_name, fmt_header)
+    ws2.write(0, 2, xh_len, fmt_header)
+    ws2.write(0, 3, xh_rolls, fmt_header)
     ws2.set_column(0, 0, 15)
     ws2.set_column(1, 1, 30)
 
@@ -1170,10 +1314,8 @@ def create_composition_excel(set_cart, pipe_cart, final_data_list, db_products,
     row = 1
     for code, info in pipe_summary.items():
         ws2.set_row(row, 80)
-        prod_info = next((item for item in db_products if str(item["code"]) == str(code)), None)
-        unit_len = prod_info.get("len_per_unit", 4) if prod_info else 4
-        if unit_len <= 0: unit_len = 4
-        rolls = math.ceil(info['len'] / unit_len)
+        prod_info = bom.by_code.get(str(code).strip())
+        rolls = math.ceil(info['len'] / bom.unit_len(code))
         img_val = prod_info.get("image") if prod_info else None
         
         insert_scaled_image(ws2, row, 0, download_image_by_id(get_best_image_id(code, img_val, drive_file_map)))
@@ -1183,11 +1325,11 @@ def create_composition_excel(set_cart, pipe_cart, final_data_list, db_products,
         row += 1
 
     if additional_items_list:
-        ws_add = workbook.add_worksheet("추가자재")
-        ws_add.write(0, 0, "이미지", fmt_header)
-        ws_add.write(0, 1, "품목명", fmt_header)
-        ws_add.write(0, 2, "규격", fmt_header)
-        ws_add.write(0, 3, "추가수량", fmt_header)
+        ws_add = workbook.add_worksheet(sh_add)
+        ws_add.write(0, 0, xh_img, fmt_header)
+        ws_add.write(0, 1, xh_name, fmt_header)
+        ws_add.write(0, 2, xh_spec, fmt_header)
+        ws_add.write(0, 3, xh_add, fmt_header)
         ws_add.set_column(0, 0, 15)
         ws_add.set_column(1, 1, 30)
         
@@ -1203,11 +1345,11 @@ def create_composition_excel(set_cart, pipe_cart, final_data_list, db_products,
             ws_add.write(row, 3, item['qty'], fmt_center)
             row += 1
 
-    ws3 = workbook.add_worksheet("전체자재")
-    ws3.write(0, 0, "이미지", fmt_header)
-    ws3.write(0, 1, "품목명", fmt_header)
-    ws3.write(0, 2, "규격", fmt_header)
-    ws3.write(0, 3, "총수량", fmt_header)
+    ws3 = workbook.add_worksheet(sh_all)
+    ws3.write(0, 0, xh_img, fmt_header)
+    ws3.write(0, 1, xh_name, fmt_header)
+    ws3.write(0, 2, xh_spec, fmt_header)
+    ws3.write(0, 3, xh_total, fmt_header)
     ws3.set_column(0, 0, 15)
     ws3.set_column(1, 1, 30)
 
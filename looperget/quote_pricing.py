@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — STEP 3 단가 표 증분 갱신 (열 단위 카탈로그 뷰 + 수동 단가 오버레이)
+
+[V82, 2026-10-19] STEP 3에서 출력 단가 선택(sel)만 바꿔도 제품 전체로 pdb를 다시 만들고
+fdata를 행마다 재구성한 뒤 custom_prices를 문자열 키로 병합해 final_edit_df를 통째로 갈았다.
+→ 카탈로그 리비전당 한 번만 [제품 × 단가 필드] 정수 행렬을 만들고,
+   단가 변경은 현재 표의 행 키 → 행렬 행 번호 gather 한 번으로 price_1/price_2 두 열만 바꾼다.
+   수량·수기 행·행 순서는 표에 있는 그대로 둔다.
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+수동 단가 오버레이: {(행 키, 단가 필드): 단가}
+    표에서 카탈로그 단가와 다르게 고친 칸만 담는다(quote_capture_overrides).
+    단가를 바꿨다 되돌아오면 그 단가에서 고친 값이 다시 살아난다.
+    행 키 = 코드 zfill(5), 코드가 없으면 품목명 (quote_batch._cp_key 규칙).
+
+행 구성 자체(quote_items → 행, 관급비용 제외 규칙)는 여전히 quote_batch.quote_build_fdata —
+'소비자가' 포함 여부가 바뀌면 행 집합이 달라지므로 app.py가 전체 재구성으로 넘어간다.
+
+주입 의존 없음(pandas + numpy). bind() 불필요.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from looperget.quote_batch import QUOTE_PKEY
+from looperget.rev_cache import rev_cache
+
+__all__ = ["QuotePriceView", "quote_price_view", "quote_row_keys",
+           "quote_retier", "quote_capture_overrides"]
+
+_PRICE_FIELDS = tuple(dict.fromkeys(QUOTE_PKEY.values()))
+
+
+def quote_row_keys(df):
+    """표 행 → 행 키 Series (코드 zfill(5), 코드가 비었거나 00000이면 품목명)."""
+    if df is None or len(df) == 0:
+        return pd.Series([], dtype=object)
+    code = df["코드"].fillna("").astype(str).str.strip() if "코드" in df else pd.Series("", index=df.index)
+    code = code.mask(code.isin(["nan", "None"]), "")   # data_editor 빈 칸 → astype(str) 잔재
+    code5 = code.str.zfill(5)
+    name = df["품목"].fillna("").astype(str).str.strip() if "품목" in df else pd.Series("", index=df.index)
+    return code5.where((code != "") & (code5 != "00000"), name)
+
+
+class QuotePriceView:
+    """[제품 × 단가 필드] int64 행렬 + 행 키 색인. 카탈로그 한 벌에 1개 — quote_price_view()가 캐시."""
+
+    def __init__(self, products):
+        products = list(products or [])
+        keys = quote_row_keys(pd.DataFrame({"코드": [p.get("code", "") for p in products],
+                                            "품목": [p.get("name", "") for p in products]}))
+        # 같은 키면 뒤 제품이 이긴다 (quote_build_fdata의 pdb 덮어쓰기 규칙)
+        self.index = pd.Series(np.arange(len(products), dtype=np.int64), index=keys.values)
+        self.index = self.index[~self.index.index.duplicated(keep="last") & (self.index.index != "")]
+        self.fields = {f: i for i, f in enumerate(_PRICE_FIELDS)}
+        cols = [pd.to_numeric(pd.Series([p.get(f, 0) for p in products], dtype=object),
+                              errors="coerce").fillna(0) for f in _PRICE_FIELDS]
+        self.prices = (np.column_stack([c.to_numpy(dtype=np.float64) for c in cols]).astype(np.int64)
+                       if products else np.zeros((0, len(_PRICE_FIELDS)), dtype=np.int64))
+
+    def rows(self, keys):
+        """행 키 → 행렬 행 번호 (카탈로그에 없으면 -1)."""
+        return self.index.reindex(pd.Index(keys)).fillna(-1).to_numpy(dtype=np.int64)
+
+    def gather(self, rows, field):
+        """행 번호 배열 → 해당 단가 필드 열 (없는 행은 0)."""
+        col = self.prices[:, self.fields[field]]
+        return np.where(rows >= 0, col[np.maximum(rows, 0)] if len(col) else 0, 0)
+
+
+# ── 카탈로그 리비전별 캐시 (looperget.rev_cache) ─────────────────────
+_VIEWS = OrderedDict()
+_VIEWS_MAX = 4
+
+
+def _price_rev(products):
+    return hash(tuple((p.get("code"), p.get("name")) + tuple(p.get(f) for f in _PRICE_FIELDS)
+                      for p in (products or [])))
+
+
+def quote_price_view(products):
+    """products → QuotePriceView. 같은 리비전이면 이미 만든 뷰를 돌려준다."""
+    return rev_cache(_VIEWS, _price_rev(products), lambda: QuotePriceView(products), _VIEWS_MAX)
+
+
+def _fields(sel):
+    pk = [QUOTE_PKEY[l] for l in sel] if sel else ["price_cons"]
+    return pk[0], (pk[1] if len(pk) > 1 else None)
+
+
+def quote_retier(df, products, sel, overlay):
+    """현재 STEP 3 표의 price_1/price_2만 새 단가(sel)로 바꾼 복사본.
+    카탈로그 행 = 행렬 gather 후 오버레이(수동 단가)로 덮음, 수기 행(카탈로그에 없음) = 그대로."""
+    out = df.copy()
+    if len(out) == 0:
+        return out
+    view = quote_price_view(products)
+    keys = quote_row_keys(out)
+    rows = view.rows(keys)
+    hit = rows >= 0
+    for col, field in zip(("price_1", "price_2"), _fields(sel)):
+        if field is None:
+            vals = np.zeros(len(out), dtype=np.int64)
+        else:
+            vals = view.gather(rows, field)
+            if overlay:
+                ov = keys.map(lambda k: overlay.get((k, field)))
+                has = ov.notna().to_numpy() & hit
+                if has.any():
+                    vals = vals.copy()
+                    vals[has] = ov[has].astype(np.int64).to_numpy()
+        if col not in out.columns:
+            out[col] = 0
+        if hit.all():
+            out[col] = vals
+        else:
+            out.loc[hit, col] = vals[hit]
+    return out
+
+
+def quote_capture_overrides(df, products, sel, overlay):
+    """표(data_editor 결과)에서 카탈로그 단가와 다른 칸을 오버레이에 기록(제자리 수정).
+    카탈로그 값으로 되돌린 칸은 오버레이에서 지운다. 수기 행은 대상 아님."""
+    if df is None or len(df) == 0:
+        return overlay
+    view = quote_price_view(products)
+    keys = quote_row_keys(df)
+    rows = view.rows(keys)
+    hit = rows >= 0
+    for col, field in zip(("price_1", "price_2"), _fields(sel)):
+        if field is None or col not in df.columns:
+            continue
+        cur = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+        base = view.gather(rows, field)
+        valid = hit & ~np.isnan(cur)
+        diff = valid & (cur != base)
+        same = valid & ~diff
+        for i in np.flatnonzero(diff).tolist():
+            overlay[(keys.iat[i], field)] = int(cur[i])
+        for i in np.flatnonzero(same).tolist():
+            overlay.pop((keys.iat[i], field), None)
+    return overlay
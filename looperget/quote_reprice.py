@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — 카탈로그 단가 변경 후 저장 견적 재단가 (코드 → 견적 역색인 + 차이표)
+
+[V91, 2026-10-19] 매입단가 일괄 변경 뒤에도 Quotes_KR의 임시 견적은 옛 custom_prices를 그대로 들고 있고,
+어떤 견적이 영향을 받는지 알 길이 없었다.
+→ 분석 창고(quote_warehouse) lines 테이블에서 창고 리비전당 한 번 품목키 → 견적키 역색인을 만들고,
+   바뀐 코드가 들어 있는 견적만 골라 STEP 3 단가 뷰(quote_pricing.QuotePriceView) gather로 다시 매긴다.
+   결과는 견적별 기존/새 총액·견적가 차이표 + 행 단위 쓰기 계획({시트 행: (총액, 데이터JSON)}).
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+재단가 규칙
+    custom_prices 중 바뀐 코드 행만 현재 카탈로그 단가(ui_state.sel 1·2열)로 바꾼다 — 다른 행(수기 단가 포함)은 그대로.
+      바뀐 코드 행에 손으로 고친 단가가 있었다면 카탈로그 단가로 덮인다(차이표의 '변경 행'으로 검토 후 반영).
+    총액 = Σ 소비자가 × items 수량 (견적 저장 시 est_total 규칙 그대로 — 코드 문자열 그대로 일치, 카탈로그에 없는 코드는 0).
+      custom_prices 행은 STEP 3 행 키(코드 zfill(5)) 규칙으로 찾는다 — 두 규칙은 저장 당시 화면과 같게 둔 것.
+    견적가 = Σ price_1 × 수량 (custom_prices — STEP 3 전 저장이라 비어 있으면 0).
+
+주입 의존 없음(pandas + numpy). bind() 불필요. 시트 쓰기는 app.py(update_quote_rows).
+"""
+import json
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from looperget.quote_batch import QUOTE_PKEY
+from looperget.quote_pricing import quote_price_view, quote_row_keys
+from looperget.quote_warehouse import quote_hash
+from looperget.rev_cache import rev_cache
+
+__all__ = ["quote_code_index", "quotes_with_codes", "quote_reprice_plan"]
+
+_PLAN_COLS = ["_row", "날짜", "현장명", "담당자", "저장유형", "변경 행", "기존 총액", "새 총액", "총액 차이",
+              "기존 견적가", "새 견적가", "견적가 차이"]
+
+
+# ── 창고 리비전별 역색인 (looperget.rev_cache) ─────────────────────
+_INDEXES = OrderedDict()
+_INDEXES_MAX = 4
+
+
+def quote_code_index(wh):
+    """분석 창고 → {품목키: 견적키 배열}. 같은 창고 리비전이면 이미 만든 색인을 돌려준다."""
+    def build():
+        ln = wh.tables["lines"]
+        return {k: np.unique(g.to_numpy()) for k, g in ln.groupby("품목키", sort=False)["견적키"]}
+    return rev_cache(_INDEXES, (id(wh), wh.rev), build, _INDEXES_MAX)
+
+
+def quotes_with_codes(wh, codes, save_types=("임시",)):
+    """바뀐 코드 목록 → 그 코드가 하나라도 든 견적키 집합 (save_types로 저장 유형 제한, 비우면 전체)."""
+    idx = quote_code_index(wh)
+    hits = [idx[k] for k in {str(c).strip().zfill(5) for c in codes or [] if str(c).strip()} if k in idx]
+    if not hits:
+        return set()
+    keys = set(np.concatenate(hits).tolist())
+    if save_types:
+        q = wh.tables["quotes"]
+        keys &= set(q.loc[q["저장유형"].isin(save_types), "견적키"])
+    return keys
+
+
+def _cons_map(products):
+    """products → {코드(strip): 소비자가 int} — est_total의 pdb와 같은 키(같은 코드면 뒤 제품이 이김)."""
+    products = list(products or [])
+    price = pd.to_numeric(pd.Series([p.get("price_cons", 0) for p in products], dtype=object),
+                          errors="coerce").fillna(0).to_numpy(dtype=np.float64).astype(np.int64)
+    return {str(p.get("code")).strip(): int(v) for p, v in zip(products, price)}
+
+
+def _total(cons, items):
+    """items {코드: 수량} → Σ int(소비자가) × int(수량) (est_total과 같은 정수 규칙)."""
+    if not items:
+        return 0
+    price = np.array([cons.get(str(k).strip(), 0) for k in items], dtype=np.int64)
+    qty = pd.to_numeric(pd.Series(list(items.values()), dtype=object), errors="coerce").fillna(0)
+    return int((price * qty.to_numpy(dtype=np.float64).astype(np.int64)).sum())
+
+
+def _quote_sum(cp):
+    if cp is None or not len(cp) or "price_1" not in cp:
+        return 0
+    p = pd.to_numeric(cp["price_1"], errors="coerce").fillna(0)
+    q = pd.to_numeric(cp["수량"], errors="coerce").fillna(0) if "수량" in cp else 0
+    return int((p * q).sum())
+
+
+def quote_reprice_plan(kr_quotes, wh, products, codes, save_types=("임시",)):
+    """(차이표 DataFrame, {시트 행 번호: (새 총액, 새 데이터JSON)}).
+    시트 행 번호 = kr_quotes 순서 + 2 (헤더 1행). 총액·견적가가 그대로이고 바뀐 행도 없는 견적은 빠진다."""
+    targets = quotes_with_codes(wh, codes, save_types)
+    codes5 = {str(c).strip().zfill(5) for c in codes or [] if str(c).strip()}
+    view = quote_price_view(products)
+    cons = _cons_map(products)
+    rows, writes = [], {}
+    for i, q in enumerate(kr_quotes or []):
+        if not targets or quote_hash(q) not in targets:
+            continue
+        try:
+            d = json.loads(str(q.get("데이터JSON", "") or "{}"))
+        except Exception:
+            continue
+        if not isinstance(d, dict):
+            continue
+        items = d.get("items") if isinstance(d.get("items"), dict) else {}
+        cp = pd.DataFrame(d.get("custom_prices") or [])
+        old_sum = _quote_sum(cp)
+        changed = np.zeros(len(cp), dtype=bool)
+        if len(cp):
+            keys = quote_row_keys(cp)
+            hit = keys.isin(codes5).to_numpy()
+            vrow = view.rows(keys[hit])
+            found = vrow >= 0
+            sel = (d.get("ui_state") or {}).get("sel") or ["소비자가"]
+            for col, lb in zip(("price_1", "price_2"), list(sel)[:2]):
+                field = QUOTE_PKEY.get(lb)
+                if field is None or col not in cp or not found.any():
+                    continue
+                new = view.gather(vrow, field)
+                old = pd.to_numeric(cp.loc[hit, col], errors="coerce").to_numpy(dtype=np.float64)
+                moved = found & (old != new)
+                if moved.any():
+                    pos = np.flatnonzero(hit)[moved]
+                    cp[col] = cp[col].astype(object)
+                    cp.iloc[pos, cp.columns.get_loc(col)] = [int(round(x)) for x in new[moved].tolist()]
+                    changed[pos] = True
+        new_sum = _quote_sum(cp)
+        old_total = int(pd.to_numeric(pd.Series([q.get("총액", 0)]), errors="coerce").fillna(0).iat[0])
+        new_total = _total(cons, items)
+        n_changed = int(changed.sum())
+        if not n_changed and new_total == old_total:
+            continue
+        if len(cp):
+            d["custom_prices"] = cp.to_dict("records")
+        rows.append([i + 2, str(q.get("날짜", "")), str(q.get("현장명", "")), str(q.get("담당자", "")),
+                     str(d.get("save_type", "임시")), n_changed, old_total, new_total, new_total - old_total,
+                     old_sum, new_sum, new_sum - old_sum])
+        writes[i + 2] = (new_total, json.dumps(d, ensure_ascii=False))
+    return pd.DataFrame(rows, columns=_PLAN_COLS), writes
@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — 국내 견적 분석 창고 (Quotes_KR 데이터JSON → 사실 테이블, 증분 ETL)
+
+[V89, 2026-10-19] Quotes_KR 행마다 데이터JSON(items·set_cart·pipe_cart·custom_prices·buyer)이
+통째로 들어 있지만 "지난 분기 가장 많이 나간 부품", "담당자별 소비자가 대비 평균 할인율"을 보려면
+견적을 하나씩 열어 봐야 했다.
+→ 견적 행 내용 해시(sha1)를 키로 새 견적만 한 번 디코드해 사실 테이블 4개에 쌓는다.
+   지워진 견적은 키로 빼고, 나머지는 손대지 않는다(리런마다 전체 재파싱 없음).
+   집계는 창고 리비전 + 인자별로 캐시 — 같은 조건이면 group-by도 다시 돌지 않는다.
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+테이블 (견적 차원 열 = 견적키·날짜·월·분기·현장명·담당자·저장유형 — 사실 테이블에 펼쳐 둔다)
+    quotes  견적 1건 = 1행 (+ 단가기준·총액·품목수) — 창고의 목록(manifest) 역할
+    lines   견적 × 품목 (품목키·코드·품목·규격·단위·수량·단가·금액)
+            custom_prices(STEP 3 표) 행 = 단가 확정, 표에 없는 items 품목 = 단가 NaN(STEP 3 전 저장)
+    sets    견적 × 세트 (세트명·구분·수량)
+    pipes   견적 × 배관 (구분·코드·품목·규격·길이)
+저장: WAREHOUSE_DIR 아래 테이블당 Parquet 파일 1개 (pyarrow 필요 — 없으면 디스크 없이 메모리 창고만).
+      폴더는 0700으로 만들고, 남의 것이거나 다른 사용자가 쓸 수 있으면 쓰지 않는다(공용 임시 폴더 대비).
+      Streamlit Cloud 컨테이너는 재시작 때 비워지므로 디스크는 프로세스 간 재사용용 캐시일 뿐 —
+      원본은 언제나 Quotes_KR 시트(파일이 없거나 스키마가 다르면 처음부터 다시 쌓는다).
+
+주입 의존 없음(pandas + numpy). bind() 불필요.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from looperget.rev_cache import rev_cache
+
+try:
+    import pyarrow  # noqa: F401  (Parquet 엔진 — streamlit 의존성으로 배포 환경에는 있음)
+    _FMT = "parquet"
+except ImportError:
+    _FMT = None   # 디스크 저장 안 함 — pickle은 공용 임시 폴더에서 읽지 않는다
+
+__all__ = [
+    "WAREHOUSE_DIR", "QW_PERIODS", "QuoteWarehouse", "quote_warehouse", "quote_hash",
+    "qw_period_values", "qw_top_parts", "qw_discount_by_manager", "qw_set_totals", "qw_pipe_totals",
+    "qw_trend",
+]
+
+WAREHOUSE_DIR = os.path.join(tempfile.gettempdir(), "looperget_quote_wh")
+QW_PERIODS = {"월별": "월", "분기별": "분기"}
+
+_SCHEMA = 1
+_Q_FIELDS = ("날짜", "현장명", "담당자", "총액", "데이터JSON")
+_DIM = ["견적키", "날짜", "월", "분기", "현장명", "담당자", "저장유형"]
+_COLS = {
+    "quotes": _DIM + ["단가기준", "총액", "품목수"],
+    "lines": _DIM + ["품목키", "코드", "품목", "규격", "단위", "수량", "단가", "금액"],
+    "sets": _DIM + ["세트명", "구분", "수량"],
+    "pipes": _DIM + ["구분", "코드", "품목", "규격", "길이"],
+}
+_INT = {"총액", "품목수", "수량"}
+_FLOAT = {"단가", "금액", "길이"}
+
+
+def quote_hash(row):
+    """Quotes_KR 행 → 내용 해시 키(sha1 앞 16자리). 같은 내용이면 같은 키 — 다시 저장하면 날짜가 바뀌어 새 키."""
+    raw = "\x1f".join(str(row.get(f, "")) for f in _Q_FIELDS)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _num(v, default=0.0):
+    try:
+        f = float(str(v).replace(",", "")) if v not in (None, "") else default
+    except (TypeError, ValueError):
+        return default
+    return default if f != f else f
+
+
+def _key(code, name):
+    """행 키 — 코드 zfill(5), 코드가 비었거나 00000이면 품목명 (quote_pricing.quote_row_keys 규칙)."""
+    c = str(code if code is not None else "").strip()
+    if c in ("nan", "None"): c = ""
+    c5 = c.zfill(5)
+    return c5 if c and c5 != "00000" else str(name or "").strip()
+
+
+def _frame(name, rows):
+    cols = _COLS[name]
+    df = pd.DataFrame(rows, columns=cols)
+    for c in cols:
+        if c in _INT:
+            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0).astype(np.int64)
+        elif c in _FLOAT:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype(np.float64)
+        else:
+            df[c] = df[c].fillna("").astype(str)
+    return df
+
+
+def _decode(qk, row):
+    """견적 행 1건 → {테이블: [행 튜플]}. 데이터JSON을 여기서 한 번만 파싱한다."""
+    try:
+        d = json.loads(str(row.get("데이터JSON", "") or "{}"))
+    except Exception:
+        d = {}
+    if not isinstance(d, dict): d = {}
+    date = str(row.get("날짜", ""))
+    month = date[:7]
+    try: quarter = f"{date[:4]}Q{(int(date[5:7]) - 1) // 3 + 1}"
+    except ValueError: quarter = ""
+    dim = (qk, date, month, quarter, str(row.get("현장명", "")), str(row.get("담당자", "")),
+           str(d.get("save_type", "임시")))
+    ui = d.get("ui_state") if isinstance(d.get("ui_state"), dict) else {}
+    sel = ui.get("sel") or ["소비자가"]
+    out = {"lines": [], "sets": [], "pipes": []}
+
+    seen = set()
+    for r in d.get("custom_prices") or []:
+        if not isinstance(r, dict): continue
+        k = _key(r.get("코드"), r.get("품목"))
+        if not k: continue
+        seen.add(k)
+        q = _num(r.get("수량"))
+        p = _num(r.get("price_1"), np.nan)
+        code = "" if k == str(r.get("품목", "")).strip() else k
+        out["lines"].append(dim + (k, code, str(r.get("품목", "")), str(r.get("규격", "")),
+                                   str(r.get("단위", "")), q, p, p * q))
+    items = d.get("items") if isinstance(d.get("items"), dict) else {}
+    for code, q in items.items():
+        k = _key(code, code)
+        if not k or k in seen: continue
+        out["lines"].append(dim + (k, k if k.isdigit() else "", "", "", "", _num(q), np.nan, np.nan))
+
+    for s in d.get("set_cart") or []:
+        if isinstance(s, dict):
+            out["sets"].append(dim + (str(s.get("name", "")), str(s.get("type", "")), _num(s.get("qty"))))
+    for p in d.get("pipe_cart") or []:
+        if isinstance(p, dict):
+            out["pipes"].append(dim + (str(p.get("type", "")), str(p.get("code", "")), str(p.get("name", "")),
+                                       str(p.get("spec", "")), _num(p.get("len"))))
+    out["quotes"] = [dim + (str(sel[0]), _num(row.get("총액")), len(items))]
+    return out
+
+
+def _private_dir(root):
+    """root를 0700으로 만들고, 내 소유 + 그룹·기타 쓰기 없음일 때만 True."""
+    try:
+        os.makedirs(root, mode=0o700, exist_ok=True)
+        st = os.stat(root)
+    except OSError:
+        return False
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        return False
+    return not st.st_mode & 0o022
+
+
+class QuoteWarehouse:
+    """Quotes_KR → 사실 테이블 4개 (tables[이름] = DataFrame). quote_warehouse()가 저장 위치별로 1개 유지.
+    세션(스레드)끼리 공유되므로 sync·저장은 lock 안에서, tables·rev는 sync 끝에 한 번에 바꾼다."""
+
+    def __init__(self, root=None):
+        self.root = root or WAREHOUSE_DIR
+        self.fmt = _FMT if _FMT and _private_dir(self.root) else None
+        self.rev = 0
+        self.tables = {t: _frame(t, []) for t in _COLS}
+        self._lock = threading.Lock()
+        self._load()
+
+    # ── 디스크 ────────────────────────────────────────────────────
+    def _path(self, name):
+        return os.path.join(self.root, f"{name}.{self.fmt}")
+
+    def _load(self):
+        if not self.fmt:
+            return
+        try:
+            with open(os.path.join(self.root, "manifest.json"), encoding="utf-8") as f:
+                man = json.load(f)
+            if man.get("schema") != _SCHEMA or man.get("fmt") != self.fmt:
+                return
+            tables = {t: pd.read_parquet(self._path(t)) for t in _COLS}
+            if any(list(df.columns) != _COLS[t] for t, df in tables.items()):
+                return
+            self.tables = tables
+            self.rev = int(man.get("rev", 0))
+        except Exception:
+            pass   # 파일 없음·손상 → 빈 창고에서 다시 쌓는다
+
+    def _save(self):
+        if not self.fmt:
+            return False
+        try:
+            for t, df in self.tables.items():
+                tmp = self._path(t) + ".tmp"
+                df.to_parquet(tmp, index=False)
+                os.replace(tmp, self._path(t))
+            tmp = os.path.join(self.root, "manifest.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"schema": _SCHEMA, "fmt": self.fmt, "rev": self.rev}, f)
+            os.replace(tmp, os.path.join(self.root, "manifest.json"))
+            return True
+        except OSError:
+            return False   # 읽기 전용 디스크 — 메모리 창고로 계속
+
+    # ── 증분 ETL ─────────────────────────────────────────────────
+    def keys(self):
+        return set(self.tables["quotes"]["견적키"])
+
+    def sync(self, kr_quotes):
+        """시트 견적 목록과 맞춘다: 새 내용만 디코드해 붙이고, 없어진 키는 뺀다.
+        반환 {"added": n, "removed": n, "total": n, "saved": bool|None}."""
+        cur = {}
+        for row in kr_quotes or []:
+            cur.setdefault(quote_hash(row), row)
+        with self._lock:
+            have = self.keys()
+            new = [k for k in cur if k not in have]
+            gone = have - cur.keys()
+            stat = {"added": len(new), "removed": len(gone), "total": len(cur), "saved": None}
+            if not new and not gone:
+                return stat
+            tables = dict(self.tables)
+            if gone:
+                for t, df in tables.items():
+                    tables[t] = df[~df["견적키"].isin(gone)].reset_index(drop=True)
+            if new:
+                rows = {t: [] for t in _COLS}
+                for k in new:
+                    for t, rs in _decode(k, cur[k]).items():
+                        rows[t].extend(rs)
+                for t, rs in rows.items():
+                    if rs:
+                        add = _frame(t, rs)
+                        tables[t] = pd.concat([tables[t], add], ignore_index=True) if len(tables[t]) else add
+            self.tables, self.rev = tables, self.rev + 1
+            stat["saved"] = self._save()
+        return stat
+
+
+_WAREHOUSES = {}
+_WAREHOUSES_LOCK = threading.Lock()
+
+
+def quote_warehouse(root=None):
+    """저장 위치 → QuoteWarehouse (프로세스당 1개 — 첫 호출 때만 디스크에서 읽는다)."""
+    root = root or WAREHOUSE_DIR
+    with _WAREHOUSES_LOCK:
+        wh = _WAREHOUSES.get(root)
+        if wh is None:
+            wh = _WAREHOUSES[root] = QuoteWarehouse(root)
+    return wh
+
+
+# ── 집계 캐시 (창고 리비전 + 인자) ──────────────────────────────────
+_REPORTS = OrderedDict()
+_REPORTS_MAX = 64
+
+
+def _hashable(v):
+    return tuple(v) if isinstance(v, (list, set)) else v
+
+
+def _memo(fn):
+    """(함수, 창고, 리비전, 인자) 키 캐시. products 인자는 키에서 빼고 호출부가 넘긴 카탈로그 리비전(_rev)으로 대신한다."""
+    def wrapped(wh, *args, **kw):
+        key = (fn.__name__, id(wh), wh.rev, tuple(_hashable(a) for a in args),
+               tuple((k, _hashable(v)) for k, v in sorted(kw.items()) if k != "products"))
+        return rev_cache(_REPORTS, key, lambda: fn(wh, *args, **kw), _REPORTS_MAX)
+    wrapped.__name__ = fn.__name__
+    wrapped.__doc__ = fn.__doc__
+    return wrapped
+
+
+def _cut(df, period_col=None, periods=(), save_types=()):
+    if period_col and periods:
+        df = df[df[period_col].isin(periods)]
+    if save_types:
+        df = df[df["저장유형"].isin(save_types)]
+    return df
+
+
+def _cons_map(products):
+    """카탈로그 → (품목키 색인 소비자가 Series, 품목명 Series, 규격 Series). 같은 키면 뒤 품목."""
+    products = products or []
+    cat = pd.DataFrame({
+        "품목키": [_key(p.get("code"), p.get("name")) for p in products],
+        "소비자가": pd.to_numeric(pd.Series([p.get("price_cons", 0) for p in products], dtype=object),
+                              errors="coerce").fillna(0).astype(np.float64),
+        "품목명": [str(p.get("name", "")) for p in products],
+        "규격명": [str(p.get("spec", "")) for p in products],
+    })
+    return cat[cat["품목키"] != ""].drop_duplicates("품목키", keep="last").set_index("품목키")
+
+
+def _prod_rev(products):
+    return hash(tuple((p.get("code"), p.get("name"), p.get("spec"), p.get("price_cons")) for p in products or []))
+
+
+@_memo
+def qw_period_values(wh, period="월별"):
+    """창고에 있는 기간 값 목록(최근 먼저)."""
+    col = QW_PERIODS[period]
+    v = wh.tables["quotes"][col]
+    return sorted(set(v[v != ""]), reverse=True)
+
+
+def qw_top_parts(wh, products=None, period="분기별", periods=(), save_types=(), n=30):
+    """많이 나간 부품 — 품목키별 수량·견적수·견적 금액(단가 확정분). products를 주면 빈 품목명을 채운다."""
+    return _top_parts(wh, _prod_rev(products), period, tuple(periods), tuple(save_types), n, products=products)
+
+
+@_memo
+def _top_parts(wh, _rev, period, periods, save_types, n, products=None):
+    df = _cut(wh.tables["lines"], QW_PERIODS[period], periods, save_types)
+    if df.empty:
+        return pd.DataFrame(columns=["품목키", "품목", "규격", "수량", "견적수", "금액"])
+    named = df[df["품목"] != ""].drop_duplicates("품목키", keep="last").set_index("품목키")
+    g = df.groupby("품목키", sort=False)
+    out = g.agg(수량=("수량", "sum"), 견적수=("견적키", "nunique"), 금액=("금액", "sum")).reset_index()
+    out["품목"] = out["품목키"].map(named["품목"])
+    out["규격"] = out["품목키"].map(named["규격"])
+    if products:
+        cat = _cons_map(products)
+        out["품목"] = out["품목"].fillna(out["품목키"].map(cat["품목명"]))
+        out["규격"] = out["규격"].fillna(out["품목키"].map(cat["규격명"]))
+    out[["품목", "규격"]] = out[["품목", "규격"]].fillna("")
+    out["금액"] = out["금액"].fillna(0).round().astype(np.int64)
+    out = out.sort_values(["수량", "견적수"], ascending=False, kind="stable").head(n)
+    return out[["품목키", "품목", "규격", "수량", "견적수", "금액"]].reset_index(drop=True)
+
+
+def qw_discount_by_manager(wh, products, period="분기별", periods=(), save_types=()):
+    """담당자별 소비자가 대비 할인율 — 단가 확정 라인을 현재 카탈로그 소비자가와 조인.
+    평균 할인율% = (1 − Σ 견적가 / Σ 소비자가) × 100 (수량 가중), 소비자가 0·미등록 품목 제외."""
+    return _discount(wh, _prod_rev(products), period, tuple(periods), tuple(save_types), products=products)
+
+
+@_memo
+def _discount(wh, _rev, period, periods, save_types, products=None):
+    cols = ["담당자", "견적수", "라인수", "소비자가 합계", "견적가 합계", "평균 할인율%", "견적별 중앙 할인율%"]
+    df = _cut(wh.tables["lines"], QW_PERIODS[period], periods, save_types)
+    df = df[df["단가"].notna() & (df["수량"] > 0)]
+    cons = df["품목키"].map(_cons_map(products)["소비자가"])
+    df = df.assign(_cons=cons * df["수량"])[cons.fillna(0).to_numpy() > 0]
+    if df.empty:
+        return pd.DataFrame(columns=cols)
+    per_q = df.groupby(["담당자", "견적키"], sort=False)[["_cons", "금액"]].sum()
+    per_q["_d"] = (1 - per_q["금액"] / per_q["_cons"]) * 100
+    g = df.groupby("담당자", sort=True)
+    out = g.agg(견적수=("견적키", "nunique"), 라인수=("품목키", "size"),
+                **{"소비자가 합계": ("_cons", "sum"), "견적가 합계": ("금액", "sum")})
+    out["평균 할인율%"] = np.round((1 - out["견적가 합계"] / out["소비자가 합계"]) * 100, 1)
+    out["견적별 중앙 할인율%"] = np.round(per_q.groupby(level=0)["_d"].median(), 1)
+    for c in ("소비자가 합계", "견적가 합계"):
+        out[c] = out[c].round().astype(np.int64)
+    out = out.reset_index()
+    out["담당자"] = out["담당자"].replace("", "(미기재)")
+    return out[cols]
+
+
+@_memo
+def qw_set_totals(wh, period="분기별", periods=(), save_types=()):
+    """세트별 수량·견적수 (set_cart)."""
+    df = _cut(wh.tables["sets"], QW_PERIODS[period], tuple(periods), tuple(save_types))
+    out = df.groupby(["구분", "세트명"], sort=True).agg(수량=("수량", "sum"), 견적수=("견적키", "nunique"))
+    return out.reset_index().sort_values("수량", ascending=False, kind="stable").reset_index(drop=True)
+
+
+@_memo
+def qw_pipe_totals(wh, period="분기별", periods=(), save_types=()):
+    """배관별 총 길이·견적수 (pipe_cart)."""
+    df = _cut(wh.tables["pipes"], QW_PERIODS[period], tuple(periods), tuple(save_types))
+    out = df.groupby(["구분", "코드", "품목", "규격"], sort=True).agg(
+        총길이=("길이", "sum"), 견적수=("견적키", "nunique"))
+    return out.reset_index().sort_values("총길이", ascending=False, kind="stable").reset_index(drop=True)
+
+
+@_memo
+def qw_trend(wh, period="월별", save_types=()):
+    """기간별 견적수·품목 수량·견적 금액(단가 확정분)·총액(시트 총액 열)."""
+    col = QW_PERIODS[period]
+    q = _cut(wh.tables["quotes"], save_types=tuple(save_types))
+    ln = _cut(wh.tables["lines"], save_types=tuple(save_types))
+    out = q[q[col] != ""].groupby(col, sort=True).agg(견적수=("견적키", "nunique"), 총액=("총액", "sum"))
+    li = ln.groupby(col, sort=True).agg(수량=("수량", "sum"), 금액=("금액", "sum"))
+    out = out.join(li, how="left").fillna(0)
+    out["금액"] = out["금액"].round().astype(np.int64)
+    out["수량"] = out["수량"].astype(np.int64)
+    return out.reset_index()
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — 단가 재계산 엔진 (스칼라 원본 + 카탈로그 일괄 NumPy판)
+
+[V83, 2026-10-19] app.py L591-757(핵심 엔진 함수·V39 시뮬레이터 엔진)에서 스칼라 함수를 추출 — 본문 무변경.
+시뮬레이터는 recalc_target 한 품목씩만 재계산할 수 있었다(smart_roundup의 while 루프,
+품목×티어 파이썬 반복). 같은 규칙을 [품목 × KR_PRICE_FIELDS] 배열 한 번으로 돌리는 *_vec 판을 더한다.
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+*_vec 판은 스칼라 판과 **비트 단위로 같은 값**을 내야 한다(같은 IEEE 연산 순서, round()의
+짝수 반올림 = np.rint). 검증: `python -m looperget.reprice_check` — 경계값 + 무작위 속성 검사.
+입력 범위: 유한한 숫자. 스칼라 판이 예외를 내는 값(숫자 아닌 문자열 등)은 *_vec 판에서 0으로 본다.
+
+[V84] 매입단가 일괄 변경: read_buy_list(공급사 단가표 → {코드: 새 매입}) + buy_change_impact
+(품목 × 티어 유지가·지침가·Δ%p 표). 시트 기록은 app.py save_products_delta (바뀐 칸만 1회).
+
+주입 의존 없음(순수 계산 + numpy/pandas). bind() 불필요.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    "KR_PRICE_FIELDS", "KR_PRICE_LABELS",
+    "smart_roundup", "recalc_prices_from_buy",
+    "snap_band_price", "margin_pct", "recalc_keep_margin",
+    "price_matrix", "smart_roundup_vec", "snap_band_price_vec",
+    "recalc_prices_from_buy_vec", "recalc_keep_margin_vec", "reprice_keep_margin",
+    "read_buy_list", "buy_change_impact",
+]
+
+
+# ── 스칼라 원본 (app.py에서 이동) ─────────────────────────────────
+KR_PRICE_FIELDS = [
+    "price_buy", "price_d1", "price_d2",
+    "price_agy1", "price_agy2",
+    "price_nh_sys", "price_nh_loc",
+    "price_cons", "price_site", "price_supply_jp"
+]
+KR_PRICE_LABELS = {
+    "price_buy": "매입단가", "price_d1": "총판가1", "price_d2": "총판가2",
+    "price_agy1": "대리점가1", "price_agy2": "대리점가2",
+    "price_nh_sys": "계통농협", "price_nh_loc": "지역농협",
+    "price_cons": "소비자가", "price_site": "단가(현장)",
+    "price_supply_jp": "신정공급가"
+}
+
+def smart_roundup(value: float, apply_vat_fit: bool = True) -> float:
+    """
+    가격 규모별 올림 단위 + 부가세 역산(÷1.1) 정수 조건:
+      ~999원    → 0.1원 단위, ÷1.1이 소수점 없이 떨어지는 최소값으로 올림
+      1000~9999 → 10원 단위, ÷1.1 조건 적용 (11의 배수)
+      10000~    → 100원 단위, ÷1.1 조건 적용 (11의 배수 × 10)
+    apply_vat_fit=False 이면 단순 올림만 수행 (신정공급가 등에 사용)
+    """
+    v = float(value)
+
+    if v < 1000:
+        # 0.1원 단위 올림 후, v/1.1이 소수점 1자리 이하로 떨어지는 최솟값 탐색
+        # 조건: v * 10이 11의 배수 → v = 11k/10 (k는 양의 정수)
+        base = math.ceil(v * 10) / 10  # 0.1원 올림
+        if not apply_vat_fit:
+            return round(base, 1)
+        # v * 10 이 11의 배수가 되는 최소 k 탐색
+        k = math.ceil(v * 10 / 11)  # v*10 >= 11k → k = ceil(v*10/11)
+        result = round(k * 11 / 10, 1)
+        return result
+
+    elif v < 10000:
+        # 10원 단위 올림 후 11의 배수
+        if not apply_vat_fit:
+            return int(math.ceil(v / 10) * 10)
+        k = math.ceil(v / 11)
+        result = k * 11
+        # 10원 단위가 아니면 다음 11의 배수로
+        while result % 10 != 0:
+            k += 1
+            result = k * 11
+        return result
+
+    else:
+        # 100원 단위 올림 후 110의 배수 (11의 배수이면서 100원 단위)
+        if not apply_vat_fit:
+            return int(math.ceil(v / 100) * 100)
+        k = math.ceil(v / 110)
+        return k * 110
+
+def recalc_prices_from_buy(old_prod: dict, new_buy: int) -> dict:
+    """매입단가 변동 시 기존 비율 유지하며 전체 단가 재계산."""
+    old_buy = float(old_prod.get("price_buy", 0) or 0)
+    if old_buy == 0:
+        result = {f: int(old_prod.get(f, 0) or 0) for f in KR_PRICE_FIELDS}
+        result["price_buy"] = new_buy
+        return result
+    ratio = float(new_buy) / old_buy
+    result = {}
+    for f in KR_PRICE_FIELDS:
+        old_val = float(old_prod.get(f, 0) or 0)
+        if f == "price_buy":
+            result[f] = new_buy
+        elif old_val == 0:
+            result[f] = 0
+        elif f == "price_supply_jp":
+            # 신정공급가는 부가세 역산 조건 제외, 단순 올림만
+            result[f] = smart_roundup(old_val * ratio, apply_vat_fit=False)
+        else:
+            result[f] = smart_roundup(old_val * ratio, apply_vat_fit=True)
+    return result
+
+# ── [V39] 매입단가 변동 시뮬레이터 엔진 (박 대표님 승인 규칙, 2026-07-11) ──
+def snap_band_price(v) -> int:
+    """가격대별 단위 스냅(반올림). ~1천=10원 / 1천~1만=100원 / 1만~10만=100원 / 10만~=1,000원."""
+    try: v = float(v)
+    except (TypeError, ValueError): return 0
+    if v <= 0: return 0
+    unit = 10 if v < 1000 else (100 if v < 100000 else 1000)
+    return int(round(v / unit) * unit)
+
+def margin_pct(sell, buy):
+    """이익율% = (판매-매입)/판매. 기존 이익분석과 동일 기준(VAT포함가 대 VAT포함가)."""
+    try:
+        sell = float(sell or 0); buy = float(buy or 0)
+        if sell <= 0: return None
+        return (sell - buy) / sell * 100.0
+    except (TypeError, ValueError): return None
+
+def recalc_keep_margin(prod: dict, new_buy: int) -> dict:
+    """기존 이익율 유지 재계산 + 단위 스냅. 이익율 산출 불가(기존가 0 등)면 0 유지."""
+    old_buy = float(prod.get("price_buy", 0) or 0)
+    out = {"price_buy": int(new_buy)}
+    for f in KR_PRICE_FIELDS:
+        if f == "price_buy": continue
+        old_v = float(prod.get(f, 0) or 0)
+        if old_v <= 0: out[f] = 0; continue
+        m = margin_pct(old_v, old_buy)
+        if m is None or m >= 100: out[f] = int(old_v); continue
+        raw = new_buy / (1 - m / 100.0) if m < 100 else old_v
+        out[f] = snap_band_price(raw)
+    return out
+
+
+# ── [V83] 카탈로그 일괄판 — 행 = 품목, 열 = KR_PRICE_FIELDS ──────────
+_BUY = KR_PRICE_FIELDS.index("price_buy")
+_JP = KR_PRICE_FIELDS.index("price_supply_jp")
+
+
+def _num(x):
+    """스칼라 판의 float(x or 0) — 변환 불가면 0."""
+    try: return float(x or 0)
+    except (TypeError, ValueError): return 0.0
+
+
+def price_matrix(products, fields=KR_PRICE_FIELDS):
+    """products → float64 [품목 × fields] 단가 행렬 (빈칸·변환 불가 = 0)."""
+    products = list(products or [])
+    return np.array([[_num(p.get(f, 0)) for f in fields] for p in products],
+                    dtype=np.float64).reshape(len(products), len(fields))
+
+
+def _ceil_div10(k):
+    """정수값 배열 k → ceil(k/10) (정수 연산, 부동소수 나눗셈 없음)."""
+    return -np.floor_divide(-k, 10)
+
+
+def smart_roundup_vec(values, apply_vat_fit=True):
+    """smart_roundup 배열판. 반환 float64 (1000 이상 구간은 정수값 — 2**53 미만에서 정확)."""
+    v = np.asarray(values, dtype=np.float64)
+    out = np.empty_like(v)
+    lo, mid = v < 1000, (v >= 1000) & (v < 10000)
+    hi = ~(lo | mid)
+    if apply_vat_fit:
+        # round(k*11/10, 1) — k*11은 정수, /10은 그 소수 1자리 값에 가장 가까운 double → round는 항등
+        out[lo] = np.ceil(v[lo] * 10 / 11) * 11 / 10
+        # while result % 10 != 0: k += 1  ⇔  k를 10의 배수로 올림 → 110 × ceil(k/10)
+        out[mid] = _ceil_div10(np.ceil(v[mid] / 11)) * 110
+        out[hi] = np.ceil(v[hi] / 110) * 110
+    else:
+        out[lo] = np.ceil(v[lo] * 10) / 10
+        out[mid] = np.ceil(v[mid] / 10) * 10
+        out[hi] = np.ceil(v[hi] / 100) * 100
+    return out
+
+
+def snap_band_price_vec(values):
+    """snap_band_price 배열판 → int64. 0 이하 = 0, round()의 짝수 반올림 = np.rint."""
+    v = np.asarray(values, dtype=np.float64)
+    unit = np.where(v < 1000, 10.0, np.where(v < 100000, 100.0, 1000.0))
+    return np.where(v > 0, np.rint(v / unit) * unit, 0).astype(np.int64)
+
+
+def recalc_prices_from_buy_vec(prices, new_buy):
+    """recalc_prices_from_buy 배열판. prices = price_matrix() [n × KR_PRICE_FIELDS], new_buy = 길이 n.
+    반환 float64 같은 모양 (1000 미만 올림값은 소수 1자리 — 스칼라 판과 같은 값)."""
+    P = np.asarray(prices, dtype=np.float64)
+    nb = np.asarray(new_buy, dtype=np.float64).reshape(-1)
+    old_buy = P[:, _BUY]
+    zero_buy = old_buy == 0
+    ratio = nb / np.where(zero_buy, 1.0, old_buy)
+    scaled = P * ratio[:, None]
+    out = smart_roundup_vec(scaled, apply_vat_fit=True)
+    out[:, _JP] = smart_roundup_vec(scaled[:, _JP], apply_vat_fit=False)
+    out[P == 0] = 0
+    out[zero_buy] = np.trunc(P[zero_buy])         # 기존가 0원 매입 → int(기존가) 그대로
+    out[:, _BUY] = nb
+    return out
+
+
+def recalc_keep_margin_vec(prices, new_buy):
+    """recalc_keep_margin 배열판 → int64 [n × KR_PRICE_FIELDS] (price_buy 열 = int(new_buy))."""
+    P = np.asarray(prices, dtype=np.float64)
+    nb = np.asarray(new_buy, dtype=np.float64).reshape(-1)
+    old_buy = P[:, _BUY:_BUY + 1]
+    pos = P > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        m = (P - old_buy) / np.where(pos, P, 1.0) * 100.0   # margin_pct와 같은 연산 순서
+        raw = nb[:, None] / (1 - m / 100.0)
+    keep = pos & (m >= 100)
+    out = np.where(pos & ~keep, snap_band_price_vec(np.where(pos & ~keep, raw, 0)), 0)
+    out = np.where(keep, np.trunc(P), out).astype(np.int64)
+    out[:, _BUY] = np.trunc(nb).astype(np.int64)
+    return out
+
+
+def reprice_keep_margin(products, new_buy):
+    """품목 목록 × 새 매입단가 → int64 [n × KR_PRICE_FIELDS] 기존 이익율 유지가 (한 번의 배열 계산).
+    price_policy == "고정" 품목은 시뮬레이터와 같게 단가 유지·매입단가만 교체."""
+    products = list(products or [])
+    P = price_matrix(products)
+    nb = np.asarray(new_buy, dtype=np.float64).reshape(-1)
+    out = recalc_keep_margin_vec(P, nb)
+    fixed = np.array([str(p.get("price_policy", "")).strip() == "고정" for p in products], dtype=bool)
+    if fixed.any():
+        out[fixed] = np.trunc(P[fixed]).astype(np.int64)
+        out[fixed, _BUY] = np.trunc(nb[fixed]).astype(np.int64)
+    return out
+
+
+# ── [V84] 매입단가 일괄 변경 — 공급사 단가표(코드→새 매입단가) 영향 분석 ──
+_CODE_COLS = ("품목코드", "코드", "code")
+_BUY_COLS = ("새 매입단가", "매입단가", "new_buy", "price_buy")
+
+
+def read_buy_list(df):
+    """업로드 표 → ({코드 zfill(5): 새 매입단가 int}, 건너뛴 행 수).
+    코드 열 = 품목코드/코드/code, 단가 열 = 새 매입단가/매입단가/new_buy/price_buy (앞에 있는 것 우선).
+    같은 코드가 여러 번이면 마지막 행. 단가가 비었거나 0 이하면 건너뜀."""
+    c_col = next((c for c in _CODE_COLS if c in df.columns), None)
+    b_col = next((c for c in _BUY_COLS if c in df.columns), None)
+    if c_col is None or b_col is None:
+        raise ValueError(f"열 이름이 필요합니다 — 코드: {'/'.join(_CODE_COLS)}, 단가: {'/'.join(_BUY_COLS)}")
+    code = df[c_col].fillna("").astype(str).str.strip().str.replace(r"\.0$", "", regex=True).str.zfill(5)
+    buy = pd.to_numeric(df[b_col].astype(str).str.replace(",", "").str.strip(), errors="coerce")
+    ok = (code != "00000") & buy.notna() & (buy > 0)
+    return dict(zip(code[ok], buy[ok].round().astype(np.int64).tolist())), int((~ok).sum())
+
+
+def _margins(sell, buy):
+    """margin_pct 배열판 — 판매가 0 이하 칸은 NaN."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(sell > 0, (sell - buy) / np.where(sell > 0, sell, 1.0) * 100.0, np.nan)
+
+
+def buy_change_impact(products, new_buy, policy=None, segments=None):
+    """새 매입단가 {코드: 단가} → 품목별 영향 표 (DataFrame, 티어마다 유지가·지침가·Δ%p).
+        유지가  기존 이익율 유지 재계산 (reprice_keep_margin, 🔒고정 = 기존가 그대로)
+        지침가  PricePolicy {세그먼트: {티어라벨: 목표%}} 기준 snap (없거나 고정이면 빈칸)
+        Δ%p     단가를 그대로 두면 이익율이 몇 %p 변하는지 (새 매입 기준 − 기존)
+    segments = 품목별 세그먼트 라벨(app.py price_segment) — 지침 조회 키. '_i' 열 = products 위치."""
+    products = list(products or [])
+    pos = {}
+    for i, p in enumerate(products):
+        c = str(p.get("code", "")).strip()
+        if c: pos.setdefault(c.zfill(5), i)
+    hit = [(pos[c], b) for c, b in new_buy.items() if c in pos]
+    idx = [i for i, _ in hit]
+    sub = [products[i] for i in idx]
+    nb = np.array([b for _, b in hit], dtype=np.float64)
+    P = price_matrix(sub)
+    keep = reprice_keep_margin(sub, nb)
+    segs = [segments[i] for i in idx] if segments is not None else [""] * len(idx)
+    fixed = np.array([str(p.get("price_policy", "")).strip() == "고정" for p in sub], dtype=bool)
+    old_buy = P[:, _BUY]
+    out = {
+        "_i": idx,
+        "코드": [str(p.get("code", "")).strip().zfill(5) for p in sub],
+        "품목": [str(p.get("name", "")) for p in sub],
+        "규격": [str(p.get("spec", "")) for p in sub],
+        "세그먼트": segs,
+        "고정": fixed,
+        "기존 매입": old_buy.astype(np.int64),
+        "새 매입": nb.astype(np.int64),
+        "매입 변동%": np.round(np.where(old_buy > 0, (nb - old_buy) / np.where(old_buy > 0, old_buy, 1.0) * 100.0,
+                                      np.nan), 1),
+    }
+    for j, f in enumerate(KR_PRICE_FIELDS):
+        if f == "price_buy": continue
+        lb = KR_PRICE_LABELS[f]
+        g = np.array([(policy or {}).get(s, {}).get(lb, np.nan) for s in segs], dtype=np.float64)
+        g_ok = ~np.isnan(g) & (g < 100) & ~fixed
+        with np.errstate(divide="ignore", invalid="ignore"):
+            g_raw = np.where(g_ok, nb / (1 - np.where(g_ok, g, 0) / 100.0), 0)
+        out[f"{lb} 기존가"] = P[:, j].astype(np.int64)
+        out[f"{lb} 유지가"] = keep[:, j]
+        out[f"{lb} 지침가"] = pd.Series(snap_band_price_vec(g_raw), dtype="Int64").mask(~g_ok)
+        out[f"{lb} Δ%p"] = np.round(_margins(P[:, j], nb) - _margins(P[:, j], old_buy), 1)
+    return pd.DataFrame(out)
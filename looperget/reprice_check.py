@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — 단가 재계산 엔진 속성 검사 (배포 앱은 import하지 않는 점검 스크립트)
+
+[V83] *_vec 판이 스칼라 판과 비트 단위로 같은 값을 내는지 경계값 + 무작위 값으로 대조한다.
+실행: `python -m looperget.reprice_check` (리포 루트에서). 불일치가 있으면 AssertionError.
+"""
+import numpy as np
+
+from looperget.reprice import (
+    KR_PRICE_FIELDS, _BUY, recalc_keep_margin, recalc_keep_margin_vec, recalc_prices_from_buy,
+    recalc_prices_from_buy_vec, smart_roundup, smart_roundup_vec, snap_band_price, snap_band_price_vec,
+)
+
+
+def _same(a, b):
+    """스칼라 결과와 배열 원소가 같은 float64 비트인지."""
+    return np.float64(a).tobytes() == np.float64(b).tobytes()
+
+
+def _selfcheck(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    edges = np.array([0.0, 0.05, 0.1, 0.95, 1.0, 11.0, 99.9, 110.0, 999.0, 999.9, 999.95, 999.99,
+                      1000.0, 1000.01, 1099.0, 1100.0, 9999.0, 9999.99, 10000.0, 10000.5,
+                      99999.0, 99999.5, 100000.0, 100500.0, 105.0, 115.0, 1050.0, 1150.0, 2500.0])
+    mags = 10.0 ** rng.uniform(-1, 7, n)
+    vals = np.concatenate([edges, mags, np.round(mags), np.round(mags, 1)])
+    for fit in (True, False):
+        got = smart_roundup_vec(vals, fit)
+        bad = [v for v, g in zip(vals.tolist(), got.tolist()) if not _same(smart_roundup(v, fit), g)]
+        assert not bad, f"smart_roundup(apply_vat_fit={fit}) 불일치: {bad[:5]}"
+    got = snap_band_price_vec(np.concatenate([vals, -vals]))
+    for v, g in zip(np.concatenate([vals, -vals]).tolist(), got.tolist()):
+        assert snap_band_price(v) == g, f"snap_band_price({v!r}) {snap_band_price(v)} != {g}"
+
+    # 카탈로그: 0원 칸·0원 매입·역마진·정수/소수 단가 섞어서
+    P = np.round(10.0 ** rng.uniform(1, 6, (n // 4, len(KR_PRICE_FIELDS))))
+    P[rng.random(P.shape) < 0.1] = 0
+    P[rng.random(P.shape) < 0.1] += 0.5
+    P[rng.random(len(P)) < 0.1, _BUY] = 0
+    nb = np.round(P[:, _BUY] * rng.uniform(0.5, 2.0, len(P)))
+    nb[rng.random(len(P)) < 0.05] = 0
+    products = [dict(zip(KR_PRICE_FIELDS, row)) for row in P.tolist()]
+    R1, R2 = recalc_prices_from_buy_vec(P, nb), recalc_keep_margin_vec(P, nb)
+    for i, p in enumerate(products):
+        b = int(nb[i])
+        r1, r2 = recalc_prices_from_buy(p, b), recalc_keep_margin(p, b)
+        for j, f in enumerate(KR_PRICE_FIELDS):
+            assert _same(r1[f], R1[i, j]), f"recalc_prices_from_buy {p} {b} {f}: {r1[f]!r} != {R1[i, j]!r}"
+            assert r2[f] == R2[i, j], f"recalc_keep_margin {p} {b} {f}: {r2[f]!r} != {R2[i, j]!r}"
+    return len(vals), len(products)
+
+
+if __name__ == "__main__":
+    nv, np_ = _selfcheck()
+    print(f"OK — 값 {nv:,}개 × 2모드, 카탈로그 {np_:,}품목 × {len(KR_PRICE_FIELDS)}필드 일치")
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — 리비전 캐시 (작은 LRU)
+
+[V95, 2026-10-19] bom·jp_analytics·jp_catalog·margin_stats·price_policy·quote_pricing·quote_reprice·
+set_pricing·quote_warehouse가 "OrderedDict + 리비전 키 + 최대 N개" 캐시를 저마다 복사해 두고 있었다.
+→ 조회·등록(·제거) 함수로 모은다. 저장소(OrderedDict)와 키(내용 해시 리비전 등)는 각 모듈이 그대로 갖는다.
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+세션(스레드)끼리 같은 저장소를 쓰므로 조회·등록·제거는 모듈 lock 안에서 한다. build()는 lock 밖에서
+(오래 걸리고, 안에서 다른 리비전 캐시를 부를 수 있다) — 두 세션이 같은 키를 동시에 만들면 나중 것이 남는다.
+
+주입 의존 없음(표준 라이브러리만). bind() 불필요.
+"""
+import threading
+
+__all__ = ["rev_cache", "rev_put", "rev_pop"]
+
+_LOCK = threading.Lock()
+
+
+def rev_put(store, key, value, maxsize):
+    """store[key] = value (가장 최근으로) — maxsize를 넘으면 가장 오래된 것부터 버린다."""
+    with _LOCK:
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > maxsize:
+            store.popitem(last=False)
+    return value
+
+
+def rev_pop(store, key):
+    """store에서 key를 빼서 돌려준다(없으면 None) — 증분 갱신 후 새 리비전으로 rev_put할 때."""
+    with _LOCK:
+        return store.pop(key, None)
+
+
+def rev_cache(store, key, build, maxsize):
+    """store에 key가 있으면 그 값(가장 최근으로 올림), 없으면 build()로 만들어 rev_put.
+    값이 None이면 없는 것으로 본다(다음 조회 때 다시 만든다)."""
+    with _LOCK:
+        hit = store.get(key)
+        if hit is not None:
+            store.move_to_end(key)
+            return hit
+    return rev_put(store, key, build(), maxsize)
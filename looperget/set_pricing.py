@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""루퍼젯 프로 매니저 — 세트 단가 롤업 (레시피 행렬 × 제품 단가 열) + 역색인 증분 갱신
+
+[V90, 2026-10-19] Sets 시트의 세트 소비자가(price_consumer)는 손으로 관리한다 —
+부품 단가를 고쳐도 세트가는 조용히 낡고, 맞춰 보려면 레시피를 하나씩 제품 목록과 대조해야 했다.
+→ 카탈로그 리비전당 한 번만 [세트 × 티어] 롤업 = 레시피 희소 행렬(bom.py의 CSR) × [제품 × 티어] 단가 행렬.
+   제품 → 세트 역색인을 같이 만들어, 제품 N개 단가 저장은 그 제품이 들어간 세트 행만 다시 더한다
+   (set_rollup_apply — margin_stats.tier_margin_stats_apply와 같은 호출 방식).
+⚠ 배포 단위 = app.py + aquanaris_layout.py + looperget/ 폴더 (셋은 항상 세트).
+
+부품 키 → 제품: BomEngine.product()와 같은 순서(코드 그대로 → zfill 5 → 품목명, 같은 키면 첫 제품).
+카탈로그에 없는 부품은 0원으로 더하고 '누락 부품'으로 센다(드리프트 판정 대상에서 빠짐).
+세트가 = Σ 레시피 수량 × 부품 단가 (올림·VAT 보정 없음 — 등록가와 비교용 원가 합계).
+
+주입 의존 없음(순수 계산 + numpy/pandas). bind() 불필요.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from looperget.bom import bom_engine
+from looperget.reprice import KR_PRICE_FIELDS, KR_PRICE_LABELS, price_matrix
+from looperget.rev_cache import rev_cache, rev_pop, rev_put
+
+__all__ = ["SetRollup", "set_rollup", "set_rollup_apply", "set_price_drift"]
+
+_CONS = KR_PRICE_FIELDS.index("price_cons")
+
+
+def _num(v):
+    try:
+        return float(str(v).replace(",", "").strip()) if v not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class SetRollup:
+    """[세트 × KR_PRICE_FIELDS] 롤업 + 제품 행 → 세트 행 역색인. set_rollup()이 리비전별로 캐시."""
+
+    def __init__(self, products, sets):
+        products = list(products or [])
+        eng = bom_engine(products, sets)
+        self.names = list(eng.set_index)
+        self.category = {}
+        for cat, val in (sets or {}).items():
+            for s_name in (val or {}):
+                self.category[s_name] = cat          # 같은 이름이면 뒤 카테고리 (BomEngine 평탄화 규칙)
+        # 부품 키 → 제품 행 번호 (BomEngine.product 규칙, 없으면 -1)
+        by_code, by_code5, by_name = {}, {}, {}
+        for i, p in enumerate(products):
+            c = str(p.get("code", "")).strip()
+            if c:
+                by_code.setdefault(c, i); by_code5.setdefault(c.zfill(5), i)
+            if p.get("name"):
+                by_name.setdefault(p.get("name"), i)
+
+        def _row(k):
+            k = str(k or "").strip()
+            for idx, kk in ((by_code, k), (by_code5, k.zfill(5)), (by_name, k)):
+                if kk in idx: return idx[kk]
+            return -1
+        part_row = np.array([_row(k) for k in eng.part_keys], dtype=np.int64)
+
+        self.indptr = eng.indptr
+        self.qty = eng.data.astype(np.float64)
+        self.nnz_set = np.repeat(np.arange(len(self.names), dtype=np.int64), np.diff(self.indptr))
+        self.nnz_prod = part_row[eng.indices] if len(eng.indices) else np.zeros(0, dtype=np.int64)
+        self.missing = np.bincount(self.nnz_set[self.nnz_prod < 0], minlength=len(self.names))
+        self.prices = price_matrix(products)
+        # 역색인: 제품 행 → 그 제품을 쓰는 세트 행들
+        hit = self.nnz_prod >= 0
+        order = np.argsort(self.nnz_prod[hit], kind="stable")
+        prod_sorted, set_sorted = self.nnz_prod[hit][order], self.nnz_set[hit][order]
+        cut = np.flatnonzero(np.diff(prod_sorted)) + 1
+        self.reverse = {int(g[0]): np.unique(s) for g, s in zip(np.split(prod_sorted, cut), np.split(set_sorted, cut))
+                        if len(g)}
+        self.totals = np.zeros((len(self.names), len(KR_PRICE_FIELDS)), dtype=np.float64)
+        self._accumulate(np.arange(len(self.qty)))
+
+    def _accumulate(self, nnz):
+        ok = nnz[self.nnz_prod[nnz] >= 0]
+        np.add.at(self.totals, self.nnz_set[ok], self.qty[ok, None] * self.prices[self.nnz_prod[ok]])
+
+    # ── 조회 ──────────────────────────────────────────────────────
+    def table(self, fields=KR_PRICE_FIELDS):
+        """세트별 롤업 표 — 분류·세트명·부품수·누락 부품 + 티어 라벨 열(원, 정수)."""
+        out = pd.DataFrame({
+            "분류": [self.category.get(n, "") for n in self.names],
+            "세트명": self.names,
+            "부품수": np.diff(self.indptr),
+            "누락 부품": self.missing,
+        })
+        for f in fields:
+            out[KR_PRICE_LABELS[f]] = np.rint(self.totals[:, KR_PRICE_FIELDS.index(f)]).astype(np.int64)
+        return out
+
+    def consumer(self):
+        """{세트명: 계산 소비자가(원)}."""
+        return dict(zip(self.names, np.rint(self.totals[:, _CONS]).astype(np.int64).tolist()))
+
+    # ── 증분 갱신 ────────────────────────────────────────────────
+    def update(self, products, rows):
+        """products[rows] 단가가 바뀜 — 그 제품 단가 행만 다시 읽고, 역색인의 세트 행만 다시 더한다.
+        반환 = 다시 계산한 세트명 목록."""
+        rows = [r for r in rows if 0 <= r < len(self.prices)]
+        if not rows:
+            return []
+        self.prices[rows] = price_matrix([products[r] for r in rows])
+        touched = [self.reverse[r] for r in rows if r in self.reverse]
+        if not touched:
+            return []
+        sets = np.unique(np.concatenate(touched))
+        self.totals[sets] = 0
+        nnz = np.concatenate([np.arange(self.indptr[s], self.indptr[s + 1]) for s in sets.tolist()])
+        self._accumulate(nnz)
+        return [self.names[s] for s in sets.tolist()]
+
+
+# ── 카탈로그 리비전별 캐시 (looperget.rev_cache) ─────────────────────
+_ROLLUPS = OrderedDict()
+_ROLLUPS_MAX = 4
+
+
+def _rollup_rev(products, sets):
+    return hash((repr(sets), tuple((p.get("code"), p.get("name")) + tuple(p.get(f) for f in KR_PRICE_FIELDS)
+                                   for p in (products or []))))
+
+
+def set_rollup(products, sets):
+    """(products, sets) → SetRollup. 같은 리비전이면 이미 만든 롤업을 돌려준다."""
+    return rev_cache(_ROLLUPS, _rollup_rev(products, sets), lambda: SetRollup(products, sets), _ROLLUPS_MAX)
+
+
+def set_rollup_apply(changes, products, sets):
+    """품목 단가 저장 직후 호출 — changes = [(변경 전 품목 사본, 변경 후 품목)] (tier_margin_stats_apply와 같은 형태).
+    변경 전 리비전의 롤업을 역색인으로 증분 갱신해 변경 후 리비전으로 다시 등록한다.
+    반환 = 다시 계산한 세트명 목록. 변경 전 롤업이 캐시에 없으면 None (다음 조회 때 새로 만든다)."""
+    if not changes: return None
+    new_rev = _rollup_rev(products, sets)
+    if new_rev in _ROLLUPS: return None
+    old_of = {id(new): old for old, new in changes}
+    before = [old_of.get(id(p), p) for p in products]
+    roll = rev_pop(_ROLLUPS, _rollup_rev(before, sets))
+    if roll is None: return None
+    pos = {id(p): i for i, p in enumerate(products)}
+    names = roll.update(products, [pos[id(new)] for _, new in changes if id(new) in pos])
+    rev_put(_ROLLUPS, new_rev, roll, _ROLLUPS_MAX)
+    return names
+
+
+def set_price_drift(roll, sets, tol_pct=1.0):
+    """등록 소비자가(Sets '소비자가') vs 롤업 소비자가 — 세트별 점검표.
+    상태: ✅ 일치 / ⚠️ 드리프트(|차이%| > tol_pct) / ➖ 미등록(등록가 없음) / ❓ 부품 누락(레시피 부품이 카탈로그에 없음)."""
+    flat = {}
+    for _cat, val in (sets or {}).items():
+        flat.update(val or {})
+    out = roll.table(fields=("price_cons",)).rename(columns={"소비자가": "계산 소비자가"})
+    reg = pd.Series([_num((flat.get(n) or {}).get("price_consumer")) for n in roll.names], dtype=np.float64)
+    out.insert(4, "등록 소비자가", reg.round().astype("Int64"))
+    diff = reg - out["계산 소비자가"]
+    out["차이"] = diff.round().astype("Int64")
+    out["차이%"] = np.round(diff / out["계산 소비자가"].where(out["계산 소비자가"] > 0) * 100, 1)
+    gap = out["차이%"].abs().to_numpy(dtype=np.float64)
+    gap = np.where(out["계산 소비자가"] > 0, gap, np.where(diff.abs() < 0.5, 0.0, np.inf))   # 계산가 0원
+    status = np.where(out["누락 부품"] > 0, "❓ 부품 누락",
+                      np.where(reg.isna(), "➖ 미등록", np.where(gap > tol_pct, "⚠️ 드리프트", "✅ 일치")))
+    out["상태"] = status
+    return out
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""app.py가 쓰는 이름이 모두 정의돼 있는지 — 분리 모듈은 app.py와 같은 `from X import *`로 풀어서 본다.
+(모듈 __all__에 빠진 이름을 app.py가 쓰면 해당 화면에서만 NameError가 나서 놓치기 쉽다.)"""
+import ast
+import builtins
+import importlib
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _tree():
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as f:
+        return ast.parse(f.read(), "app.py")
+
+
+def _star_names(tree):
+    out = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and any(a.name == "*" for a in node.names):
+            mod = importlib.import_module(node.module)
+            out.update(getattr(mod, "__all__", None) or [n for n in vars(mod) if not n.startswith("_")])
+    return out
+
+
+def _bound_names(tree):
+    out = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            out.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            out.add(node.name)
+        elif isinstance(node, ast.arg):
+            out.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            out.update((a.asname or a.name).split(".")[0] for a in node.names if a.name != "*")
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            out.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            out.update(node.names)
+    return out
+
+
+def test_app_names_resolve_through_star_imports():
+    tree = _tree()
+    used = {n.id for n in ast.walk(tree) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)}
+    known = _bound_names(tree) | _star_names(tree) | set(dir(builtins)) | {"__file__", "__name__"}
+    assert not sorted(used - known)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""견적서 PDF — 배치 단계에서 미리 센 전체 쪽 수(꼬리말 'Page n / N')가 실제 출력 쪽 수와 같은지."""
+import os
+import re
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from looperget import quote_docs  # noqa: E402
+
+
+@pytest.fixture()
+def footers(monkeypatch):
+    quote_docs.bind(FONT_REGULAR=os.path.join(ROOT, "NanumGothic-Regular.ttf"),
+                    FONT_BOLD=os.path.join(ROOT, "NanumGothic-Bold.ttf"),
+                    get_drive_file_map_deep=lambda: {},
+                    get_best_image_id=lambda *a: None,
+                    download_image_by_id=lambda *a: None)
+    seen = []
+    footer = quote_docs.PDF.footer
+
+    def spy(self):
+        seen.append((self.page_no(), getattr(self, "pages_total", 0)))
+        footer(self)
+    monkeypatch.setattr(quote_docs.PDF, "footer", spy)
+    return seen
+
+
+def _items(n):
+    return [{"품목": f"테스트 품목 {i} " + "긴 이름 " * (i % 4), "규격": "25mm", "코드": f"{i:05d}",
+             "단위": "EA", "수량": 2, "price_1": 1000, "price_2": 1500} for i in range(n)]
+
+
+def _pages(pdf_bytes):
+    return len(re.findall(rb"/Type\s*/Page(?!s)", pdf_bytes))
+
+
+@pytest.mark.parametrize("n, services, remarks, form", [
+    (40, [], "", "basic"),
+    (33, [{"항목": "설치비", "금액": 50000}] * 6, "특약 사항", "basic"),
+    (60, [{"항목": "운반비", "금액": 30000}], "비고", "profit"),
+])
+def test_page_total_matches_output(footers, n, services, remarks, form):
+    out = quote_docs.create_advanced_pdf(_items(n), services, "테스트", "2026-10-19", form,
+                                         ["소비자가", "대리점가"], {}, remarks)
+    pages = _pages(out)
+    assert pages > 1
+    assert [p for p, _ in footers] == list(range(1, pages + 1))
+    assert {t for _, t in footers} == {pages}